@@ -413,15 +413,24 @@ class InvoiceItemInline(admin.TabularInline):
     can_delete = False
 
 
+class InvoicePaymentInline(admin.TabularInline):
+    """Inline für Zahlungseingänge aus Bankauszügen."""
+    model = models.InvoicePayment
+    extra = 0
+    fields = ("booking_date", "amount", "reference", "debtor_name", "transaction_id", "imported_by")
+    readonly_fields = fields
+    can_delete = False
+
+
 @admin.register(models.Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     """Admin für Rechnungen."""
     list_display = ("invoice_number", "client", "invoice_date", "due_date", "amount", "payment_status", "created_at")
     list_filter = ("payment_status", "invoice_date", "due_date")
-    search_fields = ("invoice_number", "client__name")
+    search_fields = ("invoice_number", "payment_reference", "client__name")
     autocomplete_fields = ("client", "created_by")
-    readonly_fields = ("invoice_number", "created_at", "updated_at", "remaining_amount")
-    inlines = [InvoiceItemInline]
+    readonly_fields = ("invoice_number", "payment_reference", "created_at", "updated_at", "remaining_amount")
+    inlines = [InvoiceItemInline, InvoicePaymentInline]
     fieldsets = (
         (
             "Grunddaten",
@@ -446,7 +455,7 @@ class InvoiceAdmin(admin.ModelAdmin):
         (
             "Zahlungsstatus",
             {
-                "fields": ("payment_status", "payment_date"),
+                "fields": ("payment_status", "payment_date", "payment_reference"),
             },
         ),
         (
@@ -471,3 +480,14 @@ class InvoiceAdmin(admin.ModelAdmin):
         return None
     remaining_amount.short_description = "Offener Betrag"
 
+
+
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "run_at", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = (
+        "attempts", "progress_done", "progress_total", "progress_message", "result", "last_error",
+        "worker", "created_by", "created_at", "started_at", "heartbeat_at", "finished_at",
+    )
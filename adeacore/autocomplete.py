@@ -0,0 +1,280 @@
+"""
+Autocomplete für Auswahlfelder (Mandanten, Mitarbeitende) mit Tippfehler-Toleranz.
+
+Statt eines `<select>` mit allen Mandanten/Mitarbeitenden rendert `AutocompleteWidget`
+nur den gewählten Eintrag; Vorschläge holt der Browser beim Tippen von
+`/autocomplete/<name>/?q=…` (die besten `limit` Treffer).
+
+- Lookups: die Apps melden sie mit `register_lookup(...)` an (in ihren `signals.py`):
+  Queryset pro Request (Berechtigungen, Mandant), durchsuchte Felder, Label.
+- PostgreSQL: `pg_trgm` – Kandidaten per `ILIKE` oder `<%` (word_similarity), beide
+  über die GIN-Trigramm-Indizes (Migration 0045), sortiert nach word_similarity.
+- Sonst (SQLite): prozesslokaler Trigramm-Index in Python, pro Queryset gebaut und
+  über die Tabellen-Versionen aus `adeacore.http_cache` invalidiert.
+
+Teilstrings werden immer gefunden (wie bisher `icontains`); dazu kommen ähnliche
+Schreibweisen ("Mülller", "Mueler" -> "Müller").
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django import forms
+from django.db import connection, transaction
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_QUERY_LENGTH = 100
+# Mindestanteil der Trigramme der Eingabe, die im Treffer vorkommen (pg_trgm: word_similarity)
+MIN_SIMILARITY = 0.5
+MAX_INDEXES = 32
+
+
+@dataclass(frozen=True)
+class AutocompleteLookup:
+    """
+    Eine Auswahlliste.
+
+    `queryset(request)` liefert die erlaubten Objekte, `fields` die durchsuchten
+    (Klartext-)Felder, `label(values)` den Anzeigetext aus den Feldwerten.
+    `cache_models` sind die Tabellen, deren Änderungen den Python-Index verwerfen.
+    """
+
+    name: str
+    queryset: Callable[[Any], Any]
+    fields: Tuple[str, ...]
+    label: Callable[[Dict[str, Any]], str]
+    cache_models: Tuple = ()
+
+
+_LOOKUPS: Dict[str, AutocompleteLookup] = {}
+
+
+def register_lookup(name: str, *, queryset, fields: Sequence[str], label=None, cache_models=None) -> AutocompleteLookup:
+    """Meldet eine Auswahlliste an (beim App-Start)."""
+    fields = tuple(fields)
+    lookup = AutocompleteLookup(
+        name=name,
+        queryset=queryset,
+        fields=fields,
+        label=label or (lambda values: " ".join(str(values[field]) for field in fields if values[field])),
+        cache_models=tuple(cache_models or ()),
+    )
+    _LOOKUPS[name] = lookup
+    return lookup
+
+
+def get_lookup(name: str) -> Optional[AutocompleteLookup]:
+    return _LOOKUPS.get(name)
+
+
+# ---------------------------------------------------------------------------
+# Python-Trigramm-Index (SQLite u.a.)
+# ---------------------------------------------------------------------------
+
+def normalize(text: str) -> str:
+    """Kleinschreibung, ohne Akzente/Umlaut-Punkte, nur Buchstaben und Ziffern."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join("".join(char if char.isalnum() else " " for char in stripped.casefold()).split())
+
+
+def trigrams(text: str) -> set:
+    """Trigramme pro Wort wie pg_trgm (zwei Leerzeichen vorne, eines hinten)."""
+    result = set()
+    for word in text.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class NgramIndex:
+    """Trigramm-Index über (pk, Label, Suchtext)-Zeilen; `match` ohne Datenbank."""
+
+    def __init__(self, rows: Sequence[Tuple[Any, str, str]]):
+        self.entries: List[Tuple[Any, str, str]] = []
+        self.postings: Dict[str, List[int]] = {}
+        for pk, label, text in rows:
+            position = len(self.entries)
+            normalized = normalize(text)
+            self.entries.append((pk, label, normalized))
+            for trigram in trigrams(normalized):
+                self.postings.setdefault(trigram, []).append(position)
+
+    def match(self, query: str, limit: Optional[int]) -> List[Tuple[Any, str]]:
+        query = normalize(query)
+        if not query:
+            return []
+        query_trigrams = trigrams(query)
+        hits = Counter()
+        for trigram in query_trigrams:
+            hits.update(self.postings.get(trigram, ()))
+
+        scored = []
+        for position, count in hits.items():
+            pk, label, text = self.entries[position]
+            if text.startswith(query) or f" {query}" in text:
+                score = 3.0  # Wortanfang
+            elif query in text:
+                score = 2.0  # Teilstring (wie icontains)
+            else:
+                score = count / len(query_trigrams)
+                if score < MIN_SIMILARITY:
+                    continue
+            scored.append((-score, label.casefold(), position))
+        scored.sort()
+        if limit is not None:
+            scored = scored[:limit]
+        return [self.entries[position][:2] for _, _, position in scored]
+
+
+_INDEXES: "OrderedDict[Tuple, Tuple[str, NgramIndex]]" = OrderedDict()
+_INDEXES_LOCK = Lock()
+
+
+def _python_index(lookup: AutocompleteLookup, queryset) -> NgramIndex:
+    from adeacore.cache_stats import record_hit, record_miss
+    from adeacore.http_cache import get_table_versions
+
+    sql, params = queryset.query.sql_with_params()
+    key = (lookup.name, sql, tuple(map(str, params)))
+    token, _ = get_table_versions(lookup.cache_models or (queryset.model,))
+    with _INDEXES_LOCK:
+        cached = _INDEXES.get(key)
+        if cached is not None and cached[0] == token:
+            _INDEXES.move_to_end(key)
+            record_hit("autocomplete")
+            return cached[1]
+
+    record_miss("autocomplete")
+    rows = []
+    for values in queryset.values("pk", *lookup.fields):
+        text = " ".join(str(values[field]) for field in lookup.fields if values[field])
+        rows.append((values["pk"], lookup.label(values), text))
+    index = NgramIndex(rows)
+    with _INDEXES_LOCK:
+        _INDEXES[key] = (token, index)
+        _INDEXES.move_to_end(key)
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
+
+
+def clear_indexes() -> None:
+    with _INDEXES_LOCK:
+        _INDEXES.clear()
+
+
+# ---------------------------------------------------------------------------
+# PostgreSQL (pg_trgm)
+# ---------------------------------------------------------------------------
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _match_postgresql(lookup: AutocompleteLookup, queryset, query: str, limit: Optional[int]) -> List[Tuple[Any, str]]:
+    from django.db.models import BooleanField, FloatField
+    from django.db.models.expressions import RawSQL
+
+    meta = queryset.model._meta
+    quote = connection.ops.quote_name
+    columns = [f"{quote(meta.db_table)}.{quote(meta.get_field(field).column)}" for field in lookup.fields]
+    words = query.split()[:5]
+
+    # Jedes Wort muss in einem Feld vorkommen oder ähnlich sein; `col ILIKE` und
+    # `wort <% col` nutzen die GIN-Trigramm-Indizes
+    condition = " AND ".join(
+        "({})".format(" OR ".join(f"{column} ILIKE %s OR %s <%% {column}" for column in columns))
+        for _ in words
+    )
+    condition_params = [value for word in words for _ in columns for value in (f"%{_escape_like(word)}%", word)]
+    score = " + ".join(
+        "GREATEST({})".format(", ".join(f"word_similarity(%s, coalesce({column}, ''))" for column in columns))
+        for _ in words
+    )
+    score_params = [word for word in words for _ in columns]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Schwelle für `<%` nur in dieser Transaktion
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(MIN_SIMILARITY)])
+        rows = (
+            queryset.alias(candidate=RawSQL(f"({condition})", condition_params, output_field=BooleanField()))
+            .filter(candidate=True)
+            .annotate(similarity=RawSQL(f"({score})", score_params, output_field=FloatField()))
+            .order_by("-similarity", *lookup.fields)
+            .values("pk", *lookup.fields)
+        )
+        if limit is not None:
+            rows = rows[:limit]
+        return [(values["pk"], lookup.label(values)) for values in rows]
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def match(lookup: AutocompleteLookup, request, query: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[Tuple[Any, str]]:
+    """(pk, Label) der besten Treffer für die Eingabe, bestes zuerst; `limit=None` = alle."""
+    query = " ".join((query or "").split())[:MAX_QUERY_LENGTH]
+    if not query:
+        return []
+    queryset = lookup.queryset(request)
+    if connection.vendor == "postgresql":
+        return _match_postgresql(lookup, queryset, query, limit)
+    return _python_index(lookup, queryset).match(query, limit)
+
+
+def match_ids(name: str, request, query: str) -> List[Any]:
+    """pks aller Treffer (z.B. als Listen-Filter statt `icontains`)."""
+    return [pk for pk, _ in match(_LOOKUPS[name], request, query, limit=None)]
+
+
+class AutocompleteWidget(forms.Widget):
+    """
+    Ersetzt das `<select>` eines ModelChoiceField: verstecktes Feld mit der pk (gleiche
+    id wie bisher, bestehendes JS liest weiter `.value` und hört auf `change`) plus
+    Texteingabe mit Vorschlägen. Gerendert wird nur der gewählte Eintrag (eine Query).
+
+    Die Seite bindet einmal `adeacore/autocomplete_script.html` ein.
+    """
+
+    template_name = "adeacore/widgets/autocomplete.html"
+
+    def __init__(self, lookup: str, attrs=None, placeholder: str = "Tippen zum Suchen…"):
+        super().__init__(attrs)
+        self.lookup = lookup
+        self.placeholder = placeholder
+        self.choices = []
+
+    def id_for_label(self, id_):
+        return f"{id_}_search" if id_ else id_
+
+    def _selected_label(self, value) -> str:
+        queryset = getattr(self.choices, "queryset", None)
+        if value in (None, "") or queryset is None:
+            return ""
+        try:
+            obj = queryset.filter(pk=value).first()
+        except (TypeError, ValueError):
+            return ""
+        if obj is None:
+            return ""
+        return self.choices.field.label_from_instance(obj)
+
+    def get_context(self, name, value, attrs):
+        from django.urls import reverse
+
+        context = super().get_context(name, value, attrs)
+        context["widget"].update({
+            "url": reverse("autocomplete", args=[self.lookup]),
+            "label": self._selected_label(value),
+            "placeholder": self.placeholder,
+        })
+        return context
@@ -7,8 +7,14 @@ DSGVO/DSG 2023 konform - Art. 32 (Verfügbarkeit)
 import os
 import shutil
 import json
+import sqlite3
+import subprocess
+import tempfile
+import time
+import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
+from django.apps import apps
 from django.conf import settings
 from django.core.management import call_command
 from django.db import connection
@@ -17,33 +23,123 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class BackupError(Exception):
+    """Backup, Wiederherstellung oder Prüfung nicht möglich (z.B. pg_dump fehlt)."""
+
+
+class BackupTimeBudgetExceeded(BackupError):
+    """Das Backup hat das vorgegebene Zeitbudget überschritten."""
+
+
+def lower_io_priority() -> list:
+    """
+    Senkt CPU- und I/O-Priorität des aktuellen Prozesses.
+
+    Nur für Batch-Prozesse (Cronjob/Management-Command) gedacht – im
+    Web-Prozess nicht aufrufen, da sich die Priorität nicht zurücksetzen lässt.
+
+    Returns:
+        Liste der angewendeten Massnahmen (für Logging/Ausgabe)
+    """
+    applied = []
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+            applied.append('nice=10')
+        except OSError:
+            pass
+
+    ionice = shutil.which('ionice')
+    if ionice:
+        # Klasse 3 = idle: I/O nur, wenn sonst niemand auf die Platte zugreift
+        result = subprocess.run(
+            [ionice, '-c', '3', '-p', str(os.getpid())],
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            applied.append('ionice=idle')
+
+    return applied
+
+
+def _pg_command(binary: str, db: dict, dbname: str = None) -> tuple:
+    """
+    Kommandozeile und Umgebung für pg_dump/pg_restore mit den Verbindungsdaten aus db.
+
+    Raises:
+        BackupError: Programm nicht installiert
+    """
+    executable = shutil.which(binary)
+    if not executable:
+        raise BackupError(f"{binary} nicht gefunden – PostgreSQL-Client-Programme installieren")
+    cmd = [executable, '--dbname', dbname or db['NAME']]
+    if db.get('HOST'):
+        cmd += ['--host', str(db['HOST'])]
+    if db.get('PORT'):
+        cmd += ['--port', str(db['PORT'])]
+    if db.get('USER'):
+        cmd += ['--username', str(db['USER'])]
+    env = dict(os.environ)
+    if db.get('PASSWORD'):
+        env['PGPASSWORD'] = str(db['PASSWORD'])
+    return cmd, env
+
+
+def _run_pg(cmd: list, env: dict, timeout=None) -> None:
+    """Führt pg_dump/pg_restore aus; Fehler mit stderr als BackupError."""
+    try:
+        subprocess.run(cmd, env=env, check=True, capture_output=True, text=True, timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        message = (e.stderr or '').strip().splitlines()
+        raise BackupError(f"{Path(cmd[0]).name} fehlgeschlagen: {message[-1] if message else e.returncode}") from None
+
+
+def _dir_size(path: Path) -> int:
+    """Summe der Dateigrössen unterhalb von path (Bytes)."""
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
 class BackupManager:
     """
     Verwaltet automatische Backups der Datenbank und wichtiger Dateien.
     
     Strategie:
-    - Täglich automatisch (23:00 Uhr)
+    - Täglich automatisch (23:00 Uhr) nach settings.BACKUP_DIR
     - Vor kritischen Operationen (manuell)
     - Aufbewahrung: 30 Tage
     """
     
-    def __init__(self):
+    # SQLite-Backup in Schritten zu N Seiten; dazwischen kurze Pause,
+    # damit laufende Requests nicht blockiert werden.
+    SQLITE_PAGES_PER_STEP = 256
+    SQLITE_STEP_SLEEP = 0.005
+
+    def __init__(self, backup_dir: Path = None):
         """Initialisiert den Backup Manager."""
-        self.backup_dir = Path(settings.BASE_DIR) / 'backups'
-        self.backup_dir.mkdir(exist_ok=True)
+        self.backup_dir = Path(backup_dir) if backup_dir else Path(settings.BACKUP_DIR)
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
         self.retention_days = 30
     
-    def create_backup(self, backup_type: str = 'auto', description: str = '') -> Path:
+    def create_backup(self, backup_type: str = 'auto', description: str = '',
+                      time_budget: float = None) -> Path:
         """
         Erstellt ein Backup.
         
         Args:
             backup_type: Typ des Backups ('auto', 'manual', 'before_migration')
             description: Beschreibung des Backups
+            time_budget: Maximale Laufzeit in Sekunden (None = unbegrenzt).
+                Bei Überschreitung wird das Backup abgebrochen und verworfen.
             
         Returns:
             Pfad zum Backup-Verzeichnis
+
+        Raises:
+            BackupError: Datenbank konnte nicht gesichert werden
+            BackupTimeBudgetExceeded: Zeitbudget überschritten
         """
+        started = time.monotonic()
+        deadline = started + time_budget if time_budget else None
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_name = f"{backup_type}_{timestamp}"
         if description:
@@ -57,13 +153,12 @@ class BackupManager:
             db_backup_path = backup_path / 'database'
             db_backup_path.mkdir(exist_ok=True)
             
-            # SQLite: Kopiere Datenbank-Datei
             db_path = settings.DATABASES['default']['NAME']
             if isinstance(db_path, Path):
                 db_path = str(db_path)
             
-            if os.path.exists(db_path):
-                shutil.copy2(db_path, db_backup_path / 'db.sqlite3')
+            db_file = self._backup_database(db_backup_path, deadline)
+            self._check_deadline(deadline)
             
             # Backup der Audit-Logs
             logs_dir = Path(settings.BASE_DIR) / 'logs'
@@ -71,19 +166,28 @@ class BackupManager:
                 logs_backup_path = backup_path / 'logs'
                 shutil.copytree(logs_dir, logs_backup_path, dirs_exist_ok=True)
             
-            # Backup-Metadaten
+            # Backup-Metadaten inkl. Kennzahlen
+            duration = time.monotonic() - started
             metadata = {
                 'timestamp': datetime.now().isoformat(),
                 'type': backup_type,
                 'description': description,
                 'database': db_path,
+                'database_vendor': connection.vendor,
+                'database_file': db_file.name,
+                'database_size_bytes': db_file.stat().st_size,
+                'size_bytes': _dir_size(backup_path),
+                'duration_seconds': round(duration, 3),
                 'django_version': settings.DJANGO_VERSION if hasattr(settings, 'DJANGO_VERSION') else 'unknown'
             }
             
             with open(backup_path / 'metadata.json', 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
             
-            logger.info(f"Backup erstellt: {backup_path}")
+            logger.info(
+                f"Backup erstellt: {backup_path} "
+                f"(Dauer={metadata['duration_seconds']}s, Grösse={metadata['size_bytes']} Bytes)"
+            )
             
             # Alte Backups löschen
             self.cleanup_old_backups()
@@ -97,6 +201,63 @@ class BackupManager:
                 shutil.rmtree(backup_path)
             raise
     
+    @staticmethod
+    def _check_deadline(deadline):
+        if deadline is not None and time.monotonic() > deadline:
+            raise BackupTimeBudgetExceeded("Zeitbudget für das Backup überschritten")
+
+    def _backup_database(self, target_dir: Path, deadline=None):
+        """
+        Sichert die Datenbank nach target_dir.
+
+        - SQLite: Online-Backup-API (konsistenter Snapshot auch bei laufenden
+          Schreibzugriffen), schrittweise mit kurzen Pausen.
+        - PostgreSQL: pg_dump im Custom-Format.
+
+        Returns:
+            Pfad der Sicherungsdatei
+
+        Raises:
+            BackupError: pg_dump fehlt/schlägt fehl oder Backend nicht unterstützt –
+                ein Backup ohne Datenbank darf nicht als erfolgreich gelten
+        """
+        vendor = connection.vendor
+
+        if vendor == 'sqlite':
+            target = target_dir / 'db.sqlite3'
+            if connection.in_atomic_block:
+                # Die Backup-API wartet sonst endlos auf die eigene offene Transaktion
+                raise RuntimeError("SQLite-Backup kann nicht innerhalb einer Transaktion erstellt werden")
+            connection.ensure_connection()
+
+            def _progress(status, remaining, total):
+                self._check_deadline(deadline)
+
+            dest = sqlite3.connect(str(target))
+            try:
+                connection.connection.backup(
+                    dest,
+                    pages=self.SQLITE_PAGES_PER_STEP,
+                    progress=_progress,
+                    sleep=self.SQLITE_STEP_SLEEP,
+                )
+            finally:
+                dest.close()
+            return target
+
+        if vendor == 'postgresql':
+            target = target_dir / 'db.dump'
+            cmd, env = _pg_command('pg_dump', connection.settings_dict)
+            cmd += ['--format=custom', '--no-owner', '--file', str(target)]
+            timeout = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            try:
+                _run_pg(cmd, env, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise BackupTimeBudgetExceeded("Zeitbudget für das Backup überschritten")
+            return target
+
+        raise BackupError(f"Datenbank-Backend '{vendor}' wird nicht unterstützt")
+
     def cleanup_old_backups(self):
         """Löscht Backups älter als retention_days."""
         cutoff_date = datetime.now() - timedelta(days=self.retention_days)
@@ -178,23 +339,15 @@ class BackupManager:
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
+            # Passt die Sicherung zur aktuellen Datenbank? (vor dem Sicherheits-Backup prüfen)
+            self._database_backup_file(backup_path)
+
             # Erstelle Backup vor Restore (Sicherheit!)
             self.create_backup(backup_type='manual', description='before_restore')
             
             # Stelle Datenbank wieder her
-            db_backup_path = backup_path / 'database' / 'db.sqlite3'
-            if db_backup_path.exists():
-                db_path = settings.DATABASES['default']['NAME']
-                if isinstance(db_path, Path):
-                    db_path = str(db_path)
-                
-                # Backup der aktuellen Datenbank
-                if os.path.exists(db_path):
-                    shutil.copy2(db_path, f"{db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-                
-                # Stelle wieder her
-                shutil.copy2(db_backup_path, db_path)
-                logger.info(f"Datenbank wiederhergestellt aus: {backup_path}")
+            self._restore_database(backup_path)
+            logger.info(f"Datenbank wiederhergestellt aus: {backup_path}")
             
             # Stelle Logs wieder her (optional)
             # Überspringe Logs, falls sie von einem Prozess verwendet werden
@@ -224,6 +377,151 @@ class BackupManager:
             return False
 
 
+    @staticmethod
+    def _database_backup_file(backup_path: Path) -> Path:
+        """
+        Sicherungsdatei passend zum aktuellen Datenbank-Backend.
+
+        Raises:
+            BackupError: keine (passende) Datenbank-Sicherung im Backup
+        """
+        files = {'sqlite': 'db.sqlite3', 'postgresql': 'db.dump'}
+        if connection.vendor not in files:
+            raise BackupError(f"Datenbank-Backend '{connection.vendor}' wird nicht unterstützt")
+        db_file = backup_path / 'database' / files[connection.vendor]
+        if not db_file.exists():
+            raise BackupError(f"Keine {connection.vendor}-Sicherung in {backup_path} gefunden")
+        return db_file
+
+    def _restore_database(self, backup_path: Path) -> None:
+        """
+        Ersetzt die aktuelle Datenbank durch die Sicherung.
+
+        - SQLite: Datei kopieren (vorher Kopie der aktuellen Datei).
+        - PostgreSQL: pg_restore --clean in einer Transaktion – bei einem Fehler
+          bleibt der bisherige Stand erhalten.
+        """
+        db_file = self._database_backup_file(backup_path)
+
+        if connection.vendor == 'sqlite':
+            db_path = str(settings.DATABASES['default']['NAME'])
+            connection.close()
+            # Backup der aktuellen Datenbank
+            if os.path.exists(db_path):
+                shutil.copy2(db_path, f"{db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            shutil.copy2(db_file, db_path)
+            return
+
+        cmd, env = _pg_command('pg_restore', connection.settings_dict)
+        cmd += ['--clean', '--if-exists', '--no-owner', '--single-transaction', '--exit-on-error', str(db_file)]
+        connection.close()
+        _run_pg(cmd, env)
+
+    def _verify_postgresql(self, pg_backup: Path, result: dict) -> None:
+        """
+        Probe-Wiederherstellung in eine temporäre Datenbank (gleicher Server).
+
+        pg_restore legt die Constraints nach den Daten an – verletzte Fremdschlüssel
+        oder Unique-Constraints lassen die Wiederherstellung scheitern. Danach
+        Zeilen pro Modell zählen, die temporäre Datenbank wird immer gelöscht.
+        Benötigt das Recht CREATEDB für den Datenbank-User.
+        """
+        db = connection.settings_dict
+        tmp_name = f"adea_verify_{uuid.uuid4().hex[:12]}"
+        quote = connection.ops.quote_name
+
+        cmd, env = _pg_command('pg_restore', db, dbname=tmp_name)
+        cmd += ['--no-owner', '--no-privileges', '--exit-on-error', str(pg_backup)]
+
+        with connection._nodb_cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE {quote(tmp_name)}")
+        try:
+            _run_pg(cmd, env)
+            result['integrity'] = ['ok']
+
+            verify_connection = type(connection)({**db, 'NAME': tmp_name}, alias=connection.alias)
+            try:
+                with verify_connection.cursor() as cursor:
+                    tables = set(verify_connection.introspection.table_names(cursor))
+                    for model in apps.get_models():
+                        table = model._meta.db_table
+                        if table not in tables:
+                            result['errors'].append(f"Tabelle fehlt: {table} ({model._meta.label})")
+                            continue
+                        cursor.execute(f"SELECT COUNT(*) FROM {quote(table)}")
+                        result['row_counts'][model._meta.label] = cursor.fetchone()[0]
+            finally:
+                verify_connection.close()
+        finally:
+            with connection._nodb_cursor() as cursor:
+                cursor.execute(f"DROP DATABASE IF EXISTS {quote(tmp_name)}")
+
+    def verify_backup(self, backup_path: Path) -> dict:
+        """
+        Prüft ein Backup, ohne die produktive Datenbank anzufassen.
+
+        Die Sicherung wird in eine temporäre Datenbank kopiert und dort
+        geprüft (Integrität, Fremdschlüssel, Anzahl Zeilen pro Modell).
+
+        Returns:
+            Dict mit 'ok', 'errors', 'integrity', 'row_counts', 'duration_seconds'
+        """
+        started = time.monotonic()
+        result = {
+            'ok': False,
+            'errors': [],
+            'integrity': None,
+            'row_counts': {},
+            'duration_seconds': 0.0,
+        }
+
+        sqlite_backup = backup_path / 'database' / 'db.sqlite3'
+        pg_backup = backup_path / 'database' / 'db.dump'
+
+        if sqlite_backup.exists():
+            with tempfile.TemporaryDirectory(prefix='adea_verify_') as tmp_dir:
+                tmp_db = Path(tmp_dir) / 'verify.sqlite3'
+                shutil.copy2(sqlite_backup, tmp_db)
+                conn = sqlite3.connect(str(tmp_db))
+                try:
+                    integrity = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+                    result['integrity'] = integrity
+                    if integrity != ['ok']:
+                        result['errors'].extend(integrity)
+
+                    fk_violations = conn.execute('PRAGMA foreign_key_check').fetchall()
+                    if fk_violations:
+                        result['errors'].append(f"{len(fk_violations)} Fremdschlüssel-Verletzung(en)")
+
+                    tables = {
+                        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    }
+                    for model in apps.get_models():
+                        table = model._meta.db_table
+                        label = model._meta.label
+                        if table not in tables:
+                            result['errors'].append(f"Tabelle fehlt: {table} ({label})")
+                            continue
+                        count = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                        result['row_counts'][label] = count
+                except sqlite3.DatabaseError as e:
+                    result['errors'].append(str(e))
+                finally:
+                    conn.close()
+        elif pg_backup.exists():
+            try:
+                self._verify_postgresql(pg_backup, result)
+            except Exception as e:
+                # BackupError (pg_restore fehlt/scheitert) oder Datenbankfehler (z.B. kein CREATEDB)
+                result['errors'].append(str(e))
+        else:
+            result['errors'].append(f"Keine Datenbank-Sicherung in {backup_path} gefunden")
+
+        result['ok'] = not result['errors']
+        result['duration_seconds'] = round(time.monotonic() - started, 3)
+        return result
+
+
 # Globale Instanz
 _backup_manager = None
 
@@ -0,0 +1,163 @@
+"""
+Hit/Miss-Statistik pro Cache-Namensraum.
+
+Ziel: sichtbar machen, ob die verschiedenen Caches (Parameter, Berechtigungen,
+Timer, PDFs, Rollups, Abwesenheiten, HTTP-ETags, Autocomplete) tatsächlich
+greifen – ohne pro Cache-Zugriff einen zusätzlichen Schreibzugriff auf den (ggf. DB-basierten) Cache.
+
+Zähler werden pro Prozess gesammelt und gebündelt (alle FLUSH_EVERY Ereignisse
+bzw. FLUSH_INTERVAL Sekunden) per `incr` in den Cache "shared" geschrieben (Redis bzw.
+DB-Tabelle) – der Standard-Cache kann pro Prozess sein.
+Ausgabe: `manage.py cache_stats` und die Admin-Seite `management-dashboard/cache/`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+from django.core.cache import caches
+
+# Bekannte Namensräume (weitere werden beim ersten Ereignis automatisch erfasst);
+# "permissions" = in der Session gecachte Mitarbeiter-Zuordnung (adeazeit.permissions)
+NAMESPACES = ("parameters", "permissions", "timer", "pdfs", "rollups", "absences", "http", "autocomplete")
+
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 10.0
+
+_NAMESPACE_INDEX_KEY = "cache_stats:namespaces"
+
+_lock = threading.Lock()
+_pending: Dict[tuple, int] = defaultdict(int)
+_pending_count = 0
+_last_flush = time.monotonic()
+
+
+def _shared_cache():
+    from django.conf import settings
+
+    # Ohne eigenen Eintrag (z.B. Test-Settings) zählt der Standard-Cache
+    return caches["shared" if "shared" in settings.CACHES else "default"]
+
+
+def _counter_key(namespace: str, kind: str) -> str:
+    return f"cache_stats:{namespace}:{kind}"
+
+
+def _record(namespace: str, kind: str) -> None:
+    global _pending_count
+    with _lock:
+        _pending[(namespace, kind)] += 1
+        _pending_count += 1
+        due = _pending_count >= FLUSH_EVERY or time.monotonic() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def record_hit(namespace: str) -> None:
+    """Zählt einen Cache-Treffer im Namensraum."""
+    _record(namespace, "hits")
+
+
+def record_miss(namespace: str) -> None:
+    """Zählt einen Cache-Fehlgriff im Namensraum."""
+    _record(namespace, "misses")
+
+
+def flush() -> None:
+    """Schreibt die lokal gesammelten Zähler in den gemeinsamen Cache."""
+    global _pending_count, _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _pending_count = 0
+        _last_flush = time.monotonic()
+
+    if not pending:
+        return
+
+    cache = _shared_cache()
+    try:
+        namespaces = set(cache.get(_NAMESPACE_INDEX_KEY, ()))
+        new_namespaces = {namespace for namespace, _ in pending} - namespaces
+        if new_namespaces:
+            cache.set(_NAMESPACE_INDEX_KEY, sorted(namespaces | new_namespaces), timeout=None)
+
+        for (namespace, kind), count in pending.items():
+            key = _counter_key(namespace, kind)
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, timeout=None)
+    except Exception:
+        # Statistik darf den eigentlichen Request nie stören
+        pass
+
+
+def get_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Liefert Hits, Misses und Trefferquote pro Namensraum.
+
+    Returns:
+        {namespace: {"hits": int, "misses": int, "total": int, "hit_rate": float (0-100)}}
+    """
+    flush()
+    cache = _shared_cache()
+    namespaces = list(NAMESPACES)
+    for namespace in cache.get(_NAMESPACE_INDEX_KEY, ()):
+        if namespace not in namespaces:
+            namespaces.append(namespace)
+
+    keys = [_counter_key(ns, kind) for ns in namespaces for kind in ("hits", "misses")]
+    values = cache.get_many(keys)
+
+    stats = {}
+    for namespace in namespaces:
+        hits = values.get(_counter_key(namespace, "hits"), 0)
+        misses = values.get(_counter_key(namespace, "misses"), 0)
+        total = hits + misses
+        stats[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "total": total,
+            "hit_rate": round(hits / total * 100, 1) if total else 0.0,
+        }
+    return stats
+
+
+def reset_stats() -> None:
+    """Setzt alle Zähler zurück."""
+    with _lock:
+        _pending.clear()
+    cache = _shared_cache()
+    namespaces = set(NAMESPACES) | set(cache.get(_NAMESPACE_INDEX_KEY, ()))
+    cache.delete_many(
+        [_counter_key(ns, kind) for ns in namespaces for kind in ("hits", "misses")]
+        + [_NAMESPACE_INDEX_KEY]
+    )
+
+
+def _describe(config: Dict) -> tuple:
+    backend = config.get("BACKEND", "")
+    location = config.get("LOCATION", "")
+    if "redis" in backend.lower() and "@" in str(location):
+        # Passwort in der URL nicht anzeigen
+        location = "redis://***@" + str(location).split("@", 1)[1]
+    return backend.rsplit(".", 1)[-1], str(location)
+
+
+def get_backend_info() -> Dict[str, str]:
+    """Beschreibt die konfigurierten Cache-Backends (für Anzeige): Standard und Statistik ("shared")."""
+    from django.conf import settings
+
+    backend, location = _describe(settings.CACHES.get("default", {}))
+    shared_backend, shared_location = _describe(settings.CACHES.get("shared", {}))
+    return {
+        "backend": backend,
+        "location": location,
+        "shared_backend": shared_backend,
+        "shared_location": shared_location,
+    }
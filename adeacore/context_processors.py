@@ -28,22 +28,16 @@ def adeazeit_permissions(request):
         }
     
     try:
-        from adeazeit.permissions import (
-            is_admin,
-            is_manager_or_admin,
-            can_manage_employees,
-            can_manage_service_types,
-            can_manage_absences,
-            can_delete_entries,
-        )
+        from adeazeit.permissions import get_request_permissions
         
+        perms = get_request_permissions(request)
         return {
-            "adeazeit_is_admin": is_admin(request.user),
-            "adeazeit_is_manager": is_manager_or_admin(request.user),
-            "adeazeit_can_manage_employees": can_manage_employees(request.user),
-            "adeazeit_can_manage_service_types": can_manage_service_types(request.user),
-            "adeazeit_can_manage_absences": can_manage_absences(request.user),
-            "adeazeit_can_delete": can_delete_entries(request.user),
+            "adeazeit_is_admin": perms.is_admin,
+            "adeazeit_is_manager": perms.is_manager_or_admin,
+            "adeazeit_can_manage_employees": perms.can_manage_employees,
+            "adeazeit_can_manage_service_types": perms.can_manage_service_types,
+            "adeazeit_can_manage_absences": perms.can_manage_absences,
+            "adeazeit_can_delete": perms.can_delete_entries,
         }
     except ImportError:
         # Falls adeazeit nicht installiert ist
@@ -78,18 +72,15 @@ def adealohn_permissions(request):
 def running_timer(request):
     """
     Fügt den aktuell laufenden Timer zum Template-Context hinzu.
+
+    Liest aus dem Cache (`adeazeit.timer_state`) – keine Query pro Seitenaufruf.
     """
     if not request.user.is_authenticated:
         return {'running_timer': None}
     
     try:
-        from adeazeit.models import RunningTimeEntry, UserProfile
-        employee_profile = UserProfile.objects.get(user=request.user)
-        if employee_profile.employee:
-            timer = RunningTimeEntry.objects.filter(mitarbeiter=employee_profile.employee).first()
-            return {'running_timer': timer}
-        return {'running_timer': None}
-    except (ImportError, UserProfile.DoesNotExist, AttributeError):
-        # Falls adeazeit nicht installiert ist oder UserProfile fehlt
+        from adeazeit.timer_state import get_running_timer_state
+        return {'running_timer': get_running_timer_state(request.user)}
+    except ImportError:
+        # Falls adeazeit nicht installiert ist
         return {'running_timer': None}
-
@@ -0,0 +1,402 @@
+"""
+Streaming-Export/-Import der Datenbank als NDJSON (eine Datei pro Modell).
+
+Ziel: Mandanten-Datenbanken zwischen Hosts verschieben, ohne den Umweg über
+`dumpdata`/`loaddata` (alles im Speicher, Deserialisierung und `save()` pro Objekt,
+Entschlüsseln/Verschlüsseln jedes verschlüsselten Werts).
+
+- Export liest pro Modell in Chunks (Keyset-Pagination über den Primärschlüssel)
+  und schreibt eine JSON-Zeile pro Datensatz – konstanter Speicherbedarf.
+  Alle Modelle stammen aus einem Snapshot (PostgreSQL: SERIALIZABLE READ ONLY
+  DEFERRABLE; SQLite: eine Lesetransaktion sieht ohnehin einen festen Stand).
+- Verschlüsselte Felder werden als Chiffrat exportiert und beim Import als
+  `Ciphertext` unverändert gespeichert. Voraussetzung: gleicher
+  ADEATOOLS_ENCRYPTION_KEY auf beiden Hosts (Fingerabdruck im Manifest).
+- Import als Batch-INSERT (wie `bulk_create`, aber raw – Zeitstempel bleiben
+  erhalten) in einer Transaktion; Modell-Signale werden nur auf Wunsch
+  (`send_signals`) mit raw=True gesendet, wie bei `loaddata`.
+- Nach dem Import werden die Tabellen-Versionen der ETags erhöht
+  (`adeacore.http_cache`), da raw-INSERTs keine Signale senden.
+- Der Suchindex (`SearchDocument`, FTS-Tabelle) wird nicht übertragen, sondern nach
+  dem Import für die betroffenen Typen neu aufgebaut (`adeacore.search`).
+
+Verzeichnisaufbau:
+    manifest.json                      Format, Fingerabdruck, Modelle in Abhängigkeitsreihenfolge
+    <app_label>.<model>.ndjson[.gz]    ein JSON-Objekt (attname -> Wert) pro Zeile
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.apps import apps
+from django.core.serializers import sort_dependencies
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import F, TextField
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save, pre_save
+
+from adeacore.encryption import get_encryption_manager
+from adeacore.fields import Ciphertext, EncryptedCharField, EncryptedDateField, EncryptedTextField
+from adeacore.http_cache import bump_tracked_table_versions
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_CHUNK_SIZE = 2000
+
+# Werden von Migrationen erzeugt, sind flüchtig bzw. werden nach dem Import neu aufgebaut
+DEFAULT_EXCLUDE = (
+    "contenttypes",
+    "auth.permission",
+    "admin.logentry",
+    "sessions",
+    "adeacore.ratelimitcounter",
+    "adeacore.searchdocument",
+)
+
+ENCRYPTED_FIELDS = (EncryptedCharField, EncryptedTextField, EncryptedDateField)
+
+# Felder, deren JSON-Darstellung (String) vor dem Speichern zurückkonvertiert werden muss
+_CONVERTED_FIELDS = (
+    models.DateField,
+    models.TimeField,
+    models.DurationField,
+    models.DecimalField,
+    models.UUIDField,
+)
+
+
+class _TransferJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder ohne Kürzung auf Millisekunden (auto_now-Zeitstempel bleiben exakt)."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class DataTransferError(Exception):
+    """Fehler beim Export oder Import (ungültiges Verzeichnis, Schlüssel, Zeilenanzahl)."""
+
+
+def _is_encrypted(field) -> bool:
+    return isinstance(field, ENCRYPTED_FIELDS)
+
+
+def _matches(model, labels: Iterable[str]) -> bool:
+    label = model._meta.label_lower
+    return any(label == entry.lower() or model._meta.app_label == entry.lower() for entry in labels)
+
+
+def resolve_models(include: Iterable[str] = (), exclude: Iterable[str] = DEFAULT_EXCLUDE) -> List:
+    """
+    Liefert die zu übertragenden Modelle in Abhängigkeitsreihenfolge.
+
+    Auto-generierte M2M-Zwischentabellen folgen direkt auf ihr Modell.
+    """
+    include, exclude = list(include), list(exclude)
+    app_configs = [
+        (app_config, None)
+        for app_config in apps.get_app_configs()
+        if app_config.models_module is not None
+    ]
+    ordered = []
+    for model in sort_dependencies(app_configs, allow_cycles=True):
+        opts = model._meta
+        if opts.proxy or not opts.managed:
+            continue
+        if include and not _matches(model, include):
+            continue
+        if _matches(model, exclude):
+            continue
+        ordered.append(model)
+        for m2m in opts.local_many_to_many:
+            through = m2m.remote_field.through
+            if through._meta.auto_created and not _matches(through, exclude):
+                ordered.append(through)
+    return ordered
+
+
+def _file_name(model, compress: bool) -> str:
+    return f"{model._meta.label_lower}.ndjson" + (".gz" if compress else "")
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _export_columns(model):
+    """(attname, Ausdruck) pro Spalte; verschlüsselte Spalten als Rohtext (ohne from_db_value)."""
+    columns = []
+    for field in model._meta.local_concrete_fields:
+        if _is_encrypted(field):
+            columns.append((field.attname, Cast(F(field.attname), output_field=TextField())))
+        else:
+            columns.append((field.attname, field.attname))
+    return columns
+
+
+def iter_rows(model, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+    """Liest alle Zeilen eines Modells chunkweise in Primärschlüssel-Reihenfolge."""
+    columns = _export_columns(model)
+    names = [name for name, _ in columns]
+    pk_name = model._meta.pk.attname
+    pk_index = names.index(pk_name)
+    queryset = model._base_manager.order_by(pk_name).values_list(*[expr for _, expr in columns])
+
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(**{f"{pk_name}__gt": last_pk})
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield dict(zip(names, row))
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][pk_index]
+
+
+@contextmanager
+def _snapshot_transaction():
+    """
+    Lesetransaktion, in der alle Modelle denselben Datenbankstand sehen.
+
+    PostgreSQL arbeitet standardmässig mit READ COMMITTED (jede Query sieht neu
+    committete Daten); die Isolationsstufe muss die erste Anweisung der
+    Transaktion sein, eine umgebende Transaktion ist deshalb nicht erlaubt.
+    """
+    if connection.vendor == "postgresql" and connection.in_atomic_block:
+        raise DataTransferError("Export kann nicht innerhalb einer laufenden Transaktion erfolgen.")
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL SERIALIZABLE, READ ONLY, DEFERRABLE")
+        yield
+
+
+def export_data(
+    directory,
+    *,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = DEFAULT_EXCLUDE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    compress: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Exportiert die Modelle als NDJSON-Dateien nach `directory`.
+
+    Returns:
+        Manifest (auch als manifest.json geschrieben)
+    """
+    log = log or logger.info
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    if (directory / MANIFEST_NAME).exists():
+        raise DataTransferError(f"{directory} enthält bereits einen Export.")
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "encryption_key_fingerprint": get_encryption_manager().key_fingerprint(),
+        "models": [],
+    }
+    encoder = _TransferJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    # Ein Snapshot, damit alle Modelle aus demselben Stand stammen
+    with _snapshot_transaction():
+        for model in resolve_models(include, exclude):
+            file_name = _file_name(model, compress)
+            count = 0
+            with _open(directory / file_name, "w") as f:
+                for row in iter_rows(model, chunk_size):
+                    f.write(encoder.encode(row))
+                    f.write("\n")
+                    count += 1
+            manifest["models"].append({"model": model._meta.label_lower, "file": file_name, "count": count})
+            log(f"{model._meta.label_lower}: {count}")
+
+    with open(directory / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(directory) -> Dict:
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        raise DataTransferError(f"{path} nicht gefunden.")
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise DataTransferError(f"Unbekanntes Exportformat: {manifest.get('format')}")
+    return manifest
+
+
+class _RowBuilder:
+    """Baut Modellinstanzen aus den JSON-Zeilen (ohne Deserializer, ohne Entschlüsselung)."""
+
+    def __init__(self, model):
+        self.model = model
+        fields = {field.attname: field for field in model._meta.local_concrete_fields}
+        self.encrypted = {name for name, field in fields.items() if _is_encrypted(field)}
+        self.converted = {
+            name: field
+            for name, field in fields.items()
+            if name not in self.encrypted and isinstance(field, _CONVERTED_FIELDS)
+        }
+        self.known = set(fields)
+
+    def build(self, row: Dict):
+        unknown = set(row) - self.known
+        if unknown:
+            raise DataTransferError(
+                f"{self.model._meta.label_lower}: unbekannte Felder {', '.join(sorted(unknown))} "
+                "(Migrationsstand unterschiedlich?)"
+            )
+        for name in self.encrypted:
+            value = row.get(name)
+            if isinstance(value, str) and value:
+                row[name] = Ciphertext(value)
+        for name, field in self.converted.items():
+            value = row.get(name)
+            if isinstance(value, str):
+                row[name] = field.to_python(value)
+        return self.model(**row)
+
+
+def _iter_file(path: Path) -> Iterator[Dict]:
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _send_signals(signal, model, objs, **kwargs):
+    if signal.has_listeners(model):
+        for obj in objs:
+            signal.send(sender=model, instance=obj, raw=True, using=connection.alias, update_fields=None, **kwargs)
+
+
+def import_data(
+    directory,
+    *,
+    include: Iterable[str] = (),
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+    replace: bool = False,
+    send_signals: bool = False,
+    allow_key_mismatch: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, int]:
+    """
+    Importiert einen Export in einer Transaktion.
+
+    Args:
+        include: optional nur diese Apps/Modelle
+        replace: vorhandene Zeilen der importierten Modelle vorher löschen
+        send_signals: pre_save/post_save (raw=True) pro Objekt senden
+        allow_key_mismatch: Import trotz abweichendem Verschlüsselungsschlüssel
+
+    Returns:
+        {model_label: importierte Zeilen}
+    """
+    from django.core.management.color import no_style
+
+    log = log or logger.info
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+
+    fingerprint = get_encryption_manager().key_fingerprint()
+    if manifest.get("encryption_key_fingerprint") != fingerprint and not allow_key_mismatch:
+        raise DataTransferError(
+            "Verschlüsselungsschlüssel des Exports stimmt nicht mit ADEATOOLS_ENCRYPTION_KEY überein – "
+            "verschlüsselte Felder wären nicht lesbar."
+        )
+
+    entries = []
+    for entry in manifest["models"]:
+        try:
+            model = apps.get_model(entry["model"])
+        except LookupError:
+            raise DataTransferError(f"Modell {entry['model']} existiert nicht.")
+        if include and not _matches(model, include):
+            continue
+        entries.append((model, entry))
+
+    counts: Dict[str, int] = {}
+    with transaction.atomic():
+        with connection.constraint_checks_disabled():
+            if replace:
+                for model, _ in reversed(entries):
+                    model._base_manager.all()._raw_delete(connection.alias)
+
+            for model, entry in entries:
+                builder = _RowBuilder(model)
+                count = 0
+                batch = []
+                for row in _iter_file(directory / entry["file"]):
+                    batch.append(builder.build(row))
+                    if len(batch) >= batch_size:
+                        count += _insert(model, batch, send_signals)
+                        batch = []
+                if batch:
+                    count += _insert(model, batch, send_signals)
+
+                if count != entry["count"]:
+                    raise DataTransferError(
+                        f"{entry['model']}: {count} Zeilen gelesen, Manifest erwartet {entry['count']}."
+                    )
+                counts[entry["model"]] = count
+                log(f"{entry['model']}: {count}")
+
+        connection.check_constraints(table_names=[model._meta.db_table for model, _ in entries])
+
+        # Explizite Primärschlüssel -> Sequenzen nachziehen (PostgreSQL)
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), [model for model, _ in entries])
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+        bump_tracked_table_versions()
+
+    _rebuild_search_index([model for model, _ in entries], log)
+    return counts
+
+
+def _rebuild_search_index(models: List, log: Callable[[str], None]) -> None:
+    """Baut den Suchindex der importierten Modelle neu auf (raw-INSERTs indexieren nicht)."""
+    from adeacore import search
+
+    kinds = [source.kind for source in search.get_sources() if source.model in models]
+    if kinds:
+        counts = search.rebuild_index(kinds)
+        log(f"Suchindex: {sum(counts.values())}")
+
+
+def _insert(model, objs: List, send_signals: bool) -> int:
+    """
+    Batch-INSERT wie `bulk_create`, aber mit raw=True (wie `loaddata`).
+
+    `bulk_create` würde auto_now/auto_now_add-Felder neu setzen und damit die
+    exportierten Zeitstempel überschreiben.
+    """
+    if send_signals:
+        _send_signals(pre_save, model, objs)
+    fields = model._meta.local_concrete_fields
+    queryset = model._base_manager.using(connection.alias).all()
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    for start in range(0, len(objs), batch_size):
+        queryset._insert(objs[start:start + batch_size], fields=fields, raw=True, using=connection.alias)
+    if send_signals:
+        _send_signals(post_save, model, objs, created=True)
+    return len(objs)
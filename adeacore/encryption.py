@@ -60,8 +60,19 @@ class EncryptionManager:
         if isinstance(encryption_key, str):
             encryption_key = encryption_key.encode('utf-8')
         
+        self._key = encryption_key
         return Fernet(encryption_key)
     
+    def key_fingerprint(self) -> str:
+        """
+        Kurzer Fingerabdruck des Schlüssels (SHA-256, nicht umkehrbar).
+        
+        Dient zum Abgleich zwischen Hosts, ohne den Schlüssel selbst preiszugeben
+        (z.B. beim Datentransfer mit durchgereichten Chiffraten).
+        """
+        import hashlib
+        return hashlib.sha256(self._key).hexdigest()[:16]
+    
     def encrypt(self, value: str) -> str:
         """
         Verschlüsselt einen String-Wert.
@@ -7,6 +7,16 @@ from django.core.exceptions import ImproperlyConfigured
 from adeacore.encryption import get_encryption_manager
 
 
+class Ciphertext(str):
+    """
+    Bereits verschlüsselter Datenbankwert.
+
+    Wird von den Encrypted*-Feldern beim Speichern unverändert übernommen
+    (z.B. Datentransfer zwischen Hosts mit gleichem Schlüssel, ohne
+    Entschlüsseln/Verschlüsseln pro Wert).
+    """
+
+
 class EncryptedCharField(models.CharField):
     """
     Verschlüsseltes CharField.
@@ -46,6 +56,8 @@ class EncryptedCharField(models.CharField):
         """Verschlüsselt Wert vor dem Speichern in die Datenbank."""
         if value is None or value == "":
             return value
+        if isinstance(value, Ciphertext):
+            return str(value)
         return self._encryption_manager.encrypt(str(value))
 
 
@@ -98,6 +110,8 @@ class EncryptedTextField(models.TextField):
         """Verschlüsselt Wert vor dem Speichern in die Datenbank."""
         if value is None or value == "":
             return value
+        if isinstance(value, Ciphertext):
+            return str(value)
         return self._encryption_manager.encrypt(str(value))
 
 
@@ -158,6 +172,8 @@ class EncryptedDateField(models.CharField):
         """Verschlüsselt Wert vor dem Speichern in die Datenbank."""
         if value is None or value == "":
             return None
+        if isinstance(value, Ciphertext):
+            return str(value)
 
         # Normalisiere zu ISO-Date-String
         if isinstance(value, str):
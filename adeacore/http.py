@@ -6,9 +6,11 @@ Klein und bewusst "boring": nur zentrale, wiederverwendbare Request-Helfer.
 
 from __future__ import annotations
 
+from functools import wraps
 from typing import Any, Mapping, Optional
 
 from django.http import JsonResponse
+from django.utils.functional import LazyObject, empty
 
 
 def get_client_ip(request, *, default: Optional[str] = "unknown") -> Optional[str]:
@@ -26,6 +28,44 @@ def get_client_ip(request, *, default: Optional[str] = "unknown") -> Optional[st
     return request.META.get("REMOTE_ADDR") or default
 
 
+async def aget_request_user(request):
+    """
+    User des Requests für async Views, ohne `request.user` im Event-Loop aufzulösen.
+
+    Hat die Middleware (SessionSecurityMiddleware) den User bereits geladen, wird
+    dasselbe Objekt zurückgegeben – inkl. der daran gecachten Berechtigungs- und
+    Mitarbeiter-Zuordnung. Sonst lädt `request.auser()` ihn asynchron.
+    """
+    user = getattr(request, "user", None)
+    if isinstance(user, LazyObject):
+        if user._wrapped is not empty:
+            return user._wrapped
+    elif user is not None:
+        return user
+    return await request.auser()
+
+
+def alogin_required(view_func):
+    """
+    `login_required` für async Function-Views.
+
+    Djangos `login_required` lädt den User per `request.auser()` ein zweites Mal
+    (eigene Query); hier wird der von der Middleware geladene User übernommen.
+    """
+
+    @wraps(view_func)
+    async def _wrapped(request, *args, **kwargs):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            from django.contrib.auth.views import redirect_to_login
+
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped
+
+
 def json_ok(payload: Optional[Mapping[str, Any]] = None, *, status: int = 200, **extra) -> JsonResponse:
     """
     Standardisierte JSON-Response für Erfolg.
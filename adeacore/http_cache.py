@@ -0,0 +1,190 @@
+"""
+HTTP-Caching (Conditional GET) für Lookup- und AJAX-Endpunkte.
+
+Ziel: Dropdown-Wechsel und Formular-Eingaben fragen dieselben Daten immer wieder ab
+(Projekte eines Kunden, Stundensatz, Mitarbeiter-Info). Ändern sich die zugrunde
+liegenden Tabellen nicht, antwortet der Server mit 304 – ohne Berechtigungsprüfung,
+ohne Queries der View, nur mit einem Cache-Zugriff.
+
+- Tabellen-Versionen: pro Modell ein Cache-Eintrag (Zeitpunkt der letzten Änderung
+  + Zufallsteil), ein `cache.set` pro Änderung bzw. pro Transaktion nach dem Commit.
+  `track_table_versions(Model, ...)` setzt sie per Signal (post_save/post_delete,
+  bei M2M-Through-Modellen m2m_changed). Bulk-Writes ohne Signale (`bulk_create`)
+  rufen `bump_table_version` selbst auf, grosse Importe `bump_tracked_table_versions`.
+- `ConditionalGetMixin` (async Views): ETag aus den Versionen der `cache_models`,
+  dem User und dem Request-Pfad; Last-Modified aus der jüngsten Änderung;
+  `Cache-Control: private, max-age=<cache_max_age>`.
+- Ist der Cache geleert, werden die Versionen neu gesetzt – die ETags ändern sich
+  dadurch, veraltete 304 sind also nicht möglich.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+import uuid
+from typing import Dict, Iterable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from adeacore.cache_stats import record_hit, record_miss
+
+CACHE_NAMESPACE = "http"
+VERSION_KEY = "adeacore:table_version:{}"
+DEFAULT_MAX_AGE = 30
+
+# Per `track_table_versions` verfolgte Modelle (Label -> Modell)
+_TRACKED: Dict[str, type] = {}
+
+
+def table_label(model) -> str:
+    return model._meta.label_lower
+
+
+def _new_version() -> Tuple[float, str]:
+    # Zeitpunkt der Änderung (Last-Modified) + Zufallsteil gegen gleichzeitige Änderungen
+    return (time.time(), uuid.uuid4().hex[:12])
+
+
+def _bump_label(label: str) -> None:
+    cache.set(VERSION_KEY.format(label), _new_version(), timeout=None)
+
+
+class _BumpAfterCommit:
+    """on_commit-Callback; `done` erkennt bereits ausgeführte (Tests führen sie vorzeitig aus)."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        _bump_label(self.label)
+
+
+def bump_table_version(model) -> None:
+    """
+    Markiert die Tabelle des Modells als geändert (neue ETags für abhängige Endpunkte).
+
+    In einer Transaktion erst nach dem Commit – sonst könnte ein paralleler Request
+    noch den alten Stand unter der neuen Version ausliefern – und dann nur einmal
+    pro Tabelle (Importe speichern viele Zeilen in einer Transaktion).
+    """
+    label = table_label(model)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _bump_label(label)
+        return
+    # Nach einem Rollback sind die Callbacks verworfen -> dann neu registrieren
+    for _, func, _ in connection.run_on_commit:
+        if isinstance(func, _BumpAfterCommit) and func.label == label and not func.done:
+            return
+    transaction.on_commit(_BumpAfterCommit(label))
+
+
+def _bump_sender(sender, **kwargs) -> None:
+    bump_table_version(sender)
+
+
+def _bump_m2m(sender, action, **kwargs) -> None:
+    if action.startswith("post_"):
+        bump_table_version(sender)
+
+
+def track_table_versions(*models) -> None:
+    """Verbindet die Signale, die die Versionen der Modelle erhöhen (beim App-Start)."""
+    from django.db.models.signals import m2m_changed, post_delete, post_save
+
+    for model in models:
+        _TRACKED[table_label(model)] = model
+        uid = f"table_version:{table_label(model)}"
+        if model._meta.auto_created:
+            m2m_changed.connect(_bump_m2m, sender=model, dispatch_uid=uid)
+        else:
+            post_save.connect(_bump_sender, sender=model, dispatch_uid=uid)
+            post_delete.connect(_bump_sender, sender=model, dispatch_uid=uid)
+
+
+def bump_tracked_table_versions() -> None:
+    """Erhöht die Versionen aller verfolgten Tabellen (nach Importen ohne Signale)."""
+    for model in _TRACKED.values():
+        bump_table_version(model)
+
+
+def _versions_token(labels: List[str], versions: List[Tuple[float, str]]) -> Tuple[str, float]:
+    changed = max((version[0] for version in versions), default=0.0)
+    return ";".join(f"{label}={version[0]}:{version[1]}" for label, version in zip(labels, versions)), changed
+
+
+def get_table_versions(models: Iterable) -> Tuple[str, float]:
+    """Wie `aget_table_versions`, für synchronen Code (z.B. prozesslokale Caches)."""
+    labels = sorted(table_label(model) for model in models)
+    values = cache.get_many([VERSION_KEY.format(label) for label in labels])
+
+    versions = []
+    for label in labels:
+        key = VERSION_KEY.format(label)
+        version = values.get(key)
+        if version is None:
+            cache.add(key, _new_version(), timeout=None)
+            version = cache.get(key)
+        versions.append(version)
+    return _versions_token(labels, versions)
+
+
+async def aget_table_versions(models: Iterable) -> Tuple[str, float]:
+    """(Versions-Token, Zeitpunkt der jüngsten Änderung) der Tabellen – im Normalfall ein Cache-Zugriff."""
+    labels = sorted(table_label(model) for model in models)
+    values = await cache.aget_many([VERSION_KEY.format(label) for label in labels])
+
+    versions = []
+    for label in labels:
+        key = VERSION_KEY.format(label)
+        version = values.get(key)
+        if version is None:
+            # Noch nie geändert oder Cache geleert: Version ab jetzt festhalten
+            await cache.aadd(key, _new_version(), timeout=None)
+            version = await cache.aget(key)
+        versions.append(version)
+    return _versions_token(labels, versions)
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified und 304 für GET-Handler von async Views.
+
+    Nach dem Login-Mixin einbinden (der User fliesst in den ETag ein). Die ETag-Teile
+    lassen sich über `get_etag_parts()` erweitern (z.B. um das aktuelle Datum).
+    """
+
+    cache_models: Tuple = ()
+    cache_max_age = DEFAULT_MAX_AGE
+
+    def get_etag_parts(self) -> List[str]:
+        return [str(self.request.user.pk), self.request.get_full_path()]
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await super().dispatch(request, *args, **kwargs)
+
+        token, changed = await aget_table_versions(self.cache_models)
+        digest = hashlib.sha1("|".join([token, *self.get_etag_parts()]).encode()).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = int(changed)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        # Statistik kann in den (ggf. DB-basierten) Cache schreiben -> nicht im Event-Loop
+        await sync_to_async(record_miss if response is None else record_hit)(CACHE_NAMESPACE)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+            if not 200 <= response.status_code < 300:
+                return response
+
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+        patch_cache_control(response, private=True, max_age=self.cache_max_age)
+        return response
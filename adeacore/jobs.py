@@ -0,0 +1,318 @@
+"""
+Hintergrund-Jobs: Warteschlange in der Datenbank, abgearbeitet von `manage.py run_worker`.
+
+Ziel: Lange Operationen (PDFs, Backups, Neuberechnungen, Lohnausweise) blockieren
+keine gunicorn-Worker mehr und laufen nicht in Proxy-Timeouts – ohne Redis/Celery.
+
+Ablauf:
+- Job-Typen registrieren sich per `@register("name")` in `<app>/jobs.py`
+  (werden vom Worker per autodiscover geladen). Handler: `handler(ctx, **params)`,
+  Rückgabewert (JSON-serialisierbar) landet in `Job.result`.
+- `enqueue("name", {...}, priority=..., run_at=...)` legt eine Zeile an.
+- Ergebnisdateien: `ctx.save_file(...)`/`ctx.save_zip(...)` legen sie in der gemeinsamen
+  Ablage `settings.STORAGES["jobs"]` ab (Worker und Web-Service sehen dieselbe); der Name
+  kommt als `result["file"]` zurück, der Download läuft über `/jobs/<id>/download/`.
+- Der Worker holt Jobs mit `select_for_update(skip_locked=True)` (mehrere Worker
+  parallel möglich; auf SQLite ohne Row-Locks sichert das bedingte UPDATE ab).
+- Fehler: erneuter Versuch mit exponentiellem Backoff bis `max_attempts`, dann FAILED.
+- Heartbeat: ein Thread des Workers aktualisiert `heartbeat_at` alle
+  HEARTBEAT_INTERVAL_SECONDS, solange der Handler läuft (auch ohne Fortschrittsmeldung).
+- Abgestürzte Worker: RUNNING-Jobs ohne Heartbeat seit STALE_AFTER werden neu eingereiht.
+  Fortschritt und Abschluss schreibt ein Worker nur, solange der Job noch ihm gehört
+  (status=RUNNING, worker=<er>) – ein neu eingereihter Job wird nicht überschrieben.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import traceback
+import zipfile
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from django.core.files import File
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Wartezeit vor erneutem Versuch: RETRY_BASE_SECONDS * 2^(Versuch-1)
+RETRY_BASE_SECONDS = 30
+# RUNNING ohne Heartbeat seit so langer Zeit -> Worker gilt als abgestürzt
+STALE_AFTER = timedelta(minutes=30)
+# Fortschritt höchstens so oft in die DB schreiben
+PROGRESS_INTERVAL_SECONDS = 1.0
+# Heartbeat laufender Jobs (deutlich kürzer als STALE_AFTER)
+HEARTBEAT_INTERVAL_SECONDS = 60.0
+
+
+class JobError(Exception):
+    """Fehler beim Einreihen (z.B. unbekannter Job-Typ)."""
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    handler: Callable
+    label: str
+    max_attempts: int
+
+
+_registry: Dict[str, JobType] = {}
+
+
+def register(name: str, *, label: str = "", max_attempts: int = 3):
+    """Decorator: registriert einen Handler `handler(ctx, **params)` als Job-Typ."""
+
+    def decorator(handler):
+        _registry[name] = JobType(name=name, handler=handler, label=label or name, max_attempts=max_attempts)
+        return handler
+
+    return decorator
+
+
+def get_job_type(name: str) -> Optional[JobType]:
+    return _registry.get(name)
+
+
+def autodiscover() -> None:
+    """Lädt `jobs.py` aller installierten Apps (registriert deren Job-Typen)."""
+    from django.utils.module_loading import autodiscover_modules
+
+    autodiscover_modules("jobs")
+
+
+def job_file_storage():
+    """Gemeinsame Ablage der Job-Ergebnisdateien (settings.STORAGES["jobs"])."""
+    from django.core.files.storage import storages
+
+    return storages["jobs"]
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(name: str, params: Optional[Dict[str, Any]] = None, *, priority: int = 0, run_at=None,
+            max_attempts: Optional[int] = None, user=None):
+    """
+    Reiht einen Job ein und gibt die Job-Zeile zurück.
+
+    Raises:
+        JobError: Job-Typ ist nicht registriert
+    """
+    from adeacore.models import Job
+
+    job_type = get_job_type(name)
+    if job_type is None:
+        autodiscover()
+        job_type = get_job_type(name)
+    if job_type is None:
+        raise JobError(f"Unbekannter Job-Typ: {name}")
+    return Job.objects.create(
+        name=name,
+        params=params or {},
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or job_type.max_attempts,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def cancel(job) -> bool:
+    """Bricht einen wartenden Job ab (laufende Jobs werden nicht unterbrochen)."""
+    from adeacore.models import Job
+
+    updated = Job.objects.filter(pk=job.pk, status=Job.STATUS_QUEUED).update(
+        status=Job.STATUS_CANCELLED, finished_at=timezone.now()
+    )
+    return bool(updated)
+
+
+def _owned(job):
+    """Filter auf den Job, solange er noch RUNNING bei diesem Worker ist."""
+    from adeacore.models import Job
+
+    return Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, worker=job.worker)
+
+
+class _Heartbeat:
+    """Aktualisiert `heartbeat_at` eines laufenden Jobs aus einem Hintergrund-Thread."""
+
+    def __init__(self, job, interval: float = None):
+        self.job = job
+        self.interval = interval or HEARTBEAT_INTERVAL_SECONDS
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job.pk}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def beat(self) -> bool:
+        """Schreibt einen Heartbeat; False, wenn der Job nicht mehr diesem Worker gehört."""
+        return bool(_owned(self.job).update(heartbeat_at=timezone.now()))
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    if not self.beat():
+                        logger.warning("Job %s gehört nicht mehr Worker %s – Heartbeat beendet", self.job, self.job.worker)
+                        return
+                except DatabaseError as exc:
+                    logger.warning("Heartbeat für Job %s fehlgeschlagen: %s", self.job, exc)
+        finally:
+            # Eigene Verbindung dieses Threads
+            connection.close()
+
+
+class JobContext:
+    """Wird dem Handler übergeben: Zugriff auf den Job und gedrosselte Fortschrittsmeldung."""
+
+    def __init__(self, job):
+        self.job = job
+        self._last_write = 0.0
+
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        """Meldet Fortschritt (schreibt höchstens alle PROGRESS_INTERVAL_SECONDS, aktualisiert Heartbeat)."""
+        now = time.monotonic()
+        if done < total and now - self._last_write < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = now
+        self.job.progress_done, self.job.progress_total, self.job.progress_message = done, total, message[:255]
+        _owned(self.job).update(
+            progress_done=done,
+            progress_total=total,
+            progress_message=message[:255],
+            heartbeat_at=timezone.now(),
+        )
+
+    def save_file(self, filename: str, content) -> str:
+        """Legt eine Ergebnisdatei in der Job-Ablage ab; den Namen als `result["file"]` zurückgeben."""
+        return job_file_storage().save(f"{self.job.pk}/{filename}", File(content))
+
+    def save_zip(self, filename: str, directory) -> str:
+        """Packt alle Dateien unter `directory` in ein ZIP und legt es ab (siehe save_file)."""
+        directory = Path(directory)
+        with tempfile.TemporaryFile() as buffer:
+            with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for path in sorted(directory.rglob("*")):
+                    if path.is_file():
+                        archive.write(path, path.relative_to(directory).as_posix())
+            buffer.seek(0)
+            return self.save_file(filename, buffer)
+
+
+def requeue_stale(stale_after: timedelta = STALE_AFTER) -> int:
+    """Reiht RUNNING-Jobs abgestürzter Worker (kein Heartbeat seit `stale_after`) neu ein."""
+    from adeacore.models import Job
+
+    return Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        heartbeat_at__lt=timezone.now() - stale_after,
+    ).update(status=Job.STATUS_QUEUED, worker="", last_error="Worker ohne Heartbeat – neu eingereiht")
+
+
+def claim_next(worker: str):
+    """Holt den nächsten fälligen Job (höchste Priorität, älteste run_at) und markiert ihn als RUNNING."""
+    from adeacore.models import Job
+
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        # Bedingtes UPDATE: schützt auch auf Backends ohne Row-Locks vor Doppelvergabe
+        claimed = Job.objects.filter(pk=job.pk, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            attempts=job.attempts + 1,
+            worker=worker[:100],
+            started_at=now,
+            heartbeat_at=now,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job) -> None:
+    """
+    Führt einen geholten Job aus und schreibt Ergebnis, Retry oder Fehler zurück.
+
+    Während der Handler läuft, hält ein Heartbeat-Thread den Job frisch. Wurde der
+    Job inzwischen neu eingereiht (und evtl. von einem anderen Worker geholt), wird
+    das Ergebnis verworfen.
+    """
+    from adeacore.models import Job
+
+    job_type = get_job_type(job.name)
+    try:
+        if job_type is None:
+            raise JobError(f"Unbekannter Job-Typ: {job.name}")
+        with _Heartbeat(job):
+            result = job_type.handler(JobContext(job), **job.params)
+    except Exception as exc:
+        error = "".join(traceback.format_exception(exc))[-5000:]
+        now = timezone.now()
+        retry = job_type is not None and job.attempts < job.max_attempts
+        logger.warning("Job %s fehlgeschlagen (Versuch %s/%s): %s", job, job.attempts, job.max_attempts, exc)
+        if retry:
+            updated = _owned(job).update(
+                status=Job.STATUS_QUEUED,
+                run_at=now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)),
+                last_error=error,
+                worker="",
+            )
+        else:
+            updated = _owned(job).update(status=Job.STATUS_FAILED, last_error=error, finished_at=now)
+        if not updated:
+            logger.warning("Job %s gehört nicht mehr Worker %s – Fehler nicht geschrieben", job, job.worker)
+        return
+
+    updated = _owned(job).update(
+        status=Job.STATUS_DONE,
+        result=result,
+        finished_at=timezone.now(),
+        progress_done=job.progress_total or 1,
+        progress_total=job.progress_total or 1,
+    )
+    if not updated:
+        logger.warning("Job %s gehört nicht mehr Worker %s – Ergebnis verworfen", job, job.worker)
+
+
+def run_next(worker: Optional[str] = None) -> bool:
+    """Holt und führt einen Job aus; False, wenn nichts fällig war."""
+    job = claim_next(worker or worker_name())
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+@register("backup", label="Backup erstellen", max_attempts=1)
+def backup_job(ctx, backup_type="manual", description="", backup_dir=None, time_budget=None):
+    """Erstellt ein Backup (wie `manage.py backup create`), ohne backup_dir nach settings.BACKUP_DIR."""
+    from adeacore.backup import BackupManager, get_backup_manager
+
+    ctx.progress(0, 1, "Backup läuft")
+    manager = BackupManager(backup_dir=backup_dir) if backup_dir else get_backup_manager()
+    backup_path = manager.create_backup(backup_type=backup_type, description=description, time_budget=time_budget)
+    return {"path": str(backup_path)}
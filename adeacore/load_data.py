@@ -0,0 +1,601 @@
+"""
+Synthetische Lastdaten für Profiling und Benchmarks.
+
+Ziel: einen Produktionsbestand (viele Mandanten, tausende Mitarbeitende, Jahre an
+Zeiteinträgen, Lohnläufen und Rechnungen) lokal in Minuten nachbauen.
+
+Alle Tabellen werden per `bulk_create` befüllt. Die teuren `save()`-Methoden
+werden bewusst umgangen, die abgeleiteten Werte aber mit denselben Helpern
+berechnet:
+- TimeEntry: Rate/Betrag via `adeazeit.timeentry_calc`
+- PayrollRecord: Beträge via `adea_payroll.berechne_lohnlauf` (einmal pro
+  Mitarbeitendem, da der Monatslohn konstant ist); YTD-Tabellen werden nicht befüllt
+- Invoice: Zahlungsstatus nach derselben Regel wie `Invoice.save`, Zahlungsreferenz
+  via `adearechnung.payments.creditor_reference`
+- Suchindex: am Ende per `adeacore.search.rebuild_index` neu aufgebaut
+
+Gleicher Seed + gleiche Grössen = identische Daten (Referenzjahr statt heute).
+Verwendet von `manage.py generate_load_data` und der Benchmark-Suite.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_YEAR = 2025
+
+# Kennzeichnung der synthetischen Datensätze (ServiceType- und Mitarbeiterkürzel)
+CODE_PREFIX = "LD"
+CLIENT_NAME_PREFIX = "Lastdaten Mandant"
+INVOICE_NUMBER_PREFIX = "LD-"
+LOAD_DATA_USERNAME = "lastdaten"
+
+SERVICE_TYPES = [
+    ("LD-BUCH", "Buchhaltung", Decimal("130.00"), True),
+    ("LD-STEU", "Steuern", Decimal("150.00"), True),
+    ("LD-LOHN", "Lohnbuchhaltung", Decimal("120.00"), True),
+    ("LD-BER", "Beratung", Decimal("180.00"), True),
+    ("LD-ADM", "Administration", Decimal("95.00"), True),
+    ("LD-REV", "Revision", Decimal("160.00"), True),
+    ("LD-INT", "Intern", Decimal("0.00"), False),
+]
+
+FIXED_HOLIDAYS = [
+    (1, 1, "Neujahr"),
+    (1, 2, "Berchtoldstag"),
+    (8, 1, "Bundesfeiertag"),
+    (12, 25, "Weihnachten"),
+    (12, 26, "Stephanstag"),
+]
+EASTER_HOLIDAYS = [(-2, "Karfreitag"), (1, "Ostermontag"), (39, "Auffahrt"), (50, "Pfingstmontag")]
+
+DURATIONS = [Decimal(d) for d in ("0.25", "0.50", "0.75", "1.00", "1.50", "2.00", "3.00", "4.00")]
+COEFFICIENTS = [Decimal("1.00"), Decimal("1.00"), Decimal("0.80"), Decimal("1.20")]
+SALARIES = [Decimal(s) for s in ("4200.00", "4800.00", "5600.00", "6200.00", "7200.00", "8500.00", "11000.00")]
+
+VAT_RATE = Decimal("8.1")
+PAYMENT_DAYS = 15
+
+
+@dataclass
+class LoadDataConfig:
+    """Grössen des zu erzeugenden Bestands."""
+
+    seed: int = 42
+    clients: int = 50
+    employees: int = 2000  # Lohn-Mitarbeitende (adeacore.Employee)
+    internal_employees: int = 200  # Zeiterfassung (adeazeit.EmployeeInternal)
+    years: int = 5
+    entries_per_day: int = 3
+    end_year: int = REFERENCE_YEAR
+    payroll_history: bool = True
+    batch_size: int = 5000
+
+    @property
+    def date_from(self) -> date:
+        return date(self.end_year - self.years + 1, 1, 1)
+
+    @property
+    def date_to(self) -> date:
+        return date(self.end_year, 12, 31)
+
+    @property
+    def billed_until(self) -> date:
+        """Einträge vor diesem Datum sind verrechnet (letztes Quartal offen)."""
+        return date(self.end_year, 10, 1)
+
+
+def easter_sunday(year: int) -> date:
+    """Ostersonntag (gregorianisch, Gauss/Anonymous-Algorithmus)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def swiss_holidays(year: int) -> Dict[date, str]:
+    holidays = {date(year, month, day): name for month, day, name in FIXED_HOLIDAYS}
+    easter = easter_sunday(year)
+    for offset, name in EASTER_HOLIDAYS:
+        holidays[easter + timedelta(days=offset)] = name
+    return holidays
+
+
+def _payment_status(amount: Decimal, paid: Decimal, due_date: date, today: date) -> str:
+    """Gleiche Regel wie `Invoice.save`."""
+    if paid >= amount:
+        return "BEZAHLT"
+    if paid > Decimal("0"):
+        return "TEILWEISE"
+    if due_date < today:
+        return "UEBERFAELLIG"
+    return "OFFEN"
+
+
+def synthetic_data_exists() -> bool:
+    from adeazeit.models import ServiceType
+
+    return ServiceType.objects.filter(code__startswith=f"{CODE_PREFIX}-").exists()
+
+
+class LoadDataGenerator:
+    """
+    Erzeugt den Bestand gemäss `LoadDataConfig`.
+
+    Nach `run()` stehen die angelegten Stammdaten als Listen zur Verfügung
+    (clients, employees, internal_employees, service_types), `counts` enthält
+    die Anzahl Zeilen pro Modell.
+    """
+
+    def __init__(self, config: LoadDataConfig, log: Optional[Callable[[str], None]] = None):
+        self.config = config
+        self.log = log or logger.info
+        self.rng = random.Random(config.seed)
+        self.counts: Dict[str, int] = {}
+        self.user = None
+        self.clients: List = []
+        self.employees: List = []
+        self.internal_employees: List = []
+        self.service_types: List = []
+        self.holidays: Dict[date, str] = {}
+
+    def run(self) -> Dict[str, int]:
+        steps = [
+            ("clients", self._create_clients),
+            ("employees", self._create_employees),
+            ("service_types", self._create_service_types),
+            ("internal_employees", self._create_internal_employees),
+            ("holidays", self._create_holidays),
+            ("time_entries", self._create_time_entries),
+            ("absences", self._create_absences),
+            ("payroll", self._create_payroll),
+            ("invoices", self._create_invoices),
+        ]
+        from adeacore.http_cache import bump_tracked_table_versions
+        from adeacore.search import rebuild_index
+        from adeazeit.permissions import bump_employee_scope_version
+
+        self._ensure_user_and_company()
+        for name, step in steps:
+            step()
+            self.log(f"{name}: {self._step_summary(name)}")
+        # bulk_create löst keine Signale aus
+        bump_employee_scope_version()
+        bump_tracked_table_versions()
+        documents = rebuild_index()
+        self.log(f"search_index: {sum(documents.values())} documents")
+        return self.counts
+
+    def _step_summary(self, name: str) -> str:
+        keys = {
+            "payroll": ("payroll_records", "payroll_items"),
+            "invoices": ("invoices", "invoice_items"),
+        }.get(name, (name,))
+        return ", ".join(f"{self.counts.get(key, 0)} {key}" for key in keys)
+
+    def _bulk(self, model, objs, **kwargs) -> int:
+        model.objects.bulk_create(objs, batch_size=self.config.batch_size, **kwargs)
+        return len(objs)
+
+    # ------------------------------------------------------------------
+    # Stammdaten
+    # ------------------------------------------------------------------
+
+    def _ensure_user_and_company(self):
+        from django.contrib.auth.models import User
+
+        from adeacore.models import CompanyData
+
+        self.user, _ = User.objects.get_or_create(
+            username=LOAD_DATA_USERNAME,
+            defaults={"is_staff": True, "is_superuser": True},
+        )
+        company = CompanyData.get_instance()
+        if not company.iban:
+            company.company_name = company.company_name or "Adea Treuhand"
+            company.street, company.house_number = "Bahnhofstrasse", "1"
+            company.zipcode, company.city = "5000", "Aarau"
+            company.iban = "CH9300762011623852957"
+            company.mwst_pflichtig = True
+            company.save()
+
+    def _create_clients(self):
+        """Jeder 4. Mandant ist eine Privatperson, jede zweite Firma hat das Lohnmodul."""
+        from adeacore.models import Client
+
+        clients = []
+        for i in range(self.config.clients):
+            is_firma = i % 4 != 3
+            clients.append(Client(
+                name=f"{CLIENT_NAME_PREFIX} {i:04d}",
+                client_type="FIRMA" if is_firma else "PRIVAT",
+                lohn_aktiv=is_firma and i % 2 == 0,
+            ))
+        self.counts["clients"] = self._bulk(Client, clients)
+        self.clients = list(Client.objects.filter(name__startswith=CLIENT_NAME_PREFIX).order_by("name"))
+
+    def _create_employees(self):
+        """Lohn-Mitarbeitende, verteilt auf die Mandanten mit Lohnmodul (ungleich gross)."""
+        from adeacore.models import Employee
+
+        payroll_clients = [c for c in self.clients if c.lohn_aktiv]
+        if not payroll_clients or not self.config.employees:
+            self.counts["employees"] = 0
+            return
+
+        weights = [1 / (rank + 1) for rank in range(len(payroll_clients))]
+        assigned = self.rng.choices(payroll_clients, weights=weights, k=self.config.employees)
+        employees = []
+        for i, client in enumerate(assigned):
+            weekly_hours = self.rng.choice([Decimal("42.0"), Decimal("42.0"), Decimal("33.6"), Decimal("21.0"), Decimal("8.0")])
+            employees.append(Employee(
+                client=client,
+                personalnummer=f"{CODE_PREFIX}{i:06d}",
+                first_name=f"Vorname{i:06d}",
+                last_name=f"Nachname{i:06d}",
+                monthly_salary=self.rng.choice(SALARIES),
+                weekly_hours=weekly_hours,
+                # wie Employee.save: NBU-Pflicht ab mehr als 8h/Woche
+                nbu_pflichtig=weekly_hours > Decimal("8"),
+                is_rentner=False,
+                qst_pflichtig=(i % 7 == 0),
+                eintrittsdatum=self.config.date_from,
+            ))
+        self.counts["employees"] = self._bulk(Employee, employees)
+        self.employees = list(
+            Employee.objects.filter(personalnummer__startswith=CODE_PREFIX).order_by("personalnummer")
+        )
+
+    def _create_service_types(self):
+        from adeazeit.models import ServiceType
+
+        self.counts["service_types"] = self._bulk(ServiceType, [
+            ServiceType(code=code, name=name, standard_rate=rate, billable=billable)
+            for code, name, rate, billable in SERVICE_TYPES
+        ])
+        self.service_types = list(ServiceType.objects.filter(code__startswith=f"{CODE_PREFIX}-").order_by("code"))
+
+    def _create_internal_employees(self):
+        from adeazeit.models import EmployeeInternal
+
+        self.counts["internal_employees"] = self._bulk(EmployeeInternal, [
+            EmployeeInternal(
+                code=f"{CODE_PREFIX}{i:05d}",
+                name=f"Mitarbeiterin {i:05d}",
+                function_title="Sachbearbeitung",
+                employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"),
+                weekly_working_days=Decimal("5.0"),
+                stundensatz=self.rng.choice(COEFFICIENTS),
+                work_canton="AG",
+                employment_start=self.config.date_from,
+            )
+            for i in range(self.config.internal_employees)
+        ])
+        self.internal_employees = list(
+            EmployeeInternal.objects.filter(code__startswith=CODE_PREFIX).order_by("code")
+        )
+
+    def _create_holidays(self):
+        from adeazeit.models import Holiday
+
+        for year in range(self.config.date_from.year, self.config.end_year + 1):
+            self.holidays.update(swiss_holidays(year))
+        self.counts["holidays"] = self._bulk(
+            Holiday,
+            [Holiday(name=name, date=day, canton="") for day, name in sorted(self.holidays.items())],
+            ignore_conflicts=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Bewegungsdaten
+    # ------------------------------------------------------------------
+
+    def _workdays(self):
+        day = self.config.date_from
+        while day <= self.config.date_to:
+            if day.weekday() < 5 and day not in self.holidays:
+                yield day
+            day += timedelta(days=1)
+
+    def _create_time_entries(self):
+        """
+        Zeiteinträge pro Mitarbeitender und Arbeitstag; grosse Mandanten bekommen mehr Stunden.
+        """
+        from adeazeit.models import TimeEntry
+        from adeazeit.timeentry_calc import calculate_timeentry_amount, calculate_timeentry_rate
+
+        config = self.config
+        rates = {
+            (service_type.pk, employee.pk): calculate_timeentry_rate(service_type=service_type, employee=employee)
+            for service_type in self.service_types
+            for employee in self.internal_employees
+        }
+        cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(self.clients))))
+        per_day = len(self.internal_employees) * config.entries_per_day
+
+        batch = []
+        total = 0
+        for day in self._workdays():
+            billed = day < config.billed_until
+            kommentar_suffix = f"{day:%d.%m.%Y}"
+            day_clients = self.rng.choices(self.clients, cum_weights=cum_weights, k=per_day) if self.clients else []
+            day_services = self.rng.choices(self.service_types, k=per_day)
+            day_durations = self.rng.choices(DURATIONS, k=per_day)
+            n = 0
+            for employee in self.internal_employees:
+                for _ in range(config.entries_per_day):
+                    service_type, dauer = day_services[n], day_durations[n]
+                    billable = service_type.billable and bool(day_clients)
+                    rate = rates[(service_type.pk, employee.pk)]
+                    batch.append(TimeEntry(
+                        mitarbeiter=employee,
+                        client=day_clients[n] if billable else None,
+                        datum=day,
+                        dauer=dauer,
+                        service_type=service_type,
+                        kommentar=f"{service_type.name} {kommentar_suffix}",
+                        billable=billable,
+                        verrechnet=billable and billed,
+                        rate=rate,
+                        betrag=calculate_timeentry_amount(rate=rate, dauer=dauer),
+                    ))
+                    n += 1
+            if len(batch) >= config.batch_size:
+                total += self._bulk(TimeEntry, batch)
+                batch = []
+        if batch:
+            total += self._bulk(TimeEntry, batch)
+        self.counts["time_entries"] = total
+
+    def _create_absences(self):
+        """Pro Mitarbeitender und Jahr: zwei Ferienwochen, ein Krankheitstag, ein halber Weiterbildungstag."""
+        from adeazeit.models import Absence
+
+        absences = []
+        for year in range(self.config.date_from.year, self.config.end_year + 1):
+            for employee in self.internal_employees:
+                for _ in range(2):
+                    monday = date(year, 1, 1) + timedelta(weeks=self.rng.randrange(1, 50))
+                    monday -= timedelta(days=monday.weekday())
+                    absences.append(Absence(
+                        employee=employee,
+                        absence_type="FERIEN",
+                        date_from=monday,
+                        date_to=monday + timedelta(days=4),
+                        full_day=True,
+                    ))
+                sick_day = date(year, 1, 1) + timedelta(days=self.rng.randrange(0, 360))
+                absences.append(Absence(
+                    employee=employee, absence_type="KRANK", date_from=sick_day, date_to=sick_day, full_day=True,
+                ))
+                course_day = date(year, 1, 1) + timedelta(days=self.rng.randrange(0, 360))
+                absences.append(Absence(
+                    employee=employee,
+                    absence_type="WEITERBILDUNG",
+                    date_from=course_day,
+                    date_to=course_day,
+                    full_day=False,
+                    hours=Decimal("4.00"),
+                ))
+        self.counts["absences"] = self._bulk(Absence, absences)
+
+    def _create_payroll(self):
+        """
+        Monatliche Lohnläufe mit Grundlohn-Position für alle Lohn-Mitarbeitenden.
+
+        Historische Monate sind ABGERECHNET, der letzte Monat ENTWURF.
+        """
+        from adea_payroll import Firmendaten, Lohnstamm, Mitarbeitende, berechne_lohnlauf
+        from adeacore.models import PayrollRecord
+        from adealohn.models import PayrollItem, WageType
+
+        self.counts["payroll_records"] = 0
+        self.counts["payroll_items"] = 0
+        if not self.config.payroll_history or not self.employees:
+            return
+
+        wage_type, _ = WageType.objects.get_or_create(
+            code="GRUNDLOHN_MONAT",
+            defaults={
+                "name": "Grundlohn Monatslohn",
+                "category": "GRUNDLOHN",
+                "is_lohnwirksam": True,
+                "ahv_relevant": True,
+                "alv_relevant": True,
+                "bvg_relevant": True,
+                "uv_relevant": True,
+            },
+        )
+        firma = Firmendaten(bu_satz_ag=Decimal("0.5"), nbu_satz_an=Decimal("1.2"))
+        periods = [
+            (year, month)
+            for year in range(self.config.date_from.year, self.config.end_year + 1)
+            for month in range(1, 13)
+        ]
+        last_period = periods[-1]
+        chunk_size = max(1, self.config.batch_size // len(periods))
+
+        values_by_salary: Dict[tuple, Dict] = {}
+        for start in range(0, len(self.employees), chunk_size):
+            chunk = self.employees[start:start + chunk_size]
+            records = []
+            for employee in chunk:
+                key = (employee.monthly_salary, employee.nbu_pflichtig)
+                if key not in values_by_salary:
+                    abrechnung = berechne_lohnlauf(
+                        Mitarbeitende(vorname=employee.first_name, nachname=employee.last_name),
+                        Lohnstamm(monatslohn=employee.monthly_salary),
+                        firma,
+                        1,
+                        self.config.end_year,
+                    )
+                    values_by_salary[key] = self._payroll_values(abrechnung, employee.nbu_pflichtig)
+                values = values_by_salary[key]
+                for year, month in periods:
+                    records.append(PayrollRecord(
+                        employee=employee,
+                        year=year,
+                        month=month,
+                        status="ENTWURF" if (year, month) == last_period else "ABGERECHNET",
+                        **values,
+                    ))
+            self.counts["payroll_records"] += self._bulk(PayrollRecord, records)
+
+            salary_by_employee = {employee.pk: employee.monthly_salary for employee in chunk}
+            items = [
+                PayrollItem(
+                    payroll_id=payroll_id,
+                    wage_type=wage_type,
+                    quantity=Decimal("1"),
+                    amount=salary_by_employee[employee_id],
+                    description="Monatslohn",
+                )
+                for payroll_id, employee_id in PayrollRecord.objects.filter(
+                    employee_id__in=salary_by_employee
+                ).values_list("id", "employee_id")
+            ]
+            self.counts["payroll_items"] += self._bulk(PayrollItem, items)
+
+    @staticmethod
+    def _payroll_values(abrechnung, nbu_pflichtig: bool) -> Dict:
+        brutto = abrechnung.basis
+        return {
+            "bruttolohn": brutto,
+            "ahv_basis": brutto,
+            "alv_basis": abrechnung.alv_basis,
+            "bvg_basis": brutto,
+            "uv_basis": brutto,
+            "qst_basis": abrechnung.qst_basis,
+            "ahv_effective_basis": brutto,
+            "ahv_employee": abrechnung.ahv_an,
+            "ahv_employer": abrechnung.ahv_ag,
+            "alv_effective_basis": abrechnung.alv_basis,
+            "alv_employee": abrechnung.alv1_an + abrechnung.alv2_an,
+            "alv_employer": abrechnung.alv1_ag + abrechnung.alv2_ag,
+            "uvg_effective_basis": brutto,
+            "bu_employer": abrechnung.bu_ag,
+            "nbu_employee": abrechnung.nbu_an if nbu_pflichtig else Decimal("0.00"),
+            "ktg_employee": abrechnung.ktg_an,
+            "ktg_employer": abrechnung.ktg_ag,
+            "bvg_employee": abrechnung.bvg_an,
+            "bvg_employer": abrechnung.bvg_ag,
+            "nettolohn": abrechnung.netto,
+        }
+
+    def _create_invoices(self):
+        """
+        Eine Rechnung pro Mandant und Monat aus den verrechneten Zeiteinträgen.
+
+        Ältere Rechnungen sind bezahlt, die letzten drei Monate teils offen/teilbezahlt.
+        Die Zeiteinträge werden gestreamt, damit der Speicherbedarf konstant bleibt.
+        """
+        from django.db.models import Sum
+        from django.db.models.functions import ExtractMonth, ExtractYear
+        from django.utils import timezone
+
+        from adeacore.models import Invoice, InvoiceItem
+        from adearechnung.payments import creditor_reference
+        from adeazeit.models import TimeEntry
+
+        billed = TimeEntry.objects.filter(
+            verrechnet=True, client__name__startswith=CLIENT_NAME_PREFIX, service_type__code__startswith=f"{CODE_PREFIX}-"
+        )
+        totals = (
+            billed.values("client_id", year=ExtractYear("datum"), month=ExtractMonth("datum"))
+            .annotate(net=Sum("betrag"))
+            .order_by("client_id", "year", "month")
+        )
+
+        today = timezone.now().date()
+        settled_before = self.config.billed_until - timedelta(days=90)
+        invoices = []
+        for row in totals:
+            client_id, year, month = row["client_id"], row["year"], row["month"]
+            net = row["net"] or Decimal("0.00")
+            vat = (net * VAT_RATE / Decimal("100")).quantize(Decimal("0.01"))
+            amount = net + vat
+            invoice_date = date(year, month, 28)
+            due_date = invoice_date + timedelta(days=PAYMENT_DAYS)
+
+            roll = self.rng.random()
+            if invoice_date < settled_before or roll < 0.6:
+                paid = amount
+            elif roll < 0.8:
+                paid = (amount / 2).quantize(Decimal("0.01"))
+            else:
+                paid = Decimal("0.00")
+            invoice_number = self._invoice_number(client_id, year, month)
+            invoices.append(Invoice(
+                client_id=client_id,
+                invoice_number=invoice_number,
+                payment_reference=creditor_reference(invoice_number),
+                invoice_date=invoice_date,
+                due_date=due_date,
+                amount=amount,
+                net_amount=net,
+                vat_amount=vat,
+                vat_rate=VAT_RATE,
+                paid_amount=paid,
+                payment_status=_payment_status(amount, paid, due_date, today),
+                payment_date=invoice_date + timedelta(days=self.rng.randrange(5, 45)) if paid else None,
+                created_by=self.user,
+            ))
+        self.counts["invoices"] = self._bulk(Invoice, invoices)
+
+        invoice_ids = dict(
+            Invoice.objects.filter(invoice_number__startswith=INVOICE_NUMBER_PREFIX).values_list("invoice_number", "id")
+        )
+        service_types = {st.pk: st for st in self.service_types}
+        employee_names = {e.pk: e.name for e in self.internal_employees}
+        rows = billed.order_by("client_id", "datum", "id").values_list(
+            "id", "client_id", "datum", "dauer", "rate", "betrag", "kommentar", "service_type_id", "mitarbeiter_id"
+        )
+
+        items = []
+        total = 0
+        for entry_id, client_id, datum, dauer, rate, betrag, kommentar, service_type_id, employee_id in rows.iterator(
+            chunk_size=self.config.batch_size
+        ):
+            service_type = service_types[service_type_id]
+            vat = (betrag * VAT_RATE / Decimal("100")).quantize(Decimal("0.01"))
+            items.append(InvoiceItem(
+                invoice_id=invoice_ids[self._invoice_number(client_id, datum.year, datum.month)],
+                time_entry_id=entry_id,
+                title=service_type.name,
+                description=kommentar,
+                service_type_code=service_type.code,
+                employee_name=employee_names.get(employee_id, ""),
+                service_date=datum,
+                quantity=dauer,
+                unit_price=rate or Decimal("0.00"),
+                net_amount=betrag,
+                vat_rate=VAT_RATE,
+                vat_amount=vat,
+                gross_amount=betrag + vat,
+            ))
+            if len(items) >= self.config.batch_size:
+                total += self._bulk(InvoiceItem, items)
+                items = []
+        if items:
+            total += self._bulk(InvoiceItem, items)
+        self.counts["invoice_items"] = total
+
+    @staticmethod
+    def _invoice_number(client_id: int, year: int, month: int) -> str:
+        return f"{INVOICE_NUMBER_PREFIX}{year}-{month:02d}-{client_id:05d}"
@@ -0,0 +1,241 @@
+"""
+Management-Command für Backups (Erstellen, Auflisten, Wiederherstellen, Prüfen).
+
+Verwendung:
+    python manage.py backup create [--type auto] [--time-budget 600] [--dir /var/data/backups]
+    python manage.py backup create --enqueue --wait 3600   # im Worker (adeacore.jobs)
+    python manage.py backup list
+    python manage.py backup verify [<backup-name>]
+    python manage.py backup restore <backup-name> [--dry-run] [--noinput]
+
+Zielverzeichnis: --dir, sonst settings.BACKUP_DIR. `create` läuft täglich um 23:00 Uhr
+via Cronjob (render.yaml): Render-Cronjobs haben keine persistente Disk, deshalb reiht
+der Cronjob das Backup beim Worker (mit Disk) ein und wartet mit --wait auf das Ergebnis –
+ein fehlgeschlagenes Backup beendet den Cronjob weiterhin mit Fehler.
+`verify` prüft eine Sicherung in einer temporären Datenbank (PostgreSQL: Probe-
+Wiederherstellung mit pg_restore) – die produktive Datenbank wird dabei nicht angefasst.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adeacore.backup import BackupError, BackupManager, get_backup_manager, lower_io_priority
+
+# Abfrageintervall für --wait (Sekunden)
+WAIT_POLL_SECONDS = 5.0
+
+
+def _format_size(size_bytes: int) -> str:
+    size = float(size_bytes or 0)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = 'Erstellt, listet, prüft und stellt Backups wieder her'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['create', 'list', 'restore', 'verify'],
+            help='Auszuführende Aktion',
+        )
+        parser.add_argument(
+            'backup_name',
+            nargs='?',
+            help='Name des Backup-Verzeichnisses (restore/verify; verify ohne Name = neuestes Backup)',
+        )
+        parser.add_argument(
+            '--type',
+            default='auto',
+            help="Backup-Typ für create ('auto', 'manual', 'before_migration')",
+        )
+        parser.add_argument(
+            '--description',
+            default='',
+            help='Beschreibung für create',
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=None,
+            help='Maximale Laufzeit in Sekunden für create (Abbruch bei Überschreitung)',
+        )
+        parser.add_argument(
+            '--dir',
+            dest='backup_dir',
+            default=None,
+            help='Backup-Verzeichnis (Standard: settings.BACKUP_DIR, Umgebungsvariable ADEATOOLS_BACKUP_DIR)',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='create: Als Hintergrund-Job einreihen (manage.py run_worker) statt direkt ausführen',
+        )
+        parser.add_argument(
+            '--wait',
+            type=float,
+            default=None,
+            metavar='SEKUNDEN',
+            help='create --enqueue: Bis zu so lange auf den Job warten, Fehler als Exit-Code != 0',
+        )
+        parser.add_argument(
+            '--no-low-priority',
+            action='store_true',
+            help='CPU-/I/O-Priorität nicht absenken',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='restore: Backup nur prüfen (wie verify), nichts wiederherstellen',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='restore: Keine Rückfrage vor dem Überschreiben der Datenbank',
+        )
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if options['enqueue'] or options['wait'] is not None:
+            if action != 'create' or not options['enqueue']:
+                raise CommandError('--enqueue gibt es nur für create, --wait nur zusammen mit --enqueue.')
+            self._enqueue(options)
+            return
+        manager = BackupManager(backup_dir=options['backup_dir']) if options['backup_dir'] else get_backup_manager()
+
+        if action == 'create':
+            self._create(manager, options)
+        elif action == 'list':
+            self._list(manager)
+        elif action == 'verify':
+            self._verify(manager, self._resolve_backup(manager, options['backup_name'], latest=True))
+        elif action == 'restore':
+            if not options['backup_name']:
+                raise CommandError('Für restore muss ein Backup-Name angegeben werden.')
+            backup_path = self._resolve_backup(manager, options['backup_name'])
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING('[DRY-RUN] Backup wird nur geprüft, nicht wiederhergestellt.'))
+                self._verify(manager, backup_path)
+                return
+            self._restore(manager, backup_path, options['interactive'])
+
+    def _resolve_backup(self, manager, name, latest=False):
+        if not name:
+            if not latest:
+                raise CommandError('Kein Backup angegeben.')
+            backups = manager.list_backups()
+            if not backups:
+                raise CommandError('Keine Backups vorhanden.')
+            return backups[0]['path']
+
+        backup_path = manager.backup_dir / name
+        if not backup_path.is_dir():
+            raise CommandError(f'Backup nicht gefunden: {name}')
+        return backup_path
+
+    def _enqueue(self, options):
+        from adeacore.jobs import enqueue
+        from adeacore.models import Job
+
+        job = enqueue('backup', {
+            'backup_type': options['type'],
+            'description': options['description'],
+            'backup_dir': options['backup_dir'],
+            'time_budget': options['time_budget'],
+        }, priority=10)
+        self.stdout.write(self.style.SUCCESS(f'Backup als Job #{job.pk} eingereiht.'))
+        if options['wait'] is None:
+            return
+
+        deadline = time.monotonic() + options['wait']
+        while job.status not in Job.FINISHED_STATUSES:
+            if time.monotonic() > deadline:
+                raise CommandError(f'Job #{job.pk} nach {options["wait"]:.0f}s nicht abgeschlossen ({job.get_status_display()}).')
+            time.sleep(WAIT_POLL_SECONDS)
+            job.refresh_from_db()
+        if job.status != Job.STATUS_DONE:
+            error = job.last_error.strip().splitlines()
+            raise CommandError(f'Backup-Job #{job.pk} {job.get_status_display().lower()}: {error[-1] if error else "-"}')
+        self.stdout.write(self.style.SUCCESS(f"✅ Backup erstellt: {job.result['path']}"))
+
+    def _create(self, manager, options):
+        if not options['no_low_priority']:
+            applied = lower_io_priority()
+            if applied:
+                self.stdout.write(f"Priorität abgesenkt: {', '.join(applied)}")
+
+        try:
+            backup_path = manager.create_backup(
+                backup_type=options['type'],
+                description=options['description'],
+                time_budget=options['time_budget'],
+            )
+        except BackupError as e:
+            # Exit-Code != 0: der Cronjob darf kein Backup ohne Datenbank als Erfolg melden
+            raise CommandError(f'Backup abgebrochen: {e}')
+
+        metadata = next(
+            (b for b in manager.list_backups() if b['path'] == backup_path),
+            {},
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Backup erstellt: {backup_path.name} "
+                f"(Dauer: {metadata.get('duration_seconds', 0)}s, "
+                f"Grösse: {_format_size(metadata.get('size_bytes'))}, "
+                f"Datenbank: {_format_size(metadata.get('database_size_bytes'))})"
+            )
+        )
+
+    def _list(self, manager):
+        backups = manager.list_backups()
+        if not backups:
+            self.stdout.write(self.style.WARNING('Keine Backups vorhanden.'))
+            return
+
+        for backup in backups:
+            self.stdout.write(
+                f"  - {backup['path'].name}  {backup.get('timestamp', '')[:19]}  "
+                f"{_format_size(backup.get('size_bytes'))}  "
+                f"{backup.get('duration_seconds', '-')}s"
+            )
+        self.stdout.write(f'\n{len(backups)} Backup(s)')
+
+    def _verify(self, manager, backup_path):
+        result = manager.verify_backup(backup_path)
+
+        for label, count in sorted(result['row_counts'].items()):
+            self.stdout.write(f'  {label}: {count}')
+
+        if result['ok']:
+            total = sum(result['row_counts'].values())
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Backup {backup_path.name} ist in Ordnung "
+                    f"({len(result['row_counts'])} Tabellen, {total} Zeilen, {result['duration_seconds']}s)"
+                )
+            )
+            return
+
+        for error in result['errors']:
+            self.stdout.write(self.style.ERROR(f'  - {error}'))
+        raise CommandError(f'Backup {backup_path.name} ist fehlerhaft.')
+
+    def _restore(self, manager, backup_path, interactive):
+        if interactive:
+            confirm = input(
+                f"Die aktuelle Datenbank wird durch '{backup_path.name}' ersetzt. "
+                "Fortfahren? (ja/nein): "
+            )
+            if confirm.strip().lower() not in ('ja', 'j', 'yes', 'y'):
+                self.stdout.write(self.style.WARNING('Abgebrochen.'))
+                return
+
+        if not manager.restore_backup(backup_path):
+            raise CommandError(f'Wiederherstellung aus {backup_path.name} fehlgeschlagen.')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Backup {backup_path.name} wiederhergestellt.'))
@@ -0,0 +1,37 @@
+"""
+Management-Command zur Anzeige der Cache-Trefferquoten pro Namensraum.
+
+Verwendung:
+    python manage.py cache_stats
+    python manage.py cache_stats --reset
+"""
+from django.core.management.base import BaseCommand
+
+from adeacore.cache_stats import get_backend_info, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Zeigt Hit/Miss-Raten des Caches pro Namensraum'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Setzt alle Zähler nach der Ausgabe zurück',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend_info()
+        self.stdout.write(f"Cache-Backend: {backend['backend']} ({backend['location']})")
+        self.stdout.write(f"Statistik:     {backend['shared_backend']} ({backend['shared_location']})\n")
+
+        self.stdout.write(f"{'Namensraum':<15} {'Hits':>10} {'Misses':>10} {'Trefferquote':>14}")
+        for namespace, values in get_stats().items():
+            rate = f"{values['hit_rate']:.1f}%" if values['total'] else '-'
+            self.stdout.write(
+                f"{namespace:<15} {values['hits']:>10} {values['misses']:>10} {rate:>14}"
+            )
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('\n✅ Zähler zurückgesetzt.'))
@@ -0,0 +1,112 @@
+"""
+Management-Command für schnellen Datentransfer zwischen Hosts (NDJSON pro Modell).
+
+Verwendung:
+    python manage.py data_transfer export <verzeichnis> [app_label[.Model] ...] [--compress]
+    python manage.py data_transfer import <verzeichnis> [app_label[.Model] ...] [--replace] [--signals]
+
+Ersetzt `dumpdata`/`loaddata` für grosse Bestände: streamt Modell für Modell in
+Chunks und reicht verschlüsselte Felder als Chiffrat durch (gleicher
+ADEATOOLS_ENCRYPTION_KEY auf beiden Hosts nötig). Siehe `adeacore.data_transfer`.
+"""
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from adeacore.data_transfer import DEFAULT_CHUNK_SIZE, DEFAULT_EXCLUDE, DataTransferError, export_data, import_data
+
+
+class Command(BaseCommand):
+    help = 'Exportiert/importiert die Datenbank als NDJSON pro Modell (streamend, ohne save())'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['export', 'import'], help='Auszuführende Aktion')
+        parser.add_argument('directory', help='Export-Verzeichnis')
+        parser.add_argument(
+            'labels',
+            nargs='*',
+            help='Nur diese Apps bzw. Modelle (z.B. adeazeit adeacore.Client)',
+        )
+        parser.add_argument(
+            '--exclude', '-e',
+            action='append',
+            default=None,
+            help=f"export: Apps/Modelle ausschliessen (mehrfach möglich; Standard: {', '.join(DEFAULT_EXCLUDE)})",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Zeilen pro Lese- bzw. Schreib-Batch',
+        )
+        parser.add_argument('--compress', action='store_true', help='export: Dateien gzip-komprimieren')
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='import: vorhandene Zeilen der importierten Modelle vorher löschen',
+        )
+        parser.add_argument(
+            '--signals',
+            action='store_true',
+            help='import: pre_save/post_save (raw=True) pro Objekt senden (langsamer)',
+        )
+        parser.add_argument(
+            '--allow-key-mismatch',
+            action='store_true',
+            help='import: trotz abweichendem Verschlüsselungsschlüssel importieren',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='import --replace: Keine Rückfrage',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size muss mindestens 1 sein.')
+
+        started = time.monotonic()
+        log = lambda message: self.stdout.write(f"  {message}")
+        try:
+            if options['action'] == 'export':
+                exclude = options['exclude'] if options['exclude'] is not None else DEFAULT_EXCLUDE
+                manifest = export_data(
+                    options['directory'],
+                    include=options['labels'],
+                    exclude=exclude,
+                    chunk_size=options['chunk_size'],
+                    compress=options['compress'],
+                    log=log,
+                )
+                rows = sum(entry['count'] for entry in manifest['models'])
+                models_count = len(manifest['models'])
+                verb = 'exportiert'
+            else:
+                if options['replace'] and options['interactive']:
+                    answer = input('⚠️  Vorhandene Daten der importierten Modelle werden gelöscht. Fortfahren? [j/N] ')
+                    if answer.strip().lower() not in ('j', 'ja', 'y', 'yes'):
+                        self.stdout.write(self.style.WARNING('Abgebrochen.'))
+                        return
+                counts = import_data(
+                    options['directory'],
+                    include=options['labels'],
+                    batch_size=options['chunk_size'],
+                    replace=options['replace'],
+                    send_signals=options['signals'],
+                    allow_key_mismatch=options['allow_key_mismatch'],
+                    log=log,
+                )
+                # Gecachte Ableitungen (Berechtigungen, Timer, Parameter) passen nicht mehr zum Bestand
+                cache.clear()
+                rows = sum(counts.values())
+                models_count = len(counts)
+                verb = 'importiert'
+        except DataTransferError as e:
+            raise CommandError(str(e))
+
+        duration = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {rows} Zeilen aus {models_count} Modellen {verb} ({duration:.1f}s)"
+        ))
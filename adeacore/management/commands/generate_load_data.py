@@ -0,0 +1,82 @@
+"""
+Management-Command zum Erzeugen synthetischer Lastdaten (Profiling).
+
+Verwendung:
+    python manage.py generate_load_data
+    python manage.py generate_load_data --clients 50 --employees 2000 --years 5
+    python manage.py generate_load_data --internal-employees 400 --entries-per-day 4 --seed 7
+
+Erzeugt Mandanten, Lohn-Mitarbeitende, interne Mitarbeitende, Service-Typen,
+Zeiteinträge, Abwesenheiten, Feiertage, Lohnläufe mit Positionen sowie
+Rechnungen mit Positionen per `bulk_create` (siehe `adeacore.load_data`).
+Nur für lokale Datenbanken gedacht – ohne DEBUG ist `--force` nötig.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from adeacore.load_data import LoadDataConfig, LoadDataGenerator, synthetic_data_exists
+
+
+class Command(BaseCommand):
+    help = 'Erzeugt einen grossen synthetischen Datenbestand für Last- und Performance-Tests'
+
+    def add_arguments(self, parser):
+        defaults = LoadDataConfig()
+        parser.add_argument('--clients', type=int, default=defaults.clients, help='Anzahl Mandanten')
+        parser.add_argument('--employees', type=int, default=defaults.employees, help='Anzahl Lohn-Mitarbeitende')
+        parser.add_argument(
+            '--internal-employees',
+            type=int,
+            default=defaults.internal_employees,
+            help='Anzahl interne Mitarbeitende (Zeiterfassung)',
+        )
+        parser.add_argument('--years', type=int, default=defaults.years, help='Anzahl Jahre Historie')
+        parser.add_argument(
+            '--entries-per-day',
+            type=int,
+            default=defaults.entries_per_day,
+            help='Zeiteinträge pro interner Mitarbeitender und Arbeitstag',
+        )
+        parser.add_argument('--end-year', type=int, default=defaults.end_year, help='Letztes Jahr der Historie')
+        parser.add_argument('--seed', type=int, default=defaults.seed, help='Zufalls-Seed (gleicher Seed = gleiche Daten)')
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size, help='Zeilen pro bulk_create')
+        parser.add_argument('--no-payroll', action='store_true', help='Keine Lohnläufe erzeugen')
+        parser.add_argument('--force', action='store_true', help='Auch ohne DEBUG ausführen')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG ist deaktiviert – Lastdaten nur lokal erzeugen (oder --force verwenden).')
+        if options['clients'] < 1 or options['years'] < 1:
+            raise CommandError('--clients und --years müssen mindestens 1 sein.')
+        if synthetic_data_exists():
+            raise CommandError('Synthetische Daten existieren bereits – bitte eine frische Datenbank verwenden.')
+
+        config = LoadDataConfig(
+            seed=options['seed'],
+            clients=options['clients'],
+            employees=options['employees'],
+            internal_employees=options['internal_employees'],
+            years=options['years'],
+            entries_per_day=options['entries_per_day'],
+            end_year=options['end_year'],
+            payroll_history=not options['no_payroll'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f"Erzeuge Lastdaten {config.date_from:%d.%m.%Y} – {config.date_to:%d.%m.%Y} (Seed {config.seed}) ..."
+        )
+
+        started = time.monotonic()
+        generator = LoadDataGenerator(config, log=lambda message: self.stdout.write(f"  {message}"))
+        # Eine Transaktion: deutlich schneller (v.a. SQLite) und bei Abbruch nichts halb angelegt
+        with transaction.atomic():
+            counts = generator.run()
+        duration = time.monotonic() - started
+
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total:,} Zeilen in {duration:.1f}s erzeugt ({total / max(duration, 0.001):,.0f} Zeilen/s)".replace(',', "'")
+        ))
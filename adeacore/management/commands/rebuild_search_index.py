@@ -0,0 +1,47 @@
+"""
+Management-Command: Volltext-Suchindex neu aufbauen.
+
+Verwendung:
+    python manage.py rebuild_search_index                  # alle Typen
+    python manage.py rebuild_search_index --kind note --kind task
+    python manage.py rebuild_search_index --if-empty       # nur, wenn noch nichts indexiert ist
+
+Nötig nach der Einführung der Suche, nach Bulk-Importen ohne `index_objects`
+und zum Aufräumen. `--if-empty` läuft bei jedem Deploy (render.yaml) und baut den
+Index nur beim ersten Mal auf. Siehe `adeacore.search`.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adeacore import search
+from adeacore.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Baut den Volltext-Suchindex aus den Tabellen neu auf'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', help='Nur diesen Typ neu aufbauen (mehrfach möglich)')
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Nur aufbauen, wenn der Index noch leer ist (z.B. beim Deploy)',
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kind']
+        known = [source.kind for source in search.get_sources()]
+        unknown = sorted(set(kinds or []) - set(known))
+        if unknown:
+            raise CommandError(f"Unbekannte Typen: {', '.join(unknown)} (bekannt: {', '.join(known)})")
+
+        if options['if_empty'] and SearchDocument.objects.exists():
+            self.stdout.write('Suchindex bereits aufgebaut – nichts zu tun.')
+            return
+
+        started = time.monotonic()
+        counts = search.rebuild_index(kinds, log=lambda line: self.stdout.write(f'  {line}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Suchindex aufgebaut: {sum(counts.values())} Einträge in {time.monotonic() - started:.1f}s'
+        ))
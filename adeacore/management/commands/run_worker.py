@@ -0,0 +1,86 @@
+"""
+Management-Command: Worker für die Hintergrund-Jobs (DB-Warteschlange).
+
+Verwendung:
+    python manage.py run_worker                 # läuft dauerhaft (z.B. als eigener Dienst)
+    python manage.py run_worker --once          # fällige Jobs abarbeiten, dann beenden (Cronjob)
+    python manage.py run_worker --sleep 5 --max-jobs 100
+
+Mehrere Worker können parallel laufen (Abholen mit select_for_update(skip_locked=True)).
+SIGTERM/SIGINT beenden den Worker nach dem laufenden Job. Siehe `adeacore.jobs`.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from adeacore import jobs
+
+
+class Command(BaseCommand):
+    help = 'Arbeitet Hintergrund-Jobs aus der Datenbank-Warteschlange ab'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Nur fällige Jobs abarbeiten, dann beenden')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Wartezeit in Sekunden bei leerer Warteschlange')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Nach so vielen Jobs beenden (0 = unbegrenzt)')
+
+    def handle(self, *args, **options):
+        if options['sleep'] <= 0:
+            raise CommandError('--sleep muss grösser als 0 sein.')
+
+        jobs.autodiscover()
+        worker = jobs.worker_name()
+        self._stopping = False
+        previous = {signum: signal.signal(signum, self._stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            processed = self._loop(worker, options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'Worker beendet ({processed} Jobs)'))
+
+    def _loop(self, worker, options):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'⚠️  {requeued} hängende Job(s) neu eingereiht'))
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} gestartet'))
+
+        processed = 0
+        last_stale_check = time.monotonic()
+        while not self._stopping:
+            close_old_connections()
+            if time.monotonic() - last_stale_check > jobs.STALE_AFTER.total_seconds() / 2:
+                jobs.requeue_stale()
+                last_stale_check = time.monotonic()
+
+            job = jobs.claim_next(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            started = time.monotonic()
+            self.stdout.write(f'  ▶ {job.name} #{job.pk} (Versuch {job.attempts}/{job.max_attempts})')
+            jobs.run_job(job)
+            job.refresh_from_db()
+            duration = time.monotonic() - started
+            if job.status == job.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {job.name} #{job.pk} erledigt ({duration:.1f}s)'))
+            elif job.status == job.STATUS_QUEUED:
+                self.stdout.write(self.style.WARNING(
+                    f'  ↻ {job.name} #{job.pk} fehlgeschlagen, neuer Versuch ab {job.run_at:%H:%M:%S}'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ {job.name} #{job.pk} fehlgeschlagen'))
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+        return processed
+
+    def _stop(self, signum, frame):
+        # Laufenden Job zu Ende führen, danach beenden
+        self._stopping = True
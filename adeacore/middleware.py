@@ -2,8 +2,9 @@
 Custom Middleware für erweiterte Sicherheit.
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.sessions.models import Session
+from django.utils.functional import SimpleLazyObject
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
@@ -27,27 +28,34 @@ class SessionSecurityMiddleware(MiddlewareMixin):
     def process_request(self, request):
         """
         Prüft Session-Sicherheit bei jeder Anfrage.
+
+        `last_activity` wird nur geschrieben, wenn der letzte Eintrag älter als
+        SESSION_ACTIVITY_WRITE_INTERVAL ist – sonst bleibt die Session unverändert
+        und wird (ohne SESSION_SAVE_EVERY_REQUEST) nicht gespeichert. Der
+        Timeout-Check nutzt den bereits geladenen Session-Wert.
         """
         if not request.user.is_authenticated:
             return None
         
+        now = timezone.now()
+        last_activity = request.session.get('last_activity')
+        if isinstance(last_activity, str):
+            from django.utils.dateparse import parse_datetime
+            last_activity = parse_datetime(last_activity)
+        
         # Prüfe Session-Timeout
-        if 'last_activity' in request.session:
-            last_activity = request.session['last_activity']
-            if isinstance(last_activity, str):
-                from django.utils.dateparse import parse_datetime
-                last_activity = parse_datetime(last_activity)
-            
-            if last_activity:
-                timeout = timedelta(seconds=getattr(settings, "SESSION_COOKIE_AGE", 28800))
-                if timezone.now() - last_activity > timeout:
-                    # Session abgelaufen
-                    from django.contrib.auth import logout
-                    logout(request)
-                    return None
+        if last_activity:
+            timeout = timedelta(seconds=getattr(settings, "SESSION_COOKIE_AGE", 28800))
+            if now - last_activity > timeout:
+                # Session abgelaufen
+                from django.contrib.auth import logout
+                logout(request)
+                return None
         
-        # Aktualisiere letzte Aktivität
-        request.session['last_activity'] = timezone.now().isoformat()
+        # Aktualisiere letzte Aktivität (gebündelt)
+        write_interval = timedelta(seconds=getattr(settings, "SESSION_ACTIVITY_WRITE_INTERVAL", 60))
+        if last_activity is None or now - last_activity >= write_interval:
+            request.session['last_activity'] = now.isoformat()
         
         # IP-Adress-Validierung (optional, kann deaktiviert werden)
         # Prüfe ob IP-Adresse sich geändert hat
@@ -66,5 +74,62 @@ class SessionSecurityMiddleware(MiddlewareMixin):
             request.session['ip_address'] = get_client_ip(request)
         
         return None
-    
-    
+
+
+class PermissionSnapshotMiddleware(MiddlewareMixin):
+    """
+    Hängt den AdeaZeit-Berechtigungs-Snapshot als `request.adeazeit_permissions` an.
+
+    Der Snapshot wird lazy beim ersten Zugriff berechnet (eine Group-Query) und
+    danach von Context-Processors, Mixins und Permission-Helpern wiederverwendet.
+    Die Session wird für die User->Mitarbeiter-Zuordnung (`get_accessible_employee_ids`)
+    bereitgestellt – User und Zuordnung werden erst geladen, wo sie gebraucht werden.
+    Muss nach AuthenticationMiddleware (und SessionSecurityMiddleware) stehen.
+    """
+
+    def process_request(self, request):
+        from adeazeit.permissions import get_permission_snapshot, set_employee_scope_session
+
+        request.adeazeit_permissions = SimpleLazyObject(lambda: get_permission_snapshot(request.user))
+        set_employee_scope_session(getattr(request, "session", None))
+        return None
+
+    def process_response(self, request, response):
+        from adeazeit.permissions import set_employee_scope_session
+
+        set_employee_scope_session(None)
+        return response
+
+
+class RateInputCacheMiddleware:
+    """
+    Aktiviert pro Request einen `adeazeit.timeentry_calc.rate_input_cache()`.
+
+    Gewöhnliche `TimeEntry.save()`-Aufrufe (Formulare, API, Timer) laden
+    Service-Typ, Mitarbeitende, Mandant und Projekt dann einmal pro Request statt
+    pro gespeichertem Eintrag. Der Cache lebt nur bis zum Ende des Requests;
+    Requests ohne TimeEntry-Save lösen keine Query aus.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        from adeazeit.timeentry_calc import rate_input_cache
+
+        with rate_input_cache():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        from adeazeit.timeentry_calc import rate_input_cache
+
+        # sync_to_async kopiert den Kontext: sync Views sehen denselben Cache
+        with rate_input_cache():
+            return await self.get_response(request)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adeacore', '0042_create_cache_table'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Job-Typ')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parameter')),
+                ('status', models.CharField(choices=[('QUEUED', 'Wartend'), ('RUNNING', 'Läuft'), ('DONE', 'Erledigt'), ('FAILED', 'Fehlgeschlagen'), ('CANCELLED', 'Abgebrochen')], default='QUEUED', max_length=20)),
+                ('priority', models.SmallIntegerField(default=0, help_text='Höher = früher', verbose_name='Priorität')),
+                ('run_at', models.DateTimeField(verbose_name='Frühestens ausführen ab')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Versuche')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Max. Versuche')),
+                ('progress_done', models.PositiveIntegerField(default=0)),
+                ('progress_total', models.PositiveIntegerField(default=0)),
+                ('progress_message', models.CharField(blank=True, max_length=255)),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Ergebnis')),
+                ('last_error', models.TextField(blank=True, verbose_name='Letzter Fehler')),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='Erstellt von')),
+            ],
+            options={
+                'verbose_name': 'Hintergrund-Job',
+                'verbose_name_plural': 'Hintergrund-Jobs',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['status', 'priority', 'run_at'], name='adeacore_job_claim_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Volltext-Index ausserhalb des ORM (siehe adeacore.search); andere Datenbanken: icontains
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE adeacore_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('german', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('german', coalesce(body, '')), 'B')) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX adeacore_searchdoc_vector_gin ON adeacore_searchdocument USING GIN (search_vector)"
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+                return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE adeacore_searchdocument_fts USING fts5("
+            "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS adeacore_searchdocument_fts")
+    # PostgreSQL: Spalte und Index verschwinden mit der Tabelle
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adeacore', '0043_job'),
+        ('adeazeit', '0032_rename_task_auftragsdatum_to_eingangsdatum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='Typ')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Objekt-ID')),
+                ('title', models.CharField(blank=True, max_length=255, verbose_name='Titel')),
+                ('body', models.TextField(blank=True, verbose_name='Text')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='Datum')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='adeacore.client', verbose_name='Mandant')),
+                ('employee', models.ForeignKey(blank=True, help_text='Gesetzt = nur für diese Mitarbeiterin und ADMIN/MANAGER sichtbar', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='adeazeit.employeeinternal', verbose_name='Mitarbeiterin')),
+            ],
+            options={
+                'verbose_name': 'Suchindex-Eintrag',
+                'verbose_name_plural': 'Suchindex',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='adeacore_searchdoc_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
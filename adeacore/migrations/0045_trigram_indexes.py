@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# (Index, Tabelle, Spalte) – durchsuchte Felder der Autocomplete-Lookups (adeacore.autocomplete)
+TRIGRAM_INDEXES = [
+    ("adeacore_client_name_trgm", "adeacore_client", "name"),
+    ("adeacore_employee_first_name_trgm", "adeacore_employee", "first_name"),
+    ("adeacore_employee_last_name_trgm", "adeacore_employee", "last_name"),
+    ("adeazeit_employeeinternal_name_trgm", "adeazeit_employeeinternal", "name"),
+    ("adeazeit_employeeinternal_code_trgm", "adeazeit_employeeinternal", "code"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Nur PostgreSQL (pg_trgm); andere Datenbanken nutzen den Python-Index
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adeacore', '0044_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:40
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def creditor_reference(invoice_number):
+    # Kopie von adearechnung.payments.creditor_reference (Stand dieser Migration)
+    body = re.sub(r"[^A-Z0-9]", "", (invoice_number or "").upper())[-21:]
+    if not body:
+        return ""
+    check = 98 - int("".join(str(int(char, 36)) for char in body + "RF00")) % 97
+    return f"RF{check:02d}{body}"
+
+
+def assign_payment_references(apps, schema_editor):
+    # Bestehende Rechnungen: dieselbe Referenz, die Invoice.save() neuen Rechnungen gibt
+    Invoice = apps.get_model("adeacore", "Invoice")
+
+    batch = []
+    for invoice in Invoice.objects.filter(payment_reference="").only("pk", "invoice_number").iterator(chunk_size=500):
+        invoice.payment_reference = creditor_reference(invoice.invoice_number)
+        batch.append(invoice)
+        if len(batch) >= 500:
+            Invoice.objects.bulk_update(batch, ["payment_reference"])
+            batch = []
+    if batch:
+        Invoice.objects.bulk_update(batch, ["payment_reference"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adeacore', '0045_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='payment_reference',
+            field=models.CharField(blank=True, db_index=True, help_text='SCOR-Referenz (RF…) im QR-Zahlteil; Abgleich mit Bankbuchungen (camt)', max_length=27, verbose_name='Zahlungsreferenz'),
+        ),
+        migrations.CreateModel(
+            name='InvoicePayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100, unique=True, verbose_name='Bank-Referenz')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Betrag')),
+                ('booking_date', models.DateField(verbose_name='Buchungsdatum')),
+                ('reference', models.CharField(blank=True, max_length=27, verbose_name='Zahlungsreferenz')),
+                ('debtor_name', models.CharField(blank=True, max_length=255, verbose_name='Zahler')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Importiert von')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='adeacore.invoice', verbose_name='Rechnung')),
+            ],
+            options={
+                'verbose_name': 'Zahlungseingang',
+                'verbose_name_plural': 'Zahlungseingänge',
+                'ordering': ['-booking_date', '-id'],
+            },
+        ),
+        migrations.RunPython(assign_payment_references, migrations.RunPython.noop),
+    ]
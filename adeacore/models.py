@@ -1392,6 +1392,13 @@ class Invoice(models.Model):
         blank=True,
         help_text="Beschreibung der Leistungen",
     )
+    payment_reference = models.CharField(
+        "Zahlungsreferenz",
+        max_length=27,
+        blank=True,
+        db_index=True,
+        help_text="SCOR-Referenz (RF…) im QR-Zahlteil; Abgleich mit Bankbuchungen (camt)",
+    )
     created_by = models.ForeignKey(
         "auth.User",
         on_delete=models.SET_NULL,
@@ -1412,7 +1419,17 @@ class Invoice(models.Model):
         return f"{self.invoice_number} - {self.client.name} ({self.amount} CHF)"
     
     def save(self, *args, **kwargs):
-        """Aktualisiert Zahlungsstatus automatisch."""
+        """Aktualisiert Zahlungsstatus automatisch und vergibt die Zahlungsreferenz."""
+        from adearechnung.payments import creditor_reference
+
+        self.update_payment_status()
+        if not self.payment_reference and self.invoice_number:
+            self.payment_reference = creditor_reference(self.invoice_number)
+        
+        super().save(*args, **kwargs)
+
+    def update_payment_status(self):
+        """Setzt den Zahlungsstatus aus Beträgen und Fälligkeit (auch für bulk_update)."""
         from django.utils import timezone
         from decimal import Decimal
         
@@ -1425,8 +1442,6 @@ class Invoice(models.Model):
             self.payment_status = "UEBERFAELLIG"
         else:
             self.payment_status = "OFFEN"
-        
-        super().save(*args, **kwargs)
 
     def recalculate_amounts_from_items(self):
         """
@@ -1917,3 +1932,205 @@ class InvoiceItem(models.Model):
     def display_title(self):
         return self.title or self.service_type_code or self.description
 
+
+class InvoicePayment(models.Model):
+    """
+    Zahlungseingang aus einem Bankauszug (camt.053/054), einer Rechnung zugeordnet.
+
+    `transaction_id` ist die Referenz der Bank; sie verhindert, dass derselbe
+    Auszug doppelt verbucht wird (siehe `adearechnung.payments`).
+    """
+
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name="payments",
+        verbose_name="Rechnung",
+    )
+    transaction_id = models.CharField(
+        "Bank-Referenz",
+        max_length=100,
+        unique=True,
+    )
+    amount = models.DecimalField(
+        "Betrag",
+        max_digits=10,
+        decimal_places=2,
+    )
+    booking_date = models.DateField(
+        "Buchungsdatum",
+    )
+    reference = models.CharField(
+        "Zahlungsreferenz",
+        max_length=27,
+        blank=True,
+    )
+    debtor_name = models.CharField(
+        "Zahler",
+        max_length=255,
+        blank=True,
+    )
+    imported_by = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Importiert von",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-booking_date", "-id"]
+        verbose_name = "Zahlungseingang"
+        verbose_name_plural = "Zahlungseingänge"
+
+    def __str__(self):
+        return f"{self.invoice.invoice_number}: {self.amount} CHF ({self.booking_date:%d.%m.%Y})"
+
+
+
+class Job(models.Model):
+    """
+    Hintergrund-Job der DB-Warteschlange (siehe `adeacore.jobs`).
+
+    Wird von `manage.py run_worker` abgearbeitet; Fortschritt und Ergebnis stehen
+    direkt in der Zeile. Ergebnisdateien liegen in der Job-Ablage, `result["file"]`
+    enthält nur deren Namen.
+    """
+
+    STATUS_QUEUED = "QUEUED"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+    STATUS_CANCELLED = "CANCELLED"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Wartend"),
+        (STATUS_RUNNING, "Läuft"),
+        (STATUS_DONE, "Erledigt"),
+        (STATUS_FAILED, "Fehlgeschlagen"),
+        (STATUS_CANCELLED, "Abgebrochen"),
+    ]
+    FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+    name = models.CharField("Job-Typ", max_length=100)
+    params = models.JSONField("Parameter", default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    priority = models.SmallIntegerField("Priorität", default=0, help_text="Höher = früher")
+    run_at = models.DateTimeField("Frühestens ausführen ab")
+    attempts = models.PositiveSmallIntegerField("Versuche", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Max. Versuche", default=3)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField("Ergebnis", null=True, blank=True)
+    last_error = models.TextField("Letzter Fehler", blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        verbose_name="Erstellt von",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        verbose_name = "Hintergrund-Job"
+        verbose_name_plural = "Hintergrund-Jobs"
+        indexes = [
+            # Abholen: status=QUEUED, run_at <= jetzt, nach Priorität
+            models.Index(fields=["status", "priority", "run_at"], name="adeacore_job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def progress_percent(self) -> int:
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, int(self.progress_done * 100 / self.progress_total))
+
+    @property
+    def result_file(self) -> str:
+        """Name der Ergebnisdatei in der Job-Ablage (`adeacore.jobs.job_file_storage`), sonst ''."""
+        if self.status != self.STATUS_DONE or not isinstance(self.result, dict):
+            return ""
+        return self.result.get("file") or ""
+
+
+class SearchDocument(models.Model):
+    """
+    Eintrag des Volltext-Suchindex (siehe `adeacore.search`).
+
+    Eine Zeile pro indexiertem Objekt (Mandant, Notiz, Termin, Aufgabe, Zeiteintrag),
+    gepflegt per Signal. Der Volltext-Index selbst liegt ausserhalb des ORM und wird
+    von der Migration angelegt: PostgreSQL `search_vector` (tsvector, GIN-Index),
+    SQLite FTS5-Tabelle `adeacore_searchdocument_fts`.
+    """
+
+    kind = models.CharField("Typ", max_length=20)
+    object_id = models.PositiveBigIntegerField("Objekt-ID")
+    title = models.CharField("Titel", max_length=255, blank=True)
+    body = models.TextField("Text", blank=True)
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Mandant",
+    )
+    employee = models.ForeignKey(
+        "adeazeit.EmployeeInternal",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Mitarbeiterin",
+        help_text="Gesetzt = nur für diese Mitarbeiterin und ADMIN/MANAGER sichtbar",
+    )
+    date = models.DateField("Datum", null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Suchindex-Eintrag"
+        verbose_name_plural = "Suchindex"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="adeacore_searchdoc_object_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
+class RateLimitCounter(models.Model):
+    """
+    Zähler eines Rate-Limit-Fensters (siehe `adeacore.rate_limiting`).
+
+    Wird verwendet, wenn kein Cache mit atomarem `incr` (Redis) konfiguriert ist:
+    `UPDATE ... SET count = count + 1` ist über alle Worker hinweg atomar.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Rate-Limit-Zähler"
+        verbose_name_plural = "Rate-Limit-Zähler"
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
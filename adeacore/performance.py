@@ -0,0 +1,272 @@
+"""
+Query- und Latenz-Messung pro View.
+
+Ziel: die "Performance: N+1 vermeiden"-Kommentare messbar machen.
+- `PerformanceMiddleware` zählt pro Request SQL-Queries, DB-Zeit, Python-Zeit und
+  merkt sich die langsamsten Queries (via `connection.execute_wrapper`, funktioniert
+  auch ohne DEBUG).
+- `PerformanceStatsStore` aggregiert rollierend im Speicher (pro Prozess) und schreibt
+  optional jede Messung als JSON-Zeile (PERFORMANCE_JSONL_PATH).
+- Staff-Report: `management-dashboard/performance/`.
+- Tests: `adeacore.testing.assert_view_query_budgets`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_QUERIES_PER_VIEW = 5
+RECENT_SAMPLES = 1000
+
+
+@dataclass
+class RequestSample:
+    """Messung eines einzelnen Requests."""
+
+    view_name: str
+    path: str
+    method: str
+    status_code: int
+    query_count: int
+    db_time_ms: float
+    python_time_ms: float
+    total_time_ms: float
+    slowest_queries: List[Dict] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return {
+            "view": self.view_name,
+            "path": self.path,
+            "method": self.method,
+            "status": self.status_code,
+            "queries": self.query_count,
+            "db_ms": round(self.db_time_ms, 2),
+            "python_ms": round(self.python_time_ms, 2),
+            "total_ms": round(self.total_time_ms, 2),
+            "slowest": self.slowest_queries,
+        }
+
+
+class QueryRecorder:
+    """execute_wrapper, der Anzahl und Dauer der Queries erfasst."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.slowest: List[Dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.db_time += duration
+            self._track_slowest(sql, duration)
+
+    def _track_slowest(self, sql, duration):
+        if len(self.slowest) < SLOWEST_QUERIES_PER_VIEW or duration > self.slowest[-1]["ms"] / 1000:
+            self.slowest.append({"sql": sql[:500], "ms": round(duration * 1000, 3)})
+            self.slowest.sort(key=lambda q: q["ms"], reverse=True)
+            del self.slowest[SLOWEST_QUERIES_PER_VIEW:]
+
+    @contextmanager
+    def record(self):
+        """Hängt den Recorder an alle Datenbankverbindungen."""
+        wrappers = [connections[alias].execute_wrapper(self) for alias in connections]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            yield self
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+
+class PerformanceStatsStore:
+    """Rollierende Aggregation der Messungen pro View (pro Prozess)."""
+
+    def __init__(self, max_samples: int = RECENT_SAMPLES):
+        self._lock = threading.Lock()
+        self.samples: deque = deque(maxlen=max_samples)
+        self._listeners: List[Callable[[RequestSample], None]] = []
+
+    def add(self, sample: RequestSample) -> None:
+        with self._lock:
+            self.samples.append(sample)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(sample)
+        self._write_jsonl(sample)
+
+    def _write_jsonl(self, sample: RequestSample) -> None:
+        path = getattr(settings, "PERFORMANCE_JSONL_PATH", None)
+        if not path:
+            return
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(sample.as_dict(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Performance-Messung konnte nicht geschrieben werden: {e}")
+
+    @contextmanager
+    def subscribe(self, listener: Callable[[RequestSample], None]):
+        """Registriert einen Listener (z.B. für Query-Budgets in Tests)."""
+        with self._lock:
+            self._listeners.append(listener)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.samples.clear()
+
+    def summary(self) -> List[Dict]:
+        """
+        Aggregierte Kennzahlen pro View, sortiert nach durchschnittlicher Query-Anzahl.
+        """
+        with self._lock:
+            samples = list(self.samples)
+
+        per_view: Dict[str, Dict] = {}
+        for sample in samples:
+            entry = per_view.setdefault(sample.view_name, {
+                "view": sample.view_name,
+                "requests": 0,
+                "queries_total": 0,
+                "queries_max": 0,
+                "db_ms_total": 0.0,
+                "python_ms_total": 0.0,
+                "total_ms_max": 0.0,
+                "slowest": [],
+            })
+            entry["requests"] += 1
+            entry["queries_total"] += sample.query_count
+            entry["queries_max"] = max(entry["queries_max"], sample.query_count)
+            entry["db_ms_total"] += sample.db_time_ms
+            entry["python_ms_total"] += sample.python_time_ms
+            entry["total_ms_max"] = max(entry["total_ms_max"], sample.total_time_ms)
+            entry["slowest"] = sorted(
+                entry["slowest"] + sample.slowest_queries, key=lambda q: q["ms"], reverse=True
+            )[:SLOWEST_QUERIES_PER_VIEW]
+
+        result = []
+        for entry in per_view.values():
+            n = entry["requests"]
+            result.append({
+                "view": entry["view"],
+                "requests": n,
+                "queries_avg": round(entry["queries_total"] / n, 1),
+                "queries_max": entry["queries_max"],
+                "db_ms_avg": round(entry["db_ms_total"] / n, 2),
+                "python_ms_avg": round(entry["python_ms_total"] / n, 2),
+                "total_ms_max": round(entry["total_ms_max"], 2),
+                "slowest": entry["slowest"],
+            })
+        result.sort(key=lambda e: e["queries_avg"], reverse=True)
+        return result
+
+
+# Globale Instanz
+_stats_store = None
+
+
+def get_stats_store() -> PerformanceStatsStore:
+    """Liefert die globale PerformanceStatsStore-Instanz."""
+    global _stats_store
+    if _stats_store is None:
+        _stats_store = PerformanceStatsStore()
+    return _stats_store
+
+
+def resolve_view_name(request) -> Optional[str]:
+    """Klassenname (CBV) bzw. Funktionsname der aufgelösten View."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    func = match.func
+    view_class = getattr(func, "view_class", None)
+    if view_class is not None:
+        return view_class.__name__
+    return getattr(func, "__name__", None) or match.view_name
+
+
+class PerformanceMiddleware:
+    """
+    Misst Queries und Laufzeit pro Request und legt sie im Stats-Store ab.
+
+    Aktiv, wenn PERFORMANCE_MONITORING_ENABLED (Standard: True). Requests ohne
+    aufgelöste View (404, statische Dateien) werden nicht erfasst.
+    Sync und async fähig: unter ASGI bleibt die Kette bis zu den async Views ohne
+    Thread-Wechsel. Die Laufzeit enthält dort auch Wartezeit im Event-Loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "PERFORMANCE_MONITORING_ENABLED", True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        self._add_sample(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, "PERFORMANCE_MONITORING_ENABLED", True):
+            return await self.get_response(request)
+
+        # DB-Verbindungen sind pro Thread: den Recorder in dem Thread anhängen, in dem
+        # sync_to_async (thread_sensitive) die Queries dieses Requests ausführt.
+        recorder = QueryRecorder()
+        recording = recorder.record()
+        started = time.perf_counter()
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        self._add_sample(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def _add_sample(self, request, response, recorder, total):
+        view_name = resolve_view_name(request)
+        if view_name:
+            get_stats_store().add(RequestSample(
+                view_name=view_name,
+                path=request.path,
+                method=request.method,
+                status_code=response.status_code,
+                query_count=recorder.count,
+                db_time_ms=recorder.db_time * 1000,
+                python_time_ms=max(total - recorder.db_time, 0) * 1000,
+                total_time_ms=total * 1000,
+                slowest_queries=recorder.slowest,
+            ))
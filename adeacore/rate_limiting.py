@@ -4,9 +4,13 @@ Rate-Limiting für Login und API-Endpunkte.
 Schützt vor Brute-Force-Angriffen und DDoS.
 """
 
+import math
 import time
-from datetime import datetime, timedelta
+from datetime import timedelta
+from django.conf import settings
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from functools import wraps
@@ -17,24 +21,118 @@ from adeacore.http import get_client_ip
 logger = logging.getLogger(__name__)
 
 
+class CacheCounterStore:
+    """Zähler im Django-Cache – nur mit atomarem incr (Redis, Memcached) korrekt."""
+
+    def incr(self, key: str, timeout: int) -> int:
+        """Atomares Hochzählen; legt den Zähler bei Bedarf an."""
+        cache.add(key, 0, timeout=timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Zähler ist zwischen add() und incr() abgelaufen
+            cache.add(key, 1, timeout=timeout)
+            return 1
+
+    def decr(self, key: str) -> None:
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def get(self, key: str) -> int:
+        return cache.get(key, 0)
+
+    def delete_many(self, keys) -> None:
+        cache.delete_many(keys)
+
+
+class DatabaseCounterStore:
+    """
+    Zähler als Zeilen von `RateLimitCounter`.
+
+    `UPDATE ... SET count = count + 1` sperrt die Zeile bis zum Commit; das Lesen
+    in derselben Transaktion liefert deshalb genau den eigenen Stand – atomar über
+    alle Worker, auch ohne Redis. Abgelaufene Fenster werden beim Anlegen eines
+    neuen Zählers gelöscht.
+    """
+
+    def incr(self, key: str, timeout: int) -> int:
+        from adeacore.models import RateLimitCounter
+
+        counters = RateLimitCounter.objects.filter(key=key)
+        with transaction.atomic():
+            if counters.update(count=F("count") + 1):
+                return counters.values_list("count", flat=True).get()
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(key=key, count=1, expires_at=now + timedelta(seconds=timeout))
+            except IntegrityError:
+                # Parallel angelegt -> dessen Zeile hochzählen
+                counters.update(count=F("count") + 1)
+                return counters.values_list("count", flat=True).get()
+            RateLimitCounter.objects.filter(expires_at__lt=now).delete()
+            return 1
+
+    def decr(self, key: str) -> None:
+        from adeacore.models import RateLimitCounter
+
+        RateLimitCounter.objects.filter(key=key, count__gt=0).update(count=F("count") - 1)
+
+    def get(self, key: str) -> int:
+        from adeacore.models import RateLimitCounter
+
+        return (
+            RateLimitCounter.objects.filter(key=key, expires_at__gt=timezone.now())
+            .values_list("count", flat=True)
+            .first()
+        ) or 0
+
+    def delete_many(self, keys) -> None:
+        from adeacore.models import RateLimitCounter
+
+        RateLimitCounter.objects.filter(key__in=keys).delete()
+
+
+COUNTER_STORES = {"cache": CacheCounterStore(), "db": DatabaseCounterStore()}
+
+
 class RateLimiter:
     """
     Rate-Limiter für verschiedene Endpunkte.
     
-    Verwendet Django-Cache für Speicherung der Rate-Limit-Daten.
+    Algorithmus: Sliding-Window-Counter (festes Zeitfenster mit Interpolation).
+    Pro Schlüssel werden nur zwei Integer-Zähler gehalten (aktuelles und
+    vorheriges Fenster), die atomar hochgezählt werden.
+    Die Anzahl Anfragen im gleitenden Fenster wird geschätzt als:
+
+        vorheriges_fenster * (1 - verstrichener_anteil) + aktuelles_fenster
+
+    Speicher der Zähler (Setting RATE_LIMIT_STORE): "cache" nur mit Redis/Memcached
+    (atomares incr über alle Gunicorn-Worker), sonst "db" (`DatabaseCounterStore`).
     """
     
-    def __init__(self, max_requests: int = 5, window_seconds: int = 300):
+    def __init__(self, max_requests: int = 5, window_seconds: int = 300, name: str = "default"):
         """
         Initialisiert Rate-Limiter.
         
         Args:
             max_requests: Maximale Anzahl Anfragen im Zeitfenster
             window_seconds: Zeitfenster in Sekunden (Standard: 5 Minuten)
+            name: Namensraum der Schlüssel (trennt z.B. Login- und API-Limits)
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-    
+        self.name = name
+
+    @property
+    def store(self):
+        return COUNTER_STORES[getattr(settings, "RATE_LIMIT_STORE", "db")]
+
+    def _cache_key(self, key: str, window: int) -> str:
+        return f"rate_limit:{self.name}:{key}:{window}"
+
     def is_allowed(self, key: str) -> tuple[bool, int]:
         """
         Prüft ob Anfrage erlaubt ist.
@@ -43,41 +141,53 @@ class RateLimiter:
             key: Eindeutiger Schlüssel (z.B. IP-Adresse oder Username)
             
         Returns:
-            Tuple (is_allowed, remaining_requests)
+            Tuple (is_allowed, remaining_requests) bzw.
+            (False, retry_after_seconds) falls das Limit überschritten ist
         """
-        cache_key = f"rate_limit:{key}"
-        now = timezone.now()
-        
-        # Hole aktuelle Anfragen
-        requests = cache.get(cache_key, [])
-        
-        # Entferne alte Anfragen (älter als Zeitfenster)
-        cutoff_time = now - timedelta(seconds=self.window_seconds)
-        requests = [req_time for req_time in requests if req_time > cutoff_time]
-        
+        now = time.time()
+        window = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+
+        store = self.store
+        current_key = self._cache_key(key, window)
+        # Zwei Fenster lang behalten, da der Zähler noch als "vorheriges Fenster" gebraucht wird
+        current = store.incr(current_key, self.window_seconds * 2)
+        previous = store.get(self._cache_key(key, window - 1))
+
+        estimated = previous * (1 - elapsed) + current
+
         # Prüfe ob Limit überschritten
-        if len(requests) >= self.max_requests:
-            # Berechne verbleibende Zeit bis nächste Anfrage möglich
-            oldest_request = min(requests)
-            retry_after = int((oldest_request + timedelta(seconds=self.window_seconds) - now).total_seconds())
-            return False, retry_after
+        if estimated > self.max_requests:
+            # Abgelehnte Anfrage nicht mitzählen
+            store.decr(current_key)
+            return False, self._retry_after(previous, current - 1, elapsed)
         
-        # Füge aktuelle Anfrage hinzu
-        requests.append(now)
-        cache.set(cache_key, requests, timeout=self.window_seconds)
-        
-        remaining = self.max_requests - len(requests)
+        remaining = max(self.max_requests - math.ceil(estimated), 0)
         return True, remaining
+
+    def _retry_after(self, previous: int, current: int, elapsed: float) -> int:
+        """Sekunden, bis eine weitere Anfrage wieder unter das Limit fällt (current ohne diese Anfrage)."""
+        window = self.window_seconds
+        if current < self.max_requests and previous > 0:
+            # Noch im aktuellen Fenster: warten, bis der Anteil des Vorfensters genug gesunken ist
+            fraction = 1 - (self.max_requests - current - 1) / previous
+            wait = (fraction - elapsed) * window
+        else:
+            # Erst im nächsten Fenster, sobald das jetzige Fenster genug "ausgeblendet" ist
+            wait = (1 - elapsed) * window
+            if current > 0:
+                wait += max(1 - (self.max_requests - 1) / current, 0) * window
+        return max(math.ceil(wait), 1)
     
     def reset(self, key: str):
         """Setzt Rate-Limit für einen Schlüssel zurück."""
-        cache_key = f"rate_limit:{key}"
-        cache.delete(cache_key)
+        window = int(time.time() // self.window_seconds)
+        self.store.delete_many([self._cache_key(key, window), self._cache_key(key, window - 1)])
 
 
 # Globale Rate-Limiter-Instanzen
-login_rate_limiter = RateLimiter(max_requests=5, window_seconds=300)  # 5 Versuche in 5 Minuten
-api_rate_limiter = RateLimiter(max_requests=100, window_seconds=60)  # 100 Anfragen pro Minute
+login_rate_limiter = RateLimiter(max_requests=5, window_seconds=300, name="login")  # 5 Versuche in 5 Minuten
+api_rate_limiter = RateLimiter(max_requests=100, window_seconds=60, name="api")  # 100 Anfragen pro Minute
 
 
 def rate_limit_login(view_func):
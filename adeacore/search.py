@@ -0,0 +1,332 @@
+"""
+Volltext-Suche über Mandanten, Notizen, Termine, Aufgaben und Zeiteinträge.
+
+- Index: `SearchDocument` (eine Zeile pro Objekt: Titel, Text, Mandant, Mitarbeiterin).
+  Die Apps melden ihre Modelle mit `register_search_source(...)` an (in ihren
+  `signals.py`); post_save/post_delete aktualisieren den Index nach dem Commit, einmal
+  pro Transaktion und Objekt. Bulk-Writes ohne Signale rufen `index_objects` selbst auf.
+- Volltext: PostgreSQL `search_vector` (tsvector, Konfiguration "german", Titel
+  gewichtet A, Text B) mit GIN-Index; SQLite FTS5-Tabelle (unicode61, ohne Akzente)
+  mit bm25-Ranking. Beide legt die Migration 0044 an. Fehlt beides (z.B. SQLite ohne
+  FTS5), wird mit `icontains` gesucht.
+- Suchbegriffe werden als Präfixe UND-verknüpft: "Steuererkl 2024" findet
+  "Steuererklärung 2024".
+- Verschlüsselte Felder (Adresse, E-Mail, ...) werden nicht indexiert, sonst läge
+  ihr Klartext im Index.
+
+Bestehende Daten indexiert `manage.py rebuild_search_index`.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.text import Truncator
+
+FTS_TABLE = "adeacore_searchdocument_fts"
+TS_CONFIG = "german"
+DEFAULT_LIMIT = 50
+MAX_TERMS = 8
+BATCH_SIZE = 500
+SNIPPET_LENGTH = 160
+
+_TERM_RE = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """
+    Ein indexiertes Modell.
+
+    `build(obj)` liefert die Index-Felder (title, body, client_id, employee_id, date);
+    ohne Titel und Text wird das Objekt nicht indexiert. `url(doc)` baut den Link des
+    Treffers aus dem `SearchDocument`.
+    """
+
+    kind: str
+    label: str
+    model: Any
+    build: Callable[[Any], Dict[str, Any]]
+    url: Callable[[Any], str]
+
+
+_SOURCES: Dict[str, SearchSource] = {}
+_SOURCES_BY_MODEL: Dict[Any, SearchSource] = {}
+
+
+def register_search_source(model, *, kind: str, label: str, build, url) -> SearchSource:
+    """Meldet ein Modell für den Suchindex an und verbindet die Signale (beim App-Start)."""
+    from django.db.models.signals import post_delete, post_save
+
+    source = SearchSource(kind=kind, label=label, model=model, build=build, url=url)
+    _SOURCES[kind] = source
+    _SOURCES_BY_MODEL[model] = source
+    uid = f"search_index:{kind}"
+    post_save.connect(_index_sender, sender=model, dispatch_uid=uid)
+    post_delete.connect(_index_sender, sender=model, dispatch_uid=uid)
+    return source
+
+
+def get_sources() -> List[SearchSource]:
+    return list(_SOURCES.values())
+
+
+def _index_sender(sender, instance, **kwargs) -> None:
+    index_objects(sender, [instance.pk])
+
+
+# ---------------------------------------------------------------------------
+# Index pflegen
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _fts5_available(alias: str) -> bool:
+    from django.db import connections
+
+    return FTS_TABLE in connections[alias].introspection.table_names()
+
+
+def _backend() -> str:
+    """"postgresql", "sqlite" (FTS5) oder "like"."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite" and _fts5_available(connection.alias):
+        return "sqlite"
+    return "like"
+
+
+class _IndexAfterCommit:
+    """on_commit-Callback mit den in der Transaktion geänderten Objekten; `done` wie in http_cache."""
+
+    def __init__(self):
+        self.pending: Dict[Any, set] = {}
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for model, pks in self.pending.items():
+            update_index(model, pks)
+
+
+def index_objects(model, pks: Iterable[int]) -> None:
+    """
+    Aktualisiert die Index-Einträge der Objekte (angelegt, geändert oder gelöscht).
+
+    In einer Transaktion erst nach dem Commit und gesammelt: ein Import mit tausend
+    Zeiteinträgen schreibt den Index in wenigen Bulk-Queries statt pro Zeile.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks or model not in _SOURCES_BY_MODEL:
+        return
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        update_index(model, pks)
+        return
+    # Nach einem Rollback sind die Callbacks verworfen -> dann neu registrieren
+    for _, func, _ in conn.run_on_commit:
+        if isinstance(func, _IndexAfterCommit) and not func.done:
+            func.pending.setdefault(model, set()).update(pks)
+            return
+    callback = _IndexAfterCommit()
+    callback.pending[model] = set(pks)
+    transaction.on_commit(callback)
+
+
+def _documents(source: SearchSource, objs) -> List:
+    from adeacore.models import SearchDocument
+
+    documents = []
+    for obj in objs:
+        fields = source.build(obj)
+        title = Truncator(fields.get("title") or "").chars(255)
+        body = fields.get("body") or ""
+        if not (title.strip() or body.strip()):
+            continue
+        documents.append(SearchDocument(
+            kind=source.kind,
+            object_id=obj.pk,
+            title=title,
+            body=body,
+            client_id=fields.get("client_id"),
+            employee_id=fields.get("employee_id"),
+            date=fields.get("date"),
+        ))
+    return documents
+
+
+def _delete_fts_rows(where_sql: str, params: Sequence) -> None:
+    if _backend() == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM adeacore_searchdocument WHERE {where_sql})",
+                params,
+            )
+
+
+def _insert_fts_rows(documents) -> None:
+    if _backend() == "sqlite" and documents:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [(doc.pk, doc.title, doc.body) for doc in documents],
+            )
+
+
+def update_index(model, pks: Iterable[int]) -> int:
+    """
+    Schreibt die Index-Einträge der Objekte neu (liest sie dafür frisch aus der DB).
+
+    Nicht (mehr) vorhandene Objekte verlieren ihren Eintrag. Liefert die Anzahl
+    geschriebener Einträge.
+    """
+    from adeacore.models import SearchDocument
+
+    source = _SOURCES_BY_MODEL[model]
+    pks = sorted(pks)
+    written = 0
+    for start in range(0, len(pks), BATCH_SIZE):
+        batch = pks[start:start + BATCH_SIZE]
+        documents = _documents(source, model._base_manager.filter(pk__in=batch))
+        with transaction.atomic():
+            existing = SearchDocument.objects.filter(kind=source.kind, object_id__in=batch)
+            placeholders = ", ".join(["%s"] * len(batch))
+            _delete_fts_rows(f"kind = %s AND object_id IN ({placeholders})", [source.kind, *batch])
+            existing.delete()
+            SearchDocument.objects.bulk_create(documents)
+            _insert_fts_rows(documents)
+        written += len(documents)
+    return written
+
+
+def rebuild_index(kinds: Optional[Iterable[str]] = None, log: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+    """Baut den Index (für die angegebenen Typen oder alle) aus den Tabellen neu auf."""
+    from adeacore.models import SearchDocument
+
+    kinds = list(kinds) if kinds else list(_SOURCES)
+    counts: Dict[str, int] = {}
+    for kind in kinds:
+        source = _SOURCES[kind]
+        with transaction.atomic():
+            _delete_fts_rows("kind = %s", [kind])
+            SearchDocument.objects.filter(kind=kind).delete()
+        pks = list(source.model._base_manager.order_by("pk").values_list("pk", flat=True))
+        counts[kind] = update_index(source.model, pks)
+        if log:
+            log(f"{source.label}: {counts[kind]} Einträge")
+    if _backend() == "sqlite" and set(kinds) == set(_SOURCES):
+        # Verwaiste Zeilen (z.B. per Cascade gelöschte Einträge) entfernen
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM adeacore_searchdocument)")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Suchen
+# ---------------------------------------------------------------------------
+
+def parse_terms(query: str) -> List[str]:
+    """Suchbegriffe (Wörter, klein geschrieben, ohne Duplikate), höchstens MAX_TERMS."""
+    terms: List[str] = []
+    for term in _TERM_RE.findall((query or "").lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def visible_documents(user):
+    """Index-Einträge, die der User sehen darf (MITARBEITER: nur eigene Aufgaben/Zeiteinträge)."""
+    from adeacore.models import SearchDocument
+    from adeazeit.permissions import get_accessible_employee_ids
+
+    documents = SearchDocument.objects.all()
+    employee_ids = get_accessible_employee_ids(user)
+    if employee_ids is not None:
+        documents = documents.filter(Q(employee__isnull=True) | Q(employee_id__in=employee_ids))
+    return documents
+
+
+def _ranked_ids_postgresql(documents, terms: List[str], limit: int) -> List[int]:
+    from django.db.models import BooleanField, FloatField
+    from django.db.models.expressions import RawSQL
+
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    column = '"adeacore_searchdocument"."search_vector"'
+    return list(
+        documents.alias(
+            matches=RawSQL(f"{column} @@ to_tsquery(%s, %s)", (TS_CONFIG, tsquery), output_field=BooleanField()),
+        )
+        .filter(matches=True)
+        .annotate(rank=RawSQL(f"ts_rank({column}, to_tsquery(%s, %s))", (TS_CONFIG, tsquery), output_field=FloatField()))
+        .order_by("-rank", "-updated_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+
+
+def _ranked_ids_sqlite(documents, terms: List[str], limit: int) -> List[int]:
+    match = " ".join(f'"{term}"*' for term in terms)
+    visible_sql, visible_params = documents.values("pk").query.sql_with_params()
+    # bm25: kleiner = besser; Titel zählt zehnfach
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({visible_sql}) "
+        f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *visible_params, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _ranked_ids_like(documents, terms: List[str], limit: int) -> List[int]:
+    query = Q()
+    for term in terms:
+        query &= Q(title__icontains=term) | Q(body__icontains=term)
+    return list(documents.filter(query).order_by("-updated_at").values_list("pk", flat=True)[:limit])
+
+
+def _snippet(text: str, terms: List[str]) -> str:
+    text = " ".join(text.split())
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4) if positions else 0
+    snippet = Truncator(text[start:]).chars(SNIPPET_LENGTH)
+    return f"…{snippet}" if start else snippet
+
+
+def search(user, query: str, *, kinds: Optional[Sequence[str]] = None, limit: int = DEFAULT_LIMIT) -> List:
+    """
+    Sucht im Index und liefert die Treffer nach Relevanz (zwei Queries).
+
+    Die `SearchDocument`-Objekte tragen zusätzlich `label` (Typ), `url`,
+    `display_title` und `snippet` (Textausschnitt um den ersten Suchbegriff).
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    documents = visible_documents(user)
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    documents = documents.filter(kind__in=list(_SOURCES))
+
+    ranked_ids = {
+        "postgresql": _ranked_ids_postgresql,
+        "sqlite": _ranked_ids_sqlite,
+        "like": _ranked_ids_like,
+    }[_backend()](documents, terms, limit)
+
+    by_id = documents.model.objects.select_related("client").in_bulk(ranked_ids)
+    hits = []
+    for pk in ranked_ids:
+        doc = by_id.get(pk)
+        if doc is None:
+            continue
+        source = _SOURCES[doc.kind]
+        doc.label = source.label
+        doc.url = source.url(doc)
+        doc.display_title = doc.title or Truncator(" ".join(doc.body.split())).chars(80)
+        doc.snippet = _snippet(doc.body, terms)
+        hits.append(doc)
+    return hits
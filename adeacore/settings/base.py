@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'adeacore.performance.PerformanceMiddleware',  # Query-Anzahl/Latenz pro View
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,6 +44,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'adeacore.middleware.SessionSecurityMiddleware',  # Session-Sicherheit
+    'adeacore.middleware.PermissionSnapshotMiddleware',  # Rollen/Rechte einmal pro Request
+    'adeacore.middleware.RateInputCacheMiddleware',  # Satz-Eingaben der TimeEntry-Saves pro Request
 ]
 
 ROOT_URLCONF = 'adeacore.urls'
@@ -109,15 +112,98 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Backups (adeacore.backup): auf persistentem oder externem Speicher, sonst löscht ein
+# Redeploy bzw. das Ende des Cron-Containers jede Sicherung (render.yaml: Disk des Workers)
+BACKUP_DIR = Path(os.environ.get('ADEATOOLS_BACKUP_DIR', '') or BASE_DIR / 'backups')
+
+# Ergebnisdateien der Hintergrund-Jobs (Lohnausweise, Rechnungs-PDFs als ZIP): der Worker
+# schreibt, der Web-Service liefert sie über /jobs/<id>/download/ aus – beide brauchen
+# dieselbe Ablage (gemeinsames Volume über ADEATOOLS_JOB_FILES_DIR oder Object Storage,
+# siehe production.py)
+JOB_FILES_DIR = Path(os.environ.get('ADEATOOLS_JOB_FILES_DIR', '') or BASE_DIR / 'job_files')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'jobs': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': JOB_FILES_DIR},
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# - REDIS_URL gesetzt: Redis für "default" und "shared" (gemeinsam für alle Worker,
+#   Invalidierungen wirken sofort überall; benötigt das Paket `redis`)
+# - sonst "default" nach ADEATOOLS_CACHE_BACKEND: "locmem" (Standard, pro Prozess),
+#   "file" (Verzeichnis ADEATOOLS_CACHE_DIR) oder "db". Lokal kein DB-Cache als Standard:
+#   jeder Treffer wäre eine Query (Timer-Zustand, Tabellen-Versionen, Rollups).
+#   Production ohne REDIS_URL nutzt "db" und lehnt "locmem" ab (production.py).
+# - "shared": Daten, die über alle Worker zusammenlaufen müssen und gebündelt
+#   geschrieben werden (Cache-Statistik) – ohne Redis in der Tabelle CACHE_TABLE_NAME
+CACHE_TABLE_NAME = 'adeatools_cache'
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('ADEATOOLS_CACHE_BACKEND', 'locmem').lower()
+
+_DB_CACHE = {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': CACHE_TABLE_NAME,
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+}
+
+if REDIS_URL:
+    _REDIS_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'adeatools',
+    }
+    CACHES = {'default': _REDIS_CACHE, 'shared': _REDIS_CACHE}
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('ADEATOOLS_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+        'shared': _DB_CACHE,
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {'default': _DB_CACHE, 'shared': _DB_CACHE}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'shared': _DB_CACHE,
+    }
+
+# Rate-Limit-Zähler (adeacore.rate_limiting): "cache" braucht ein atomares incr über
+# alle Worker (Redis), sonst atomare UPDATEs auf der Tabelle RateLimitCounter ("db")
+RATE_LIMIT_STORE = os.environ.get('ADEATOOLS_RATE_LIMIT_STORE', 'cache' if REDIS_URL else 'db').lower()
+
+# Performance-Messung (adeacore.performance): Queries/Latenz pro View
+PERFORMANCE_MONITORING_ENABLED = os.environ.get('ADEATOOLS_PERFORMANCE_MONITORING', 'true').lower() == 'true'
+PERFORMANCE_JSONL_PATH = os.environ.get('ADEATOOLS_PERFORMANCE_JSONL', '') or None
+
 # Session Security (Swiss Banking Standard)
 # Session-Timeout: 2 Stunden für produktive Arbeit (Vertec-Analog)
 # Wird automatisch verlängert durch Heartbeat während aktiver Eingabe
 SESSION_COOKIE_AGE = 7200  # 2 Stunden (angepasst für längere Eingaben)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True  # Verlängert Session bei jedem Request
+# Kein Speichern bei jedem Request: SessionSecurityMiddleware schreibt `last_activity`
+# (und verlängert damit die Session) höchstens alle SESSION_ACTIVITY_WRITE_INTERVAL Sekunden.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_ACTIVITY_WRITE_INTERVAL = int(os.environ.get('ADEATOOLS_SESSION_ACTIVITY_WRITE_INTERVAL', '60'))
+
+# Session-Engine: "db" (Standard), "cached_db" (Lesen aus dem Cache, Schreiben in DB)
+# oder "signed_cookies" (keine Server-Speicherung; Logout kann Cookies anderer Geräte
+# nicht serverseitig ungültig machen)
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}.get(os.environ.get('ADEATOOLS_SESSION_ENGINE', 'db').lower(), 'django.contrib.sessions.backends.db')
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Strict'  # Strenger als 'Lax' für besseren CSRF-Schutz
 CSRF_COOKIE_HTTPONLY = True
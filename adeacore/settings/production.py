@@ -43,23 +43,65 @@ else:
         '127.0.0.1',
     ]
 
+# Läuft der Prozess unter ASGI (gunicorn + Uvicorn-Worker, siehe render.yaml)?
+ASGI_SERVER = os.environ.get('DJANGO_ASGI', '').lower() in ('1', 'true', 'yes')
+
 # Database - PostgreSQL
 try:
     import dj_database_url
     DATABASE_URL = os.environ.get('DATABASE_URL')
     if DATABASE_URL:
         DATABASES = {
-            'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+            # Unter ASGI (DJANGO_ASGI=1) keine persistenten Verbindungen: sync_to_async
+            # nutzt einen Thread pro Request, jede offene Verbindung bliebe sonst liegen.
+            'default': dj_database_url.parse(DATABASE_URL, conn_max_age=0 if ASGI_SERVER else 600)
         }
     else:
         raise ValueError("DATABASE_URL nicht gesetzt für Production!")
 except ImportError:
     raise ImproperlyConfigured("dj-database-url benötigt für Production!")
 
+# Ohne Redis: Datenbank-Cache als Standard. Mitarbeiter-Zuordnung, Tabellen-Versionen
+# (ETag/304) und Timer-Zustand müssen alle Web-Worker, den Job-Worker und die Cron-Jobs
+# erreichen; ein Cache pro Prozess (locmem) ist deshalb in Production nicht zulässig.
+if not REDIS_URL:
+    CACHE_BACKEND = os.environ.get('ADEATOOLS_CACHE_BACKEND', 'db').lower()
+    if CACHE_BACKEND == 'locmem':
+        raise ImproperlyConfigured(
+            "ADEATOOLS_CACHE_BACKEND=locmem ist pro Prozess und in Production nicht zulässig. "
+            "REDIS_URL setzen oder ADEATOOLS_CACHE_BACKEND=db verwenden."
+        )
+    if CACHE_BACKEND == 'db':
+        CACHES = {'default': CACHES['shared'], 'shared': CACHES['shared']}
+
+# Job-Ergebnisdateien: Web-Service und Worker laufen auf Render in getrennten Containern
+# ohne gemeinsame Disk, deshalb S3-kompatibler Object Storage (django-storages), sobald
+# ein Bucket gesetzt ist. Zugangsdaten: AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY.
+JOB_FILES_BUCKET = os.environ.get('ADEATOOLS_JOB_FILES_BUCKET', '')
+if JOB_FILES_BUCKET:
+    STORAGES['jobs'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': JOB_FILES_BUCKET,
+            'endpoint_url': os.environ.get('ADEATOOLS_JOB_FILES_ENDPOINT') or None,
+            'location': 'jobs',
+            'default_acl': 'private',
+            'file_overwrite': False,
+        },
+    }
+elif not os.environ.get('ADEATOOLS_JOB_FILES_DIR'):
+    import warnings
+    warnings.warn(
+        "Weder ADEATOOLS_JOB_FILES_BUCKET noch ADEATOOLS_JOB_FILES_DIR gesetzt - Job-Ergebnisdateien "
+        "liegen lokal im Container und sind für den Web-Service nicht abrufbar.",
+        UserWarning
+    )
+
 # WhiteNoise Middleware für statische Dateien
 try:
     import whitenoise
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    # Sync und async fähige Variante, damit die Kette unter ASGI async bleibt
+    MIDDLEWARE.insert(1, 'adeacore.static_files.AsyncWhiteNoiseMiddleware')
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 except ImportError:
     raise ImproperlyConfigured("WhiteNoise benötigt für Production!")
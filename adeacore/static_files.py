@@ -0,0 +1,40 @@
+"""
+WhiteNoise für ASGI.
+
+`WhiteNoiseMiddleware` ist nur sync-fähig: unter ASGI würde Django deshalb die ganze
+Middleware-Kette (und damit auch die async Views) in einem Thread pro Request
+ausführen. Diese Variante ist sync und async fähig – statische Dateien werden wie
+bisher von WhiteNoise ausgeliefert (Lookup im Speicher, ohne autorefresh kein I/O),
+alle anderen Requests gehen ohne Thread-Wechsel weiter.
+
+Nur in Production aktiv (whitenoise ist dort installiert), siehe settings/production.py.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+def _not_static(request):
+    return None
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        # WhiteNoise liefert für Nicht-Static-Pfade das Ergebnis von get_response -> None
+        super().__init__(_not_static)
+        self._get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = super().__call__(request)
+        return response if response is not None else self._get_response(request)
+
+    async def __acall__(self, request):
+        response = super().__call__(request)
+        return response if response is not None else await self._get_response(request)
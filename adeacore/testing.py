@@ -0,0 +1,78 @@
+"""
+Test-Helper: Query-Budgets pro View, temporäre Job-Ablage.
+
+Verwendung:
+    from adeacore.testing import assert_view_query_budgets
+
+    with assert_view_query_budgets({"PayrollRecordDetailView": 8}):
+        self.client.get(url)
+
+Alle während des Blocks von `PerformanceMiddleware` gemessenen Requests einer
+View mit Budget werden geprüft; Überschreitungen (oder eine nie aufgerufene View)
+lassen den Test mit AssertionError fehlschlagen.
+
+`temporary_job_storage()` legt die Job-Ablage (settings.STORAGES["jobs"]) für die
+Dauer des Blocks in ein temporäres Verzeichnis.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+from django.conf import settings
+from django.test import override_settings
+
+from adeacore.performance import get_stats_store
+
+
+@contextmanager
+def assert_view_query_budgets(budgets: Dict[str, int], *, require_all: bool = True):
+    """
+    Prüft, dass jede View höchstens `budgets[view]` Queries pro Request ausführt.
+
+    Args:
+        budgets: {View-Name: max. Queries}, View-Name = Klassenname bzw. Funktionsname
+        require_all: Fehler, falls eine View mit Budget im Block nicht aufgerufen wurde
+    """
+    samples = []
+
+    def listener(sample):
+        if sample.view_name in budgets:
+            samples.append(sample)
+
+    with get_stats_store().subscribe(listener):
+        yield samples
+
+    violations = []
+    for sample in samples:
+        budget = budgets[sample.view_name]
+        if sample.query_count > budget:
+            slowest = "\n".join(f"    {q['ms']}ms  {q['sql']}" for q in sample.slowest_queries)
+            violations.append(
+                f"{sample.view_name} ({sample.method} {sample.path}): "
+                f"{sample.query_count} Queries > Budget {budget}\n{slowest}"
+            )
+
+    if require_all:
+        seen = {sample.view_name for sample in samples}
+        for view_name in budgets:
+            if view_name not in seen:
+                violations.append(f"{view_name}: wurde nicht aufgerufen")
+
+    if violations:
+        raise AssertionError("Query-Budget überschritten:\n" + "\n".join(violations))
+
+
+@contextmanager
+def temporary_job_storage():
+    """Job-Ablage in einem temporären Verzeichnis; liefert dessen Pfad."""
+    with tempfile.TemporaryDirectory(prefix="adea_job_files_") as location:
+        storages = {
+            **settings.STORAGES,
+            "jobs": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": location}},
+        }
+        with override_settings(STORAGES=storages):
+            yield Path(location)
@@ -0,0 +1,1155 @@
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from adeacore.backup import BackupError, BackupManager, BackupTimeBudgetExceeded
+from adeacore.models import Client
+from adeacore.rate_limiting import RateLimiter
+
+
+class BackupManagerTest(TransactionTestCase):
+    """Tests für Backup-Erstellung und -Prüfung (ohne umschliessende Transaktion, wie im Cronjob)."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='adea_backup_test_'))
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.manager = BackupManager(backup_dir=self.tmp_dir)
+        Client.objects.create(name="Backup Test AG", client_type="FIRMA")
+
+    def test_create_backup_writes_metrics(self):
+        """Test: Backup enthält Datenbank-Snapshot sowie Dauer und Grösse in den Metadaten."""
+        backup_path = self.manager.create_backup(backup_type='manual')
+
+        self.assertTrue((backup_path / 'database' / 'db.sqlite3').exists())
+        metadata = self.manager.list_backups()[0]
+        self.assertEqual(metadata['path'], backup_path)
+        self.assertGreater(metadata['size_bytes'], 0)
+        self.assertGreater(metadata['database_size_bytes'], 0)
+        self.assertIn('duration_seconds', metadata)
+
+    def test_create_backup_time_budget_exceeded(self):
+        """Test: Überschrittenes Zeitbudget bricht ab und hinterlässt kein Backup."""
+        with self.assertRaises(BackupTimeBudgetExceeded):
+            self.manager.create_backup(backup_type='manual', time_budget=-1)
+        self.assertEqual(list(self.tmp_dir.iterdir()), [])
+
+    def test_verify_backup_counts_rows(self):
+        """Test: verify prüft Integrität und zählt Zeilen pro Modell."""
+        backup_path = self.manager.create_backup(backup_type='manual')
+
+        result = self.manager.verify_backup(backup_path)
+
+        self.assertTrue(result['ok'], result['errors'])
+        self.assertEqual(result['integrity'], ['ok'])
+        self.assertEqual(result['row_counts']['adeacore.Client'], 1)
+
+    def test_verify_backup_detects_missing_table(self):
+        """Test: Fehlende Tabellen in der Sicherung werden gemeldet."""
+        backup_path = self.manager.create_backup(backup_type='manual')
+        conn = sqlite3.connect(str(backup_path / 'database' / 'db.sqlite3'))
+        conn.execute('DROP TABLE adeacore_clientnote')
+        conn.commit()
+        conn.close()
+
+        result = self.manager.verify_backup(backup_path)
+
+        self.assertFalse(result['ok'])
+        self.assertTrue(any('adeacore_clientnote' in e for e in result['errors']))
+
+    def test_missing_pg_dump_fails_backup(self):
+        """Test: Ohne pg_dump kein "erfolgreiches" Backup ohne Datenbank – der Command endet mit Fehler."""
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch('adeacore.backup.shutil.which', return_value=None):
+            with self.assertRaisesMessage(BackupError, 'pg_dump nicht gefunden'):
+                self.manager.create_backup(backup_type='manual')
+            with mock.patch('adeacore.management.commands.backup.get_backup_manager', return_value=self.manager):
+                with self.assertRaises(CommandError):
+                    call_command('backup', 'create', '--no-low-priority', stdout=StringIO())
+        self.assertEqual(list(self.tmp_dir.iterdir()), [])
+
+    def test_restore_and_verify_reject_unusable_database_file(self):
+        """Test: Eine PostgreSQL-Sicherung wird auf SQLite nicht "erfolgreich" wiederhergestellt."""
+        backup_path = self.manager.create_backup(backup_type='manual')
+        (backup_path / 'database' / 'db.sqlite3').rename(backup_path / 'database' / 'db.dump')
+
+        self.assertFalse(self.manager.restore_backup(backup_path))
+        self.assertEqual([b['path'] for b in self.manager.list_backups()], [backup_path])
+
+        with mock.patch('adeacore.backup.shutil.which', return_value=None):
+            result = self.manager.verify_backup(backup_path)
+        self.assertFalse(result['ok'])
+        self.assertIn('pg_restore nicht gefunden', result['errors'][0])
+
+    def test_backup_command_create_list_verify(self):
+        """Test: Management-Command create/list/verify und restore --dry-run."""
+        out = StringIO()
+        with mock.patch('adeacore.management.commands.backup.get_backup_manager', return_value=self.manager):
+            call_command('backup', 'create', '--type', 'manual', '--no-low-priority', stdout=out)
+            backup_name = self.manager.list_backups()[0]['path'].name
+            call_command('backup', 'list', stdout=out)
+            call_command('backup', 'verify', stdout=out)
+            call_command('backup', 'restore', backup_name, '--dry-run', stdout=out)
+
+            with self.assertRaises(CommandError):
+                call_command('backup', 'restore', 'gibt_es_nicht', '--dry-run', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('Backup erstellt', output)
+        self.assertIn(backup_name, output)
+        self.assertIn('DRY-RUN', output)
+
+    def test_backup_dir_from_settings_and_option(self):
+        """Test: Zielverzeichnis aus settings.BACKUP_DIR, --dir hat Vorrang."""
+        with override_settings(BACKUP_DIR=self.tmp_dir / 'settings'):
+            self.assertEqual(BackupManager().backup_dir, self.tmp_dir / 'settings')
+
+        call_command('backup', 'create', '--dir', str(self.tmp_dir / 'option'), '--no-low-priority', stdout=StringIO())
+        self.assertEqual(len(BackupManager(backup_dir=self.tmp_dir / 'option').list_backups()), 1)
+
+    def test_enqueue_and_wait_reports_job_result(self):
+        """Test: --enqueue --wait wartet auf den Worker und meldet einen Fehler mit Exit-Code != 0."""
+        from adeacore import jobs
+
+        out = StringIO()
+        # Statt zu schlafen arbeitet der "Worker" den Job ab
+        with mock.patch('adeacore.management.commands.backup.time.sleep', side_effect=lambda _: jobs.run_next()):
+            call_command('backup', 'create', '--dir', str(self.tmp_dir), '--enqueue', '--wait', '60', stdout=out)
+            self.assertIn('Backup erstellt', out.getvalue())
+            self.assertEqual(len(self.manager.list_backups()), 1)
+
+            with self.assertRaisesMessage(CommandError, 'fehlgeschlagen'):
+                call_command(
+                    'backup', 'create', '--dir', str(self.tmp_dir), '--time-budget', '-1',
+                    '--enqueue', '--wait', '60', stdout=out,
+                )
+        with self.assertRaises(CommandError):
+            call_command('backup', 'list', '--enqueue', stdout=out)
+
+
+# Atomares incr (wie Redis/Memcached) für die Nebenläufigkeitstests
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RATE_LIMIT_STORE="cache")
+class RateLimiterTest(SimpleTestCase):
+    """Tests für den Sliding-Window-Rate-Limiter (Zähler im Cache)."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_limit_and_retry_after(self):
+        """Test: Nach max_requests wird abgelehnt und Retry-After geliefert."""
+        limiter = RateLimiter(max_requests=3, window_seconds=60, name="test")
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6000.0):
+            results = [limiter.is_allowed("1.2.3.4") for _ in range(4)]
+
+        self.assertEqual(results[:3], [(True, 2), (True, 1), (True, 0)])
+        allowed, retry_after = results[3]
+        self.assertFalse(allowed)
+        # Nächstes Fenster + 20s, bis 3 * (1 - t/60) + 1 <= 3
+        self.assertEqual(retry_after, 80)
+
+    def test_sliding_window_interpolation(self):
+        """Test: Das Vorfenster zählt anteilig – kein voller Reset an der Fenstergrenze."""
+        limiter = RateLimiter(max_requests=4, window_seconds=60, name="test")
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6000.0):
+            for _ in range(4):
+                self.assertTrue(limiter.is_allowed("k")[0])
+
+        # 15s ins nächste Fenster: Vorfenster zählt noch 75% -> 3 + 1 = 4 erlaubt, dann voll
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6075.0):
+            self.assertTrue(limiter.is_allowed("k")[0])
+            self.assertFalse(limiter.is_allowed("k")[0])
+
+    def test_constant_payload_and_reset(self):
+        """Test: Pro Fenster nur ein Integer im Cache; reset() gibt wieder frei."""
+        limiter = RateLimiter(max_requests=100, window_seconds=60, name="test")
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6000.0):
+            for _ in range(100):
+                limiter.is_allowed("k")
+            self.assertEqual(cache.get("rate_limit:test:k:100"), 100)
+            self.assertFalse(limiter.is_allowed("k")[0])
+
+            limiter.reset("k")
+            self.assertTrue(limiter.is_allowed("k")[0])
+
+    def test_namespaces_are_separate(self):
+        """Test: Login- und API-Limiter teilen sich keine Zähler."""
+        login = RateLimiter(max_requests=1, window_seconds=60, name="login")
+        api = RateLimiter(max_requests=1, window_seconds=60, name="api")
+        self.assertTrue(login.is_allowed("1.2.3.4")[0])
+        self.assertTrue(api.is_allowed("1.2.3.4")[0])
+
+    def test_concurrent_requests_never_exceed_limit(self):
+        """Stresstest: Parallele Anfragen lassen exakt max_requests durch."""
+        limiter = RateLimiter(max_requests=50, window_seconds=3600, name="stress")
+        allowed = []
+        barrier = threading.Barrier(20)
+
+        def worker():
+            barrier.wait()
+            for _ in range(10):
+                if limiter.is_allowed("shared")[0]:
+                    allowed.append(1)
+
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=7200.0):
+            threads = [threading.Thread(target=worker) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(allowed), 50)
+
+
+@override_settings(RATE_LIMIT_STORE="db")
+class DatabaseRateLimiterTest(TransactionTestCase):
+    """Tests für den Rate-Limiter mit Zählern in der Datenbank (ohne Redis)."""
+
+    def test_limit_interpolation_and_reset(self):
+        """Test: Gleiches Verhalten wie mit Cache-Zählern, eine Zeile pro Fenster."""
+        from adeacore.models import RateLimitCounter
+
+        limiter = RateLimiter(max_requests=3, window_seconds=60, name="test")
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6000.0):
+            results = [limiter.is_allowed("1.2.3.4") for _ in range(4)]
+        self.assertEqual(results, [(True, 2), (True, 1), (True, 0), (False, 80)])
+        self.assertEqual(RateLimitCounter.objects.get().count, 3)
+
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6080.0):
+            self.assertTrue(limiter.is_allowed("1.2.3.4")[0])
+            self.assertFalse(limiter.is_allowed("1.2.3.4")[0])
+            limiter.reset("1.2.3.4")
+            self.assertEqual(RateLimitCounter.objects.count(), 0)
+            self.assertTrue(limiter.is_allowed("1.2.3.4")[0])
+
+    def test_expired_windows_are_purged(self):
+        """Test: Beim Anlegen eines neuen Zählers werden abgelaufene Fenster gelöscht."""
+        from adeacore.models import RateLimitCounter
+
+        limiter = RateLimiter(max_requests=3, window_seconds=60, name="test")
+        with mock.patch('adeacore.rate_limiting.time.time', return_value=6000.0):
+            limiter.is_allowed("a")
+        RateLimitCounter.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        limiter.is_allowed("b")
+        keys = list(RateLimitCounter.objects.values_list("key", flat=True))
+        self.assertEqual(keys, [limiter._cache_key("b", int(time.time() // 60))])
+
+    def test_concurrent_increments_are_not_lost(self):
+        """Stresstest: Parallele incr (eigene DB-Verbindungen) liefern lückenlos 1..N, nichts geht verloren."""
+        from django.db import OperationalError, connection as db_connection
+
+        from adeacore.rate_limiting import DatabaseCounterStore
+
+        store = DatabaseCounterStore()
+        values = []
+        barrier = threading.Barrier(10)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(10):
+                    while True:
+                        try:
+                            values.append(store.incr("rate_limit:stress:shared:1", 60))
+                            break
+                        except OperationalError:
+                            # In-Memory-SQLite der Tests meldet Sperren sofort (kein busy_timeout);
+                            # incr läuft in einer Transaktion, wiederholen ist also sicher
+                            time.sleep(0.001)
+            finally:
+                db_connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(values), list(range(1, 101)))
+        self.assertEqual(store.get("rate_limit:stress:shared:1"), 100)
+
+
+class CacheStatsTest(TestCase):
+    """Tests für die Cache-Statistik pro Namensraum."""
+
+    def setUp(self):
+        from adeacore import cache_stats
+
+        cache_stats.reset_stats()
+        self.addCleanup(cache_stats.reset_stats)
+
+    def test_hit_rate_per_namespace(self):
+        """Test: Hits/Misses werden gebündelt geschrieben und als Quote ausgegeben."""
+        from adeacore.cache_stats import get_stats, record_hit, record_miss
+
+        for _ in range(3):
+            record_hit("parameters")
+        record_miss("parameters")
+        record_miss("eigener_namensraum")
+
+        stats = get_stats()
+        self.assertEqual(stats["parameters"], {"hits": 3, "misses": 1, "total": 4, "hit_rate": 75.0})
+        self.assertEqual(stats["eigener_namensraum"]["misses"], 1)
+        self.assertEqual(stats["pdfs"]["total"], 0)
+
+    def test_counters_live_in_shared_cache(self):
+        """Test: Zähler liegen im Cache "shared" – ein (pro Prozess) geleerter Standard-Cache verliert nichts."""
+        from adeacore.cache_stats import flush, get_stats, record_hit
+
+        record_hit("timer")
+        flush()
+        cache.clear()
+        self.assertEqual(get_stats()["timer"]["hits"], 1)
+
+    def test_permission_snapshot_is_not_counted(self):
+        """Test: Attribut-Treffer des Berechtigungs-Snapshots sind kein Cache-Zugriff."""
+        from django.contrib.auth.models import User
+
+        from adeacore.cache_stats import get_stats
+        from adeazeit.permissions import get_permission_snapshot
+
+        user = User.objects.create_user(username="snapshot", password="x")
+        get_permission_snapshot(user)
+        get_permission_snapshot(user)
+        self.assertEqual(get_stats()["permissions"]["total"], 0)
+
+    def test_cache_stats_command_and_page(self):
+        """Test: Command und Admin-Seite zeigen die Namensräume an."""
+        from django.contrib.auth.models import User
+        from adeacore.cache_stats import record_hit
+
+        record_hit("timer")
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn("Cache-Backend: LocMemCache", out.getvalue())
+        self.assertIn("Statistik:     DatabaseCache", out.getvalue())
+        self.assertIn("timer", out.getvalue())
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get('/management-dashboard/cache/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "permissions")
+
+
+@override_settings(SESSION_ACTIVITY_WRITE_INTERVAL=60)
+class SessionActivityTest(TestCase):
+    """Tests für gebündelte last_activity-Schreibzugriffe."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        self.user = User.objects.create_user(username="session", password="x")
+        self.client.force_login(self.user)
+
+    def _session_row(self):
+        from django.contrib.sessions.models import Session
+
+        return Session.objects.get(session_key=self.client.session.session_key)
+
+    def _set_last_activity(self, seconds_ago):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        session = self.client.session
+        session['last_activity'] = (timezone.now() - timedelta(seconds=seconds_ago)).isoformat()
+        session.save()
+
+    def test_recent_activity_does_not_write_session(self):
+        """Test: Innerhalb des Intervalls wird die Session nicht erneut gespeichert."""
+        self.client.get('/session/heartbeat/')
+        row = self._session_row()
+
+        with mock.patch('django.contrib.sessions.backends.db.SessionStore.save') as save:
+            response = self.client.get('/session/heartbeat/')
+        self.assertEqual(response.status_code, 200)
+        save.assert_not_called()
+        self.assertEqual(self._session_row().session_data, row.session_data)
+
+    def test_stale_activity_is_written(self):
+        """Test: Nach Ablauf des Intervalls wird last_activity aktualisiert."""
+        self._set_last_activity(120)
+        before = self.client.session['last_activity']
+
+        self.client.get('/session/heartbeat/')
+
+        self.assertNotEqual(self.client.session['last_activity'], before)
+
+    def test_timeout_logs_out(self):
+        """Test: Inaktivität über SESSION_COOKIE_AGE führt zum Logout."""
+        from django.conf import settings
+
+        self._set_last_activity(settings.SESSION_COOKIE_AGE + 60)
+        response = self.client.get('/session/heartbeat/')
+        self.assertEqual(response.status_code, 401)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    """Tests für Query-/Latenz-Messung und Query-Budgets."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from adeacore.performance import get_stats_store
+
+        get_stats_store().clear()
+        self.staff = User.objects.create_user(username="perf", password="x", is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_dashboard_within_query_budget(self):
+        """Test: Admin-Dashboard bleibt im Query-Budget (inkl. Session- und DB-Cache-Queries)."""
+        from adeacore.testing import assert_view_query_budgets
+
+        with assert_view_query_budgets({"admin_dashboard": 22}) as samples:
+            self.client.get('/management-dashboard/')
+        self.assertEqual(len(samples), 1)
+        self.assertGreater(samples[0].query_count, 0)
+
+    def test_budget_violation_fails(self):
+        """Test: Überschrittenes oder nicht geprüftes Budget lässt den Test fehlschlagen."""
+        from adeacore.testing import assert_view_query_budgets
+
+        with self.assertRaisesMessage(AssertionError, "admin_dashboard"):
+            with assert_view_query_budgets({"admin_dashboard": 0}):
+                self.client.get('/management-dashboard/')
+
+        with self.assertRaisesMessage(AssertionError, "nicht aufgerufen"):
+            with assert_view_query_budgets({"PayrollRecordDetailView": 8}):
+                self.client.get('/management-dashboard/')
+
+    def test_report_page_lists_views(self):
+        """Test: Report-Seite zeigt gemessene Views mit Kennzahlen."""
+        self.client.get('/session/heartbeat/')
+        response = self.client.get('/management-dashboard/performance/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "session_heartbeat")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerateLoadDataTest(TestCase):
+    """Tests für den Lastdaten-Generator."""
+
+    def test_generate_small_dataset(self):
+        """Test: Alle Modelle werden befüllt, abgeleitete Werte sind konsistent."""
+        from django.db.models import Sum
+        from adeacore.models import Employee, Invoice, InvoiceItem, PayrollRecord, SearchDocument
+        from adealohn.models import PayrollItem
+        from adeazeit.models import Absence, EmployeeInternal, TimeEntry
+
+        out = StringIO()
+        with self.settings(DEBUG=True):
+            call_command(
+                'generate_load_data', '--clients', '4', '--employees', '5', '--internal-employees', '2',
+                '--years', '1', '--entries-per-day', '1', stdout=out,
+            )
+
+        self.assertIn('Zeilen', out.getvalue())
+        self.assertEqual(Client.objects.filter(name__startswith='Lastdaten').count(), 4)
+        self.assertEqual(Employee.objects.count(), 5)
+        self.assertFalse(Employee.objects.exclude(client__lohn_aktiv=True).exists())
+        self.assertEqual(EmployeeInternal.objects.filter(code__startswith='LD').count(), 2)
+        self.assertEqual(PayrollRecord.objects.count(), 5 * 12)
+        self.assertEqual(PayrollItem.objects.count(), 5 * 12)
+        self.assertEqual(PayrollRecord.objects.filter(status='ENTWURF').count(), 5)
+        self.assertEqual(Absence.objects.count(), 2 * 4)
+        # bulk_create indexiert nicht -> Index wird am Ende neu aufgebaut
+        self.assertEqual(SearchDocument.objects.filter(kind='client').count(), 4)
+
+        billed = TimeEntry.objects.filter(verrechnet=True)
+        self.assertGreater(billed.count(), 0)
+        self.assertTrue(TimeEntry.objects.filter(verrechnet=False, billable=True).exists())
+        self.assertEqual(InvoiceItem.objects.count(), billed.count())
+        self.assertEqual(
+            Invoice.objects.aggregate(total=Sum('net_amount'))['total'],
+            billed.aggregate(total=Sum('betrag'))['total'],
+        )
+        self.assertFalse(Invoice.objects.filter(payment_reference='').exists())
+        entry = TimeEntry.objects.filter(billable=True).select_related('service_type', 'mitarbeiter').first()
+        expected_rate = (entry.service_type.standard_rate * entry.mitarbeiter.stundensatz).quantize(entry.rate)
+        self.assertEqual(entry.rate, expected_rate)
+        self.assertEqual(entry.betrag, (entry.rate * entry.dauer).quantize(entry.betrag))
+
+        with self.settings(DEBUG=True), self.assertRaisesMessage(CommandError, 'existieren bereits'):
+            call_command('generate_load_data', '--clients', '1', stdout=out)
+
+    def test_requires_debug_or_force(self):
+        """Test: Ohne DEBUG wird nur mit --force generiert."""
+        with self.settings(DEBUG=False), self.assertRaisesMessage(CommandError, '--force'):
+            call_command('generate_load_data', stdout=StringIO())
+
+
+class DataTransferTest(TestCase):
+    """Tests für den streamenden NDJSON-Export/-Import."""
+
+    def setUp(self):
+        from datetime import date
+        from decimal import Decimal
+        from adeacore.models import Employee
+
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='adea_transfer_test_'))
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.client_obj = Client.objects.create(
+            name="Transfer AG", client_type="FIRMA", lohn_aktiv=True, email="info@transfer.ch"
+        )
+        self.employee = Employee.objects.create(
+            client=self.client_obj,
+            first_name="Erika",
+            last_name="Muster",
+            ahv_nummer="756.1234.5678.97",
+            geburtsdatum=date(1980, 5, 17),
+            monthly_salary=Decimal("6500.00"),
+            weekly_hours=Decimal("42.0"),
+        )
+
+    def test_round_trip_passes_ciphertext_through(self):
+        """Test: Export/Import ohne Ent-/Verschlüsselung, Werte und Zeitstempel bleiben erhalten."""
+        from adeacore.data_transfer import export_data, import_data
+        from adeacore.encryption import get_encryption_manager
+        from adeacore.models import Employee
+
+        manager = get_encryption_manager()
+        created_at = Client.objects.get(pk=self.client_obj.pk).created_at
+        with mock.patch.object(manager, 'decrypt') as decrypt:
+            manifest = export_data(self.tmp_dir, include=['adeacore.client', 'adeacore.employee'], chunk_size=1)
+        decrypt.assert_not_called()
+
+        exported = (self.tmp_dir / 'adeacore.employee.ndjson').read_text(encoding='utf-8')
+        self.assertNotIn('756.1234.5678.97', exported)
+        self.assertNotIn('1980-05-17', exported)
+        self.assertEqual([m['model'] for m in manifest['models']], ['adeacore.client', 'adeacore.employee'])
+
+        with mock.patch.object(manager, 'encrypt') as encrypt:
+            counts = import_data(self.tmp_dir, replace=True)
+        encrypt.assert_not_called()
+
+        self.assertEqual(counts, {'adeacore.client': 1, 'adeacore.employee': 1})
+        employee = Employee.objects.get(pk=self.employee.pk)
+        self.assertEqual(employee.ahv_nummer, '756.1234.5678.97')
+        self.assertEqual(str(employee.geburtsdatum), '1980-05-17')
+        self.assertEqual(employee.client.email, 'info@transfer.ch')
+        self.assertEqual(employee.client.created_at, created_at)
+
+    def test_import_bumps_table_versions(self):
+        """Test: Nach dem Import (ohne Signale) ändern sich die ETag-Versionen, auch der Rechnungen."""
+        from adeacore.data_transfer import export_data, import_data
+        from adeacore.http_cache import get_table_versions
+        from adeacore.models import Invoice
+        from adeazeit.models import EmployeeInternal
+
+        export_data(self.tmp_dir, include=['adeacore.client'])
+        before, _ = get_table_versions([EmployeeInternal, Invoice])
+        with self.captureOnCommitCallbacks(execute=True):
+            import_data(self.tmp_dir, replace=True)
+        after, _ = get_table_versions([EmployeeInternal, Invoice])
+        for part_before, part_after in zip(before.split(';'), after.split(';')):
+            self.assertNotEqual(part_before, part_after)
+
+    def test_import_rejects_foreign_key_fingerprint_and_count_mismatch(self):
+        """Test: Fremder Schlüssel oder manipulierte Dateien brechen den Import ab."""
+        import json
+        from adeacore.data_transfer import DataTransferError, export_data, import_data
+
+        export_data(self.tmp_dir, include=['adeacore.client'])
+        manifest_path = self.tmp_dir / 'manifest.json'
+        manifest = json.loads(manifest_path.read_text())
+
+        manifest['encryption_key_fingerprint'] = 'anderer'
+        manifest_path.write_text(json.dumps(manifest))
+        with self.assertRaisesMessage(DataTransferError, 'Verschlüsselungsschlüssel'):
+            import_data(self.tmp_dir, replace=True)
+
+        manifest['models'][0]['count'] = 5
+        manifest_path.write_text(json.dumps(manifest))
+        with self.assertRaisesMessage(DataTransferError, 'Manifest erwartet 5'):
+            import_data(self.tmp_dir, replace=True, allow_key_mismatch=True)
+        self.assertTrue(Client.objects.filter(pk=self.client_obj.pk).exists())
+
+    def test_command_full_round_trip(self):
+        """Test: Kompletter Export (gzip) und Import --replace über den Command."""
+        from django.contrib.auth.models import Group, User
+
+        user = User.objects.create_user(username='transfer', password='x')
+        user.groups.add(Group.objects.create(name='Transfer-Gruppe'))
+        target = self.tmp_dir / 'export'
+
+        out = StringIO()
+        call_command('data_transfer', 'export', str(target), '--compress', stdout=out)
+        self.assertTrue((target / 'adeazeit.timeentry.ndjson.gz').exists())
+        self.assertTrue((target / 'auth.user_groups.ndjson.gz').exists())
+
+        call_command('data_transfer', 'import', str(target), '--replace', '--noinput', stdout=out)
+
+        self.assertIn('importiert', out.getvalue())
+        self.assertEqual(list(User.objects.get(username='transfer').groups.values_list('name', flat=True)), ['Transfer-Gruppe'])
+        self.assertEqual(Client.objects.count(), 1)
+
+
+class DataTransferSnapshotTest(TransactionTestCase):
+    """Tests für die Snapshot-Isolation des Exports (ohne umgebende Testtransaktion)."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='adea_transfer_test_'))
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def test_postgresql_export_runs_in_serializable_snapshot(self):
+        """Test: Auf PostgreSQL ist SET TRANSACTION die erste Anweisung der Exporttransaktion."""
+        from django.db import connections
+        from adeacore.data_transfer import export_data
+
+        class FirstStatement(Exception):
+            pass
+
+        def intercept(execute, sql, params, many, context):
+            if sql == 'BEGIN':  # SQLite startet die Transaktion per Anweisung
+                return execute(sql, params, many, context)
+            # SQLite kennt weder die Anweisung noch das PostgreSQL-SQL danach: nach der
+            # ersten Anweisung abbrechen
+            raise FirstStatement(sql)
+
+        with mock.patch.object(connections['default'], 'vendor', 'postgresql'):
+            with connection.execute_wrapper(intercept), self.assertRaises(FirstStatement) as raised:
+                export_data(self.tmp_dir, include=['adeacore.client'])
+        self.assertEqual(
+            raised.exception.args[0], 'SET TRANSACTION ISOLATION LEVEL SERIALIZABLE, READ ONLY, DEFERRABLE'
+        )
+
+    def test_postgresql_export_refuses_outer_transaction(self):
+        """Test: Innerhalb einer Transaktion lässt sich die Isolationsstufe nicht mehr setzen."""
+        from django.db import connections, transaction
+        from adeacore.data_transfer import DataTransferError, export_data
+
+        with mock.patch.object(connections['default'], 'vendor', 'postgresql'):
+            with transaction.atomic(), self.assertRaisesMessage(DataTransferError, 'laufenden Transaktion'):
+                export_data(self.tmp_dir, include=['adeacore.client'])
+
+
+class JobQueueTest(TestCase):
+    """Tests für die DB-Warteschlange der Hintergrund-Jobs und den Worker."""
+
+    def setUp(self):
+        from adeacore import jobs
+
+        self.calls = []
+        self.addCleanup(jobs._registry.pop, 'test_echo', None)
+        self.addCleanup(jobs._registry.pop, 'test_fail', None)
+
+        @jobs.register('test_echo')
+        def echo(ctx, value=0):
+            ctx.progress(1, 2, 'halb')
+            self.calls.append(value)
+            return {'value': value}
+
+        @jobs.register('test_fail', max_attempts=2)
+        def fail(ctx):
+            raise RuntimeError('kaputt')
+
+    def test_enqueue_unknown_type(self):
+        from adeacore import jobs
+
+        with self.assertRaises(jobs.JobError):
+            jobs.enqueue('gibt_es_nicht')
+
+    def test_claim_order_and_success(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        low = jobs.enqueue('test_echo', {'value': 1})
+        high = jobs.enqueue('test_echo', {'value': 2}, priority=5)
+        jobs.enqueue('test_echo', {'value': 3}, priority=9, run_at=timezone.now() + timedelta(hours=1))
+
+        self.assertTrue(jobs.run_next('test'))
+        self.assertTrue(jobs.run_next('test'))
+        self.assertFalse(jobs.run_next('test'))
+        self.assertEqual(self.calls, [2, 1])
+
+        high.refresh_from_db()
+        self.assertEqual(high.status, Job.STATUS_DONE)
+        self.assertEqual(high.result, {'value': 2})
+        self.assertEqual(high.attempts, 1)
+        self.assertEqual(high.progress_percent, 100)
+        self.assertEqual(high.worker, 'test')
+        low.refresh_from_db()
+        self.assertEqual(low.status, Job.STATUS_DONE)
+
+    def test_retry_with_backoff_then_failed(self):
+        from django.utils import timezone
+
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        job = jobs.enqueue('test_fail')
+        self.assertTrue(jobs.run_next('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('kaputt', job.last_error)
+
+        # Backoff abgelaufen: zweiter (letzter) Versuch
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertTrue(jobs.run_next('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_cancel_and_requeue_stale(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        queued = jobs.enqueue('test_echo')
+        self.assertTrue(jobs.cancel(queued))
+        self.assertFalse(jobs.cancel(queued))
+
+        stale = jobs.enqueue('test_echo')
+        Job.objects.filter(pk=stale.pk).update(
+            status=Job.STATUS_RUNNING, heartbeat_at=timezone.now() - jobs.STALE_AFTER - timedelta(minutes=1)
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Job.STATUS_QUEUED)
+
+    def test_requeued_job_is_not_overwritten(self):
+        """Test: Ergebnis/Fehler nur, solange der Job noch RUNNING bei diesem Worker ist."""
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        self.addCleanup(jobs._registry.pop, 'test_requeued', None)
+
+        @jobs.register('test_requeued', max_attempts=1)
+        def requeued(ctx, fail=False):
+            # Wie requeue_stale + Abholung durch einen anderen Worker
+            Job.objects.filter(pk=ctx.job.pk).update(worker='anderer')
+            ctx.progress(1, 1, 'fertig')
+            if fail:
+                raise RuntimeError('zu spät')
+            return {'value': 1}
+
+        for params in ({}, {'fail': True}):
+            job = jobs.enqueue('test_requeued', params)
+            self.assertTrue(jobs.run_next('test'))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.worker), (Job.STATUS_RUNNING, 'anderer'))
+            self.assertIsNone(job.result)
+            self.assertEqual(job.last_error, '')
+            self.assertEqual(job.progress_message, '')
+            self.assertFalse(jobs._Heartbeat(Job(pk=job.pk, worker='test')).beat())
+
+    def test_run_worker_once(self):
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        jobs.enqueue('test_echo', {'value': 7})
+        jobs.enqueue('test_fail', max_attempts=1)
+        out = StringIO()
+        call_command('run_worker', '--once', stdout=out)
+
+        self.assertEqual(self.calls, [7])
+        self.assertIn('Worker beendet (2 Jobs)', out.getvalue())
+        self.assertEqual(
+            sorted(Job.objects.values_list('status', flat=True)), [Job.STATUS_DONE, Job.STATUS_FAILED]
+        )
+
+    def test_status_page_and_json(self):
+        from django.contrib.auth.models import User
+
+        from adeacore import jobs
+
+        staff = User.objects.create_user(username='jobadmin', password='x', is_staff=True)
+        other = User.objects.create_user(username='jobuser', password='x')
+        job = jobs.enqueue('test_echo', user=other)
+
+        self.client.force_login(staff)
+        response = self.client.get('/management-dashboard/jobs/')
+        self.assertContains(response, 'test_echo')
+        self.client.post('/management-dashboard/jobs/', {'action': 'cancel', 'job_id': job.pk})
+        data = self.client.get(f'/jobs/{job.pk}/status/').json()
+        self.assertEqual(data['job']['status'], 'CANCELLED')
+
+        self.client.force_login(User.objects.create_user(username='fremd', password='x'))
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/status/').status_code, 404)
+        self.client.force_login(other)
+        self.assertTrue(self.client.get(f'/jobs/{job.pk}/status/').json()['success'])
+
+    def test_result_file_download(self):
+        """Test: Ergebnisdatei liegt in der Job-Ablage und ist über job_status/Download erreichbar."""
+        import io
+        import zipfile
+
+        from django.contrib.auth.models import User
+
+        from adeacore import jobs
+        from adeacore.testing import temporary_job_storage
+
+        self.addCleanup(jobs._registry.pop, 'test_file', None)
+
+        @jobs.register('test_file')
+        def make_file(ctx):
+            directory = Path(tempfile.mkdtemp())
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+            (directory / 'a.txt').write_text('Inhalt')
+            return {'file': ctx.save_zip('ergebnis.zip', directory)}
+
+        owner = User.objects.create_user(username='jobowner', password='x')
+        with temporary_job_storage() as location:
+            job = jobs.enqueue('test_file', user=owner)
+            self.assertEqual(self.client.get(f'/jobs/{job.pk}/download/').status_code, 302)
+            self.client.force_login(owner)
+            self.assertIsNone(self.client.get(f'/jobs/{job.pk}/status/').json()['job']['download_url'])
+            self.assertEqual(self.client.get(f'/jobs/{job.pk}/download/').status_code, 404)
+
+            self.assertTrue(jobs.run_next('test'))
+            self.assertTrue((location / str(job.pk) / 'ergebnis.zip').exists())
+            data = self.client.get(f'/jobs/{job.pk}/status/').json()
+            self.assertEqual(data['job']['download_url'], f'/jobs/{job.pk}/download/')
+
+            response = self.client.get(data['job']['download_url'])
+            self.assertIn('filename="ergebnis.zip"', response['Content-Disposition'])
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(archive.read('a.txt'), b'Inhalt')
+
+            self.client.force_login(User.objects.create_user(username='jobfremd', password='x'))
+            self.assertEqual(self.client.get(f'/jobs/{job.pk}/download/').status_code, 404)
+
+    def test_long_operations_are_enqueued(self):
+        """Test: Jobs-Seite und --enqueue der Commands reihen ein statt direkt auszuführen."""
+        from django.contrib.auth.models import User
+
+        from adeacore.models import Job
+
+        self.client.force_login(User.objects.create_user(username='jobstaff', password='x', is_staff=True))
+        self.client.post('/management-dashboard/jobs/', {'action': 'timeentry_rates'})
+        self.client.post('/management-dashboard/jobs/', {'action': 'lohnausweise', 'year': '2025'})
+        self.client.post('/management-dashboard/jobs/', {'action': 'lohnausweise', 'year': 'x'})
+        self.client.post('/management-dashboard/jobs/', {'action': 'invoice_pdfs', 'year': '2025'})
+        # Backups nur über Cronjob/CLI (BACKUP_DIR beim Worker), nicht über die Jobs-Seite
+        self.client.post('/management-dashboard/jobs/', {'action': 'backup'})
+        call_command('update_timeentry_rates', '--unbilled-only', '--from', '2025-01-01', '--enqueue', stdout=StringIO())
+        call_command('generate_lohnausweise', '2025', '--workers', '1', '--enqueue', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generate_lohnausweise', '2025', '--output', '/tmp/x', '--enqueue', stdout=StringIO())
+
+        queued = list(Job.objects.order_by('pk').values_list('name', 'params', 'status'))
+        self.assertEqual(queued, [
+            ('timeentry_rates', {'unbilled_only': True}, Job.STATUS_QUEUED),
+            ('lohnausweise', {'year': 2025}, Job.STATUS_QUEUED),
+            ('invoice_pdfs', {'year': 2025}, Job.STATUS_QUEUED),
+            ('timeentry_rates', {
+                'date_from': '2025-01-01', 'date_to': None, 'unbilled_only': True, 'service_types': None, 'force': False,
+            }, Job.STATUS_QUEUED),
+            ('lohnausweise', {'year': 2025, 'client_ids': None, 'workers': 1}, Job.STATUS_QUEUED),
+        ])
+
+
+class JobHeartbeatTest(TransactionTestCase):
+    """Heartbeat-Thread des Workers (eigene DB-Verbindung, daher ohne Testtransaktion)."""
+
+    def test_heartbeat_refreshed_while_handler_runs(self):
+        from adeacore import jobs
+        from adeacore.models import Job
+
+        self.addCleanup(jobs._registry.pop, 'test_slow', None)
+
+        @jobs.register('test_slow')
+        def slow(ctx):
+            # Keine Fortschrittsmeldung: nur der Heartbeat-Thread schreibt
+            time.sleep(0.3)
+            return {}
+
+        job = jobs.enqueue('test_slow')
+        with mock.patch.object(jobs, 'HEARTBEAT_INTERVAL_SECONDS', 0.05):
+            self.assertTrue(jobs.run_next('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertGreater(job.heartbeat_at, job.started_at)
+
+
+class SearchIndexTest(TestCase):
+    """Tests für den Volltext-Suchindex (adeacore.search): Pflege per Signal, Ranking, Sichtbarkeit."""
+
+    def setUp(self):
+        from datetime import date
+        from decimal import Decimal
+
+        from django.contrib.auth.models import User
+
+        from adeacore.models import ClientNote
+        from adeazeit.models import EmployeeInternal, ServiceType, Task, UserProfile
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mandant = Client.objects.create(name="Müller Treuhand AG", client_type="FIRMA")
+            self.service_type = ServiceType.objects.create(
+                code="SI", name="Suche", standard_rate=Decimal("100.00"), billable=True,
+            )
+            self.employee = EmployeeInternal.objects.create(
+                code="SI1", name="Suche Eins", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            self.other_employee = EmployeeInternal.objects.create(
+                code="SI2", name="Suche Zwei", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            self.note = ClientNote.objects.create(
+                client=self.mandant, title="Steuererklärung 2024", content="Belege fehlen noch.",
+                note_date=date(2025, 3, 1),
+            )
+            self.own_task = Task.objects.create(
+                titel="Unterlagen prüfen", beschreibung="Für die Steuererklärung 2024 nachfragen",
+                client=self.mandant, mitarbeiter=self.employee,
+            )
+            self.foreign_task = Task.objects.create(
+                titel="Steuererklärung 2024 einreichen", client=self.mandant, mitarbeiter=self.other_employee,
+            )
+            self.user = User.objects.create_user(username="suche", password="x")
+            UserProfile.objects.create(user=self.user, employee=self.employee)
+            self.admin = User.objects.create_superuser(username="suchadmin", password="x")
+
+    def _time_entry(self, kommentar, employee=None):
+        from datetime import date, time
+        from decimal import Decimal
+
+        from adeazeit.models import TimeEntry
+
+        return TimeEntry.objects.create(
+            mitarbeiter=employee or self.employee, client=self.mandant, service_type=self.service_type,
+            datum=date(2025, 4, 1), start=time(8, 0), ende=time(9, 0), dauer=Decimal("1.00"),
+            kommentar=kommentar,
+        )
+
+    def test_prefix_search_ranks_title_first(self):
+        """Test: Wortanfänge finden Notizen und Aufgaben; Titel-Treffer stehen vor Text-Treffern."""
+        from adeacore import search
+
+        hits = search.search(self.admin, "steuererkl 2024")
+        self.assertEqual(
+            {(hit.kind, hit.object_id) for hit in hits},
+            {("note", self.note.pk), ("task", self.own_task.pk), ("task", self.foreign_task.pk)},
+        )
+        self.assertEqual(hits[-1].object_id, self.own_task.pk)
+        self.assertEqual(search.search(self.admin, "Müller")[0].url, f"/desk/{self.mandant.pk}/")
+        self.assertEqual(search.search(self.admin, "  ,;  "), [])
+        self.assertEqual(search.search(self.admin, "steuererkl 2023"), [])
+
+    def test_employee_sees_only_own_tasks_and_entries(self):
+        """Test: MITARBEITER finden Notizen, aber nur eigene Aufgaben und Zeiteinträge."""
+        from adeacore import search
+
+        with self.captureOnCommitCallbacks(execute=True):
+            own_entry = self._time_entry("Telefonat Steuererklärung")
+            self._time_entry("Steuererklärung erfasst", employee=self.other_employee)
+
+        found = {(hit.kind, hit.object_id) for hit in search.search(self.user, "steuererklärung")}
+        self.assertEqual(found, {
+            ("note", self.note.pk), ("task", self.own_task.pk), ("timeentry", own_entry.pk),
+        })
+        self.assertEqual(len(search.search(self.admin, "steuererklärung")), 5)
+        self.assertEqual(search.search(self.user, "steuererklärung", kinds=["timeentry"])[0].object_id, own_entry.pk)
+
+    def test_index_follows_changes_after_commit(self):
+        """Test: Änderungen und Löschungen landen nach dem Commit im Index, einmal pro Transaktion."""
+        from adeacore import search
+        from adeacore.models import SearchDocument
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.note.title = "Jahresabschluss"
+            self.note.save()
+            self.note.content = "Bilanz"
+            self.note.save()
+            entry = self._time_entry("")
+        index_callbacks = [func for func in callbacks if isinstance(func, search._IndexAfterCommit)]
+        self.assertEqual(len(index_callbacks), 1)
+        self.assertTrue(search.search(self.admin, "steuererklärung", kinds=["note"]))
+        index_callbacks[0]()
+        self.assertFalse(search.search(self.admin, "steuererklärung", kinds=["note"]))
+        self.assertEqual(search.search(self.admin, "jahresab bilanz")[0].object_id, self.note.pk)
+        # Zeiteintrag ohne Kommentar: nichts zu indexieren
+        self.assertFalse(SearchDocument.objects.filter(kind="timeentry", object_id=entry.pk).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.delete()
+        self.assertFalse(search.search(self.admin, "jahresab"))
+
+    def test_bulk_create_validated_indexes(self):
+        """Test: bulk_create_validated (ohne Signale) indexiert die neuen Zeiteinträge selbst."""
+        from datetime import date, time
+        from decimal import Decimal
+
+        from adeacore import search
+        from adeazeit.models import TimeEntry
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeEntry.objects.bulk_create_validated([
+                TimeEntry(
+                    mitarbeiter=self.employee, client=self.mandant, service_type=self.service_type,
+                    datum=date(2025, 4, 2), start=time(8, 0), ende=time(9, 0), dauer=Decimal("1.00"),
+                    kommentar="Quellensteuer Abrechnung",
+                ),
+            ])
+        self.assertEqual(len(search.search(self.user, "quellenst")), 1)
+
+    def test_rebuild_command(self):
+        """Test: rebuild_search_index baut den Index aus den Tabellen neu auf."""
+        from adeacore import search
+        from adeacore.models import SearchDocument
+
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search.search(self.admin, "steuererkl"), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Suchindex aufgebaut: 4 Einträge', out.getvalue())
+        self.assertEqual(len(search.search(self.admin, "steuererkl")), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_search_index', kind=['gibt_es_nicht'], stdout=StringIO())
+
+    def test_rebuild_if_empty(self):
+        """Test: --if-empty (Deploy) baut nur einen leeren Index auf."""
+        from adeacore.models import SearchDocument
+
+        SearchDocument.objects.filter(kind='note').delete()
+        out = StringIO()
+        call_command('rebuild_search_index', '--if-empty', stdout=out)
+        self.assertIn('nichts zu tun', out.getvalue())
+        self.assertFalse(SearchDocument.objects.filter(kind='note').exists())
+
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', '--if-empty', stdout=out)
+        self.assertIn('Suchindex aufgebaut: 4 Einträge', out.getvalue())
+
+    def test_data_transfer_rebuilds_index(self):
+        """Test: Der Index wird nicht exportiert, sondern nach dem Import neu aufgebaut."""
+        from adeacore import search
+        from adeacore.data_transfer import export_data, import_data
+        from adeacore.models import SearchDocument
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix='adea_transfer_test_'))
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        manifest = export_data(tmp_dir, include=['adeacore'])
+        self.assertNotIn('adeacore.searchdocument', [entry['model'] for entry in manifest['models']])
+
+        SearchDocument.objects.all().delete()
+        import_data(tmp_dir, include=['adeacore.clientnote'], replace=True)
+        self.assertEqual([(hit.kind, hit.object_id) for hit in search.search(self.admin, "belege")], [("note", self.note.pk)])
+        self.assertFalse(SearchDocument.objects.filter(kind='task').exists())
+
+    def test_search_view(self):
+        """Test: Suchseite zeigt Treffer mit Link und Mandant, in konstanter Query-Anzahl."""
+        self.client.force_login(self.admin)
+        response = self.client.get('/suche/', {'q': 'Steuererkl 2024'})
+        self.assertContains(response, 'Steuererklärung 2024 einreichen')
+        self.assertContains(response, f'/desk/{self.mandant.pk}/notes/{self.note.pk}/edit/')
+        self.assertContains(response, '3 Treffer')
+
+        response = self.client.get('/suche/', {'q': 'Steuererkl', 'typ': 'note'})
+        self.assertContains(response, '1 Treffer')
+        self.assertNotContains(self.client.get('/suche/'), 'Treffer')
+
+
+class AutocompleteTest(TestCase):
+    """Tests für die Autocomplete-Auswahl (adeacore.autocomplete): Tippfehler, Berechtigungen, Widget."""
+
+    def setUp(self):
+        from datetime import date
+        from decimal import Decimal
+
+        from django.contrib.auth.models import User
+
+        from adeacore import autocomplete
+        from adeazeit.models import EmployeeInternal, UserProfile
+
+        autocomplete.clear_indexes()
+        # Callbacks ausführen: offene Versions-Erhöhungen würden spätere sonst zusammenfassen
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mandant = Client.objects.create(name="Müller Treuhand AG", client_type="FIRMA")
+            self.other_mandant = Client.objects.create(name="Beispiel GmbH", client_type="FIRMA")
+            self.employee = EmployeeInternal.objects.create(
+                code="AC1", name="Anna Ackermann", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            self.other_employee = EmployeeInternal.objects.create(
+                code="AC2", name="Bruno Baumann", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            self.user = User.objects.create_user(username="auto", password="x")
+            UserProfile.objects.create(user=self.user, employee=self.employee)
+            self.admin = User.objects.create_superuser(username="autoadmin", password="x")
+
+    def test_ngram_index_tolerates_typos(self):
+        """Test: Teilstrings und ähnliche Schreibweisen werden gefunden, Wortanfänge zuerst."""
+        from adeacore.autocomplete import NgramIndex
+
+        index = NgramIndex([
+            (1, "Müller Treuhand AG", "Müller Treuhand AG"),
+            (2, "Schmid Müller GmbH", "Schmid Müller GmbH"),
+            (3, "Beispiel GmbH", "Beispiel GmbH"),
+        ])
+        self.assertEqual([pk for pk, _ in index.match("mül", None)], [1, 2])
+        self.assertEqual([pk for pk, _ in index.match("Mülller", None)], [1, 2])
+        self.assertEqual([pk for pk, _ in index.match("treuhnd", None)], [1])
+        self.assertEqual(index.match("xyz", None), [])
+        self.assertEqual(len(index.match("gmbh", 1)), 1)
+
+    def test_endpoint_respects_permissions(self):
+        """Test: der Endpunkt liefert nur erlaubte Mitarbeitende; unbekannte Lookups ergeben 404."""
+        self.client.force_login(self.user)
+        response = self.client.get('/autocomplete/employee/', {'q': 'mann'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': self.employee.pk, 'text': 'Anna Ackermann'}])
+        self.assertEqual(self.client.get('/autocomplete/unbekannt/', {'q': 'x'}).status_code, 404)
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/autocomplete/employee/', {'q': 'mann'})
+        self.assertEqual({row['id'] for row in response.json()['results']}, {self.employee.pk, self.other_employee.pk})
+        response = self.client.get('/autocomplete/client/', {'q': 'Mülller', 'limit': 1})
+        self.assertEqual(response.json()['results'], [{'id': self.mandant.pk, 'text': 'Müller Treuhand AG'}])
+
+    def test_index_invalidated_after_save(self):
+        """Test: neue oder umbenannte Mandanten erscheinen ohne Neustart (Tabellen-Version)."""
+        from django.test import RequestFactory
+
+        from adeacore import autocomplete
+
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        lookup = autocomplete.get_lookup("client")
+        self.assertEqual(autocomplete.match(lookup, request, "Beispiel"), [(self.other_mandant.pk, "Beispiel GmbH")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_mandant.name = "Muster AG"
+            self.other_mandant.save()
+        self.assertEqual(autocomplete.match(lookup, request, "Beispiel"), [])
+        self.assertEqual(autocomplete.match(lookup, request, "Muster"), [(self.other_mandant.pk, "Muster AG")])
+
+    def test_widget_renders_only_selected_choice(self):
+        """Test: das Formular rendert statt aller Optionen nur den gewählten Eintrag."""
+        from adeazeit.forms import TimeEntryForm
+
+        form = TimeEntryForm(initial={'mitarbeiter': self.employee.pk, 'client': self.mandant.pk})
+        html = str(form['mitarbeiter']) + str(form['client'])
+        self.assertIn('value="Anna Ackermann"', html)
+        self.assertIn('value="Müller Treuhand AG"', html)
+        self.assertNotIn('Bruno Baumann', html)
+        self.assertNotIn('Beispiel GmbH', html)
+        self.assertIn('/autocomplete/employee/', html)
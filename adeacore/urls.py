@@ -33,10 +33,17 @@ urlpatterns = [
     path('admin/', lambda request: redirect('/management-console-secure/'), name='admin-redirect'),
     # Admin Dashboard
     path('management-dashboard/', views.admin_dashboard, name='admin-dashboard'),
+    path('management-dashboard/cache/', views.cache_stats_view, name='admin-cache-stats'),
+    path('management-dashboard/performance/', views.performance_report, name='admin-performance'),
+    path('management-dashboard/jobs/', views.jobs_view, name='admin-jobs'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job-status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job-download'),
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('global-logout/', views.global_logout, name='global-logout'),
     path('session/heartbeat/', views.session_heartbeat, name='session-heartbeat'),
+    path('suche/', views.search_view, name='search'),
+    path('autocomplete/<slug:name>/', views.autocomplete_view, name='autocomplete'),
     path('desk/', include('adeadesk.urls', namespace='adeadesk')),
     path('zeit/', include('adeazeit.urls', namespace='adeazeit')),
     path('rechnung/', include('adearechnung.urls', namespace='adearechnung')),
@@ -6,6 +6,7 @@ from django.db.models import Count, Sum, Q
 from datetime import date, timedelta
 from decimal import Decimal
 
+from adeacore.http import alogin_required
 from adeacore.models import Client, Employee
 from adeazeit.models import EmployeeInternal, TimeEntry, Absence
 from adealohn.models import PayrollRecord
@@ -93,8 +94,12 @@ def admin_dashboard(request):
         'employee'
     ).order_by('-created_at')[:5]
     
+    # Debitoren-Summen (gecacht bis zur nächsten Rechnungsänderung)
+    from adearechnung.aging import cached_aging_totals
+
     context = {
         'stats': stats,
+        'debtor_aging': cached_aging_totals(today),
         'recent_time_entries': recent_time_entries,
         'recent_absences': recent_absences,
         'today': today,
@@ -103,19 +108,206 @@ def admin_dashboard(request):
     return render(request, 'admin/dashboard.html', context)
 
 
+@login_required(login_url='/login/')
+@user_passes_test(staff_required, login_url='/login/')
+def cache_stats_view(request):
+    """Cache-Übersicht: Backend und Trefferquote pro Namensraum - nur für Staff-User."""
+    from adeacore.cache_stats import get_backend_info, get_stats, reset_stats
+
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        reset_stats()
+        return redirect('admin-cache-stats')
+
+    context = {
+        'backend': get_backend_info(),
+        'stats': get_stats(),
+    }
+    return render(request, 'admin/cache_stats.html', context)
+
+
+@login_required(login_url='/login/')
+@user_passes_test(staff_required, login_url='/login/')
+def performance_report(request):
+    """Query-Anzahl und Latenz pro View (rollierend, dieser Prozess) - nur für Staff-User."""
+    from adeacore.performance import get_stats_store
+
+    store = get_stats_store()
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        store.clear()
+        return redirect('admin-performance')
+
+    context = {
+        'views': store.summary(),
+        'sample_count': len(store.samples),
+    }
+    return render(request, 'admin/performance.html', context)
+
+
+@login_required(login_url='/login/')
+@user_passes_test(staff_required, login_url='/login/')
+def jobs_view(request):
+    """Hintergrund-Jobs: Warteschlange, laufende und letzte Jobs - nur für Staff-User."""
+    from django.contrib import messages
+
+    from adeacore import jobs
+    from adeacore.models import Job
+
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        job = Job.objects.filter(pk=request.POST.get('job_id') or None).first()
+        if action == 'cancel' and job:
+            if jobs.cancel(job):
+                messages.success(request, f"Job #{job.pk} abgebrochen.")
+            else:
+                messages.warning(request, f"Job #{job.pk} wartet nicht mehr und kann nicht abgebrochen werden.")
+        elif action == 'retry' and job and job.status == Job.STATUS_FAILED:
+            new_job = jobs.enqueue(job.name, job.params, priority=job.priority, user=request.user)
+            messages.success(request, f"Job #{job.pk} neu eingereiht als #{new_job.pk}.")
+        elif action == 'timeentry_rates':
+            # Verrechnete Einträge bleiben unverändert (wie --unbilled-only)
+            new_job = jobs.enqueue('timeentry_rates', {'unbilled_only': True}, user=request.user)
+            messages.success(request, f"Neuberechnung der Stundensätze als Job #{new_job.pk} eingereiht.")
+        elif action in ('lohnausweise', 'invoice_pdfs'):
+            # Ergebnis als ZIP in der Job-Ablage, Download in der Tabelle. Backups bleiben
+            # beim Cronjob/Worker (BACKUP_DIR), nicht als Browser-Download.
+            label = 'Lohnausweise' if action == 'lohnausweise' else 'Rechnungs-PDFs'
+            year = request.POST.get('year', '')
+            if year.isdigit() and 2000 <= int(year) <= 2100:
+                new_job = jobs.enqueue(action, {'year': int(year)}, user=request.user)
+                messages.success(request, f"{label} {year} als Job #{new_job.pk} eingereiht.")
+            else:
+                messages.error(request, f"Ungültiges Jahr für die {label}.")
+        return redirect('admin-jobs')
+
+    status = request.GET.get('status', '')
+    queryset = Job.objects.select_related('created_by')
+    if status:
+        queryset = queryset.filter(status=status)
+    counts = dict(Job.objects.values_list('status').annotate(count=Count('id')).order_by())
+
+    context = {
+        'jobs': queryset[:100],
+        'status_counts': [(value, label, counts.get(value, 0)) for value, label in Job.STATUS_CHOICES],
+        'selected_status': status,
+        'previous_year': date.today().year - 1,
+        'current_year': date.today().year,
+    }
+    return render(request, 'admin/jobs.html', context)
+
+
+@login_required(login_url='/login/')
+def job_status(request, pk):
+    """Status eines Jobs als JSON (für Polling); Staff oder Ersteller des Jobs."""
+    from django.urls import reverse
+
+    from adeacore.http import json_error, json_ok
+    from adeacore.models import Job
+
+    job = Job.objects.filter(pk=pk).first()
+    if job is None or not (request.user.is_staff or job.created_by_id == request.user.pk):
+        return json_error("Job nicht gefunden.", status=404)
+    return json_ok(job={
+        'download_url': reverse('job-download', args=[job.pk]) if job.result_file else None,
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress_percent': job.progress_percent,
+        'progress_message': job.progress_message,
+        'attempts': job.attempts,
+        'result': job.result,
+        'finished': job.is_finished,
+    })
+
+
+@login_required(login_url='/login/')
+def job_download(request, pk):
+    """Ergebnisdatei eines erledigten Jobs aus der Job-Ablage; Staff oder Ersteller des Jobs."""
+    from pathlib import Path
+
+    from django.http import Http404
+
+    from adeacore.jobs import job_file_storage
+    from adeacore.models import Job
+    from adeacore.streaming import streaming_download
+
+    job = Job.objects.filter(pk=pk).first()
+    if job is None or not (request.user.is_staff or job.created_by_id == request.user.pk) or not job.result_file:
+        raise Http404("Keine Datei zu diesem Job.")
+    storage = job_file_storage()
+    if not storage.exists(job.result_file):
+        raise Http404("Datei nicht mehr vorhanden.")
+
+    def chunks():
+        with storage.open(job.result_file, 'rb') as f:
+            yield from f.chunks()
+
+    filename = Path(job.result_file).name
+    content_type = 'application/zip' if filename.endswith('.zip') else 'application/octet-stream'
+    return streaming_download(chunks(), content_type=content_type, filename=filename)
+
+
+@login_required(login_url='/login/')
+def search_view(request):
+    """Globale Volltext-Suche (Suchfeld in der Navigation), siehe `adeacore.search`."""
+    import time
+
+    from adeacore import search
+
+    query = request.GET.get('q', '').strip()[:200]
+    sources = search.get_sources()
+    kind = request.GET.get('typ', '')
+    if kind not in {source.kind for source in sources}:
+        kind = ''
+
+    started = time.perf_counter()
+    hits = search.search(request.user, query, kinds=[kind] if kind else None) if query else []
+    context = {
+        'search_query': query,
+        'hits': hits,
+        'kinds': [(source.kind, source.label) for source in sources],
+        'selected_kind': kind,
+        'duration_ms': (time.perf_counter() - started) * 1000,
+        'limit': search.DEFAULT_LIMIT,
+    }
+    return render(request, 'search.html', context)
+
+
+@alogin_required
+async def autocomplete_view(request, name):
+    """Vorschläge für Auswahlfelder (AutocompleteWidget) als JSON, siehe `adeacore.autocomplete`."""
+    from asgiref.sync import sync_to_async
+
+    from adeacore import autocomplete
+    from adeacore.http import json_error, json_ok
+
+    lookup = autocomplete.get_lookup(name)
+    if lookup is None:
+        return json_error("Unbekannte Auswahlliste.", status=404)
+    try:
+        limit = min(max(int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT)), 1), autocomplete.MAX_LIMIT)
+    except ValueError:
+        limit = autocomplete.DEFAULT_LIMIT
+
+    # Queryset (Berechtigungen, Session-Mandant) und Index-Zugriff sind synchron
+    matches = await sync_to_async(autocomplete.match)(lookup, request, request.GET.get('q', ''), limit)
+    return json_ok(results=[{'id': pk, 'text': label} for pk, label in matches])
+
 def global_logout(request):
     """Logout-Funktion für normale User (nicht nur Admin)."""
     auth_logout(request)
     return redirect('home')
 
 
-def session_heartbeat(request):
-    """Heartbeat-Endpoint um Session während aktiver Eingabe zu verlängern."""
-    if request.user.is_authenticated:
-        # Session wird automatisch verlängert durch SESSION_SAVE_EVERY_REQUEST = True
-        from django.http import JsonResponse
+async def session_heartbeat(request):
+    """Heartbeat-Endpoint um Session während aktiver Eingabe zu verlängern (async)."""
+    from django.http import JsonResponse
+    from adeacore.http import aget_request_user
+
+    user = await aget_request_user(request)
+    if user.is_authenticated:
+        # Session wird durch SessionSecurityMiddleware verlängert (last_activity, gebündelt)
         return JsonResponse({"status": "ok", "authenticated": True})
     else:
-        from django.http import JsonResponse
         return JsonResponse({"status": "expired", "authenticated": False}, status=401)
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdeadeskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adeadesk'
+
+    def ready(self):
+        # Suchindex-Anmeldung für Mandanten, Notizen und Termine
+        from . import signals  # noqa: F401
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from django.urls import reverse
+from django.utils import timezone
+
+from adeacore.autocomplete import register_lookup
+from adeacore.models import Client, ClientNote, Event
+from adeacore.search import register_search_source
+
+# Volltext-Suche (adeacore.search): nur Klartext-Felder, verschlüsselte bleiben draussen
+register_search_source(
+    Client,
+    kind="client",
+    label="Mandant",
+    build=lambda client: {
+        "title": client.name,
+        "body": "\n".join(filter(None, [client.kontaktperson_name, client.status_grund])),
+        "client_id": client.pk,
+    },
+    url=lambda doc: reverse("adeadesk:client-detail", args=[doc.object_id]),
+)
+register_search_source(
+    ClientNote,
+    kind="note",
+    label="Notiz",
+    build=lambda note: {
+        "title": note.title,
+        "body": note.content,
+        "client_id": note.client_id,
+        "date": note.note_date,
+    },
+    url=lambda doc: reverse("adeadesk:note-update", args=[doc.client_id, doc.object_id]),
+)
+register_search_source(
+    Event,
+    kind="event",
+    label="Termin",
+    build=lambda event: {
+        "title": event.title,
+        "body": event.description,
+        "client_id": event.client_id,
+        "date": timezone.localtime(event.start_date).date() if event.start_date else None,
+    },
+    url=lambda doc: reverse("adeadesk:event-update", args=[doc.client_id, doc.object_id]),
+)
+
+# Mandanten-Auswahl (adeacore.autocomplete), z.B. in Zeiteintrag- und Aufgaben-Formular
+register_lookup(
+    "client",
+    queryset=lambda request: Client.objects.order_by("name"),
+    fields=["name"],
+    cache_models=[Client],
+)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdealohnConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adealohn'
+
+    def ready(self):
+        # Autocomplete-Lookups registrieren
+        from . import signals  # noqa: F401
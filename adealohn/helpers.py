@@ -146,10 +146,17 @@ def get_parameter_for_year_cached(
     
     Verwendet LRU-Cache für Performance (max 128 Einträge).
     """
+    from adeacore.cache_stats import record_hit, record_miss
+
     model_name = model_class.__name__
     filters_tuple = tuple(sorted(filters.items()))
     
+    hits_before = _get_parameter_cached.cache_info().hits
     result = _get_parameter_cached(model_name, year, filters_tuple)
+    if _get_parameter_cached.cache_info().hits > hits_before:
+        record_hit("parameters")
+    else:
+        record_miss("parameters")
     
     # Falls None und defaults vorhanden, erstelle temporäre Instanz
     if result is None and defaults:
@@ -0,0 +1,37 @@
+"""
+Hintergrund-Jobs von AdeaLohn (siehe `adeacore.jobs`).
+"""
+
+import tempfile
+
+from adeacore.jobs import register
+
+
+@register("lohnausweise", label="Lohnausweise erstellen")
+def lohnausweise_job(ctx, year, client_ids=None, workers=1):
+    """
+    Wie `manage.py generate_lohnausweise`; ohne client_ids alle Firmen mit Lohn aktiv.
+
+    Gerendert wird in ein temporäres Verzeichnis, das Ergebnis liegt als ZIP in der
+    Job-Ablage (Download auf der Jobs-Seite).
+    """
+    from adeacore.models import Client
+
+    from .lohnausweis import export_client_year
+
+    clients = Client.objects.filter(client_type="FIRMA", lohn_aktiv=True).order_by("name")
+    if client_ids:
+        clients = clients.filter(pk__in=client_ids)
+    clients = list(clients)
+
+    summary = {"certificates": 0, "rendered": 0, "skipped": 0, "draft_months": 0}
+    with tempfile.TemporaryDirectory(prefix="lohnausweise_") as directory:
+        for index, client in enumerate(clients):
+            ctx.progress(index, len(clients), client.name)
+            result = export_client_year(client, year, directory, workers=workers)
+            for key in summary:
+                summary[key] += getattr(result, key)
+        if summary["certificates"]:
+            summary["file"] = ctx.save_zip(f"lohnausweise_{year}.zip", directory)
+    ctx.progress(len(clients), len(clients), "Fertig")
+    return summary
@@ -0,0 +1,309 @@
+"""
+Jahresaggregation und Massen-Erstellung der Lohnausweise pro Mandant.
+
+Ziel: Zum Jahresende pro Mitarbeitendem einen Lohnausweis aus den (bis zu zwölf)
+PayrollRecords und deren PayrollItems – ohne jede Lohnabrechnung einzeln zu öffnen.
+Die Aggregation braucht pro Mandant eine konstante Anzahl gruppierter Queries
+(Mitarbeitende, Summen der Lohnläufe, Summen der Positionen pro Lohnart, Lohnarten),
+unabhängig von der Anzahl Mitarbeitender.
+
+Zuordnung der Lohnarten zu den Ziffern (vereinfachtes Formular 11):
+- SPESEN_* bzw. Kategorie SPESEN                     -> Ziffer 13 (nicht im Bruttolohn)
+- PRIVATANTEIL_* bzw. Kategorie SACHLEISTUNG          -> Ziffer 2
+- KINDERZULAGE/FAMILIENZULAGE bzw. FAMILIENZULAGE     -> Ziffer 1
+- übrige lohnwirksame Lohnarten                       -> Ziffer 1
+- nicht lohnwirksame Lohnarten (z.B. BVG_AN als Abzug) werden ignoriert; die Abzüge
+  stammen aus den Feldern der PayrollRecords (Ziffern 9, 10.1, 12).
+
+Die PDFs werden in einem Prozess-Pool gerendert (`adealohn.lohnausweis_pdf`); pro
+Mandant und Jahr entsteht zusätzlich `lohnausweise.json` (maschinenlesbar). Ein
+unveränderter Lohnausweis (gleicher Daten-Hash wie im letzten Export) wird nicht neu
+gerendert (Cache-Statistik-Namensraum "pdfs").
+"""
+
+from __future__ import annotations
+
+import calendar
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.utils import timezone
+from django.utils.text import slugify
+
+from adeacore.cache_stats import record_hit, record_miss
+from adeacore.models import Employee, PayrollRecord
+
+from .models import PayrollItem, WageType, WageTypeCategory
+
+MANIFEST_NAME = "lohnausweise.json"
+CACHE_NAMESPACE = "pdfs"
+FAMILY_ALLOWANCE_CODES = ("KINDERZULAGE", "FAMILIENZULAGE")
+
+# Summierte Felder der PayrollRecords
+RECORD_FIELDS = (
+    "bruttolohn",
+    "ahv_employee",
+    "alv_employee",
+    "nbu_employee",
+    "bu_employee",
+    "ktg_employee",
+    "bvg_employee",
+    "qst_abzug",
+    "nettolohn",
+)
+
+ZERO = Decimal("0.00")
+
+
+def classify_wage_type(wage_type: WageType) -> Optional[str]:
+    """Ziffer-Gruppe einer Lohnart: 'lohn', 'nebenleistungen', 'spesen' oder None (ignoriert)."""
+    code = wage_type.code
+    if code.startswith("SPESEN_") or wage_type.category == WageTypeCategory.SPESEN:
+        return "spesen"
+    if code.startswith("PRIVATANTEIL_") or wage_type.category == WageTypeCategory.SACHLEISTUNG:
+        return "nebenleistungen"
+    if code in FAMILY_ALLOWANCE_CODES or wage_type.category == WageTypeCategory.FAMILIENZULAGE:
+        return "lohn"
+    if wage_type.is_lohnwirksam:
+        return "lohn"
+    return None
+
+
+def _address(*parts) -> str:
+    return ", ".join(part for part in (p.strip() for p in parts if p) if part)
+
+
+@dataclass
+class Lohnausweis:
+    """Aggregierte Jahreswerte eines Mitarbeitenden."""
+
+    employee: Employee
+    year: int
+    months: int
+    first_month: int
+    last_month: int
+    draft_months: int
+    record_totals: Dict[str, Decimal]
+    categories: Dict[str, Decimal] = field(default_factory=dict)
+    wage_types: Dict[str, Decimal] = field(default_factory=dict)
+
+    @property
+    def period_from(self) -> date:
+        start = date(self.year, self.first_month, 1)
+        entry = self.employee.eintrittsdatum
+        return max(start, entry) if entry else start
+
+    @property
+    def period_to(self) -> date:
+        end = date(self.year, self.last_month, calendar.monthrange(self.year, self.last_month)[1])
+        exit_date = self.employee.austrittsdatum
+        return min(end, exit_date) if exit_date else end
+
+    @property
+    def ziffern(self) -> Dict[str, Decimal]:
+        totals = self.record_totals
+        lohn = self.categories.get("lohn", ZERO)
+        nebenleistungen = self.categories.get("nebenleistungen", ZERO)
+        bruttolohn = lohn + nebenleistungen
+        sozialbeitraege = totals["ahv_employee"] + totals["alv_employee"] + totals["nbu_employee"] + totals["bu_employee"]
+        bvg = totals["bvg_employee"]
+        return {
+            "1_lohn": lohn,
+            "2_gehaltsnebenleistungen": nebenleistungen,
+            "8_bruttolohn": bruttolohn,
+            "9_sozialbeitraege": sozialbeitraege,
+            "10_1_bvg": bvg,
+            "11_nettolohn": bruttolohn - sozialbeitraege - bvg,
+            "12_quellensteuer": totals["qst_abzug"],
+            "13_spesen": self.categories.get("spesen", ZERO),
+        }
+
+    def as_dict(self) -> Dict:
+        """JSON-taugliche Darstellung (Beträge als Strings), Grundlage für PDF und Export."""
+        employee = self.employee
+        client = employee.client
+        return {
+            "year": self.year,
+            "employee": {
+                "id": employee.pk,
+                "personalnummer": employee.personalnummer or "",
+                "name": f"{employee.last_name} {employee.first_name}",
+                "ahv_nummer": employee.ahv_nummer or "",
+                "geburtsdatum": employee.geburtsdatum.strftime("%d.%m.%Y") if employee.geburtsdatum else "",
+                "address": _address(employee.street, f"{employee.zipcode or ''} {employee.city or ''}"),
+            },
+            "employer": {
+                "id": client.pk,
+                "name": client.name,
+                "address": _address(
+                    f"{client.street or ''} {client.house_number or ''}",
+                    f"{client.zipcode or ''} {client.city or ''}",
+                ),
+            },
+            "period_from": self.period_from.strftime("%d.%m.%Y"),
+            "period_to": self.period_to.strftime("%d.%m.%Y"),
+            "months": self.months,
+            "draft_months": self.draft_months,
+            "ziffern": {key: str(value) for key, value in self.ziffern.items()},
+            "wage_types": {code: str(value) for code, value in sorted(self.wage_types.items())},
+            "bruttolohn_abrechnungen": str(self.record_totals["bruttolohn"]),
+        }
+
+
+def aggregate_year(client, year: int) -> List[Lohnausweis]:
+    """
+    Jahreswerte aller Mitarbeitenden des Mandanten mit mindestens einem Lohnlauf im Jahr.
+
+    Vier Queries, unabhängig von der Anzahl Mitarbeitender und Lohnläufe.
+    """
+    record_rows = (
+        PayrollRecord.objects.filter(employee__client=client, year=year)
+        .values("employee_id")
+        .annotate(
+            months=Count("id"),
+            first_month=Min("month"),
+            last_month=Max("month"),
+            draft_months=Count("id", filter=Q(status="ENTWURF")),
+            **{name: Sum(name) for name in RECORD_FIELDS},
+        )
+        .order_by()
+    )
+    records = {row["employee_id"]: row for row in record_rows}
+    if not records:
+        return []
+
+    item_total = ExpressionWrapper(F("quantity") * F("amount"), output_field=DecimalField(max_digits=14, decimal_places=2))
+    item_rows = list(
+        PayrollItem.objects.filter(payroll__employee__client=client, payroll__year=year)
+        .values("payroll__employee_id", "wage_type_id")
+        .annotate(total=Sum(item_total))
+        .order_by()
+    )
+    wage_types = WageType.objects.in_bulk({row["wage_type_id"] for row in item_rows})
+
+    employees = Employee.objects.filter(pk__in=records.keys()).select_related("client").order_by("last_name", "first_name", "pk")
+    certificates = {}
+    for employee in employees:
+        row = records[employee.pk]
+        certificates[employee.pk] = Lohnausweis(
+            employee=employee,
+            year=year,
+            months=row["months"],
+            first_month=row["first_month"],
+            last_month=row["last_month"],
+            draft_months=row["draft_months"],
+            record_totals={name: Decimal(row[name] or 0).quantize(ZERO) for name in RECORD_FIELDS},
+        )
+
+    for row in item_rows:
+        certificate = certificates.get(row["payroll__employee_id"])
+        wage_type = wage_types[row["wage_type_id"]]
+        group = classify_wage_type(wage_type)
+        if certificate is None or group is None:
+            continue
+        total = Decimal(row["total"] or 0).quantize(ZERO)
+        certificate.categories[group] = certificate.categories.get(group, ZERO) + total
+        certificate.wage_types[wage_type.code] = certificate.wage_types.get(wage_type.code, ZERO) + total
+
+    return list(certificates.values())
+
+
+def _file_name(data: Dict) -> str:
+    employee = data["employee"]
+    number = employee["personalnummer"] or str(employee["id"])
+    return f"Lohnausweis_{data['year']}_{slugify(number)}_{slugify(employee['name'])}.pdf"
+
+
+def _data_hash(data: Dict) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ExportResult:
+    directory: Path
+    certificates: int
+    rendered: int
+    skipped: int
+    draft_months: int
+
+
+def export_client_year(
+    client,
+    year: int,
+    output_dir,
+    *,
+    workers: int = 1,
+    force: bool = False,
+    log: Callable[[str], None] = lambda message: None,
+) -> ExportResult:
+    """
+    Erstellt die Lohnausweise eines Mandanten für ein Jahr.
+
+    Ablage: <output_dir>/<jahr>/<mandant>/ mit einem PDF pro Mitarbeitendem und
+    `lohnausweise.json`. Mit workers > 1 rendert ein Prozess-Pool (spawn, ohne DB-Zugriff).
+    """
+    directory = Path(output_dir) / str(year) / f"{client.pk}-{slugify(client.name)}"
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path = directory / MANIFEST_NAME
+
+    previous = {}
+    if manifest_path.exists() and not force:
+        with manifest_path.open(encoding="utf-8") as f:
+            previous = {entry["file"]: entry["sha256"] for entry in json.load(f)["certificates"]}
+
+    certificates = [certificate.as_dict() for certificate in aggregate_year(client, year)]
+    entries = []
+    jobs = []
+    for data in certificates:
+        file_name = _file_name(data)
+        digest = _data_hash(data)
+        if previous.get(file_name) == digest and (directory / file_name).exists():
+            record_hit(CACHE_NAMESPACE)
+        else:
+            record_miss(CACHE_NAMESPACE)
+            jobs.append((data, str(directory / file_name)))
+        entries.append({"file": file_name, "sha256": digest, **data})
+
+    if jobs:
+        _render(jobs, workers)
+
+    manifest = {
+        "format": 1,
+        "created_at": timezone.now().isoformat(timespec="seconds"),
+        "year": year,
+        "employer": {"id": client.pk, "name": client.name},
+        "certificates": entries,
+    }
+    with manifest_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    result = ExportResult(
+        directory=directory,
+        certificates=len(entries),
+        rendered=len(jobs),
+        skipped=len(entries) - len(jobs),
+        draft_months=sum(data["draft_months"] for data in certificates),
+    )
+    log(f"{client.name}: {result.certificates} Lohnausweise ({result.rendered} gerendert, {result.skipped} unverändert)")
+    return result
+
+
+def _render(jobs, workers: int) -> None:
+    from .lohnausweis_pdf import render_to_file
+
+    if workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            render_to_file(job)
+        return
+    # spawn: Worker erben keine offenen DB-Verbindungen des Hauptprozesses
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        list(pool.map(render_to_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
@@ -0,0 +1,123 @@
+"""
+PDF-Ausgabe des Lohnausweises (Formular 11, vereinfachte Darstellung).
+
+Bewusst ohne Django-Models/DB: die Worker-Prozesse von `generate_lohnausweise`
+(spawn) importieren nur dieses Modul und erhalten die bereits aggregierten Daten
+als Dict (`Lohnausweis.as_dict()`).
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# (Ziffer, Bezeichnung, Schlüssel in as_dict()["ziffern"])
+ZIFFERN = (
+    ("1", "Lohn (inkl. Familienzulagen)", "1_lohn"),
+    ("2", "Gehaltsnebenleistungen (Sachleistungen, Privatanteile)", "2_gehaltsnebenleistungen"),
+    ("8", "Bruttolohn total", "8_bruttolohn"),
+    ("9", "Beiträge AHV/IV/EO/ALV/NBU", "9_sozialbeitraege"),
+    ("10.1", "Berufliche Vorsorge 2. Säule – ordentliche Beiträge", "10_1_bvg"),
+    ("11", "Nettolohn", "11_nettolohn"),
+    ("12", "Quellensteuerabzug", "12_quellensteuer"),
+    ("13", "Spesenvergütungen (nicht im Bruttolohn enthalten)", "13_spesen"),
+)
+
+
+def _chf(value) -> str:
+    return f"{Decimal(value):,.2f}".replace(",", "'")
+
+
+def _styles():
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            "LohnausweisTitle",
+            parent=styles["Heading1"],
+            fontSize=16,
+            textColor=colors.HexColor("#1d1d1f"),
+            spaceAfter=4,
+        ),
+        "normal": ParagraphStyle(
+            "LohnausweisNormal",
+            parent=styles["Normal"],
+            fontSize=9,
+            textColor=colors.HexColor("#1d1d1f"),
+        ),
+    }
+
+
+def render_pdf(data: Dict) -> bytes:
+    """Rendert einen Lohnausweis als PDF (Bytes)."""
+    styles = _styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=20 * mm,
+        rightMargin=20 * mm,
+        topMargin=16 * mm,
+        bottomMargin=16 * mm,
+        title=f"Lohnausweis {data['year']} – {data['employee']['name']}",
+    )
+
+    employee = data["employee"]
+    employer = data["employer"]
+    story = [
+        Paragraph(f"Lohnausweis {data['year']}", styles["title"]),
+        Paragraph("Certificat de salaire / Certificato di salario", styles["normal"]),
+        Spacer(1, 6 * mm),
+    ]
+
+    head = [
+        ["AHV-Nr.", employee["ahv_nummer"] or "–", "Arbeitgeber", employer["name"]],
+        ["Geburtsdatum", employee["geburtsdatum"] or "–", "", employer["address"]],
+        ["Name", employee["name"], "Personalnummer", employee["personalnummer"] or "–"],
+        ["Adresse", employee["address"], "Periode", f"{data['period_from']} – {data['period_to']}"],
+    ]
+    head_table = Table(head, colWidths=[28 * mm, 57 * mm, 30 * mm, 55 * mm])
+    head_table.setStyle(TableStyle([
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#6e6e73")),
+        ("TEXTCOLOR", (2, 0), (2, -1), colors.HexColor("#6e6e73")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    story.extend([head_table, Spacer(1, 8 * mm)])
+
+    rows = [["Ziffer", "Bezeichnung", "CHF"]]
+    for ziffer, label, key in ZIFFERN:
+        rows.append([ziffer, label, _chf(data["ziffern"][key])])
+    table = Table(rows, colWidths=[16 * mm, 119 * mm, 35 * mm])
+    table.setStyle(TableStyle([
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.HexColor("#1d1d1f")),
+        ("ALIGN", (2, 0), (2, -1), "RIGHT"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f5f5f7")]),
+        ("FONTNAME", (0, 3), (-1, 3), "Helvetica-Bold"),
+        ("FONTNAME", (0, 6), (-1, 6), "Helvetica-Bold"),
+    ]))
+    story.extend([table, Spacer(1, 8 * mm)])
+
+    remarks = [f"Lohnabrechnungen: {data['months']} Monate"]
+    if data["draft_months"]:
+        remarks.append(f"Achtung: {data['draft_months']} Abrechnung(en) noch im Status Entwurf")
+    story.append(Paragraph("Bemerkungen (Ziffer 15): " + "; ".join(remarks), styles["normal"]))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_to_file(job: Tuple[Dict, str]) -> str:
+    """Worker-Funktion: rendert (Daten, Zielpfad) und gibt den Pfad zurück."""
+    data, path = job
+    Path(path).write_bytes(render_pdf(data))
+    return path
@@ -0,0 +1,134 @@
+"""
+Lohnjournal: alle Lohnläufe eines Zeitraums als eine Tabelle (CSV/XLSX).
+
+Ziel: Lohndaten ohne Klicken durch einzelne Abrechnungen exportieren – über Monate,
+Jahre und (für Staff) alle Mandanten. Eine Zeile pro PayrollRecord, eine Spalte pro
+vorkommender Lohnart (Summe quantity × amount) und pro Beitrags-/Basisfeld.
+
+Speicher bleibt konstant: die Lohnläufe werden per `iterator(chunk_size=...)`
+gelesen, die Positionen pro Chunk mit einer gruppierten Query geholt. Queries:
+1 (Lohnarten) + 1 (Lohnläufe) + 1 pro Chunk.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterator, List, Sequence, Tuple
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from adeacore.models import PayrollRecord
+
+from .models import PayrollItem, WageType
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# (Feld, Spaltentitel) der PayrollRecords nach den Lohnarten-Spalten
+CONTRIBUTION_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("bruttolohn", "Bruttolohn"),
+    ("ahv_basis", "AHV-Basis"),
+    ("ahv_effective_basis", "AHV-Basis effektiv"),
+    ("ahv_employee", "AHV AN"),
+    ("ahv_employer", "AHV AG"),
+    ("alv_basis", "ALV-Basis"),
+    ("alv_effective_basis", "ALV-Basis effektiv"),
+    ("alv_employee", "ALV AN"),
+    ("alv_employer", "ALV AG"),
+    ("uv_basis", "UV-Basis"),
+    ("uvg_effective_basis", "UVG-Basis effektiv"),
+    ("bu_employee", "BU AN"),
+    ("bu_employer", "BU AG"),
+    ("nbu_employee", "NBU AN"),
+    ("ktg_effective_basis", "KTG-Basis effektiv"),
+    ("ktg_employee", "KTG AN"),
+    ("ktg_employer", "KTG AG"),
+    ("bvg_basis", "BVG-Basis"),
+    ("bvg_insured_salary", "BVG versicherter Lohn"),
+    ("bvg_employee", "BVG AN"),
+    ("bvg_employer", "BVG AG"),
+    ("fak_employer", "FAK AG"),
+    ("vk_employer", "VK AG"),
+    ("qst_basis", "QST-Basis"),
+    ("qst_abzug", "QST-Abzug"),
+    ("nettolohn", "Nettolohn"),
+)
+
+_RECORD_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("employee__client__name", "Mandant"),
+    ("employee__personalnummer", "Personalnummer"),
+    ("employee__last_name", "Nachname"),
+    ("employee__first_name", "Vorname"),
+    ("year", "Jahr"),
+    ("month", "Monat"),
+    ("status", "Status"),
+)
+
+_STATUS_LABELS = dict(PayrollRecord.STATUS_CHOICES)
+
+
+def journal_wage_types(records) -> List[Tuple[int, str, str]]:
+    """(id, code, name) aller Lohnarten mit Positionen in den Lohnläufen, nach Code."""
+    return list(
+        WageType.objects.filter(items__payroll__in=records.values("pk"))
+        .distinct()
+        .order_by("code")
+        .values_list("id", "code", "name")
+    )
+
+
+def journal_header(wage_types: Sequence[Tuple[int, str, str]]) -> List[str]:
+    return (
+        [label for _, label in _RECORD_COLUMNS]
+        + [f"{code} {name}" for _, code, name in wage_types]
+        + [label for _, label in CONTRIBUTION_FIELDS]
+    )
+
+
+def _item_totals(payroll_ids) -> dict:
+    item_total = ExpressionWrapper(F("quantity") * F("amount"), output_field=DecimalField(max_digits=14, decimal_places=2))
+    totals = {}
+    rows = (
+        PayrollItem.objects.filter(payroll_id__in=payroll_ids)
+        .values_list("payroll_id", "wage_type_id")
+        .annotate(total=Sum(item_total))
+        .order_by()
+    )
+    for payroll_id, wage_type_id, total in rows:
+        totals[(payroll_id, wage_type_id)] = Decimal(total).quantize(Decimal("0.01"))
+    return totals
+
+
+def journal_rows(records, wage_types: Sequence[Tuple[int, str, str]], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list]:
+    """
+    Eine Zeile pro Lohnlauf (sortiert nach Mandant, Jahr, Monat, Mitarbeiter), passend
+    zu `journal_header(wage_types)`. Liest streamend, hält höchstens einen Chunk.
+    """
+    wage_type_ids = [wage_type_id for wage_type_id, _, _ in wage_types]
+    record_fields = [name for name, _ in _RECORD_COLUMNS]
+    values = (
+        records.order_by("employee__client__name", "employee__client_id", "year", "month",
+                         "employee__last_name", "employee__first_name", "pk")
+        .values_list("pk", *record_fields, *(name for name, _ in CONTRIBUTION_FIELDS))
+        .iterator(chunk_size=chunk_size)
+    )
+    status_index = 1 + record_fields.index("status")
+    chunk = []
+    for row in values:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_rows(chunk, wage_type_ids, status_index)
+            chunk = []
+    if chunk:
+        yield from _chunk_rows(chunk, wage_type_ids, status_index)
+
+
+def _chunk_rows(chunk, wage_type_ids, status_index) -> Iterator[list]:
+    totals = _item_totals([row[0] for row in chunk])
+    contribution_start = status_index + 1
+    for row in chunk:
+        payroll_id = row[0]
+        line = list(row[1:contribution_start])
+        line[status_index - 1] = _STATUS_LABELS.get(line[status_index - 1], line[status_index - 1])
+        line.extend(totals.get((payroll_id, wage_type_id)) for wage_type_id in wage_type_ids)
+        line.extend(row[contribution_start:])
+        yield line
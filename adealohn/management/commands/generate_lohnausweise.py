@@ -0,0 +1,104 @@
+"""
+Management-Command für die Massen-Erstellung der Lohnausweise eines Jahres.
+
+Verwendung:
+    python manage.py generate_lohnausweise 2025
+    python manage.py generate_lohnausweise 2025 --client 12 --client 15 --output /srv/lohnausweise
+    python manage.py generate_lohnausweise 2025 --workers 8 --force
+    python manage.py generate_lohnausweise 2025 --enqueue     # im Worker (adeacore.jobs)
+
+Pro Mandant werden die Lohnläufe des Jahres gruppiert aggregiert, die PDFs in einem
+Prozess-Pool gerendert und `lohnausweise.json` geschrieben. Unveränderte Lohnausweise
+werden bei einem erneuten Lauf übersprungen (--force rendert alle neu).
+Siehe `adealohn.lohnausweis`.
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adeacore.models import Client
+from adealohn.lohnausweis import export_client_year
+
+
+class Command(BaseCommand):
+    help = 'Erstellt die Lohnausweise (PDF + JSON) aller Mitarbeitenden für ein Jahr'
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int, help='Kalenderjahr (z.B. 2025)')
+        parser.add_argument(
+            '--client',
+            action='append',
+            type=int,
+            dest='clients',
+            help='Nur diesen Mandanten (ID, mehrfach möglich; Standard: alle Firmen mit Lohn aktiv)',
+        )
+        parser.add_argument('--output', default=None, help='Zielverzeichnis (Standard: lohnausweise)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Anzahl Render-Prozesse (1 = im Hauptprozess)',
+        )
+        parser.add_argument('--force', action='store_true', help='Auch unveränderte Lohnausweise neu rendern')
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Als Hintergrund-Job einreihen (manage.py run_worker) statt direkt ausführen',
+        )
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year < 2000 or year > 2100:
+            raise CommandError('Jahr muss zwischen 2000 und 2100 liegen.')
+        if options['workers'] < 1:
+            raise CommandError('--workers muss mindestens 1 sein.')
+
+        clients = Client.objects.filter(client_type='FIRMA', lohn_aktiv=True).order_by('name')
+        if options['clients']:
+            ids = set(options['clients'])
+            clients = clients.filter(pk__in=ids)
+            unknown = ids - {client.pk for client in clients}
+            if unknown:
+                raise CommandError(
+                    f"Unbekannte Mandanten oder Lohn nicht aktiv: {', '.join(str(pk) for pk in sorted(unknown))}"
+                )
+
+        if options['enqueue']:
+            from adeacore.jobs import enqueue
+
+            if options['output'] or options['force']:
+                raise CommandError('--output/--force gelten nicht mit --enqueue: der Job legt ein ZIP in der Job-Ablage ab.')
+            job = enqueue('lohnausweise', {
+                'year': year,
+                'client_ids': options['clients'],
+                'workers': options['workers'],
+            })
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Als Job #{job.pk} eingereiht (manage.py run_worker); Download auf der Jobs-Seite."
+            ))
+            return
+
+        started = time.monotonic()
+        log = lambda message: self.stdout.write(f"  {message}")
+        total = rendered = 0
+        for client in clients:
+            result = export_client_year(
+                client,
+                year,
+                options['output'] or 'lohnausweise',
+                workers=options['workers'],
+                force=options['force'],
+                log=log,
+            )
+            total += result.certificates
+            rendered += result.rendered
+            if result.draft_months:
+                self.stdout.write(self.style.WARNING(
+                    f"  ⚠️  {client.name}: {result.draft_months} Lohnabrechnung(en) im Status Entwurf enthalten"
+                ))
+
+        duration = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} Lohnausweise {year} erstellt ({rendered} gerendert, {total - rendered} unverändert, {duration:.1f}s)"
+        ))
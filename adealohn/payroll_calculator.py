@@ -7,11 +7,16 @@ from decimal import Decimal
 from adeacore.models import PayrollRecord
 from adeacore.money import round_to_5_rappen
 
+FAMILY_ALLOWANCE_CODES = ('KINDERZULAGE', 'FAMILIENZULAGE')
 
-def berechne_lohnabrechnung(record: PayrollRecord) -> dict:
+
+def berechne_lohnabrechnung(record: PayrollRecord, items=None) -> dict:
     """
     Zentrale Funktion für Lohnabrechnungsberechnung.
     Single Source of Truth für UI und Print.
+
+    `items` sind die bereits geladenen PayrollItems (mit wage_type) des Records;
+    ohne Angabe werden sie mit einer Query geladen.
     
     Formeln:
     - nettolohn = bruttolohn - sozialabzuege_total - qst_abzug
@@ -53,17 +58,18 @@ def berechne_lohnabrechnung(record: PayrollRecord) -> dict:
     # Nettolohn = Bruttolohn - Sozialabzüge - QST
     nettolohn = bruttolohn - sozialabzuege_total - qst_abzug
     
+    if items is None:
+        items = list(record.items.select_related("wage_type"))
+    
     # Privatanteile (aus PayrollItems)
-    privatanteil_items = record.items.filter(
-        wage_type__code__startswith="PRIVATANTEIL_"
+    privatanteile_total = sum(
+        item.total for item in items if item.wage_type.code.startswith("PRIVATANTEIL_")
     )
-    privatanteile_total = sum(item.total for item in privatanteil_items)
     
     # Familienzulagen (Durchlaufender Posten SVA)
-    family_allowance_items = record.items.filter(
-        wage_type__code__in=['KINDERZULAGE', 'FAMILIENZULAGE']
+    zulagen_total = sum(
+        item.total for item in items if item.wage_type.code in FAMILY_ALLOWANCE_CODES
     )
-    zulagen_total = sum(item.total for item in family_allowance_items)
     
     # Auszahlung = Nettolohn - Privatanteile + Zulagen
     auszahlung_raw = nettolohn - privatanteile_total + zulagen_total
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from adeacore.autocomplete import register_lookup
+from adeacore.http_cache import track_table_versions
+from adeacore.models import Employee
+from adeacore.tenancy import resolve_current_client
+
+
+def _employee_lookup_queryset(request):
+    # Nur Mitarbeitende des aktiven Mandanten (wie die Listen in AdeaLohn)
+    client = resolve_current_client(request)
+    if client is None:
+        return Employee.objects.none()
+    return Employee.objects.filter(client=client).order_by("last_name", "first_name")
+
+
+# Mitarbeiter-Auswahl (adeacore.autocomplete), z.B. Filter der Lohnabrechnungs-Liste
+register_lookup(
+    "lohn-employee",
+    queryset=_employee_lookup_queryset,
+    fields=["first_name", "last_name"],
+    cache_models=[Employee],
+)
+track_table_versions(Employee)
@@ -0,0 +1,248 @@
+"""
+Jährliche Lohnmeldung an die Sozialversicherungen (AHV/ALV, UVG, BVG, FAK).
+
+Ziel: Die Jahressummen pro Mitarbeitendem (AHV-Lohn, ALV-Lohn, UVG-Lohn nach Kappung,
+BVG-Lohn, FAK) nicht mehr von Hand aus den Lohnabrechnungen ins Excel übertragen.
+Alle Summen eines Mandanten kommen aus einer gruppierten Query; Stammdaten und die
+YTD-Felder des Mitarbeiters werden in derselben Query mitgelesen.
+
+Plausibilisierung pro Mitarbeitendem:
+- YTD-Abgleich: Summe der ABGERECHNETEN Lohnläufe gegen `alv_ytd_basis`,
+  `uvg_ytd_basis`, `bvg_ytd_basis` des Employee. Die YTD-Felder werden im Januar
+  zurückgesetzt, der Abgleich ist also nur für das jüngste Lohnjahr des Mitarbeiters
+  möglich (sonst übersprungen).
+- Lohnläufe, die noch nicht abgerechnet sind.
+- ALV-/UVG-Lohn über dem Jahresmaximum der Parameter des Jahres.
+
+Export: CSV/XLSX über `adeacore.streaming` oder XML (`declaration_xml_chunks`,
+einfaches eigenes Schema, kein Swissdec/ELM).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List
+from xml.sax.saxutils import escape, quoteattr
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from adeacore.models import PayrollRecord
+
+from .helpers import get_parameter_for_year_cached
+from .models import ALVParameter, UVGParameter
+
+ZERO = Decimal("0.00")
+
+# (Feld im PayrollRecord, Spaltentitel / XML-Element)
+DECLARATION_FIELDS = (
+    ("bruttolohn", "Bruttolohn", "Bruttolohn"),
+    ("ahv_basis", "AHV-Lohn", "AHVLohn"),
+    ("ahv_effective_basis", "AHV-Lohn beitragspflichtig", "AHVLohnBeitragspflichtig"),
+    ("ahv_employee", "AHV AN", "AHVBeitragAN"),
+    ("ahv_employer", "AHV AG", "AHVBeitragAG"),
+    ("alv_effective_basis", "ALV-Lohn", "ALVLohn"),
+    ("alv_employee", "ALV AN", "ALVBeitragAN"),
+    ("alv_employer", "ALV AG", "ALVBeitragAG"),
+    ("uv_basis", "UVG-Lohn ungekappt", "UVGLohnUngekappt"),
+    ("uvg_effective_basis", "UVG-Lohn", "UVGLohn"),
+    ("bu_employer", "BU AG", "BUBeitragAG"),
+    ("nbu_employee", "NBU AN", "NBUBeitragAN"),
+    ("bvg_basis", "BVG-Lohn", "BVGLohn"),
+    ("bvg_employee", "BVG AN", "BVGBeitragAN"),
+    ("bvg_employer", "BVG AG", "BVGBeitragAG"),
+    ("fak_employer", "FAK AG", "FAKBeitragAG"),
+)
+
+# Summe der abgerechneten Lohnläufe -> YTD-Feld des Employee
+YTD_CHECKS = (
+    ("alv_effective_basis", "alv_ytd_basis", "ALV"),
+    ("uvg_effective_basis", "uvg_ytd_basis", "UVG"),
+    ("bvg_basis", "bvg_ytd_basis", "BVG"),
+)
+
+_EMPLOYEE_FIELDS = (
+    "personalnummer",
+    "first_name",
+    "last_name",
+    "ahv_nummer",
+    "geburtsdatum",
+    "eintrittsdatum",
+    "austrittsdatum",
+    "alv_ytd_basis",
+    "uvg_ytd_basis",
+    "bvg_ytd_basis",
+)
+
+
+@dataclass
+class Declaration:
+    """Jahresmeldung eines Mitarbeitenden (Summen + Befunde der Plausibilisierung)."""
+
+    employee_id: int
+    year: int
+    employee: Dict
+    months: int
+    first_month: int
+    last_month: int
+    open_months: int
+    totals: Dict[str, Decimal]
+    ytd_checked: bool = False
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.issues
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(value or 0).quantize(ZERO)
+
+
+def build_declarations(client, year: int) -> List[Declaration]:
+    """
+    Jahresmeldungen aller Mitarbeitenden des Mandanten mit Lohnläufen im Jahr.
+
+    Eine Query: gruppiert nach Mitarbeitendem über alle Lohnläufe ab `year`; die
+    Summen sind auf das Jahr gefiltert, `latest_year` entscheidet über den YTD-Abgleich.
+    """
+    in_year = Q(year=year)
+    settled = Q(year=year, status="ABGERECHNET")
+    rows = (
+        PayrollRecord.objects.filter(employee__client=client, year__gte=year)
+        .values("employee_id", *(f"employee__{name}" for name in _EMPLOYEE_FIELDS))
+        .annotate(
+            months=Count("id", filter=in_year),
+            first_month=Min("month", filter=in_year),
+            last_month=Max("month", filter=in_year),
+            open_months=Count("id", filter=in_year & ~Q(status="ABGERECHNET")),
+            latest_year=Max("year"),
+            **{f"sum_{name}": Sum(name, filter=in_year) for name, _, _ in DECLARATION_FIELDS},
+            **{f"settled_{name}": Sum(name, filter=settled) for name, _, _ in YTD_CHECKS},
+        )
+        .filter(months__gt=0)
+        .order_by("employee__last_name", "employee__first_name", "employee_id")
+    )
+
+    alv = get_parameter_for_year_cached(ALVParameter, year)
+    uvg = get_parameter_for_year_cached(UVGParameter, year)
+    caps = {
+        "alv_effective_basis": ("ALV", alv.max_annual_insured_salary if alv else None),
+        "uvg_effective_basis": ("UVG", uvg.max_annual_insured_salary if uvg else None),
+    }
+
+    declarations = []
+    for row in rows:
+        declaration = Declaration(
+            employee_id=row["employee_id"],
+            year=year,
+            employee={name: row[f"employee__{name}"] for name in _EMPLOYEE_FIELDS},
+            months=row["months"],
+            first_month=row["first_month"],
+            last_month=row["last_month"],
+            open_months=row["open_months"],
+            totals={name: _decimal(row[f"sum_{name}"]) for name, _, _ in DECLARATION_FIELDS},
+        )
+        _validate(declaration, row, caps)
+        declarations.append(declaration)
+    return declarations
+
+
+def _validate(declaration: Declaration, row: Dict, caps: Dict) -> None:
+    if declaration.open_months:
+        declaration.issues.append(f"{declaration.open_months} Lohnlauf/-läufe nicht abgerechnet")
+
+    for name, (label, maximum) in caps.items():
+        if maximum is not None and declaration.totals[name] > maximum:
+            declaration.issues.append(
+                f"{label}-Lohn {declaration.totals[name]} über Jahresmaximum {maximum}"
+            )
+
+    if row["latest_year"] != declaration.year:
+        return
+    declaration.ytd_checked = True
+    for name, ytd_field, label in YTD_CHECKS:
+        settled = _decimal(row[f"settled_{name}"])
+        ytd = _decimal(declaration.employee[ytd_field])
+        if settled != ytd:
+            declaration.issues.append(f"{label}: Summe abgerechnet {settled} ≠ YTD {ytd}")
+
+
+def declaration_header() -> List[str]:
+    return (
+        ["Personalnummer", "Nachname", "Vorname", "AHV-Nr.", "Geburtsdatum", "Eintritt", "Austritt",
+         "Jahr", "Von Monat", "Bis Monat"]
+        + [label for _, label, _ in DECLARATION_FIELDS]
+        + ["YTD geprüft", "Befunde"]
+    )
+
+
+def declaration_rows(declarations: Iterable[Declaration]) -> Iterator[list]:
+    """Zeilen passend zu `declaration_header()`."""
+    for declaration in declarations:
+        employee = declaration.employee
+        yield (
+            [
+                employee["personalnummer"],
+                employee["last_name"],
+                employee["first_name"],
+                employee["ahv_nummer"],
+                employee["geburtsdatum"],
+                employee["eintrittsdatum"],
+                employee["austrittsdatum"],
+                declaration.year,
+                declaration.first_month,
+                declaration.last_month,
+            ]
+            + [declaration.totals[name] for name, _, _ in DECLARATION_FIELDS]
+            + ["ja" if declaration.ytd_checked else "nein", "; ".join(declaration.issues)]
+        )
+
+
+def _element(tag: str, value) -> str:
+    if value in (None, ""):
+        return ""
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    return f"<{tag}>{escape(str(value))}</{tag}>"
+
+
+def declaration_xml_chunks(client, year: int, declarations: Iterable[Declaration]) -> Iterator[str]:
+    """XML-Lohnmeldung, ein Chunk pro Mitarbeitendem, am Ende die Kontrollsummen."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield (
+        f"<Lohnmeldung Jahr={quoteattr(str(year))} "
+        f"Erstellt={quoteattr(timezone.now().isoformat(timespec='seconds'))}>\n"
+        f"  <Arbeitgeber>{_element('Name', client.name)}</Arbeitgeber>\n"
+    )
+    totals = {name: ZERO for name, _, _ in DECLARATION_FIELDS}
+    count = 0
+    for declaration in declarations:
+        count += 1
+        for name in totals:
+            totals[name] += declaration.totals[name]
+        employee = declaration.employee
+        person = "".join((
+            _element("Personalnummer", employee["personalnummer"]),
+            _element("Nachname", employee["last_name"]),
+            _element("Vorname", employee["first_name"]),
+            _element("AHVNummer", employee["ahv_nummer"]),
+            _element("Geburtsdatum", employee["geburtsdatum"]),
+            _element("Eintritt", employee["eintrittsdatum"]),
+            _element("Austritt", employee["austrittsdatum"]),
+        ))
+        amounts = "".join(_element(tag, declaration.totals[name]) for name, _, tag in DECLARATION_FIELDS)
+        issues = "".join(_element("Befund", issue) for issue in declaration.issues)
+        yield (
+            f"  <Mitarbeiter VonMonat=\"{declaration.first_month}\" BisMonat=\"{declaration.last_month}\" "
+            f"YTDGeprueft=\"{'true' if declaration.ytd_checked else 'false'}\">"
+            f"{person}<Summen>{amounts}</Summen>"
+            + (f"<Befunde>{issues}</Befunde>" if issues else "")
+            + "</Mitarbeiter>\n"
+        )
+    # Kontrollsummen über alle Mitarbeitenden
+    amounts = "".join(_element(tag, totals[name]) for name, _, tag in DECLARATION_FIELDS)
+    yield f'  <Total AnzahlMitarbeiter="{count}">{amounts}</Total>\n'
+    yield "</Lohnmeldung>\n"
+
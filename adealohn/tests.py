@@ -1,5 +1,6 @@
+from datetime import date
 from decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
 
 from adeacore.models import Employee, Client, PayrollRecord
@@ -380,6 +381,30 @@ class TenantTestCase(TestCase):
         self.assertEqual(employees.first(), self.employee_a)
         self.assertNotIn(self.employee_b, employees)
     
+    def test_payroll_list_search_tolerates_typos(self):
+        """Test dass die Suche der Payroll-Liste Mitarbeitende auch mit Tippfehlern findet."""
+        from django.test import Client as TestClient
+        from django.contrib.auth.models import User
+        
+        self.employee_a.first_name = "Martina"
+        self.employee_a.last_name = "Schneider"
+        self.employee_a.save()
+        
+        user = User.objects.create_user(username='testuser', password='testpass')
+        test_client = TestClient()
+        test_client.force_login(user)
+        session = test_client.session
+        session['active_client_id'] = self.client_a.pk
+        session.save()
+        
+        response = test_client.get('/lohn/payroll/', {'q': 'Schnieder'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['records']), [self.payroll_a])
+        # Auswahl rendert nur den gewählten Eintrag, nicht alle Mitarbeitenden
+        response = test_client.get('/lohn/payroll/', {'employee': self.employee_a.pk})
+        self.assertContains(response, 'value="Martina Schneider"')
+        self.assertContains(response, '/autocomplete/lohn-employee/')
+    
     def test_payroll_create_with_wrong_client_employee(self):
         """Test dass PayrollRecord nicht mit Employee eines anderen Clients erstellt werden kann."""
         from django.test import Client as TestClient
@@ -566,3 +591,496 @@ class DataIntegrityTestCase(TestCase):
         error_msg = str(cm.exception.error_dict['employee'][0])
         self.assertIn('Firmen', error_msg)
         self.assertIn('Privatperson', error_msg)
+
+
+class LohnausweisTestCase(TestCase):
+    """Jahresaggregation und Massen-Erstellung der Lohnausweise."""
+
+    def setUp(self):
+        from adealohn.models import PayrollItem, WageTypeCategory
+
+        self.firma = Client.objects.create(name="Lohn AG", client_type="FIRMA", lohn_aktiv=True)
+        self.anna = Employee.objects.create(
+            client=self.firma,
+            first_name="Anna",
+            last_name="Muster",
+            personalnummer="100",
+            hourly_rate=Decimal("0.00"),
+            eintrittsdatum=date(2025, 3, 15),
+        )
+        self.beat = Employee.objects.create(
+            client=self.firma,
+            first_name="Beat",
+            last_name="Beispiel",
+            personalnummer="200",
+            hourly_rate=Decimal("0.00"),
+        )
+        lohn = WageType.objects.create(code="TEST_MONATSLOHN", name="Monatslohn")
+        kinder = WageType.objects.create(
+            code="TEST_KINDERZULAGE", name="Kinderzulage", category=WageTypeCategory.FAMILIENZULAGE, ahv_relevant=False
+        )
+        privat = WageType.objects.create(
+            code="PRIVATANTEIL_TEST", name="Privatanteil Auto", category=WageTypeCategory.SACHLEISTUNG
+        )
+        spesen = WageType.objects.create(
+            code="SPESEN_TEST", name="Pauschalspesen", category=WageTypeCategory.SPESEN, is_lohnwirksam=False
+        )
+        bvg_abzug = WageType.objects.create(code="TEST_BVG_AN", name="BVG Abzug", is_lohnwirksam=False)
+
+        # bulk_create: ohne save()-Neuberechnung, damit die Abzüge exakt vorgegeben sind
+        records = PayrollRecord.objects.bulk_create(
+            [
+                PayrollRecord(
+                    employee=self.anna,
+                    month=month,
+                    year=2025,
+                    status="ABGERECHNET" if month < 12 else "ENTWURF",
+                    bruttolohn=Decimal("5400.00"),
+                    ahv_employee=Decimal("286.20"),
+                    alv_employee=Decimal("59.40"),
+                    nbu_employee=Decimal("40.00"),
+                    bvg_employee=Decimal("150.00"),
+                    qst_abzug=Decimal("100.00"),
+                )
+                for month in range(3, 13)
+            ]
+            + [
+                PayrollRecord(employee=self.beat, month=1, year=2025, bruttolohn=Decimal("7000.00"), status="GEPRUEFT"),
+                PayrollRecord(employee=self.beat, month=12, year=2024, bruttolohn=Decimal("9999.00")),
+            ]
+        )
+        items = []
+        for record in records:
+            if record.employee_id == self.anna.pk:
+                items += [
+                    PayrollItem(payroll=record, wage_type=lohn, amount=Decimal("5000.00")),
+                    PayrollItem(payroll=record, wage_type=kinder, quantity=Decimal("2"), amount=Decimal("200.00")),
+                    PayrollItem(payroll=record, wage_type=privat, amount=Decimal("150.00")),
+                    PayrollItem(payroll=record, wage_type=spesen, amount=Decimal("300.00")),
+                    PayrollItem(payroll=record, wage_type=bvg_abzug, amount=Decimal("150.00")),
+                ]
+            else:
+                items.append(PayrollItem(payroll=record, wage_type=lohn, amount=record.bruttolohn))
+        PayrollItem.objects.bulk_create(items)
+
+    def test_aggregate_year_sums_ziffern(self):
+        from adealohn.lohnausweis import aggregate_year
+
+        certificates = {c.employee.pk: c for c in aggregate_year(self.firma, 2025)}
+        self.assertEqual(set(certificates), {self.anna.pk, self.beat.pk})
+
+        anna = certificates[self.anna.pk]
+        self.assertEqual(anna.months, 10)
+        self.assertEqual(anna.draft_months, 1)
+        self.assertEqual(anna.period_from, date(2025, 3, 15))
+        self.assertEqual(anna.period_to, date(2025, 12, 31))
+        ziffern = anna.ziffern
+        self.assertEqual(ziffern["1_lohn"], Decimal("54000.00"))
+        self.assertEqual(ziffern["2_gehaltsnebenleistungen"], Decimal("1500.00"))
+        self.assertEqual(ziffern["8_bruttolohn"], Decimal("55500.00"))
+        self.assertEqual(ziffern["9_sozialbeitraege"], Decimal("3856.00"))
+        self.assertEqual(ziffern["10_1_bvg"], Decimal("1500.00"))
+        self.assertEqual(ziffern["11_nettolohn"], Decimal("50144.00"))
+        self.assertEqual(ziffern["12_quellensteuer"], Decimal("1000.00"))
+        self.assertEqual(ziffern["13_spesen"], Decimal("3000.00"))
+        self.assertNotIn("TEST_BVG_AN", anna.wage_types)
+
+        beat = certificates[self.beat.pk]
+        self.assertEqual(beat.months, 1)
+        self.assertEqual(beat.ziffern["8_bruttolohn"], Decimal("7000.00"))
+        self.assertEqual(beat.period_to, date(2025, 1, 31))
+
+    def test_aggregate_year_query_count_is_constant(self):
+        from adealohn.lohnausweis import aggregate_year
+
+        with self.assertNumQueries(4):
+            aggregate_year(self.firma, 2025)
+        for number in range(5):
+            employee = Employee.objects.create(
+                client=self.firma, first_name="Extra", last_name=f"MA{number}", hourly_rate=Decimal("0.00")
+            )
+            PayrollRecord.objects.bulk_create([PayrollRecord(employee=employee, month=6, year=2025)])
+        with self.assertNumQueries(4):
+            certificates = aggregate_year(self.firma, 2025)
+        self.assertEqual(len(certificates), 7)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_generate_command_writes_pdfs_and_manifest(self):
+        import json
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+
+        from django.core.management import call_command
+
+        from adeacore import cache_stats
+
+        with tempfile.TemporaryDirectory() as output:
+            out = StringIO()
+            call_command("generate_lohnausweise", "2025", "--workers", "1", "--output", output, stdout=out)
+            self.assertIn("Entwurf", out.getvalue())
+
+            directory = next((Path(output) / "2025").iterdir())
+            pdfs = sorted(directory.glob("*.pdf"))
+            self.assertEqual(len(pdfs), 2)
+            self.assertTrue(all(pdf.read_bytes().startswith(b"%PDF") for pdf in pdfs))
+            manifest = json.loads((directory / "lohnausweise.json").read_text(encoding="utf-8"))
+            by_number = {c["employee"]["personalnummer"]: c for c in manifest["certificates"]}
+            self.assertEqual(by_number["100"]["ziffern"]["11_nettolohn"], "50144.00")
+            self.assertEqual(by_number["100"]["period_from"], "15.03.2025")
+
+            # Zweiter Lauf: unveränderte Lohnausweise werden nicht neu gerendert
+            mtimes = {pdf: pdf.stat().st_mtime_ns for pdf in pdfs}
+            hits_before = cache_stats.get_stats()["pdfs"]["hits"]
+            out = StringIO()
+            call_command("generate_lohnausweise", "2025", "--workers", "1", "--output", output, stdout=out)
+            self.assertIn("0 gerendert, 2 unverändert", out.getvalue())
+            self.assertEqual({pdf: pdf.stat().st_mtime_ns for pdf in pdfs}, mtimes)
+            self.assertEqual(cache_stats.get_stats()["pdfs"]["hits"], hits_before + 2)
+
+    def test_export_renders_in_process_pool(self):
+        """Test: Mit workers=2 rendert der Prozess-Pool (spawn) beide Lohnausweise."""
+        import tempfile
+        from concurrent.futures import ProcessPoolExecutor
+        from pathlib import Path
+        from unittest import mock
+
+        from adealohn.lohnausweis import export_client_year
+
+        with tempfile.TemporaryDirectory() as output, mock.patch(
+            "adealohn.lohnausweis.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        ) as pool:
+            result = export_client_year(self.firma, 2025, output, workers=2)
+            pool.assert_called_once()
+            self.assertEqual(result.rendered, 2)
+            pdfs = sorted(Path(result.directory).glob("*.pdf"))
+            self.assertEqual(len(pdfs), 2)
+            self.assertTrue(all(pdf.read_bytes().startswith(b"%PDF") for pdf in pdfs))
+
+    def test_job_stores_zip_for_download(self):
+        """Test: Der Job rendert temporär und legt die Lohnausweise als ZIP in die Job-Ablage."""
+        import zipfile
+
+        from adeacore import jobs
+        from adeacore.models import Job
+        from adeacore.testing import temporary_job_storage
+
+        with temporary_job_storage() as location:
+            job = jobs.enqueue("lohnausweise", {"year": 2025})
+            self.assertTrue(jobs.run_next("test"))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_DONE, job.last_error)
+            self.assertEqual(job.result["certificates"], 2)
+            self.assertEqual(job.result_file, f"{job.pk}/lohnausweise_2025.zip")
+            with zipfile.ZipFile(location / job.result_file) as archive:
+                names = archive.namelist()
+        self.assertEqual(len([name for name in names if name.endswith(".pdf")]), 2)
+        self.assertTrue(all(name.startswith(f"2025/{self.firma.pk}-lohn-ag/") for name in names))
+
+
+class LohnjournalTestCase(TestCase):
+    """Streaming-Export des Lohnjournals (CSV/XLSX)."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        from adealohn.models import PayrollItem
+
+        self.firma = Client.objects.create(name="Journal AG", client_type="FIRMA", lohn_aktiv=True)
+        self.andere = Client.objects.create(name="Andere GmbH", client_type="FIRMA", lohn_aktiv=True)
+        self.employee = Employee.objects.create(
+            client=self.firma, first_name="Carla", last_name="Journal", personalnummer="7", hourly_rate=Decimal("0.00")
+        )
+        self.fremd = Employee.objects.create(
+            client=self.andere, first_name="Dora", last_name="Fremd", hourly_rate=Decimal("0.00")
+        )
+        self.lohn = WageType.objects.create(code="TEST_JOURNAL_LOHN", name="Monatslohn")
+        self.bonus = WageType.objects.create(code="TEST_JOURNAL_BONUS", name="Bonus")
+        # bulk_create: ohne save()-Neuberechnung
+        records = PayrollRecord.objects.bulk_create([
+            PayrollRecord(employee=self.employee, month=month, year=2025, bruttolohn=Decimal("6000.00"),
+                          ahv_employee=Decimal("318.00"), nettolohn=Decimal("5400.00"), status="ABGERECHNET")
+            for month in (1, 2, 3)
+        ] + [PayrollRecord(employee=self.fremd, month=1, year=2025, bruttolohn=Decimal("1000.00"))])
+        items = [PayrollItem(payroll=record, wage_type=self.lohn, amount=record.bruttolohn) for record in records]
+        items.append(PayrollItem(payroll=records[1], wage_type=self.bonus, quantity=Decimal("2"), amount=Decimal("250.00")))
+        PayrollItem.objects.bulk_create(items)
+
+        self.user = User.objects.create_user(username="journal", password="pw")
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_client_id"] = self.firma.pk
+        session.save()
+
+    def _csv(self, response):
+        import csv
+
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(content.splitlines(), delimiter=";"))
+
+    def test_rows_have_wage_type_and_contribution_columns(self):
+        from adealohn.lohnjournal import journal_header, journal_rows, journal_wage_types
+
+        records = PayrollRecord.objects.filter(employee__client=self.firma)
+        wage_types = journal_wage_types(records)
+        header = journal_header(wage_types)
+        rows = list(journal_rows(records, wage_types))
+
+        self.assertEqual(len(rows), 3)
+        self.assertIn("TEST_JOURNAL_BONUS Bonus", header)
+        self.assertIn("AHV AN", header)
+        february = rows[1]
+        self.assertEqual(february[header.index("Monat")], 2)
+        self.assertEqual(february[header.index("Status")], "Abgerechnet")
+        self.assertEqual(february[header.index("TEST_JOURNAL_BONUS Bonus")], Decimal("500.00"))
+        self.assertEqual(february[header.index("TEST_JOURNAL_LOHN Monatslohn")], Decimal("6000.00"))
+        self.assertEqual(february[header.index("AHV AN")], Decimal("318.00"))
+        self.assertIsNone(rows[0][header.index("TEST_JOURNAL_BONUS Bonus")])
+
+    def test_rows_query_one_item_query_per_chunk(self):
+        from adealohn.lohnjournal import journal_rows, journal_wage_types
+
+        records = PayrollRecord.objects.filter(employee__client=self.firma)
+        wage_types = journal_wage_types(records)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(journal_rows(records, wage_types))), 3)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(journal_rows(records, wage_types, chunk_size=2))), 3)
+
+    def test_csv_export_is_limited_to_current_client_and_period(self):
+        response = self.client.get("/lohn/payroll/journal/", {"format": "csv", "von": "2025-02", "bis": "2025-12"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("lohnjournal_journal-ag_2025-02_2025-12.csv", response["Content-Disposition"])
+        rows = self._csv(response)
+        header, body = rows[0], rows[1:]
+        self.assertEqual([row[header.index("Monat")] for row in body], ["2", "3"])
+        self.assertEqual({row[header.index("Mandant")] for row in body}, {"Journal AG"})
+        self.assertEqual(body[0][header.index("TEST_JOURNAL_BONUS Bonus")], "500.00")
+
+    def test_xlsx_export_and_all_clients_for_staff(self):
+        import io
+        import zipfile
+
+        response = self.client.get("/lohn/payroll/journal/", {"format": "xlsx", "alle_mandanten": "1"})
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/lohn/payroll/journal/", {"format": "xlsx", "alle_mandanten": "1"})
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(sheet.count("<row "), 5)
+        self.assertIn("Andere GmbH", sheet)
+        self.assertIn("<v>500.00</v>", sheet)
+
+    async def test_csv_export_streams_via_asgi(self):
+        """Test: Unter ASGI ohne Django-Warnung (kein list() über den ganzen Generator)."""
+        import csv
+        import warnings
+
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get("/lohn/payroll/journal/", {"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            content = b"".join([part async for part in response]).decode("utf-8-sig")
+        rows = list(csv.reader(content.splitlines(), delimiter=";"))
+        self.assertEqual(len(rows), 4)
+
+    async def test_streaming_download_pulls_chunks_one_by_one(self):
+        """Test: Der sync Generator wird pro gesendetem Chunk weitergezogen, nicht vorab ganz gelesen."""
+        from adeacore.streaming import streaming_download
+
+        produced = []
+
+        def chunks():
+            for number in range(3):
+                produced.append(number)
+                yield f"{number}\n"
+
+        response = streaming_download(chunks(), content_type="text/plain", filename="test.txt")
+        stream = aiter(response)
+        self.assertEqual(await anext(stream), b"0\n")
+        self.assertEqual(produced, [0])
+        self.assertEqual([part async for part in stream], [b"1\n", b"2\n"])
+        self.assertEqual(produced, [0, 1, 2])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get("/lohn/payroll/journal/", {"format": "pdf"}).status_code, 400)
+        self.assertEqual(self.client.get("/lohn/payroll/journal/", {"von": "2025-13"}).status_code, 400)
+
+
+class SVDeclarationTestCase(TestCase):
+    """Jährliche Lohnmeldung an die Sozialversicherungen."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        from adealohn.helpers import clear_parameter_cache
+        from adealohn.models import UVGParameter
+
+        clear_parameter_cache()
+        self.addCleanup(clear_parameter_cache)
+        UVGParameter.objects.update_or_create(year=2025, defaults={"max_annual_insured_salary": Decimal("20000.00")})
+
+        self.firma = Client.objects.create(name="Melde AG", client_type="FIRMA", lohn_aktiv=True)
+        self.eva = Employee.objects.create(
+            client=self.firma, first_name="Eva", last_name="Aktuell", personalnummer="1",
+            ahv_nummer="756.1234.5678.97", hourly_rate=Decimal("0.00"),
+        )
+        self.fritz = Employee.objects.create(
+            client=self.firma, first_name="Fritz", last_name="Folgejahr", personalnummer="2", hourly_rate=Decimal("0.00")
+        )
+        # bulk_create: ohne save()-Neuberechnung und YTD-Fortschreibung
+        PayrollRecord.objects.bulk_create(
+            [
+                PayrollRecord(
+                    employee=self.eva, month=month, year=2025, status="ABGERECHNET",
+                    bruttolohn=Decimal("7000.00"), ahv_basis=Decimal("7000.00"), ahv_effective_basis=Decimal("7000.00"),
+                    alv_effective_basis=Decimal("7000.00"), uv_basis=Decimal("7000.00"),
+                    uvg_effective_basis=Decimal("7000.00"), bvg_basis=Decimal("6000.00"), fak_employer=Decimal("70.00"),
+                )
+                for month in (1, 2, 3)
+            ]
+            + [
+                PayrollRecord(employee=self.fritz, month=12, year=2025, bruttolohn=Decimal("3000.00"),
+                              alv_effective_basis=Decimal("3000.00")),
+                PayrollRecord(employee=self.fritz, month=1, year=2026, status="ABGERECHNET"),
+                PayrollRecord(employee=self.eva, month=12, year=2024, bruttolohn=Decimal("9999.00")),
+            ]
+        )
+        Employee.objects.filter(pk=self.eva.pk).update(
+            alv_ytd_basis=Decimal("21000.00"), uvg_ytd_basis=Decimal("20000.00"), bvg_ytd_basis=Decimal("18000.00")
+        )
+
+        user = User.objects.create_user(username="melder", password="pw")
+        self.client.force_login(user)
+        session = self.client.session
+        session["active_client_id"] = self.firma.pk
+        session.save()
+
+    def test_build_declarations_totals_and_checks(self):
+        from adealohn.sv_declaration import build_declarations
+
+        build_declarations(self.firma, 2025)  # Parameter-Cache füllen
+        with self.assertNumQueries(1):
+            declarations = build_declarations(self.firma, 2025)
+
+        eva, fritz = declarations
+        self.assertEqual(eva.employee["last_name"], "Aktuell")
+        self.assertEqual(eva.employee["ahv_nummer"], "756.1234.5678.97")
+        self.assertEqual((eva.months, eva.first_month, eva.last_month), (3, 1, 3))
+        self.assertEqual(eva.totals["bruttolohn"], Decimal("21000.00"))
+        self.assertEqual(eva.totals["uvg_effective_basis"], Decimal("21000.00"))
+        self.assertEqual(eva.totals["fak_employer"], Decimal("210.00"))
+        self.assertTrue(eva.ytd_checked)
+        # UVG-YTD weicht ab und UVG-Lohn liegt über dem Maximum der Parameter
+        self.assertEqual(len(eva.issues), 2)
+        self.assertTrue(any(issue.startswith("UVG-Lohn 21000.00 über Jahresmaximum") for issue in eva.issues))
+        self.assertTrue(any(issue.startswith("UVG: Summe abgerechnet 21000.00") for issue in eva.issues))
+
+        # Lohnlauf im Folgejahr: YTD gehört zu 2026, nur der offene Lohnlauf wird gemeldet
+        self.assertFalse(fritz.ytd_checked)
+        self.assertEqual(fritz.open_months, 1)
+        self.assertEqual(fritz.issues, ["1 Lohnlauf/-läufe nicht abgerechnet"])
+
+    def test_csv_export(self):
+        import csv
+
+        response = self.client.get("/lohn/sv-meldung/", {"jahr": "2025"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("sv_lohnmeldung_melde-ag_2025.csv", response["Content-Disposition"])
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        header, *rows = list(csv.reader(content.splitlines(), delimiter=";"))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0][header.index("ALV-Lohn")], "21000.00")
+        self.assertEqual(rows[1][header.index("YTD geprüft")], "nein")
+
+    def test_xml_export(self):
+        from xml.etree import ElementTree
+
+        response = self.client.get("/lohn/sv-meldung/", {"jahr": "2025", "format": "xml"})
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(b"".join(response.streaming_content))
+        self.assertEqual(root.get("Jahr"), "2025")
+        self.assertEqual(len(root.findall("Mitarbeiter")), 2)
+        total = root.find("Total")
+        self.assertEqual(total.get("AnzahlMitarbeiter"), "2")
+        self.assertEqual(total.findtext("Bruttolohn"), "24000.00")
+        self.assertEqual(root.find("Mitarbeiter/AHVNummer").text, "756.1234.5678.97")
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get("/lohn/sv-meldung/").status_code, 400)
+        self.assertEqual(self.client.get("/lohn/sv-meldung/", {"jahr": "2025", "format": "pdf"}).status_code, 400)
+
+
+class PayrollRecordDetailBudgetTestCase(TestCase):
+    """Query-Budget der Lohnabrechnungs-Detailansicht."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        from adealohn.models import PayrollItem, WageTypeCategory
+
+        self.firma = Client.objects.create(name="Budget AG", client_type="FIRMA", lohn_aktiv=True)
+        employee = Employee.objects.create(
+            client=self.firma,
+            first_name="Carla",
+            last_name="Budget",
+            personalnummer="300",
+            hourly_rate=Decimal("0.00"),
+        )
+        lohn = WageType.objects.create(code="TEST_MONATSLOHN", name="Monatslohn")
+        # KINDERZULAGE wird per Migration angelegt
+        kinder, _ = WageType.objects.get_or_create(
+            code="KINDERZULAGE",
+            defaults={"name": "Kinderzulage", "category": WageTypeCategory.FAMILIENZULAGE, "ahv_relevant": False},
+        )
+        privat = WageType.objects.create(
+            code="PRIVATANTEIL_TEST", name="Privatanteil Auto", category=WageTypeCategory.SACHLEISTUNG
+        )
+        spesen = WageType.objects.create(
+            code="SPESEN_TEST", name="Pauschalspesen", category=WageTypeCategory.SPESEN, is_lohnwirksam=False
+        )
+        (self.record,) = PayrollRecord.objects.bulk_create(
+            [PayrollRecord(employee=employee, month=5, year=2025, bruttolohn=Decimal("5350.00"))]
+        )
+        PayrollItem.objects.bulk_create(
+            [
+                PayrollItem(payroll=self.record, wage_type=lohn, amount=Decimal("5000.00")),
+                PayrollItem(payroll=self.record, wage_type=kinder, quantity=Decimal("1"), amount=Decimal("200.00")),
+                PayrollItem(
+                    payroll=self.record,
+                    wage_type=kinder,
+                    quantity=Decimal("1"),
+                    amount=Decimal("200.00"),
+                    description="Nachzahlung April",
+                ),
+                PayrollItem(payroll=self.record, wage_type=privat, amount=Decimal("150.00")),
+                PayrollItem(payroll=self.record, wage_type=spesen, amount=Decimal("300.00")),
+            ]
+        )
+
+        # AdeaLohn-Zugriff haben Staff-User (adealohn.permissions.can_access_adelohn)
+        self.client.force_login(User.objects.create_user(username="lohnbudget", password="x", is_staff=True))
+        session = self.client.session
+        session["active_client_id"] = self.firma.pk
+        session.save()
+
+    def test_detail_within_query_budget(self):
+        from adeacore.testing import assert_view_query_budgets
+
+        url = f"/lohn/payroll/{self.record.pk}/"
+        # Erster Request der Session schreibt last_activity und füllt den Timer-Cache
+        self.client.get(url)
+        with assert_view_query_budgets({"PayrollRecordDetailView": 8}):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["laufende_zulagen"]), 1)
+        self.assertEqual(len(response.context["nachzahlungen"]), 1)
+        self.assertEqual(response.context["zulagen_total"], Decimal("400.00"))
+        self.assertEqual(response.context["summe_spesen"], Decimal("300.00"))
+        self.assertEqual(response.context["privatanteile_total"], Decimal("150.00"))
@@ -13,6 +13,8 @@ urlpatterns = [
     path("<int:pk>/delete/", views.EmployeeDeleteView.as_view(), name="employee-delete"),
     path("payroll/", views.PayrollRecordListView.as_view(), name="payroll-list"),
     path("payroll/new/", views.PayrollRecordCreateView.as_view(), name="payroll-create"),
+    path("payroll/journal/", views.PayrollJournalExportView.as_view(), name="payroll-journal-export"),
+    path("sv-meldung/", views.SVDeclarationExportView.as_view(), name="sv-declaration-export"),
     path("payroll/<int:pk>/", views.PayrollRecordDetailView.as_view(), name="payroll-detail"),
     path("payroll/<int:pk>/print/", views.PayrollRecordPrintView.as_view(), name="payroll-print"),
     path("payroll/<int:pk>/edit/", views.PayrollRecordUpdateView.as_view(), name="payroll-update"),
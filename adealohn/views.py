@@ -8,8 +8,9 @@ from django.db import transaction
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.text import slugify
 from django.core.exceptions import ValidationError
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import (
@@ -20,6 +21,7 @@ from django.views.generic import (
     DeleteView,
     TemplateView,
     FormView,
+    View,
 )
 from django import forms
 from django.contrib import messages
@@ -41,6 +43,11 @@ from .mixins import (
     LockedPayrollFormGuardMixin,
 )
 from .payroll_flow import create_payroll_item_and_recompute
+from .lohnjournal import journal_header, journal_rows, journal_wage_types
+from .sv_declaration import build_declarations, declaration_header, declaration_rows, declaration_xml_chunks
+from .permissions import can_access_adelohn
+from adeacore import autocomplete
+from adeacore.streaming import FORMATS, streaming_download, streaming_export_response
 from adeacore.tenancy import resolve_current_client
 from .helpers import (
     percent_to_decimal, decimal_to_percent,
@@ -396,11 +403,12 @@ class PayrollRecordListView(LoginRequiredMixin, TenantFilterMixin, ListView):
         # Suche
         query = self.request.GET.get("q", "")
         if query:
-            queryset = queryset.filter(
-                Q(employee__first_name__icontains=query)
-                | Q(employee__last_name__icontains=query)
-                | Q(employee__client__name__icontains=query)
-            )
+            if current_client:
+                # Namen tippfehlertolerant über den Mitarbeiter-Lookup (nur aktiver Mandant)
+                employee_match = Q(employee_id__in=autocomplete.match_ids("lohn-employee", self.request, query))
+            else:
+                employee_match = Q(employee__first_name__icontains=query) | Q(employee__last_name__icontains=query)
+            queryset = queryset.filter(employee_match | Q(employee__client__name__icontains=query))
         
         return queryset.select_related("employee", "employee__client").order_by("-year", "-month", "employee__last_name")
 
@@ -421,7 +429,17 @@ class PayrollRecordListView(LoginRequiredMixin, TenantFilterMixin, ListView):
         from calendar import month_name
         months = [(i, month_name[i]) for i in range(1, 13)]
         
+        # Auswahl mit Vorschlägen statt <select> mit allen Mitarbeitenden
+        employee_field = forms.ModelChoiceField(
+            queryset=employees,
+            required=False,
+            widget=autocomplete.AutocompleteWidget("lohn-employee", placeholder="Alle"),
+        )
+        
         context["employees"] = employees
+        context["employee_widget"] = employee_field.widget.render(
+            "employee", self.request.GET.get("employee", ""), attrs={"id": "employee-filter"}
+        )
         context["years"] = years
         context["months"] = months
         context["selected_employee"] = self.request.GET.get("employee", "")
@@ -432,6 +450,109 @@ class PayrollRecordListView(LoginRequiredMixin, TenantFilterMixin, ListView):
         return context
 
 
+def _parse_period(value):
+    """'YYYY-MM' -> (Jahr, Monat); leer -> None. ValueError bei ungültigem Wert."""
+    if not value:
+        return None
+    year, month = (int(part) for part in value.split("-"))
+    if not 1 <= month <= 12:
+        raise ValueError(value)
+    return year, month
+
+
+class PayrollJournalExportView(LoginRequiredMixin, TenantMixin, View):
+    """
+    Lohnjournal als Streaming-Download (CSV/XLSX), siehe `adealohn.lohnjournal`.
+
+    GET-Parameter: format (csv|xlsx), von/bis (YYYY-MM), employee,
+    alle_mandanten=1 (nur Staff: alle Firmen mit Lohn aktiv statt aktuellem Mandanten).
+    """
+    login_url = '/admin/login/'
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest("Ungültiges Format (csv oder xlsx).")
+        try:
+            period_from = _parse_period(request.GET.get("von"))
+            period_to = _parse_period(request.GET.get("bis"))
+        except ValueError:
+            return HttpResponseBadRequest("Ungültige Periode (erwartet YYYY-MM).")
+
+        if request.GET.get("alle_mandanten") == "1":
+            if not can_access_adelohn(request.user):
+                return HttpResponseForbidden("Export über alle Mandanten nur für Staff-User.")
+            records = PayrollRecord.objects.filter(
+                employee__client__client_type="FIRMA", employee__client__lohn_aktiv=True
+            )
+            scope = "alle"
+        else:
+            forbidden = self.require_client()
+            if forbidden:
+                return forbidden
+            current_client = self.get_current_client()
+            records = PayrollRecord.objects.filter(employee__client=current_client)
+            scope = slugify(current_client.name)
+
+        if period_from:
+            records = records.filter(Q(year__gt=period_from[0]) | Q(year=period_from[0], month__gte=period_from[1]))
+        if period_to:
+            records = records.filter(Q(year__lt=period_to[0]) | Q(year=period_to[0], month__lte=period_to[1]))
+        employee_id = request.GET.get("employee")
+        if employee_id:
+            if not employee_id.isdigit():
+                return HttpResponseBadRequest("Ungültiger Mitarbeiter.")
+            records = records.filter(employee_id=employee_id)
+
+        wage_types = journal_wage_types(records)
+        period = "_".join(f"{year}-{month:02d}" for year, month in filter(None, (period_from, period_to)))
+        return streaming_export_response(
+            journal_header(wage_types),
+            journal_rows(records, wage_types),
+            fmt=fmt,
+            filename=f"lohnjournal_{scope}" + (f"_{period}" if period else ""),
+            sheet_name="Lohnjournal",
+        )
+
+
+class SVDeclarationExportView(LoginRequiredMixin, TenantMixin, View):
+    """
+    Jährliche Lohnmeldung an die Sozialversicherungen für den aktuellen Mandanten,
+    siehe `adealohn.sv_declaration`.
+
+    GET-Parameter: jahr (Pflicht), format (csv|xlsx|xml, Standard csv).
+    """
+    login_url = '/admin/login/'
+
+    def get(self, request, *args, **kwargs):
+        forbidden = self.require_client()
+        if forbidden:
+            return forbidden
+        fmt = request.GET.get("format", "csv")
+        if fmt not in FORMATS + ("xml",):
+            return HttpResponseBadRequest("Ungültiges Format (csv, xlsx oder xml).")
+        try:
+            year = int(request.GET.get("jahr", ""))
+        except ValueError:
+            return HttpResponseBadRequest("Jahr fehlt oder ist ungültig.")
+
+        client = self.get_current_client()
+        declarations = build_declarations(client, year)
+        filename = f"sv_lohnmeldung_{slugify(client.name)}_{year}"
+        if fmt == "xml":
+            return streaming_download(
+                declaration_xml_chunks(client, year, declarations),
+                content_type="application/xml; charset=utf-8",
+                filename=f"{filename}.xml",
+            )
+        return streaming_export_response(
+            declaration_header(),
+            declaration_rows(declarations),
+            fmt=fmt,
+            filename=filename,
+            sheet_name=f"Lohnmeldung {year}",
+        )
+
 class PayrollRecordMixin:
     """Mixin für PayrollRecord Views mit gemeinsamer Logik."""
     
@@ -697,7 +818,8 @@ class PayrollRecordUpdateView(LoginRequiredMixin, TenantObjectMixin, LockedPayro
 
 
 class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView):
-    model = PayrollRecord
+    # Performance: Employee/Client für die Mandantenprüfung gleich mitladen
+    queryset = PayrollRecord.objects.select_related("employee__client")
     template_name = "adealohn/payroll/detail.html"
     login_url = '/admin/login/'
     
@@ -706,7 +828,7 @@ class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView)
         # Setze 'record' als Alias für 'object' (für Template-Kompatibilität)
         context["record"] = self.object
         
-        time_records = (
+        time_records = list(
             TimeRecord.objects.filter(
                 employee=self.object.employee,
                 date__month=self.object.month,
@@ -715,17 +837,21 @@ class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView)
             .select_related("client", "project")
             .order_by("-date")
         )
-        hours_total = time_records.aggregate(total=Sum("hours"))["total"] or Decimal("0")
+        hours_total = sum((record.hours for record in time_records), Decimal("0"))
         from .helpers import get_parameter_for_year
         bvg_params = get_parameter_for_year(BVGParameter, self.object.year)
         # Jahreslohn für BVG: YTD-Basis + aktuelle Basis
         ytd_basis = self.object.employee.bvg_ytd_basis or Decimal("0")
         annual_salary = ytd_basis + (self.object.bvg_basis or Decimal("0"))
         
+        # Performance: alle PayrollItems einmal laden und in Python aufteilen
+        items = list(
+            self.object.items.select_related('wage_type').order_by('wage_type__code', 'id')
+        )
+        
+        from adealohn.payroll_calculator import FAMILY_ALLOWANCE_CODES, berechne_lohnabrechnung
         # Familienzulagen: Alle PayrollItems mit KINDERZULAGE oder FAMILIENZULAGE (vereinfacht)
-        family_allowance_items = self.object.items.filter(
-            wage_type__code__in=['KINDERZULAGE', 'FAMILIENZULAGE']
-        ).select_related('wage_type').order_by('wage_type__code', 'id')
+        family_allowance_items = [item for item in items if item.wage_type.code in FAMILY_ALLOWANCE_CODES]
         
         # Trennung zwischen laufenden Zulagen und Nachzahlungen (basierend auf Beschreibung)
         laufende_zulagen = []
@@ -750,22 +876,17 @@ class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView)
         context["zulagen_total"] = summe_familienzulagen
         
         # Spesen: Alle PayrollItems mit WageTypes, deren code mit "SPESEN_" beginnt
-        spesen_items = self.object.items.filter(
-            wage_type__code__startswith="SPESEN_"
-        ).select_related('wage_type').order_by('wage_type__code', 'id')
+        spesen_items = [item for item in items if item.wage_type.code.startswith("SPESEN_")]
         context["spesen_items"] = spesen_items
         context["summe_spesen"] = sum(item.total for item in spesen_items)
         
         # Privatanteile: Alle PayrollItems mit WageTypes, deren code mit "PRIVATANTEIL_" beginnt
-        privatanteil_items = self.object.items.filter(
-            wage_type__code__startswith="PRIVATANTEIL_"
-        ).select_related('wage_type').order_by('wage_type__code', 'id')
+        privatanteil_items = [item for item in items if item.wage_type.code.startswith("PRIVATANTEIL_")]
         context["privatanteil_items"] = privatanteil_items
         context["privatanteile_total"] = sum(item.total for item in privatanteil_items)
         
         # Zentrale Berechnung verwenden
-        from adealohn.payroll_calculator import berechne_lohnabrechnung
-        lohnabrechnung = berechne_lohnabrechnung(self.object)
+        lohnabrechnung = berechne_lohnabrechnung(self.object, items=items)
         context["auszahlung"] = lohnabrechnung["auszahlung"]
         context["aufschluesselung"] = lohnabrechnung["aufschluesselung"]
         
@@ -780,9 +901,11 @@ class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView)
         context["bvg_employer_rate_percent"] = bvg_employer_rate_percent
         
         # Lohnabrechnung: Alle lohnwirksamen PayrollItems für Bruttolohn-Aufschlüsselung
-        lohnwirksame_items = self.object.items.filter(
-            wage_type__is_lohnwirksam=True
-        ).select_related('wage_type').order_by('wage_type__category', 'wage_type__code', 'id')
+        # (stabile Sortierung: innerhalb der Kategorie bleibt code/id erhalten)
+        lohnwirksame_items = sorted(
+            (item for item in items if item.wage_type.is_lohnwirksam),
+            key=lambda item: item.wage_type.category,
+        )
         context["lohnwirksame_items"] = lohnwirksame_items
         
         # Summe der lohnwirksamen Items (sollte gleich bruttolohn sein)
@@ -791,11 +914,10 @@ class PayrollRecordDetailView(LoginRequiredMixin, TenantObjectMixin, DetailView)
         
         # Alle anderen Items (nicht lohnwirksam, z.B. BVG_AN, BVG_AG als Abzüge)
         # AUSSER Familienzulagen (KINDERZULAGE, FAMILIENZULAGE) - die werden separat angezeigt
-        nicht_lohnwirksame_items = self.object.items.filter(
-            wage_type__is_lohnwirksam=False
-        ).exclude(
-            wage_type__code__in=['KINDERZULAGE', 'FAMILIENZULAGE']
-        ).select_related('wage_type').order_by('wage_type__code', 'id')
+        nicht_lohnwirksame_items = [
+            item for item in items
+            if not item.wage_type.is_lohnwirksam and item.wage_type.code not in FAMILY_ALLOWANCE_CODES
+        ]
         context["nicht_lohnwirksame_items"] = nicht_lohnwirksame_items
         
         return context
@@ -0,0 +1,127 @@
+"""
+Offene Posten und Altersstruktur der Debitoren (0–30, 31–60, 61–90, über 90 Tage).
+
+Alles wird in der Datenbank gerechnet:
+
+- `with_open_amounts(queryset)`: Annotation `remaining` (Betrag − bezahlt) für Listen.
+- `with_base_net_total(queryset)`: Annotation `base_net_total` (Summe der Positionen vor
+  Rabatt, als Subquery) statt `Invoice.base_net_amount` (eine Query pro Aufruf).
+- `aging_by_client()`: eine Query mit `Sum(Case(When(...)))` pro Altersklasse, gruppiert
+  nach Mandant.
+- `cached_aging_totals()`: Summen über alle Mandanten (eine Query) für die Dashboard-
+  Kachel; im Cache (Namensraum "rollups") bis zur nächsten Rechnungsänderung – über
+  die Tabellen-Version aus `adeacore.http_cache` – bzw. bis zum nächsten Tag.
+
+Massgebend ist die Überfälligkeit (Tage seit Fälligkeit); noch nicht fällige Rechnungen
+zählen zur ersten Klasse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from adeacore.cache_stats import record_hit, record_miss
+
+CACHE_NAMESPACE = "rollups"
+CACHE_TIMEOUT = 60 * 60
+CACHE_KEY = "adearechnung:aging_totals:{}:{}"
+
+# (Schlüssel, Bezeichnung, Tage überfällig von, bis)
+BUCKETS = [
+    ("days_0_30", "0–30 Tage", None, 30),
+    ("days_31_60", "31–60 Tage", 31, 60),
+    ("days_61_90", "61–90 Tage", 61, 90),
+    ("days_over_90", "über 90 Tage", 91, None),
+]
+
+_MONEY = DecimalField(max_digits=12, decimal_places=2)
+_ZERO = Value(Decimal("0.00"), output_field=_MONEY)
+
+
+def with_open_amounts(queryset):
+    """Annotiert `remaining` (offener Betrag)."""
+    return queryset.annotate(remaining=ExpressionWrapper(F("amount") - F("paid_amount"), output_field=_MONEY))
+
+
+def with_base_net_total(queryset):
+    """Annotiert `base_net_total` (ohne Join auf die Positionen, keine Duplikate)."""
+    from adeacore.models import InvoiceItem
+
+    items_net = (
+        InvoiceItem.objects.filter(invoice=OuterRef("pk"))
+        .order_by()
+        .values("invoice")
+        .annotate(total=Sum("net_amount"))
+        .values("total")
+    )
+    return queryset.annotate(base_net_total=Coalesce(Subquery(items_net, output_field=_MONEY), _ZERO))
+
+
+def open_invoices(queryset=None):
+    """Rechnungen mit offenem Betrag (ohne stornierte)."""
+    from adeacore.models import Invoice
+
+    queryset = Invoice.objects.all() if queryset is None else queryset
+    return queryset.exclude(payment_status="STORNIERT").filter(amount__gt=F("paid_amount"))
+
+
+def _bucket_aggregates(today: date) -> Dict:
+    remaining = F("amount") - F("paid_amount")
+    aggregates = {}
+    for key, _, min_days, max_days in BUCKETS:
+        # Überfällig seit `min_days`..`max_days` Tagen <=> Fälligkeit im entsprechenden Datumsfenster
+        condition = Q()
+        if max_days is not None:
+            condition &= Q(due_date__gte=today - timedelta(days=max_days))
+        if min_days is not None:
+            condition &= Q(due_date__lte=today - timedelta(days=min_days))
+        aggregates[key] = Coalesce(
+            Sum(Case(When(condition, then=remaining), default=_ZERO, output_field=_MONEY)), _ZERO
+        )
+    aggregates["total"] = Coalesce(Sum(remaining, output_field=_MONEY), _ZERO)
+    aggregates["invoice_count"] = Count("id")
+    return aggregates
+
+
+def aging_by_client(today: Optional[date] = None, queryset=None) -> List[Dict]:
+    """Offene Beträge pro Mandant und Altersklasse (eine Query), grösste zuerst."""
+    today = today or date.today()
+    return list(
+        open_invoices(queryset)
+        .values("client_id", "client__name")
+        .annotate(**_bucket_aggregates(today))
+        .order_by("-total", "client__name")
+    )
+
+
+def aging_totals(today: Optional[date] = None, queryset=None) -> Dict:
+    """Summen über alle Mandanten (eine Query)."""
+    today = today or date.today()
+    aggregates = _bucket_aggregates(today)
+    aggregates["client_count"] = Count("client", distinct=True)
+    return open_invoices(queryset).aggregate(**aggregates)
+
+
+def cached_aging_totals(today: Optional[date] = None) -> Dict:
+    """`aging_totals()` für das Dashboard, gecacht bis zur nächsten Rechnungsänderung."""
+    from adeacore.http_cache import get_table_versions
+    from adeacore.models import Invoice
+
+    today = today or date.today()
+    token, _ = get_table_versions([Invoice])
+    key = CACHE_KEY.format(today.isoformat(), hashlib.sha1(token.encode()).hexdigest()[:16])
+    totals = cache.get(key)
+    if totals is not None:
+        record_hit(CACHE_NAMESPACE)
+        return totals
+    record_miss(CACHE_NAMESPACE)
+    totals = aging_totals(today)
+    cache.set(key, totals, timeout=CACHE_TIMEOUT)
+    return totals
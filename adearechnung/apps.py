@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdearechnungConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adearechnung'
+
+    def ready(self):
+        # Tabellen-Versionen der Rechnungen registrieren
+        from . import signals  # noqa: F401
@@ -0,0 +1,200 @@
+"""
+Streaming-Parser für Bankdateien im ISO-20022-Format.
+
+Unterstützt camt.053 (Kontoauszug) und camt.054 (Gutschriftsanzeige, z.B. QR-Zahlungen
+als Sammelbuchung) in allen gängigen Versionen – Namespaces werden ignoriert.
+
+Die Datei wird in Blöcken gelesen (`XMLPullParser`, wie `iterparse`); jede Buchung
+(`Ntry`) wird nach dem Auswerten aus dem Baum entfernt. Der Speicherbedarf bleibt
+damit auch bei Monatsauszügen mit Tausenden Buchungen konstant.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Iterator, List, Optional
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+CHUNK_SIZE = 64 * 1024
+DOCUMENT_TYPES = {"BkToCstmrStmt": "camt.053", "BkToCstmrDbtCdtNtfctn": "camt.054"}
+
+
+class CamtError(ValueError):
+    """Datei ist kein gültiges camt.053/054-Dokument."""
+
+
+@dataclass(frozen=True)
+class CamtTransaction:
+    """Eine Transaktion (bei Sammelbuchungen: ein Eintrag der `TxDtls`)."""
+
+    transaction_id: str
+    amount: Decimal
+    currency: str
+    credit: bool
+    booked: bool
+    booking_date: Optional[date]
+    value_date: Optional[date]
+    reference: str = ""
+    remittance: str = ""
+    debtor_name: str = ""
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(element: Optional[Element], path: str) -> Optional[Element]:
+    """Kind-Element über lokale Namen ("A/B/C"), unabhängig vom Namespace."""
+    for name in path.split("/"):
+        if element is None:
+            return None
+        element = next((child for child in element if _local(child.tag) == name), None)
+    return element
+
+
+def _children(element: Optional[Element], name: str) -> List[Element]:
+    if element is None:
+        return []
+    return [child for child in element if _local(child.tag) == name]
+
+
+def _text(element: Optional[Element], path: str) -> str:
+    found = _child(element, path)
+    return (found.text or "").strip() if found is not None else ""
+
+
+def _date(element: Optional[Element]) -> Optional[date]:
+    # <Dt>2025-03-31</Dt> oder <DtTm>2025-03-31T10:00:00</DtTm>
+    value = _text(element, "Dt") or _text(element, "DtTm")[:10]
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        raise CamtError(f"Ungültiges Datum: {value}") from None
+
+
+def _amount(element: Optional[Element]) -> Optional[Decimal]:
+    if element is None or not (element.text or "").strip():
+        return None
+    try:
+        return Decimal(element.text.strip())
+    except InvalidOperation:
+        raise CamtError(f"Ungültiger Betrag: {element.text}") from None
+
+
+def _entry_transactions(entry: Element) -> Iterator[CamtTransaction]:
+    amount = _amount(_child(entry, "Amt"))
+    if amount is None:
+        raise CamtError("Buchung ohne Betrag.")
+    currency = _child(entry, "Amt").get("Ccy", "")
+    credit = _text(entry, "CdtDbtInd") == "CRDT"
+    # Bis camt.053.001.04: <Sts>BOOK</Sts>, ab .08: <Sts><Cd>BOOK</Cd></Sts>
+    status = _text(entry, "Sts") or _text(entry, "Sts/Cd")
+    booked = status in ("", "BOOK")
+    booking_date = _date(_child(entry, "BookgDt"))
+    value_date = _date(_child(entry, "ValDt"))
+    entry_ref = _text(entry, "AcctSvcrRef") or _text(entry, "NtryRef")
+
+    details = [tx for entry_details in _children(entry, "NtryDtls") for tx in _children(entry_details, "TxDtls")]
+    if not details:
+        details = [None]
+
+    for position, tx in enumerate(details):
+        amount_element = _child(tx, "Amt")
+        if amount_element is None:
+            amount_element = _child(tx, "AmtDtls/TxAmt/Amt")
+        tx_amount = _amount(amount_element)
+        tx_currency = currency
+        if tx_amount is None:
+            if len(details) > 1:
+                raise CamtError(f"Transaktion ohne Betrag in Sammelbuchung {entry_ref}".strip())
+            tx_amount = amount
+        else:
+            tx_currency = amount_element.get("Ccy", currency)
+        tx_indicator = _text(tx, "CdtDbtInd")
+        remittance = _child(tx, "RmtInf")
+        reference = next(
+            (ref for ref in (_text(structured, "CdtrRefInf/Ref") for structured in _children(remittance, "Strd")) if ref),
+            "",
+        )
+        debtor_name = _text(tx, "RltdPties/Dbtr/Nm") or _text(tx, "RltdPties/Dbtr/Pty/Nm")
+
+        transaction_id = _text(tx, "Refs/AcctSvcrRef")
+        if not transaction_id and entry_ref:
+            transaction_id = entry_ref if len(details) == 1 else f"{entry_ref}/{position + 1}"
+        if not transaction_id:
+            # Ohne Bank-Referenz: Fingerabdruck der Buchung (gleiche Datei -> gleiche ID)
+            fingerprint = "|".join(map(str, [
+                booking_date, tx_amount, tx_currency, reference, debtor_name, _text(tx, "Refs/EndToEndId"), position,
+            ]))
+            transaction_id = "sha1:" + hashlib.sha1(fingerprint.encode()).hexdigest()
+
+        yield CamtTransaction(
+            transaction_id=transaction_id[:100],
+            amount=tx_amount,
+            currency=tx_currency,
+            credit=(tx_indicator or ("CRDT" if credit else "DBIT")) == "CRDT",
+            booked=booked,
+            booking_date=booking_date,
+            value_date=value_date,
+            reference=reference,
+            remittance=" ".join(filter(None, ((item.text or "").strip() for item in _children(remittance, "Ustrd")))),
+            debtor_name=debtor_name,
+        )
+
+
+def iter_transactions(source: BinaryIO, *, chunk_size: int = CHUNK_SIZE) -> Iterator[CamtTransaction]:
+    """
+    Liefert die Transaktionen einer camt.053/054-Datei in Dateireihenfolge.
+
+    Raises:
+        CamtError: kein camt-Dokument, XML-Fehler oder DTD/Entities (nicht erlaubt).
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    stack: List[Element] = []
+    document_type = None
+    in_prolog = True
+    previous = b""
+
+    while True:
+        chunk = source.read(chunk_size)
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if in_prolog:
+            # camt kennt keine DTD; Entities würden sonst expandiert (Billion Laughs)
+            window = previous[-16:] + chunk
+            if b"<!DOCTYPE" in window or b"<!ENTITY" in window:
+                raise CamtError("DTD/Entities sind in camt-Dateien nicht erlaubt.")
+            previous = chunk
+        try:
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+        except ParseError as exc:
+            raise CamtError(f"Ungültiges XML: {exc}") from None
+
+        for event, element in parser.read_events():
+            name = _local(element.tag)
+            if event == "start":
+                in_prolog = False
+                if len(stack) == 1 and document_type is None:
+                    document_type = DOCUMENT_TYPES.get(name)
+                    if document_type is None:
+                        raise CamtError("Kein camt.053/054-Dokument.")
+                stack.append(element)
+                continue
+            stack.pop()
+            if name == "Ntry" and document_type:
+                yield from _entry_transactions(element)
+                # Ausgewertete Buchung freigeben – konstanter Speicher
+                if stack:
+                    stack[-1].remove(element)
+
+        if not chunk:
+            break
+
+    if document_type is None:
+        raise CamtError("Kein camt.053/054-Dokument.")
@@ -0,0 +1,35 @@
+"""
+Hintergrund-Jobs von AdeaRechnung (siehe `adeacore.jobs`).
+"""
+
+import tempfile
+from pathlib import Path
+
+from django.utils.text import get_valid_filename
+
+from adeacore.jobs import register
+
+
+@register("invoice_pdfs", label="Rechnungs-PDFs erstellen")
+def invoice_pdfs_job(ctx, year, client_id=None):
+    """PDFs aller Rechnungen eines Jahres (optional eines Mandanten) als ZIP in der Job-Ablage."""
+    from adeacore.models import Invoice
+
+    from .pdf_generator import InvoicePDFGenerator
+
+    invoices = Invoice.objects.filter(invoice_date__year=year).select_related("client").order_by("invoice_number")
+    if client_id:
+        invoices = invoices.filter(client_id=client_id)
+    invoices = list(invoices)
+
+    summary = {"invoices": len(invoices)}
+    generator = InvoicePDFGenerator()
+    with tempfile.TemporaryDirectory(prefix="rechnungen_") as directory:
+        for index, invoice in enumerate(invoices):
+            ctx.progress(index, len(invoices), invoice.invoice_number)
+            pdf = generator.generate_pdf(invoice).content
+            (Path(directory) / get_valid_filename(f"Rechnung_{invoice.invoice_number}.pdf")).write_bytes(pdf)
+        if invoices:
+            summary["file"] = ctx.save_zip(f"rechnungen_{year}.zip", directory)
+    ctx.progress(len(invoices), len(invoices), "Fertig")
+    return summary
@@ -0,0 +1,45 @@
+"""
+Management-Command: Bankauszüge (camt.053/054) importieren und Zahlungen verbuchen.
+
+Verwendung:
+    python manage.py import_camt auszug_2025-03.xml
+    python manage.py import_camt *.xml --dry-run     # nur prüfen
+
+Gleiche Zuordnung wie der Import in AdeaRechnung (siehe `adearechnung.payments`);
+bereits importierte Buchungen werden übersprungen.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adearechnung.camt import CamtError, iter_transactions
+from adearechnung.payments import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Importiert camt.053/054-Dateien und verbucht zugeordnete Zahlungen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='camt.053/054-Dateien')
+        parser.add_argument('--dry-run', action='store_true', help='Nur zuordnen, nichts speichern')
+
+    def handle(self, *args, **options):
+        for path in options['files']:
+            started = time.monotonic()
+            try:
+                with open(path, 'rb') as source:
+                    result = reconcile(iter_transactions(source), dry_run=options['dry_run'])
+            except (OSError, CamtError) as exc:
+                raise CommandError(f'{path}: {exc}')
+
+            for tx, reason in result.unmatched:
+                self.stdout.write(
+                    f'  ✗ {tx.booking_date or ""} {tx.amount:>10} {tx.currency} '
+                    f'{tx.reference or tx.remittance[:40]} – {reason}'
+                )
+            verb = 'zugeordnet (nicht gespeichert)' if options['dry_run'] else 'verbucht'
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {path}: {len(result.matched)} Zahlungen über {result.matched_total:.2f} CHF {verb}, '
+                f'{len(result.unmatched)} nicht zugeordnet, {result.duplicates} bereits importiert '
+                f'({time.monotonic() - started:.1f}s)'
+            ))
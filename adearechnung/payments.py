@@ -0,0 +1,253 @@
+"""
+Zahlungsreferenzen und Abgleich von Bankbuchungen mit Rechnungen.
+
+- Jede Rechnung erhält eine SCOR-Referenz (ISO 11649, "RF…") aus der Rechnungsnummer;
+  sie steht im QR-Zahlteil und in der indexierten Spalte `Invoice.payment_reference`.
+- `reconcile(...)` ordnet Gutschriften aus camt.053/054 (siehe `adearechnung.camt`)
+  über Referenz und Betrag den Rechnungen zu und verbucht die Treffer gesammelt:
+  pro Block eine Query für Rechnungen und bereits importierte Buchungen, am Ende
+  ein `bulk_update` und ein `bulk_create` – auch bei Tausenden Buchungen in Sekunden.
+- Verbuchte Zahlungen werden als `InvoicePayment` mit der Bank-Referenz gespeichert;
+  ein erneuter Import derselben Datei verbucht nichts doppelt.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+BATCH_SIZE = 500
+CURRENCY = "CHF"
+
+_SCOR_PATTERN = re.compile(r"RF\d{2}[A-Z0-9]{1,21}")
+_QRR_PATTERN = re.compile(r"\d{27}")
+
+
+# ---------------------------------------------------------------------------
+# Referenzen
+# ---------------------------------------------------------------------------
+
+def normalize_reference(value: str) -> str:
+    """Referenz ohne Leerzeichen, in Grossbuchstaben (so steht sie in der Datenbank)."""
+    return "".join((value or "").split()).upper()
+
+
+def _iso7064_mod97(value: str) -> int:
+    return int("".join(str(int(char, 36)) for char in value)) % 97
+
+
+def creditor_reference(invoice_number: str) -> str:
+    """
+    SCOR-Referenz (ISO 11649) zur Rechnungsnummer, z.B. "RE-2025-0001" -> "RF..RE20250001".
+
+    Nur Buchstaben und Ziffern; bei mehr als 21 Zeichen zählen die letzten 21.
+    Leer, wenn die Nummer keine Buchstaben oder Ziffern enthält.
+    """
+    body = re.sub(r"[^A-Z0-9]", "", (invoice_number or "").upper())[-21:]
+    if not body:
+        return ""
+    check = 98 - _iso7064_mod97(body + "RF00")
+    return f"RF{check:02d}{body}"
+
+
+def is_valid_creditor_reference(value: str) -> bool:
+    value = normalize_reference(value)
+    if not _SCOR_PATTERN.fullmatch(value):
+        return False
+    return _iso7064_mod97(value[4:] + value[:4]) == 1
+
+
+def is_valid_qr_reference(value: str) -> bool:
+    """QR-Referenz (27 Ziffern, Prüfziffer Modulo 10 rekursiv)."""
+    value = normalize_reference(value)
+    if not _QRR_PATTERN.fullmatch(value):
+        return False
+    carry = 0
+    for digit in value[:-1]:
+        carry = (0, 9, 4, 6, 8, 2, 7, 1, 3, 5)[(carry + int(digit)) % 10]
+    return (10 - carry) % 10 == int(value[-1])
+
+
+def format_reference(value: str) -> str:
+    """Lesbare Darstellung in Vierergruppen (SCOR) bzw. 2+5er-Gruppen (QRR)."""
+    value = normalize_reference(value)
+    if _QRR_PATTERN.fullmatch(value):
+        return " ".join([value[:2]] + [value[i:i + 5] for i in range(2, 27, 5)])
+    return " ".join(value[i:i + 4] for i in range(0, len(value), 4))
+
+
+def extract_reference(text: str) -> str:
+    """Sucht eine gültige SCOR-/QR-Referenz in freiem Text (Zahler tippen sie oft ab)."""
+    compact = normalize_reference(text)
+    for match in re.finditer(r"RF\d{2}", compact):
+        candidate = compact[match.start():match.start() + 25]
+        # Ohne Leerzeichen ist das Ende unklar -> längste gültige Referenz
+        for end in range(len(candidate), 4, -1):
+            if is_valid_creditor_reference(candidate[:end]):
+                return candidate[:end]
+    for match in re.finditer(r"(?=(\d{27}))", compact):
+        if is_valid_qr_reference(match.group(1)):
+            return match.group(1)
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Abgleich
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ReconciliationResult:
+    """Ergebnis eines Imports: verbuchte und nicht zugeordnete Gutschriften."""
+
+    matched: List[Tuple] = field(default_factory=list)  # (CamtTransaction, Invoice)
+    unmatched: List[Tuple] = field(default_factory=list)  # (CamtTransaction, Grund)
+    duplicates: int = 0
+    skipped: int = 0  # Belastungen und nicht gebuchte Einträge
+    dry_run: bool = False
+
+    @property
+    def matched_total(self) -> Decimal:
+        return sum((tx.amount for tx, _ in self.matched), Decimal("0.00"))
+
+    @property
+    def unmatched_total(self) -> Decimal:
+        return sum((tx.amount for tx, _ in self.unmatched), Decimal("0.00"))
+
+
+class _Reconciler:
+    def __init__(self, result: ReconciliationResult, user):
+        from adeacore.models import Invoice
+
+        self.invoice_model = Invoice
+        self.result = result
+        self.user = user
+        self.seen_ids = set()
+        # Über Blöcke hinweg dieselben Objekte: Teilzahlungen in einer Datei summieren sich
+        self.invoices_by_reference: Dict[str, List] = {}
+        self.changed: Dict[int, object] = {}
+        self.payments: List = []
+
+    def _load(self, batch) -> set:
+        from adeacore.models import InvoicePayment
+
+        references = {tx_reference for _, tx_reference in batch if tx_reference} - self.invoices_by_reference.keys()
+        if references:
+            for reference in references:
+                self.invoices_by_reference[reference] = []
+            # Zeilen bis zum Commit sperren: paid_amount wird absolut (bulk_update) geschrieben,
+            # eine parallel erfasste Zahlung ginge sonst verloren
+            invoices = (
+                self.invoice_model.objects.filter(payment_reference__in=references)
+                .exclude(payment_status="STORNIERT")
+                .select_related("client")
+                .select_for_update(of=("self",))
+                .order_by("invoice_date", "pk")
+            )
+            for invoice in invoices:
+                self.invoices_by_reference[invoice.payment_reference].append(invoice)
+        ids = [tx.transaction_id for tx, _ in batch]
+        return set(InvoicePayment.objects.filter(transaction_id__in=ids).values_list("transaction_id", flat=True))
+
+    def _choose(self, tx, reference: str):
+        """(Rechnung, None) oder (None, Grund)."""
+        if not reference:
+            return None, "Keine Referenz"
+        if tx.currency != CURRENCY:
+            return None, f"Währung {tx.currency}"
+        candidates = self.invoices_by_reference.get(reference) or []
+        if not candidates:
+            return None, "Referenz unbekannt"
+        open_candidates = [invoice for invoice in candidates if invoice.remaining_amount > 0]
+        if not open_candidates:
+            return None, "Rechnung bereits bezahlt"
+        # Genau der offene Betrag, sonst Teilzahlung an die älteste offene Rechnung
+        for invoice in open_candidates:
+            if invoice.remaining_amount == tx.amount:
+                return invoice, None
+        for invoice in open_candidates:
+            if tx.amount < invoice.remaining_amount:
+                return invoice, None
+        return None, f"Betrag übersteigt offenen Betrag ({open_candidates[0].remaining_amount:.2f})"
+
+    def process(self, batch) -> None:
+        from adeacore.models import InvoicePayment
+
+        imported = self._load(batch)
+        for tx, reference in batch:
+            if tx.transaction_id in imported or tx.transaction_id in self.seen_ids:
+                self.result.duplicates += 1
+                continue
+            self.seen_ids.add(tx.transaction_id)
+            invoice, reason = self._choose(tx, reference)
+            if invoice is None:
+                self.result.unmatched.append((tx, reason))
+                continue
+
+            payment_date = tx.booking_date or tx.value_date or timezone.localdate()
+            invoice.paid_amount += tx.amount
+            if invoice.payment_date is None or payment_date > invoice.payment_date:
+                invoice.payment_date = payment_date
+            invoice.update_payment_status()
+            self.changed[invoice.pk] = invoice
+            self.payments.append(InvoicePayment(
+                invoice=invoice,
+                transaction_id=tx.transaction_id,
+                amount=tx.amount,
+                booking_date=payment_date,
+                reference=reference,
+                debtor_name=tx.debtor_name[:255],
+                imported_by=self.user,
+            ))
+            self.result.matched.append((tx, invoice))
+
+    def save(self) -> None:
+        from adeacore.http_cache import bump_table_version
+        from adeacore.models import InvoicePayment
+
+        now = timezone.now()
+        for invoice in self.changed.values():
+            invoice.updated_at = now  # auto_now greift bei bulk_update nicht
+        self.invoice_model.objects.bulk_update(
+            list(self.changed.values()),
+            ["paid_amount", "payment_date", "payment_status", "updated_at"],
+            batch_size=BATCH_SIZE,
+        )
+        InvoicePayment.objects.bulk_create(self.payments, batch_size=BATCH_SIZE)
+        if self.changed:
+            # bulk_update sendet keine Signale (Debitoren-Summen, adearechnung.aging)
+            bump_table_version(self.invoice_model)
+
+
+def reconcile(transactions: Iterable, *, user=None, dry_run: bool = False) -> ReconciliationResult:
+    """
+    Verbucht die Gutschriften mit bekannter Referenz und passendem Betrag.
+
+    Zuordnung: Referenz (strukturiert, sonst aus dem Mitteilungstext) -> Rechnung;
+    der Betrag muss dem offenen Betrag entsprechen oder darunter liegen (Teilzahlung).
+    Alles andere landet mit Grund in `unmatched`. Mit `dry_run` wird nichts gespeichert.
+    Alles-oder-nichts: parallele Imports derselben Buchung scheitern am Unique-Index;
+    die betroffenen Rechnungen bleiben bis zum Commit gesperrt (select_for_update).
+    """
+    result = ReconciliationResult(dry_run=dry_run)
+    with transaction.atomic():
+        reconciler = _Reconciler(result, user)
+        batch = []
+        for tx in transactions:
+            if not tx.credit or not tx.booked:
+                result.skipped += 1
+                continue
+            reference = normalize_reference(tx.reference) or extract_reference(tx.remittance)
+            batch.append((tx, reference))
+            if len(batch) >= BATCH_SIZE:
+                reconciler.process(batch)
+                batch = []
+        if batch:
+            reconciler.process(batch)
+        if not dry_run:
+            reconciler.save()
+    return result
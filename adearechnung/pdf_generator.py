@@ -405,7 +405,7 @@ class InvoicePDFGenerator:
                 [Paragraph(f"Empfänger: {company_data.company_name}", self.normal_style)],
                 [Paragraph(f"IBAN: {company_data.iban}", self.normal_style)],
                 [Paragraph(f"Betrag: {invoice.amount:.2f} CHF", self.normal_style)],
-                [Paragraph(f"Referenz: {invoice.invoice_number}", self.normal_style)],
+                [Paragraph(f"Referenz: {self._payment_reference(invoice, company_data) or invoice.invoice_number}", self.normal_style)],
             ],
             colWidths=[114 * mm],
         )
@@ -443,6 +443,15 @@ class InvoicePDFGenerator:
         elements.append(slip)
         return elements
 
+    def _payment_reference(self, invoice, company_data):
+        """SCOR-Referenz für den Zahlteil (formatiert); leer bei QR-IBAN (verlangt QR-Referenz)."""
+        from adearechnung.payments import format_reference
+
+        iban = (str(company_data.iban or "").replace(" ", "")).strip().upper()
+        if not invoice.payment_reference or (iban[4:5] == "3" and iban[4:9].isdigit() and 30000 <= int(iban[4:9]) <= 31999):
+            return ""
+        return format_reference(invoice.payment_reference)
+
     def _build_qr_bill(self, invoice, company_data):
         """Erstellt ein QRBill-Objekt für CH-Zahlungen."""
         iban = (str(company_data.iban or "").replace(" ", "")).strip()
@@ -468,6 +477,8 @@ class InvoicePDFGenerator:
             },
             amount=Decimal(str(invoice.amount)).quantize(Decimal("0.01")),
             currency="CHF",
+            # Referenz für den automatischen Abgleich der Bankbuchungen (adearechnung.payments)
+            reference_number=self._payment_reference(invoice, company_data) or None,
             additional_information=f"Rechnung {invoice.invoice_number}",
         )
 
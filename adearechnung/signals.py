@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from adeacore.http_cache import track_table_versions
+from adeacore.models import Invoice
+
+# Tabellen-Version der Rechnungen (adeacore.http_cache): verwirft die gecachten
+# Debitoren-Summen des Dashboards (adearechnung.aging)
+track_table_versions(Invoice)
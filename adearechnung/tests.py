@@ -1,3 +1,318 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+
+from adeacore.models import Client, Invoice, InvoiceItem, InvoicePayment
+from adearechnung.camt import CamtError, iter_transactions
+from adearechnung.payments import (
+    creditor_reference,
+    extract_reference,
+    format_reference,
+    is_valid_creditor_reference,
+    reconcile,
+)
+
+CAMT_053 = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.04">
+  <BkToCstmrStmt>
+    <GrpHdr><MsgId>MSG-1</MsgId><CreDtTm>2025-04-01T06:00:00</CreDtTm></GrpHdr>
+    <Stmt>
+      <Id>STMT-1</Id>
+      {entries}
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+ENTRY = """<Ntry>
+        <Amt Ccy="{currency}">{amount}</Amt>
+        <CdtDbtInd>{indicator}</CdtDbtInd>
+        <Sts>BOOK</Sts>
+        <BookgDt><Dt>{booking_date}</Dt></BookgDt>
+        <ValDt><Dt>{booking_date}</Dt></ValDt>
+        <AcctSvcrRef>{ref}</AcctSvcrRef>
+        <NtryDtls>{details}</NtryDtls>
+      </Ntry>"""
+
+TX = """<TxDtls>
+          <Refs><EndToEndId>NOTPROVIDED</EndToEndId></Refs>
+          <Amt Ccy="CHF">{amount}</Amt>
+          <CdtDbtInd>CRDT</CdtDbtInd>
+          <RltdPties><Dbtr><Nm>{debtor}</Nm></Dbtr></RltdPties>
+          <RmtInf>{remittance}</RmtInf>
+        </TxDtls>"""
+
+
+def _tx(amount, reference="", debtor="Muster AG", text=""):
+    remittance = f"<Ustrd>{text}</Ustrd>" if text else ""
+    if reference:
+        remittance += f"<Strd><CdtrRefInf><Tp><CdOrPrtry><Prtry>SCOR</Prtry></CdOrPrtry></Tp><Ref>{reference}</Ref></CdtrRefInf></Strd>"
+    return TX.format(amount=amount, debtor=debtor, remittance=remittance)
+
+
+def _entry(ref, details, amount="0.00", indicator="CRDT", currency="CHF", booking_date="2025-03-31"):
+    return ENTRY.format(
+        ref=ref, details="".join(details), amount=amount, indicator=indicator,
+        currency=currency, booking_date=booking_date,
+    )
+
+
+def _camt(*entries) -> bytes:
+    return CAMT_053.format(entries="".join(entries)).encode("utf-8")
+
+
+class CamtParserTest(SimpleTestCase):
+    """Tests für den Streaming-Parser (adearechnung.camt)."""
+
+    def test_parses_batch_entries_independent_of_chunk_size(self):
+        """Test: Sammelbuchungen liefern eine Transaktion pro TxDtls, auch bei kleinen Blöcken."""
+        data = _camt(
+            _entry("E1", [_tx("100.00", "RF18 5390 0754 7034"), _tx("50.50", debtor="Beispiel GmbH", text="Rechnung 12")], "150.50"),
+            _entry("E2", [], "20.00", indicator="DBIT"),
+        )
+        for chunk_size in (7, 64 * 1024):
+            transactions = list(iter_transactions(BytesIO(data), chunk_size=chunk_size))
+            self.assertEqual([tx.transaction_id for tx in transactions], ["E1/1", "E1/2", "E2"])
+            first, second, debit = transactions
+            self.assertEqual((first.amount, first.reference, first.debtor_name), (Decimal("100.00"), "RF18 5390 0754 7034", "Muster AG"))
+            self.assertEqual((second.amount, second.remittance, second.booking_date), (Decimal("50.50"), "Rechnung 12", date(2025, 3, 31)))
+            self.assertTrue(first.credit and first.booked)
+            self.assertFalse(debit.credit)
+
+    def test_rejects_dtd_and_foreign_documents(self):
+        """Test: DTDs (Entity-Expansion) und andere XML-Dokumente werden abgelehnt."""
+        with self.assertRaises(CamtError):
+            list(iter_transactions(BytesIO(b'<?xml version="1.0"?><!DOCTYPE x [<!ENTITY a "b">]><Document/>')))
+        with self.assertRaises(CamtError):
+            list(iter_transactions(BytesIO(b'<Document><CstmrCdtTrfInitn/></Document>')))
+        with self.assertRaises(CamtError):
+            list(iter_transactions(BytesIO(b'<Document><BkToCstmrStmt>')))
+
+    def test_creditor_reference(self):
+        """Test: SCOR-Referenzen sind gültig und werden auch im Mitteilungstext erkannt."""
+        reference = creditor_reference("RE-2025-0001")
+        self.assertTrue(reference.startswith("RF") and reference.endswith("RE20250001"))
+        self.assertTrue(is_valid_creditor_reference(reference))
+        self.assertTrue(is_valid_creditor_reference("RF18 5390 0754 7034"))
+        self.assertFalse(is_valid_creditor_reference("RF19 5390 0754 7034"))
+        self.assertEqual(extract_reference(f"Zahlung {format_reference(reference)} danke"), reference)
+        self.assertEqual(extract_reference("Rechnung vom März"), "")
+
+
+class BankImportTest(TestCase):
+    """Tests für den Abgleich von Bankbuchungen mit Rechnungen (adearechnung.payments)."""
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(name="Muster AG", client_type="FIRMA")
+        self.user = User.objects.create_superuser(username="bank", password="x")
+        today = date.today()
+        self.invoices = [
+            Invoice.objects.create(
+                client=self.client_obj, invoice_number=f"RE-2025-{number:04d}", invoice_date=today,
+                due_date=today + timedelta(days=15), amount=Decimal("100.00"),
+            )
+            for number in range(1, 4)
+        ]
+
+    def test_invoice_gets_payment_reference(self):
+        """Test: neue Rechnungen erhalten die SCOR-Referenz ihrer Nummer."""
+        self.assertEqual(self.invoices[0].payment_reference, creditor_reference("RE-2025-0001"))
+
+    def test_reconcile_applies_matches_and_reports_rest(self):
+        """Test: Treffer werden gesammelt verbucht, der Rest mit Grund gemeldet, nichts doppelt."""
+        first, second, third = self.invoices
+        data = _camt(
+            _entry("E1", [
+                _tx("100.00", format_reference(first.payment_reference)),
+                _tx("40.00", text=f"Teilzahlung {format_reference(second.payment_reference)}"),
+                _tx("250.00", third.payment_reference),
+                _tx("10.00", "RF18 5390 0754 7034"),
+                _tx("5.00"),
+            ], "405.00"),
+            _entry("E2", [], "99.00", indicator="DBIT"),
+        )
+
+        result = reconcile(iter_transactions(BytesIO(data)), user=self.user)
+        self.assertEqual([invoice.pk for _, invoice in result.matched], [first.pk, second.pk])
+        self.assertEqual(
+            [reason for _, reason in result.unmatched],
+            ["Betrag übersteigt offenen Betrag (100.00)", "Referenz unbekannt", "Keine Referenz"],
+        )
+        self.assertEqual(result.skipped, 1)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.payment_status, first.paid_amount, first.payment_date), ("BEZAHLT", Decimal("100.00"), date(2025, 3, 31)))
+        self.assertEqual((second.payment_status, second.paid_amount), ("TEILWEISE", Decimal("40.00")))
+        self.assertEqual(InvoicePayment.objects.count(), 2)
+
+        again = reconcile(iter_transactions(BytesIO(data)), user=self.user)
+        self.assertEqual((len(again.matched), again.duplicates), (0, 2))
+        second.refresh_from_db()
+        self.assertEqual(second.paid_amount, Decimal("40.00"))
+
+    def test_reconcile_queries_do_not_grow_with_transactions(self):
+        """Test: viele Buchungen kosten pro Block dieselben Queries (bulk statt pro Zeile)."""
+        details = [_tx("1.00", invoice.payment_reference) for invoice in self.invoices for _ in range(20)]
+        data = _camt(_entry("E1", details, "60.00"))
+        transactions = list(iter_transactions(BytesIO(data)))
+        # Savepoint, Rechnungen, bereits importierte, bulk_update, bulk_create, Savepoint-Release
+        with self.assertNumQueries(6):
+            result = reconcile(transactions)
+        self.assertEqual(len(result.matched), 60)
+        self.invoices[0].refresh_from_db()
+        self.assertEqual(self.invoices[0].paid_amount, Decimal("20.00"))
+
+    def test_reconcile_locks_invoice_rows(self):
+        """Test: Rechnungen werden mit SELECT ... FOR UPDATE (nur Rechnungszeilen) geladen."""
+        from django.db import connection
+
+        locking = []
+
+        def strip_for_update(execute, sql, params, many, context):
+            # SQLite kennt keine Row-Locks: Klausel protokollieren und entfernen
+            if " FOR UPDATE" in sql:
+                sql, clause = sql.split(" FOR UPDATE", 1)
+                locking.append(f"FOR UPDATE{clause}")
+            return execute(sql, params, many, context)
+
+        data = _camt(_entry("E1", [_tx("100.00", self.invoices[0].payment_reference)], "100.00"))
+        with mock.patch.object(connection.features, "has_select_for_update", True), \
+                mock.patch.object(connection.features, "has_select_for_update_of", True), \
+                connection.execute_wrapper(strip_for_update):
+            result = reconcile(iter_transactions(BytesIO(data)))
+        self.assertEqual(len(result.matched), 1)
+        self.assertEqual(locking, ['FOR UPDATE OF "adeacore_invoice"'])
+
+    def test_import_view_dry_run(self):
+        """Test: die Prüfung zeigt Zuordnungen, ohne zu verbuchen."""
+        self.client.force_login(self.user)
+        data = _camt(_entry("E1", [_tx("100.00", self.invoices[0].payment_reference)], "100.00"))
+        response = self.client.post('/rechnung/bank-import/', {
+            'statement': SimpleUploadedFile('auszug.xml', data, content_type='application/xml'),
+            'dry_run': '1',
+        })
+        self.assertContains(response, 'RE-2025-0001')
+        self.assertContains(response, 'Prüfung, nichts verbucht')
+        self.assertFalse(InvoicePayment.objects.exists())
+
+        response = self.client.post('/rechnung/bank-import/', {
+            'statement': SimpleUploadedFile('auszug.xml', data, content_type='application/xml'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(InvoicePayment.objects.get().invoice, self.invoices[0])
+
+        response = self.client.post('/rechnung/bank-import/', {
+            'statement': SimpleUploadedFile('kaputt.xml', b'<html/>', content_type='application/xml'),
+        })
+        self.assertContains(response, 'konnte nicht gelesen werden')
+
+
+class DebtorAgingTest(TestCase):
+    """Tests für offene Posten und Altersstruktur (adearechnung.aging)."""
+
+    def setUp(self):
+        self.today = date(2025, 6, 30)
+        self.user = User.objects.create_superuser(username="aging", password="x", is_staff=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.muster = Client.objects.create(name="Muster AG", client_type="FIRMA")
+            self.beispiel = Client.objects.create(name="Beispiel GmbH", client_type="FIRMA")
+            self._invoice(self.muster, 1, days_overdue=-5, amount="100.00")
+            self._invoice(self.muster, 2, days_overdue=45, amount="200.00", paid="50.00")
+            self._invoice(self.muster, 3, days_overdue=120, amount="300.00")
+            self._invoice(self.beispiel, 4, days_overdue=75, amount="80.00")
+            self._invoice(self.beispiel, 5, days_overdue=200, amount="500.00", paid="500.00")
+
+    def _invoice(self, client, number, *, days_overdue, amount, paid="0.00"):
+        due_date = self.today - timedelta(days=days_overdue)
+        return Invoice.objects.create(
+            client=client, invoice_number=f"RE-2025-{number:04d}", invoice_date=due_date - timedelta(days=15),
+            due_date=due_date, amount=Decimal(amount), paid_amount=Decimal(paid),
+        )
+
+    def test_aging_by_client_and_totals(self):
+        """Test: offene Beträge landen in der richtigen Altersklasse, bezahlte fehlen."""
+        from adearechnung.aging import aging_by_client, aging_totals
+
+        with self.assertNumQueries(1):
+            rows = aging_by_client(self.today)
+        self.assertEqual([row["client__name"] for row in rows], ["Muster AG", "Beispiel GmbH"])
+        muster, beispiel = rows
+        self.assertEqual(
+            (muster["days_0_30"], muster["days_31_60"], muster["days_61_90"], muster["days_over_90"], muster["total"]),
+            (Decimal("100.00"), Decimal("150.00"), Decimal("0.00"), Decimal("300.00"), Decimal("550.00")),
+        )
+        self.assertEqual((beispiel["days_61_90"], beispiel["invoice_count"]), (Decimal("80.00"), 1))
+
+        with self.assertNumQueries(1):
+            totals = aging_totals(self.today)
+        self.assertEqual((totals["total"], totals["client_count"], totals["invoice_count"]), (Decimal("630.00"), 2, 4))
+
+    def test_cached_totals_follow_invoice_changes(self):
+        """Test: die Dashboard-Summen kommen aus dem Cache, bis sich eine Rechnung ändert."""
+        from adearechnung.aging import cached_aging_totals
+
+        self.assertEqual(cached_aging_totals(self.today)["total"], Decimal("630.00"))
+        with mock.patch("adearechnung.aging.aging_totals") as aging_totals:
+            cached_aging_totals(self.today)
+        aging_totals.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._invoice(self.beispiel, 6, days_overdue=0, amount="70.00")
+        self.assertEqual(cached_aging_totals(self.today)["total"], Decimal("700.00"))
+
+    def test_invoice_list_annotates_open_amounts(self):
+        """Test: die Rechnungsliste zeigt offene Beträge ohne Query pro Rechnung."""
+        self.client.force_login(self.user)
+        response = self.client.get('/rechnung/invoices/')
+        invoices = {invoice.invoice_number: invoice for invoice in response.context['invoices']}
+        self.assertEqual(invoices["RE-2025-0002"].remaining, Decimal("150.00"))
+        # Liste braucht nur den offenen Betrag, keine Positions-Subquery
+        self.assertFalse(hasattr(invoices["RE-2025-0002"], "base_net_total"))
+        self.assertContains(response, '150,00 CHF')
+
+        invoice = invoices["RE-2025-0002"]
+        InvoiceItem.objects.create(
+            invoice=invoice, description="Beratung", service_date=self.today, quantity=Decimal("1"),
+            unit_price=Decimal("120.00"), net_amount=Decimal("120.00"), gross_amount=Decimal("120.00"),
+        )
+        response = self.client.get(f'/rechnung/invoices/{invoice.pk}/')
+        self.assertEqual(response.context['base_net_amount'], Decimal("120.00"))
+        self.assertEqual(response.context['invoice'].base_net_total, Decimal("120.00"))
+
+        response = self.client.get('/rechnung/debitoren/')
+        self.assertContains(response, 'Muster AG')
+        self.assertContains(response, '630,00 CHF')
+
+
+class InvoicePdfJobTest(TestCase):
+    """Rechnungs-PDFs eines Jahres als Hintergrund-Job (adearechnung.jobs)."""
+
+    def test_job_stores_zip_for_download(self):
+        import zipfile
+
+        from adeacore import jobs
+        from adeacore.models import Job
+        from adeacore.testing import temporary_job_storage
+
+        client = Client.objects.create(name="PDF AG", client_type="FIRMA")
+        for number, invoice_date in ((1, date(2025, 2, 1)), (2, date(2025, 3, 1)), (3, date(2024, 12, 1))):
+            Invoice.objects.create(
+                client=client, invoice_number=f"RE-PDF-{number}", invoice_date=invoice_date,
+                due_date=invoice_date + timedelta(days=15), amount=Decimal("100.00"),
+            )
+
+        with temporary_job_storage() as location:
+            job = jobs.enqueue("invoice_pdfs", {"year": 2025})
+            self.assertTrue(jobs.run_next("test"))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_DONE, job.last_error)
+            self.assertEqual(job.result["invoices"], 2)
+            with zipfile.ZipFile(location / job.result_file) as archive:
+                self.assertEqual(archive.namelist(), ["Rechnung_RE-PDF-1.pdf", "Rechnung_RE-PDF-2.pdf"])
+                self.assertTrue(archive.read("Rechnung_RE-PDF-1.pdf").startswith(b"%PDF"))
@@ -30,6 +30,12 @@ urlpatterns = [
     path("invoices/<int:pk>/reset-billing/", views.InvoiceResetBillingView.as_view(), name="invoice-reset-billing"),
     path("invoices/<int:pk>/delete/", views.InvoiceDeleteView.as_view(), name="invoice-delete"),
     
+    # Offene Posten / Altersstruktur
+    path("debitoren/", views.DebtorAgingView.as_view(), name="debtor-aging"),
+    
+    # Zahlungseingänge aus Bankauszügen (camt.053/054)
+    path("bank-import/", views.BankStatementImportView.as_view(), name="bank-import"),
+    
     # PDF-Export
     path("invoices/<int:pk>/pdf/", views.InvoicePDFView.as_view(), name="invoice-pdf"),
 ]
@@ -8,13 +8,14 @@ from django.views.generic import TemplateView, ListView, DetailView
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse, HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.contrib import messages
 from django.db import transaction
 from adeazeit.mixins import ManagerOrAdminRequiredMixin
 from adeazeit.views import mark_as_invoiced
 from adeacore.models import Invoice, Client, InvoiceItem
+from adearechnung.aging import BUCKETS, aging_by_client, aging_totals, with_base_net_total, with_open_amounts
 from adearechnung.services import InvoiceService
 from adeazeit.models import TimeEntry
 from datetime import datetime, date
@@ -426,8 +427,9 @@ class InvoiceListView(ManagerOrAdminRequiredMixin, ListView):
     paginate_by = 50
     
     def get_queryset(self):
-        # List-Template nutzt nur invoice.* + invoice.client.*. `items` wird hier nicht benötigt.
-        queryset = Invoice.objects.select_related('client', 'created_by')
+        # List-Template nutzt nur invoice.* + invoice.client.*. `items` wird hier nicht benötigt;
+        # offene Beträge kommen als Annotation (keine Query pro Rechnung)
+        queryset = with_open_amounts(Invoice.objects.select_related('client', 'created_by'))
         
         # Filter nach Client
         client_id = self.request.GET.get('client_id')
@@ -449,7 +451,9 @@ class InvoiceDetailView(ManagerOrAdminRequiredMixin, DetailView):
     context_object_name = "invoice"
     
     def get_queryset(self):
-        return Invoice.objects.select_related('client', 'created_by').prefetch_related('items__time_entry')
+        return with_base_net_total(
+            Invoice.objects.select_related('client', 'created_by').prefetch_related('items__time_entry')
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -461,13 +465,27 @@ class InvoiceDetailView(ManagerOrAdminRequiredMixin, DetailView):
 
         context["invoice_rows"] = invoice_rows
         context["manual_items"] = manual_items
-        context["base_net_amount"] = invoice.base_net_amount
+        context["base_net_amount"] = invoice.base_net_total
         context["company_data"] = company_data
         context["warn_qr_iban_missing"] = not bool((company_data.iban or "").strip())
         context["manual_item_locked"] = invoice.payment_status in MANUAL_ITEM_LOCKED_STATUSES
         return context
 
 
+class DebtorAgingView(ManagerOrAdminRequiredMixin, TemplateView):
+    """Offene Posten pro Mandant nach Überfälligkeit (0–30, 31–60, 61–90, über 90 Tage)."""
+    template_name = "adearechnung/debtor_aging.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = date.today()
+        context["today"] = today
+        context["buckets"] = BUCKETS
+        context["rows"] = aging_by_client(today)
+        context["totals"] = aging_totals(today)
+        return context
+
+
 class InvoicePDFView(ManagerOrAdminRequiredMixin, DetailView):
     """PDF-Export einer Rechnung."""
     model = Invoice
@@ -595,6 +613,42 @@ class InvoiceUpdatePaymentView(ManagerOrAdminRequiredMixin, View):
         return redirect("adearechnung:invoice-detail", pk=invoice.pk)
 
 
+class BankStatementImportView(ManagerOrAdminRequiredMixin, View):
+    """
+    Import von Bankauszügen (camt.053/054): Gutschriften über Zahlungsreferenz und
+    Betrag den Rechnungen zuordnen und gesammelt verbuchen (siehe adearechnung.payments).
+    Nicht zugeordnete Buchungen werden aufgelistet und bleiben manuell zu erfassen.
+    """
+
+    template_name = "adearechnung/bank_import.html"
+
+    def get(self, request):
+        return render(request, self.template_name, {})
+
+    def post(self, request):
+        from adearechnung.camt import CamtError, iter_transactions
+        from adearechnung.payments import reconcile
+
+        upload = request.FILES.get("statement")
+        if not upload:
+            messages.error(request, "Bitte eine camt.053/054-Datei auswählen.")
+            return render(request, self.template_name, {})
+
+        dry_run = bool(request.POST.get("dry_run"))
+        try:
+            result = reconcile(iter_transactions(upload), user=request.user, dry_run=dry_run)
+        except CamtError as exc:
+            messages.error(request, f"Datei {upload.name} konnte nicht gelesen werden: {exc}")
+            return render(request, self.template_name, {})
+
+        if not dry_run and result.matched:
+            messages.success(
+                request,
+                f"{len(result.matched)} Zahlungen über {result.matched_total:.2f} CHF verbucht.",
+            )
+        return render(request, self.template_name, {"result": result, "filename": upload.name})
+
+
 class InvoiceUpdateDiscountView(ManagerOrAdminRequiredMixin, View):
     """
     Aktualisiert den Rechnungsrabatt (CHF) und berechnet Summen neu.
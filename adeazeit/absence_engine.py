@@ -0,0 +1,264 @@
+"""
+Abwesenheits-Engine: Abwesenheiten einmal pro (Mitarbeiter, Jahr) expandieren.
+
+Ziel: `monthly_absence_hours` und die Bulk-Monatsstatistik haben jede ganztägige
+Abwesenheit für jeden angezeigten Monat erneut Tag für Tag durchlaufen. Hier wird
+pro Mitarbeiter und Jahr einmal ausgerechnet, wie viele Arbeitstage (Mo–Fr ohne
+Feiertage des Arbeitskantons) je Monat und Abwesenheitstyp betroffen sind, plus die
+Stunden der Teilzeit-Abwesenheiten. Das Ergebnis liegt im Django-Cache; Stunden
+werden erst beim Lesen mit den aktuellen Sollstunden des Mitarbeiters berechnet.
+
+Invalidierung (adeazeit.signals): Absence/EmployeeInternal geändert -> Version des
+Mitarbeiters erhöhen; Holiday geändert -> globale Version erhöhen.
+
+Darauf aufbauend: Ferien-Saldi aller Mitarbeitenden eines Jahres in einem Durchgang.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+
+from adeacore.cache_stats import record_hit, record_miss
+
+CACHE_NAMESPACE = "absences"
+CACHE_TIMEOUT = 24 * 60 * 60
+GLOBAL_VERSION_KEY = "adeazeit:absence_version"
+
+# Abwesenheiten, die die effektive Sollzeit reduzieren (Feiertage laufen über Holiday)
+EXCLUDED_FROM_ABSENCE_HOURS = ("FEIERTAG",)
+VACATION_TYPE = "FERIEN"
+
+
+def _employee_version_key(employee_id: int) -> str:
+    return f"adeazeit:absence_version:{employee_id}"
+
+
+def _year_key(employee_id: int, year: int, canton: str, versions) -> str:
+    return f"adeazeit:absence_year:{employee_id}:{year}:{canton}:{versions[0]}:{versions[1]}"
+
+
+def _bump(key: str) -> None:
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate_employee_absences(employee_id: int) -> None:
+    """Verwirft die expandierten Abwesenheiten eines Mitarbeiters (alle Jahre)."""
+    _bump(_employee_version_key(employee_id))
+
+
+def invalidate_all_absences() -> None:
+    """Verwirft alle expandierten Abwesenheiten (z.B. nach Feiertagsänderungen)."""
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def daily_hours(employee) -> Decimal:
+    """Sollstunden pro Arbeitstag = weekly_soll_hours / weekly_working_days (Standard 5)."""
+    weekly_working_days = employee.weekly_working_days or Decimal("5.0")
+    if employee.weekly_soll_hours and weekly_working_days > 0:
+        return employee.weekly_soll_hours / weekly_working_days
+    return Decimal("0.00")
+
+
+@dataclass
+class AbsenceYear:
+    """
+    Expandierte Abwesenheiten eines Mitarbeiters in einem Jahr.
+
+    workdays: {Monat: {Typ: Anzahl Arbeitstage}} der ganztägigen Abwesenheiten
+    partial_hours: {Monat: {Typ: Stunden}} der Teilzeit-Abwesenheiten (Monat von date_from)
+    """
+
+    employee_id: int
+    year: int
+    workdays: Dict[int, Dict[str, int]]
+    partial_hours: Dict[int, Dict[str, Decimal]]
+
+    def absence_hours(self, month: int, hours_per_day: Decimal) -> Decimal:
+        """Abwesenheitsstunden im Monat (ohne Feiertage), ungerundet."""
+        total = Decimal("0.00")
+        for absence_type, days in self.workdays.get(month, {}).items():
+            if absence_type not in EXCLUDED_FROM_ABSENCE_HOURS:
+                total += Decimal(str(days)) * hours_per_day
+        for absence_type, hours in self.partial_hours.get(month, {}).items():
+            if absence_type not in EXCLUDED_FROM_ABSENCE_HOURS:
+                total += hours
+        return total
+
+    def days_of_type(self, absence_type: str, hours_per_day: Decimal) -> Decimal:
+        """Tage eines Typs im ganzen Jahr (Teilzeit-Stunden in Tage umgerechnet)."""
+        days = Decimal(sum(month.get(absence_type, 0) for month in self.workdays.values()))
+        hours = sum((month.get(absence_type, Decimal("0.00")) for month in self.partial_hours.values()), Decimal("0.00"))
+        if hours and hours_per_day > 0:
+            days += hours / hours_per_day
+        return days
+
+
+def _holidays_by_canton(year: int) -> Dict[str, frozenset]:
+    """Feiertage des Jahres pro Kanton ("" = schweizweit, in jedem Kanton enthalten). Eine Query."""
+    from .models import Holiday
+
+    by_canton = defaultdict(set)
+    for holiday_date, canton in Holiday.objects.filter(date__year=year).values_list("date", "canton"):
+        by_canton[canton or ""].add(holiday_date)
+    national = by_canton.get("", set())
+    return defaultdict(
+        lambda: frozenset(national),
+        {canton: frozenset(days | national) for canton, days in by_canton.items()},
+    )
+
+
+def expand_absences(absences: Iterable, year: int, holidays: frozenset, employee_id: int) -> AbsenceYear:
+    """Expandiert Abwesenheiten auf Arbeitstage pro Monat und Typ (reine Berechnung, ohne DB)."""
+    year_start = date(year, 1, 1)
+    year_end = date(year, 12, 31)
+    workdays: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    partial_hours: Dict[int, Dict[str, Decimal]] = defaultdict(lambda: defaultdict(lambda: Decimal("0.00")))
+
+    for absence in absences:
+        if absence.full_day:
+            current_day = max(absence.date_from, year_start)
+            last_day = min(absence.date_to, year_end)
+            while current_day <= last_day:
+                # Monday = 0, Friday = 4
+                if current_day.weekday() < 5 and current_day not in holidays:
+                    workdays[current_day.month][absence.absence_type] += 1
+                current_day += timedelta(days=1)
+        elif absence.hours and year_start <= absence.date_from <= year_end:
+            partial_hours[absence.date_from.month][absence.absence_type] += absence.hours
+
+    return AbsenceYear(
+        employee_id=employee_id,
+        year=year,
+        workdays={month: dict(types) for month, types in workdays.items()},
+        partial_hours={month: dict(types) for month, types in partial_hours.items()},
+    )
+
+
+def get_absence_years(employees: Iterable, year: int) -> Dict[int, AbsenceYear]:
+    """
+    Expandierte Abwesenheiten für mehrere Mitarbeitende eines Jahres.
+
+    Warm: zwei Cache-Zugriffe (Versionen, Jahre). Für fehlende Mitarbeitende je eine
+    Query für Abwesenheiten und Feiertage, danach im Cache abgelegt.
+    """
+    from .models import Absence
+
+    employees = list(employees)
+    if not employees:
+        return {}
+
+    version_keys = [GLOBAL_VERSION_KEY] + [_employee_version_key(e.pk) for e in employees]
+    versions = cache.get_many(version_keys)
+    global_version = versions.get(GLOBAL_VERSION_KEY, 0)
+    keys = {
+        e.pk: _year_key(e.pk, year, e.work_canton or "", (global_version, versions.get(_employee_version_key(e.pk), 0)))
+        for e in employees
+    }
+
+    cached = cache.get_many(list(keys.values()))
+    result: Dict[int, AbsenceYear] = {}
+    missing = []
+    for employee in employees:
+        entry = cached.get(keys[employee.pk])
+        if entry is not None:
+            record_hit(CACHE_NAMESPACE)
+            result[employee.pk] = entry
+        else:
+            record_miss(CACHE_NAMESPACE)
+            missing.append(employee)
+
+    if missing:
+        holidays = _holidays_by_canton(year)
+        absences_by_employee = defaultdict(list)
+        absences = Absence.objects.filter(
+            employee_id__in=[e.pk for e in missing],
+            date_from__lte=date(year, 12, 31),
+            date_to__gte=date(year, 1, 1),
+        ).only("employee_id", "absence_type", "date_from", "date_to", "full_day", "hours")
+        for absence in absences:
+            absences_by_employee[absence.employee_id].append(absence)
+
+        to_cache = {}
+        for employee in missing:
+            entry = expand_absences(
+                absences_by_employee.get(employee.pk, []),
+                year,
+                holidays[employee.work_canton or ""],
+                employee.pk,
+            )
+            result[employee.pk] = entry
+            to_cache[keys[employee.pk]] = entry
+        cache.set_many(to_cache, CACHE_TIMEOUT)
+
+    return result
+
+
+def monthly_absence_hours(employee, year: int, month: int, absence_year: Optional[AbsenceYear] = None) -> Decimal:
+    """Abwesenheitsstunden des Monats (ohne FEIERTAG), auf 0.01 gerundet."""
+    if absence_year is None:
+        absence_year = get_absence_years([employee], year)[employee.pk]
+    return absence_year.absence_hours(month, daily_hours(employee)).quantize(Decimal("0.01"))
+
+
+@dataclass(frozen=True)
+class VacationBalance:
+    """Ferien-Saldo eines Mitarbeiters für ein Jahr (in Tagen)."""
+
+    employee_id: int
+    year: int
+    entitlement_days: Decimal
+    taken_days: Decimal
+
+    @property
+    def remaining_days(self) -> Decimal:
+        return self.entitlement_days - self.taken_days
+
+
+def vacation_entitlement(employee, year: int) -> Decimal:
+    """
+    Ferienanspruch im Jahr: vacation_days_per_year (bzw. Legacy ferien_pro_jahr),
+    bei Ein-/Austritt im Jahr pro rata der Beschäftigungstage.
+    """
+    annual = employee.vacation_days_per_year or employee.ferien_pro_jahr or Decimal("0.00")
+    year_start = date(year, 1, 1)
+    year_end = date(year, 12, 31)
+    start = max(employee.employment_start or employee.eintrittsdatum or year_start, year_start)
+    end = min(employee.employment_end or employee.austrittsdatum or year_end, year_end)
+    if end < start:
+        return Decimal("0.00")
+    days_in_year = (year_end - year_start).days + 1
+    employed_days = (end - start).days + 1
+    if employed_days == days_in_year:
+        return Decimal(annual).quantize(Decimal("0.01"))
+    return (Decimal(annual) * employed_days / days_in_year).quantize(Decimal("0.01"))
+
+
+def vacation_balances(employees: Iterable, year: int) -> Dict[int, VacationBalance]:
+    """
+    Ferien-Saldi aller übergebenen Mitarbeitenden für das Jahr in einem Durchgang.
+
+    Bezogen = alle im Jahr erfassten FERIEN (ganztägig in Arbeitstagen, Teilzeit über
+    die Sollstunden pro Tag in Tage umgerechnet), inkl. bereits geplanter Ferien.
+    """
+    employees = list(employees)
+    absence_years = get_absence_years(employees, year)
+    balances = {}
+    for employee in employees:
+        taken = absence_years[employee.pk].days_of_type(VACATION_TYPE, daily_hours(employee))
+        balances[employee.pk] = VacationBalance(
+            employee_id=employee.pk,
+            year=year,
+            entitlement_days=vacation_entitlement(employee, year),
+            taken_days=taken.quantize(Decimal("0.01")),
+        )
+    return balances
@@ -29,15 +29,15 @@ def calculate_employee_monthly_stats_bulk(*, employees, year: int, month: int) -
     Bulk-Variante für Monatsstatistiken.
 
     Ziel: identische Business-Logik wie `calculate_employee_monthly_stats`, aber mit
-    deutlich weniger DB-Queries (TimeEntry/Absence aggregiert pro Monat).
+    deutlich weniger DB-Queries (TimeEntry aggregiert pro Monat, Abwesenheiten pro Jahr gecached).
     """
-    from collections import defaultdict
-    from datetime import date, timedelta
+    from datetime import date
     from decimal import Decimal
 
     from django.db.models import Sum
 
-    from .models import Absence, TimeEntry
+    from .absence_engine import get_absence_years, monthly_absence_hours
+    from .models import TimeEntry
     from .services import WorkingTimeCalculator
 
     employees_list = list(employees)
@@ -65,57 +65,18 @@ def calculate_employee_monthly_stats_bulk(*, employees, year: int, month: int) -
         for row in ist_rows
     }
 
-    # Abwesenheiten: 1 Query für den Monat (ohne FEIERTAG), Rechnung in Python wie bisher
-    absences = (
-        Absence.objects.filter(
-            employee_id__in=employee_ids,
-            date_from__lt=end_date,
-            date_to__gte=start_date,
-        )
-        .exclude(absence_type="FEIERTAG")
-        .only("employee_id", "date_from", "date_to", "full_day", "hours")
-    )
-
-    absence_by_employee_id: Dict[int, Decimal] = defaultdict(lambda: Decimal("0.00"))
-
-    for absence in absences:
-        employee = employee_by_id.get(absence.employee_id)
-        if employee is None:
-            continue
-
-        weekly_working_days = employee.weekly_working_days or Decimal("5.0")
-        daily_hours = (
-            employee.weekly_soll_hours / weekly_working_days
-            if employee.weekly_soll_hours and weekly_working_days > 0
-            else Decimal("0.00")
-        )
-
-        # Overlap mit dem Monat (end_date ist exklusive Grenze)
-        overlap_start = max(absence.date_from, start_date)
-        overlap_end = min(absence.date_to, end_date - timedelta(days=1))
-
-        if absence.full_day:
-            # Count workdays in overlap period (excluding weekends and holidays)
-            employee_canton = employee.work_canton or ""
-            holidays_set = WorkingTimeCalculator._holidays_set(year, month, employee_canton)
-
-            days_count = 0
-            current_day = overlap_start
-            while current_day <= overlap_end:
-                if current_day.weekday() < 5 and current_day not in holidays_set:
-                    days_count += 1
-                current_day += timedelta(days=1)
-
-            absence_by_employee_id[employee.id] += Decimal(str(days_count)) * daily_hours
-        else:
-            if absence.hours:
-                absence_by_employee_id[employee.id] += absence.hours
+    # Abwesenheiten: pro (Mitarbeiter, Jahr) einmal expandiert und gecached (adeazeit.absence_engine)
+    absence_years = get_absence_years(employees_list, year)
+    absence_by_employee_id: Dict[int, Decimal] = {
+        employee.id: monthly_absence_hours(employee, year, month, absence_years[employee.id])
+        for employee in employees_list
+    }
 
     # Final: identische Rundung/Derivate wie WorkingTimeCalculator
     result: Dict[int, Dict[str, Any]] = {}
     for employee in employees_list:
         monthly_soll = WorkingTimeCalculator.monthly_soll_hours(employee, year, month)
-        monthly_absence = absence_by_employee_id.get(employee.id, Decimal("0.00")).quantize(Decimal("0.01"))
+        monthly_absence = absence_by_employee_id[employee.id]
         monthly_ist = ist_by_employee_id.get(employee.id, Decimal("0.00")).quantize(Decimal("0.01"))
 
         monthly_effective_soll = max(monthly_soll - monthly_absence, Decimal("0.00")).quantize(Decimal("0.01"))
@@ -2,9 +2,20 @@ from django import forms
 from django.db import models
 from datetime import date
 from .models import EmployeeInternal, ServiceType, ZeitProject, TimeEntry, Absence, Task
+from adeacore.autocomplete import AutocompleteWidget
 from adeacore.models import Client
 
 
+def active_employees():
+    """Aktive Mitarbeitende (employment_end ist None oder >= heute)."""
+    today = date.today()
+    return EmployeeInternal.objects.filter(
+        aktiv=True
+    ).filter(
+        models.Q(employment_end__isnull=True) | models.Q(employment_end__gte=today)
+    )
+
+
 class EmployeeInternalForm(forms.ModelForm):
     class Meta:
         model = EmployeeInternal
@@ -136,8 +147,9 @@ class TimeEntryForm(forms.ModelForm):
             "rate",
         ]
         widgets = {
-            "mitarbeiter": forms.Select(attrs={"class": "adea-select"}),
-            "client": forms.Select(attrs={"class": "adea-select"}),
+            # Auswahl per Autocomplete statt <select> mit allen Einträgen
+            "mitarbeiter": AutocompleteWidget("employee"),
+            "client": AutocompleteWidget("client"),
             "datum": forms.DateInput(attrs={"class": "adea-input", "type": "date"}, format="%Y-%m-%d"),
             "start": forms.TimeInput(attrs={"class": "adea-input", "type": "time"}),
             "ende": forms.TimeInput(attrs={"class": "adea-input", "type": "time"}),
@@ -152,12 +164,7 @@ class TimeEntryForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Filter: Nur aktive Mitarbeitende (employment_end ist None oder >= heute)
-        today = date.today()
-        self.fields["mitarbeiter"].queryset = EmployeeInternal.objects.filter(
-            aktiv=True
-        ).filter(
-            models.Q(employment_end__isnull=True) | models.Q(employment_end__gte=today)
-        )
+        self.fields["mitarbeiter"].queryset = active_employees()
         # Filter: Alle Clients (FIRMA und PRIVAT)
         self.fields["client"].queryset = Client.objects.all().order_by("name")
         # Mandant ist optional für interne Arbeiten
@@ -201,12 +208,7 @@ class AbsenceForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Filter: Nur aktive Mitarbeitende
-        today = date.today()
-        self.fields["employee"].queryset = EmployeeInternal.objects.filter(
-            aktiv=True
-        ).filter(
-            models.Q(employment_end__isnull=True) | models.Q(employment_end__gte=today)
-        )
+        self.fields["employee"].queryset = active_employees()
         
         # JavaScript für Stunden-Feld
         self.fields["full_day"].widget.attrs["onchange"] = "toggleHoursField(this)"
@@ -236,19 +238,14 @@ class TaskForm(forms.ModelForm):
             "fälligkeitsdatum": forms.DateInput(attrs={"class": "adea-input", "type": "date"}, format="%Y-%m-%d"),
             "tagesplan": forms.CheckboxInput(attrs={"class": "adea-checkbox"}),
             "notizen": forms.Textarea(attrs={"class": "adea-textarea", "rows": 3}),
-            "client": forms.Select(attrs={"class": "adea-select"}),
-            "mitarbeiter": forms.Select(attrs={"class": "adea-select"}),
+            "client": AutocompleteWidget("client"),
+            "mitarbeiter": AutocompleteWidget("employee"),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Filter: Nur aktive Mitarbeitende
-        today = date.today()
-        self.fields["mitarbeiter"].queryset = EmployeeInternal.objects.filter(
-            aktiv=True
-        ).filter(
-            models.Q(employment_end__isnull=True) | models.Q(employment_end__gte=today)
-        )
+        self.fields["mitarbeiter"].queryset = active_employees()
         # Filter: Alle Clients
         self.fields["client"].queryset = Client.objects.all().order_by("name")
         # Client ist optional
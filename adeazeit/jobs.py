@@ -0,0 +1,31 @@
+"""
+Hintergrund-Jobs von AdeaZeit (siehe `adeacore.jobs`).
+"""
+
+from datetime import date
+
+from adeacore.jobs import register
+
+
+@register("timeentry_rates", label="Stundensätze neu berechnen")
+def recalculate_rates_job(ctx, date_from=None, date_to=None, unbilled_only=False, service_types=None, force=False):
+    """Wie `manage.py update_timeentry_rates`, Filter als JSON-Parameter (Datum als YYYY-MM-DD)."""
+    from .models import TimeEntry
+    from .rate_update import recalculate_timeentry_rates
+
+    entries = TimeEntry.objects.all()
+    if date_from:
+        entries = entries.filter(datum__gte=date.fromisoformat(date_from))
+    if date_to:
+        entries = entries.filter(datum__lte=date.fromisoformat(date_to))
+    if unbilled_only:
+        entries = entries.filter(verrechnet=False)
+    if service_types:
+        entries = entries.filter(service_type__code__in=service_types)
+
+    result = recalculate_timeentry_rates(
+        entries,
+        force=force,
+        progress=lambda done, total, updated: ctx.progress(done, total, f"{updated} Einträge aktualisiert"),
+    )
+    return {"pairs_total": result.pairs_total, "pairs_changed": result.pairs_changed, "updated": result.updated}
@@ -3,15 +3,28 @@ Management-Command zum Aktualisieren der Stundensätze in bestehenden Zeiteintr
 
 Verwendung:
     python manage.py update_timeentry_rates
-    
+    python manage.py update_timeentry_rates --service-type BER --from 2025-01-01 --unbilled-only
+    python manage.py update_timeentry_rates --dry-run -v 2
+    python manage.py update_timeentry_rates --unbilled-only --enqueue   # im Worker (adeacore.jobs)
+
 Dieses Command aktualisiert alle Zeiteinträge, deren Stundensatz nicht dem aktuellen
 Standard-Stundensatz des Service-Typs entspricht. Wichtig für korrekte Fakturierung.
+Die Neuberechnung ist mengenbasiert (pro Service-Typ/Mitarbeiter-Paar, Updates in
+Chunks mit je eigener Transaktion), siehe `adeazeit.rate_update`.
 """
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from decimal import Decimal
-from adeazeit.models import TimeEntry
-from adeazeit.timeentry_calc import calculate_timeentry_rate, calculate_timeentry_amount
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adeazeit.models import ServiceType, TimeEntry
+from adeazeit.rate_update import DEFAULT_CHUNK_SIZE, recalculate_timeentry_rates
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Ungültiges Datum '{value}' (erwartet YYYY-MM-DD).")
 
 
 class Command(BaseCommand):
@@ -28,80 +41,99 @@ class Command(BaseCommand):
             action='store_true',
             help='Aktualisiert ALLE Einträge, auch wenn rate bereits gesetzt ist',
         )
+        parser.add_argument('--from', dest='date_from', help='Nur Einträge ab diesem Datum (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Nur Einträge bis zu diesem Datum (YYYY-MM-DD)')
+        parser.add_argument(
+            '--unbilled-only',
+            action='store_true',
+            help='Nur noch nicht verrechnete Einträge anpassen',
+        )
+        parser.add_argument(
+            '--service-type',
+            action='append',
+            dest='service_types',
+            help='Nur Einträge dieses Service-Typ-Codes (mehrfach möglich)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Einträge pro Transaktion',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Als Hintergrund-Job einreihen (manage.py run_worker) statt direkt ausführen',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        force = options['force']
-        
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size muss mindestens 1 sein.')
+
+        entries = TimeEntry.objects.all()
+        if options['date_from']:
+            entries = entries.filter(datum__gte=_parse_date(options['date_from']))
+        if options['date_to']:
+            entries = entries.filter(datum__lte=_parse_date(options['date_to']))
+        if options['unbilled_only']:
+            entries = entries.filter(verrechnet=False)
+        if options['service_types']:
+            codes = set(options['service_types'])
+            unknown = codes - set(ServiceType.objects.filter(code__in=codes).values_list('code', flat=True))
+            if unknown:
+                raise CommandError(f"Unbekannte Service-Typen: {', '.join(sorted(unknown))}")
+            entries = entries.filter(service_type__code__in=codes)
+
+        if options['enqueue']:
+            if dry_run:
+                raise CommandError('--enqueue und --dry-run schliessen sich aus.')
+            self._enqueue(options)
+            return
+
         self.stdout.write(self.style.SUCCESS('Aktualisiere Stundensätze für Zeiteinträge...'))
-        
-        # Finde alle Zeiteinträge mit ServiceType und Mitarbeiter
-        entries = TimeEntry.objects.select_related('service_type', 'mitarbeiter').all()
-        
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        
-        with transaction.atomic():
-            for entry in entries:
-                if not entry.service_type or not entry.mitarbeiter:
-                    skipped_count += 1
-                    continue
-                
-                current_rate = entry.rate or Decimal('0.00')
-                correct_rate = calculate_timeentry_rate(service_type=entry.service_type, employee=entry.mitarbeiter)
-                
-                # Prüfe ob Update nötig ist
-                needs_update = False
-                if force:
-                    # Force: Aktualisiere alle
-                    needs_update = True
-                elif current_rate != correct_rate:
-                    # Rate weicht von der korrekten Rate ab (inkl. Koeffizient)
-                    needs_update = True
-                
-                if needs_update:
-                    old_rate = entry.rate
-                    old_betrag = entry.betrag
-                    
-                    # Aktualisiere Rate und Betrag (mit Koeffizient)
-                    entry.rate = correct_rate
-                    entry.betrag = calculate_timeentry_amount(rate=correct_rate, dauer=entry.dauer)
-                    
-                    if not dry_run:
-                        try:
-                            entry.save(update_fields=['rate', 'betrag'])
-                            updated_count += 1
-                            if updated_count <= 10:  # Zeige erste 10 Updates
-                                koeffizient_info = f" (Koeffizient: {entry.mitarbeiter.stundensatz})" if entry.mitarbeiter.stundensatz and entry.mitarbeiter.stundensatz > 0 else ""
-                                self.stdout.write(
-                                    f'  ✓ Aktualisiert: {entry.datum} - {entry.mitarbeiter.name} - '
-                                    f'{entry.service_type.code} - Rate: {old_rate} → {correct_rate} CHF{koeffizient_info}, '
-                                    f'Betrag: {old_betrag} → {entry.betrag} CHF'
-                                )
-                        except Exception as e:
-                            error_count += 1
-                            self.stdout.write(
-                                self.style.ERROR(
-                                    f'  ✗ Fehler bei Eintrag {entry.pk}: {e}'
-                                )
-                            )
-                    else:
-                        updated_count += 1
-                        koeffizient_info = f" (Koeffizient: {entry.mitarbeiter.stundensatz})" if entry.mitarbeiter.stundensatz and entry.mitarbeiter.stundensatz > 0 else ""
-                        self.stdout.write(
-                            f'  [DRY-RUN] Würde aktualisieren: {entry.datum} - {entry.mitarbeiter.name} - '
-                            f'{entry.service_type.code} - Rate: {current_rate} → {correct_rate} CHF{koeffizient_info}'
-                        )
-                else:
-                    skipped_count += 1
-        
+
+        reported = {'step': 0}
+
+        def progress(done, total, updated):
+            # Etwa alle 10% der Paare eine Zeile
+            step = done * 10 // max(total, 1)
+            if step > reported['step'] or done == total:
+                reported['step'] = step
+                self.stdout.write(f'  {done}/{total} Paare verarbeitet, {updated} Einträge')
+
+        result = recalculate_timeentry_rates(
+            entries,
+            force=options['force'],
+            dry_run=dry_run,
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+
+        prefix = '  [DRY-RUN] Würde aktualisieren' if dry_run else '  ✓ Aktualisiert'
+        shown = result.changes if options['verbosity'] >= 2 else result.changes[:10]
+        for pair in shown:
+            employee = pair.employee
+            koeffizient_info = f" (Koeffizient: {employee.stundensatz})" if employee.stundensatz and employee.stundensatz > 0 else ""
+            self.stdout.write(
+                f'{prefix}: {employee.name} - {pair.service_type.code} - '
+                f'Rate: {pair.rate} CHF{koeffizient_info} - {pair.count} Einträge'
+            )
+
         if dry_run:
-            self.stdout.write(self.style.WARNING(f'\n[DRY-RUN] {updated_count} Einträge würden aktualisiert werden.'))
-            self.stdout.write(self.style.WARNING(f'{skipped_count} Einträge würden übersprungen werden.'))
+            self.stdout.write(self.style.WARNING(f'\n[DRY-RUN] {result.updated} Einträge würden aktualisiert werden.'))
         else:
-            self.stdout.write(self.style.SUCCESS(f'\n✓ {updated_count} Einträge aktualisiert.'))
-            self.stdout.write(self.style.SUCCESS(f'  {skipped_count} Einträge übersprungen.'))
-            if error_count > 0:
-                self.stdout.write(self.style.ERROR(f'  {error_count} Fehler aufgetreten.'))
+            self.stdout.write(self.style.SUCCESS(f'\n✓ {result.updated} Einträge aktualisiert.'))
+        self.stdout.write(f'  {result.pairs_changed} von {result.pairs_total} Service-Typ/Mitarbeiter-Paaren betroffen.')
+
+    def _enqueue(self, options):
+        from adeacore.jobs import enqueue
 
+        job = enqueue('timeentry_rates', {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'unbilled_only': options['unbilled_only'],
+            'service_types': options['service_types'],
+            'force': options['force'],
+        })
+        self.stdout.write(self.style.SUCCESS(f'✓ Als Job #{job.pk} eingereiht (manage.py run_worker).'))
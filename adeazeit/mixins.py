@@ -4,16 +4,10 @@ Permission-Mixins für AdeaZeit Views.
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseForbidden
 from django.shortcuts import render
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
 from .permissions import (
-    is_admin,
-    is_manager_or_admin,
-    can_view_all_entries,
-    can_edit_all_entries,
-    can_delete_entries,
-    can_manage_employees,
-    can_manage_service_types,
-    can_manage_absences,
+    get_request_permissions,
     get_accessible_time_entries,
     get_accessible_employees,
     get_accessible_absences,
@@ -25,6 +19,24 @@ def render_forbidden(request, error_message="Sie haben keine Berechtigung für d
     return render(request, '403_forbidden.html', {'error_message': error_message}, status=403)
 
 
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin für Views mit async Handlern (ASGI).
+
+    Lädt den User per `aget_request_user` und setzt ihn als `request.user`, damit
+    der Handler im Event-Loop keinen Lazy-User mehr auflösen muss.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        from adeacore.http import aget_request_user
+
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), self.get_login_url(), self.get_redirect_field_name())
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
 class RoleRequiredMixin(LoginRequiredMixin):
     """
     Basis-Mixin für Rollenprüfung.
@@ -37,8 +49,7 @@ class RoleRequiredMixin(LoginRequiredMixin):
             return self.handle_no_permission()
         
         if self.required_role:
-            from .permissions import has_role
-            if not has_role(request.user, self.required_role):
+            if get_request_permissions(request).role != self.required_role:
                 return render_forbidden(request, "Sie haben keine Berechtigung für diese Aktion.")
         
         return super().dispatch(request, *args, **kwargs)
@@ -51,7 +62,7 @@ class AdminRequiredMixin(RoleRequiredMixin):
         if not request.user.is_authenticated:
             return self.handle_no_permission()
         
-        if not is_admin(request.user):
+        if not get_request_permissions(request).is_admin:
             return render_forbidden(request, "Diese Aktion erfordert Admin-Rechte.")
         
         return super().dispatch(request, *args, **kwargs)
@@ -64,7 +75,7 @@ class ManagerOrAdminRequiredMixin(RoleRequiredMixin):
         if not request.user.is_authenticated:
             return self.handle_no_permission()
         
-        if not is_manager_or_admin(request.user):
+        if not get_request_permissions(request).is_manager_or_admin:
             return render_forbidden(request, "Diese Aktion erfordert Manager- oder Admin-Rechte.")
         
         return super().dispatch(request, *args, **kwargs)
@@ -79,7 +90,7 @@ class FilterByRoleMixin:
         queryset = super().get_queryset()
         
         # Wenn User alle Einträge sehen kann, keine Filterung
-        if can_view_all_entries(self.request.user):
+        if get_request_permissions(self.request).can_view_all_entries:
             return queryset
         
         # Sonst: Filter nach zugänglichen Objekten
@@ -125,7 +136,7 @@ class CanEditMixin:
         obj = self.get_object()
         
         # Prüfe, ob User alle Einträge bearbeiten kann
-        if can_edit_all_entries(request.user):
+        if get_request_permissions(request).can_edit_all_entries:
             return super().dispatch(request, *args, **kwargs)
         
         # Prüfe, ob User das eigene Objekt bearbeiten kann
@@ -147,7 +158,7 @@ class CanDeleteMixin:
             return self.handle_no_permission()
         
         # Nur Admins können löschen
-        if not can_delete_entries(request.user):
+        if not get_request_permissions(request).can_delete_entries:
             return render_forbidden(request, "Nur Administratoren können Einträge löschen.")
         
         return super().dispatch(request, *args, **kwargs)
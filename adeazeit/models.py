@@ -350,10 +350,127 @@ class ZeitProject(models.Model):
         return f"{self.client.name} – {self.name}"
 
 
+class TimeEntryBatchValidationError(ValidationError):
+    """
+    Validierungsfehler aus `TimeEntry.objects.bulk_create_validated()`.
+
+    `errors_by_index` ordnet jedem fehlerhaften Eintrag (Index in der übergebenen
+    Liste) seinen ValidationError zu.
+    """
+
+    def __init__(self, errors_by_index):
+        self.errors_by_index = errors_by_index
+        messages = []
+        for index, error in sorted(errors_by_index.items()):
+            for message in error.messages:
+                messages.append(f"Eintrag {index + 1}: {message}")
+        super().__init__(messages)
+
+
+class TimeEntryQuerySet(models.QuerySet):
+
+    def bulk_create_validated(self, entries, batch_size=None):
+        """
+        Validiert und speichert mehrere Zeiteinträge auf einmal (Importe, Wochenraster).
+
+        Prüfung siehe `validate_entries()`. Ist ein Eintrag ungültig, wird nichts
+        gespeichert. Wie `bulk_create()` werden keine Signale gesendet.
+
+        Raises:
+            TimeEntryBatchValidationError: mit den Fehlern pro Eintrag
+        """
+        entries = list(entries)
+        if not entries:
+            return []
+
+        errors = self.validate_entries(entries)
+        if errors:
+            raise TimeEntryBatchValidationError(errors)
+        created = self.bulk_create(entries, batch_size=batch_size)
+        # Ohne Signale: Tabellen-Version für die ETags und Suchindex selbst aktualisieren
+        from adeacore.http_cache import bump_table_version
+        from adeacore.search import index_objects
+
+        bump_table_version(self.model)
+        index_objects(self.model, [entry.pk for entry in created])
+        return created
+
+    def validate_entries(self, entries):
+        """
+        Bereitet Zeiteinträge wie `save()` vor und prüft sie, ohne zu speichern.
+
+        Dauer, Rate, billable und Betrag werden berechnet und jeder Eintrag mit
+        full_clean() geprüft. Service-Typen, Mitarbeitende, Mandanten und Projekte
+        werden pro Modell mit einer Query geladen; Zeitüberschneidungen werden für den
+        ganzen Batch mit einer Bereichs-Query gegen die Datenbank und im Speicher
+        untereinander geprüft.
+
+        Returns:
+            {Index: ValidationError} für ungültige Einträge (leer = alles gültig)
+        """
+        from .timeentry_calc import rate_input_cache
+
+        errors = {}
+        with rate_input_cache() as rate_inputs:
+            for name in TimeEntry.RELATED_FIELDS:
+                field = TimeEntry._meta.get_field(name)
+                rate_inputs.prefetch(field.related_model, {getattr(e, field.attname) for e in entries})
+
+            for index, entry in enumerate(entries):
+                entry._attach_related(rate_inputs)
+                entry._overlap_checked = True
+                try:
+                    entry._calculate_amounts()
+                    entry.full_clean(exclude=entry._loaded_related_fields())
+                except ValidationError as e:
+                    errors[index] = e
+                finally:
+                    del entry._overlap_checked
+
+        for index, other in self._find_overlaps(entries, skip=errors.keys()):
+            errors[index] = entries[index]._overlap_error(other)
+        return errors
+
+    def _find_overlaps(self, entries, skip=()):
+        """(Index, überschneidender Eintrag) für Einträge mit Start/Ende – eine Query für den Batch."""
+        timed = [
+            (index, entry) for index, entry in enumerate(entries)
+            if index not in skip and entry.start and entry.ende
+        ]
+        if not timed:
+            return []
+
+        existing = {}
+        rows = TimeEntry.objects.filter(
+            mitarbeiter_id__in={entry.mitarbeiter_id for _, entry in timed},
+            datum__range=(min(e.datum for _, e in timed), max(e.datum for _, e in timed)),
+            start__isnull=False,
+            ende__isnull=False,
+        ).exclude(
+            pk__in=[entry.pk for _, entry in timed if entry.pk]
+        ).order_by().only("mitarbeiter_id", "datum", "start", "ende")
+        for row in rows:
+            existing.setdefault((row.mitarbeiter_id, row.datum), []).append(row)
+
+        overlaps = []
+        for index, entry in timed:
+            day = existing.setdefault((entry.mitarbeiter_id, entry.datum), [])
+            other = next((o for o in day if o.start < entry.ende and o.ende > entry.start), None)
+            if other is not None:
+                overlaps.append((index, other))
+            else:
+                # Nachfolgende Einträge im Batch prüfen auch gegen diesen
+                day.append(entry)
+        return overlaps
+
+
 class TimeEntry(models.Model):
     """
     Zeiteinträge (Kerndatenmodell).
     """
+    # Fremdschlüssel, die in save()/bulk_create_validated() aus dem RateInputCache kommen
+    RELATED_FIELDS = ("mitarbeiter", "client", "project", "service_type")
+
     mitarbeiter = models.ForeignKey(
         EmployeeInternal,
         on_delete=models.PROTECT,
@@ -410,6 +527,8 @@ class TimeEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TimeEntryQuerySet.as_manager()
+
     class Meta:
         ordering = ["-datum", "-start"]
         verbose_name = "Zeiteintrag"
@@ -479,62 +598,97 @@ class TimeEntry(models.Model):
             })
         
         # Prüfe auf Zeitüberschneidungen für denselben Mitarbeiter
-        if self.mitarbeiter and self.datum and self.start and self.ende:
-            # Finde alle Zeiteinträge für denselben Mitarbeiter am selben Tag mit Start- und Endzeit
-            overlapping = TimeEntry.objects.filter(
-                mitarbeiter=self.mitarbeiter,
+        # (bei bulk_create_validated bereits für den ganzen Batch mit einer Query geprüft)
+        if self.mitarbeiter_id and self.datum and self.start and self.ende and not hasattr(self, '_overlap_checked'):
+            # Ein Eintrag desselben Mitarbeiters am selben Tag, dessen Start vor dem neuen Ende
+            # und dessen Ende nach dem neuen Start liegt – eine Query statt exists() + first()
+            overlapping_entry = TimeEntry.objects.filter(
+                mitarbeiter_id=self.mitarbeiter_id,
                 datum=self.datum,
                 start__isnull=False,
-                ende__isnull=False
+                ende__isnull=False,
+                start__lt=self.ende,
+                ende__gt=self.start,
             ).exclude(
                 pk=self.pk if self.pk else None
-            ).filter(
-                # Überschneidung: Start liegt vor dem Ende des neuen Zeitraums UND Ende liegt nach dem Start des neuen Zeitraums
-                start__lt=self.ende,
-                ende__gt=self.start
-            )
-            
-            if overlapping.exists():
-                overlapping_entry = overlapping.first()
-                raise ValidationError({
-                    'start': f'Zeitüberschneidung! Es existiert bereits ein Eintrag für {self.mitarbeiter.name} '
-                            f'am {self.datum.strftime("%d.%m.%Y")} von {overlapping_entry.start.strftime("%H:%M")} bis {overlapping_entry.ende.strftime("%H:%M")}.',
-                    'ende': 'Bitte wählen Sie eine andere Zeit oder bearbeiten Sie den bestehenden Eintrag.'
-                })
+            ).only("start", "ende").first()
+
+            if overlapping_entry is not None:
+                raise self._overlap_error(overlapping_entry)
+
+    def _overlap_error(self, other):
+        return ValidationError({
+            'start': f'Zeitüberschneidung! Es existiert bereits ein Eintrag für {self.mitarbeiter.name} '
+                    f'am {self.datum.strftime("%d.%m.%Y")} von {other.start.strftime("%H:%M")} bis {other.ende.strftime("%H:%M")}.',
+            'ende': 'Bitte wählen Sie eine andere Zeit oder bearbeiten Sie den bestehenden Eintrag.'
+        })
+
+    def _attach_related(self, rate_inputs):
+        """Setzt noch nicht geladene Fremdschlüssel-Objekte aus dem RateInputCache."""
+        for name in self.RELATED_FIELDS:
+            field = self._meta.get_field(name)
+            if field.is_cached(self):
+                continue
+            obj = rate_inputs.get(field.related_model, getattr(self, field.attname))
+            if obj is not None:
+                field.set_cached_value(self, obj)
+
+    def _loaded_related_fields(self):
+        """
+        Fremdschlüssel, deren Objekt bereits geladen ist.
+
+        Deren Existenzprüfung in full_clean() (eine Query pro Feld) ist überflüssig.
+        """
+        loaded = []
+        for name in self.RELATED_FIELDS:
+            field = self._meta.get_field(name)
+            if field.is_cached(self) and field.get_cached_value(self) is not None:
+                loaded.append(name)
+        return loaded
+
+    def _calculate_amounts(self):
+        """Berechnet Dauer, Rate, billable und Betrag (ohne Speichern)."""
+        from .timeentry_calc import calculate_timeentry_rate, calculate_timeentry_amount
+
+        # Berechne Dauer automatisch aus Start- und Endzeit, falls beide vorhanden sind
+        if self.start and self.ende:
+            # Verwende Helper-Methode für Dauer-Berechnung
+            diff_minutes = self._calculate_duration_minutes(self.start, self.ende)
+            # Konvertiere Minuten zu Stunden
+            self.dauer = Decimal(str(diff_minutes / 60)).quantize(Decimal('0.01'))
+
+        # WICHTIG: Für korrekte Fakturierung muss IMMER der aktuelle Stundensatz aus ServiceType verwendet werden
+        # UND der Koeffizient des Mitarbeiters angewendet werden
+        if self.service_type:
+            # Koeffizient des Mitarbeiters IMMER anwenden (z.B. 0.5 = 50% des Standard-Stundensatzes)
+            # Auch wenn rate bereits gesetzt ist, muss sie neu berechnet werden, damit Koeffizient-Änderungen wirksam werden
+            self.rate = calculate_timeentry_rate(service_type=self.service_type, employee=self.mitarbeiter)
+
+        # billable aus ServiceType übernehmen, falls nicht explizit gesetzt
+        if not hasattr(self, '_billable_set'):
+            if self.service_type:
+                self.billable = self.service_type.billable
+
+        # Betrag IMMER neu berechnen (für korrekte Fakturierung)
+        # Verwendet den aktuellen rate und dauer
+        self.betrag = calculate_timeentry_amount(rate=self.rate, dauer=self.dauer)
 
     def save(self, *args, **kwargs):
         """Automatische Berechnung von Rate und Betrag."""
         from django.db import transaction
-        from datetime import datetime, timedelta
-        from .timeentry_calc import calculate_timeentry_rate, calculate_timeentry_amount
-        
+        from .timeentry_calc import current_rate_input_cache
+
         with transaction.atomic():
-            # Berechne Dauer automatisch aus Start- und Endzeit, falls beide vorhanden sind
-            if self.start and self.ende:
-                # Verwende Helper-Methode für Dauer-Berechnung
-                diff_minutes = self._calculate_duration_minutes(self.start, self.ende)
-                # Konvertiere Minuten zu Stunden
-                self.dauer = Decimal(str(diff_minutes / 60)).quantize(Decimal('0.01'))
-            
-            # WICHTIG: Für korrekte Fakturierung muss IMMER der aktuelle Stundensatz aus ServiceType verwendet werden
-            # UND der Koeffizient des Mitarbeiters angewendet werden
-            if self.service_type:
-                # Koeffizient des Mitarbeiters IMMER anwenden (z.B. 0.5 = 50% des Standard-Stundensatzes)
-                # Auch wenn rate bereits gesetzt ist, muss sie neu berechnet werden, damit Koeffizient-Änderungen wirksam werden
-                self.rate = calculate_timeentry_rate(service_type=self.service_type, employee=self.mitarbeiter)
-            
-            # billable aus ServiceType übernehmen, falls nicht explizit gesetzt
-            if not hasattr(self, '_billable_set'):
-                if self.service_type:
-                    self.billable = self.service_type.billable
-            
-            # Betrag IMMER neu berechnen (für korrekte Fakturierung)
-            # Verwendet den aktuellen rate und dauer
-            self.betrag = calculate_timeentry_amount(rate=self.rate, dauer=self.dauer)
-            
+            # Service-Typ/Mitarbeiter aus dem Request-Cache statt je einer Lazy-Load-Query
+            rate_inputs = current_rate_input_cache()
+            if rate_inputs is not None:
+                self._attach_related(rate_inputs)
+
+            self._calculate_amounts()
+
             # Validierung
-            self.full_clean()
-            
+            self.full_clean(exclude=self._loaded_related_fields())
+
             super().save(*args, **kwargs)
 
 
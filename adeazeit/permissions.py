@@ -5,11 +5,22 @@ Rollen:
 - ADMIN: Vollzugriff auf alles
 - MANAGER: Kann alles sehen und bearbeiten, aber nicht löschen
 - MITARBEITER: Kann nur eigene Zeiteinträge sehen/bearbeiten
+
+Die Rolle wird pro Request nur einmal aufgelöst (eine Group-Query) und als
+`PermissionSnapshot` am User-Objekt bzw. als `request.adeazeit_permissions`
+(siehe `adeacore.middleware.PermissionSnapshotMiddleware`) zwischengespeichert.
+Alle Helper unten lesen aus diesem Snapshot.
 """
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 
+from adeacore.cache_stats import record_hit, record_miss
+
 
 # Rollen-Namen
 ROLE_ADMIN = "AdeaZeit Admin"
@@ -17,19 +28,51 @@ ROLE_MANAGER = "AdeaZeit Manager"
 ROLE_MITARBEITER = "AdeaZeit Mitarbeiter"
 
 
-def get_user_role(user):
-    """
-    Gibt die Rolle des Users zurück.
-    
-    Returns:
-        str: Rolle (ROLE_ADMIN, ROLE_MANAGER, ROLE_MITARBEITER) oder None
-    """
-    if not user.is_authenticated:
-        return None
-    
-    # Prüfe Groups
-    group_names = user.groups.values_list('name', flat=True)
-    
+# Attribut am User-Objekt, unter dem der Snapshot gecached wird
+_SNAPSHOT_ATTR = "_adeazeit_permission_snapshot"
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """Unveränderliche Momentaufnahme von Rolle und Rechten eines Users."""
+
+    role: Optional[str] = None
+    is_admin: bool = False
+    is_manager_or_admin: bool = False
+
+    @property
+    def can_view_all_entries(self) -> bool:
+        return self.is_manager_or_admin
+
+    @property
+    def can_edit_all_entries(self) -> bool:
+        return self.is_manager_or_admin
+
+    @property
+    def can_delete_entries(self) -> bool:
+        return self.is_admin
+
+    @property
+    def can_manage_employees(self) -> bool:
+        return self.is_manager_or_admin
+
+    @property
+    def can_manage_service_types(self) -> bool:
+        return self.is_manager_or_admin
+
+    @property
+    def can_manage_absences(self) -> bool:
+        return self.is_manager_or_admin
+
+    @property
+    def can_view_reports(self) -> bool:
+        return self.is_manager_or_admin
+
+
+ANONYMOUS_SNAPSHOT = PermissionSnapshot()
+
+
+def _resolve_role(user, group_names):
     if ROLE_ADMIN in group_names:
         return ROLE_ADMIN
     elif ROLE_MANAGER in group_names:
@@ -44,6 +87,55 @@ def get_user_role(user):
     return None
 
 
+def get_permission_snapshot(user) -> PermissionSnapshot:
+    """
+    Liefert den Berechtigungs-Snapshot des Users (max. eine Query pro User-Objekt).
+
+    Der Snapshot wird am User-Objekt gecached; da `request.user` pro Request
+    neu geladen wird, gilt der Cache faktisch pro Request.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_SNAPSHOT
+
+    snapshot = getattr(user, _SNAPSHOT_ATTR, None)
+    if snapshot is not None:
+        return snapshot
+
+    group_names = set(user.groups.values_list('name', flat=True))
+    role = _resolve_role(user, group_names)
+    snapshot = PermissionSnapshot(
+        role=role,
+        is_admin=role == ROLE_ADMIN or user.is_superuser,
+        is_manager_or_admin=role in (ROLE_ADMIN, ROLE_MANAGER) or user.is_superuser,
+    )
+    setattr(user, _SNAPSHOT_ATTR, snapshot)
+    return snapshot
+
+
+def get_request_permissions(request) -> PermissionSnapshot:
+    """Snapshot aus der Middleware; Fallback auf den User, falls die Middleware fehlt."""
+    snapshot = getattr(request, "adeazeit_permissions", None)
+    if snapshot is not None:
+        return snapshot
+    return get_permission_snapshot(getattr(request, "user", None))
+
+
+def clear_permission_snapshot(user):
+    """Verwirft den gecachten Snapshot (z.B. nach Änderung der Gruppen)."""
+    if user is not None and hasattr(user, _SNAPSHOT_ATTR):
+        delattr(user, _SNAPSHOT_ATTR)
+
+
+def get_user_role(user):
+    """
+    Gibt die Rolle des Users zurück.
+    
+    Returns:
+        str: Rolle (ROLE_ADMIN, ROLE_MANAGER, ROLE_MITARBEITER) oder None
+    """
+    return get_permission_snapshot(user).role
+
+
 def has_role(user, role):
     """Prüft, ob der User eine bestimmte Rolle hat."""
     return get_user_role(user) == role
@@ -51,48 +143,168 @@ def has_role(user, role):
 
 def is_admin(user):
     """Prüft, ob der User Admin ist."""
-    return has_role(user, ROLE_ADMIN) or (user.is_authenticated and user.is_superuser)
+    return get_permission_snapshot(user).is_admin
 
 
 def is_manager_or_admin(user):
     """Prüft, ob der User Manager oder Admin ist."""
-    role = get_user_role(user)
-    return role in [ROLE_ADMIN, ROLE_MANAGER] or (user.is_authenticated and user.is_superuser)
+    return get_permission_snapshot(user).is_manager_or_admin
 
 
 def can_view_all_entries(user):
     """Prüft, ob der User alle Zeiteinträge sehen kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_view_all_entries
 
 
 def can_edit_all_entries(user):
     """Prüft, ob der User alle Zeiteinträge bearbeiten kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_edit_all_entries
 
 
 def can_delete_entries(user):
     """Prüft, ob der User Zeiteinträge löschen kann."""
-    return is_admin(user)
+    return get_permission_snapshot(user).can_delete_entries
 
 
 def can_manage_employees(user):
     """Prüft, ob der User Mitarbeitende verwalten kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_manage_employees
 
 
 def can_manage_service_types(user):
     """Prüft, ob der User Service-Typen verwalten kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_manage_service_types
 
 
 def can_manage_absences(user):
     """Prüft, ob der User Abwesenheiten verwalten kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_manage_absences
 
 
 def can_view_reports(user):
     """Prüft, ob der User Reports sehen kann."""
-    return is_manager_or_admin(user)
+    return get_permission_snapshot(user).can_view_reports
+
+
+# Session-/Cache-Schlüssel für die User->Mitarbeiter-Zuordnung
+EMPLOYEE_SCOPE_SESSION_KEY = "adeazeit_employee_scope"
+EMPLOYEE_SCOPE_VERSION_KEY = "adeazeit:employee_scope_version"
+_EMPLOYEE_IDS_ATTR = "_adeazeit_employee_ids"
+
+
+def get_employee_scope_version() -> int:
+    """Aktuelle Version der Zuordnung (steigt bei Änderungen an UserProfile/EmployeeInternal)."""
+    from django.core.cache import cache
+
+    return cache.get(EMPLOYEE_SCOPE_VERSION_KEY, 0)
+
+
+def bump_employee_scope_version():
+    """Invalidiert alle in Sessions gecachten Zuordnungen."""
+    from django.core.cache import cache
+
+    cache.add(EMPLOYEE_SCOPE_VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(EMPLOYEE_SCOPE_VERSION_KEY)
+    except ValueError:
+        cache.set(EMPLOYEE_SCOPE_VERSION_KEY, 1, timeout=None)
+
+
+def _lookup_employee_id(user):
+    """
+    Sucht den EmployeeInternal des Users: zuerst über UserProfile,
+    sonst Fallback über Username/Name (für Migration).
+    """
+    from .models import EmployeeInternal, UserProfile
+
+    employee_id = (
+        UserProfile.objects.filter(user=user, employee__isnull=False)
+        .values_list("employee_id", flat=True)
+        .first()
+    )
+    if employee_id:
+        return employee_id
+
+    # Fallback: Versuche über Username zu finden (für Migration)
+    query = Q(code__iexact=user.username) | Q(name__icontains=user.username)
+    full_name = user.get_full_name()
+    if full_name:
+        # Leerer Name würde mit icontains auf jeden Mitarbeitenden passen
+        query |= Q(name__icontains=full_name)
+    return EmployeeInternal.objects.filter(query).values_list("pk", flat=True).first()
+
+
+# Session des laufenden Requests (gesetzt von PermissionSnapshotMiddleware); gelesen wird
+# sie erst, wenn die Zuordnung tatsächlich gebraucht wird
+_scope_session: ContextVar = ContextVar("adeazeit_employee_scope_session", default=None)
+
+
+def set_employee_scope_session(session):
+    """Macht die Session des Requests für `get_accessible_employee_ids` verfügbar (None = keine)."""
+    _scope_session.set(session)
+
+
+def _owns_session(user, session) -> bool:
+    from django.contrib.auth import SESSION_KEY
+
+    return str(session.get(SESSION_KEY)) == str(user.pk)
+
+
+def _employee_ids_from_session(user, session, version):
+    cached = session.get(EMPLOYEE_SCOPE_SESSION_KEY)
+    if not cached or cached.get("user_id") != user.pk or cached.get("version") != version:
+        return None
+    return frozenset(cached.get("ids", []))
+
+
+def _store_employee_ids_in_session(user, session, version, employee_ids):
+    value = {"user_id": user.pk, "version": version, "ids": sorted(employee_ids)}
+    if session.get(EMPLOYEE_SCOPE_SESSION_KEY) != value:
+        session[EMPLOYEE_SCOPE_SESSION_KEY] = value
+
+
+def clear_employee_scope(user):
+    """Verwirft die am User-Objekt gecachte Zuordnung."""
+    if user is not None and hasattr(user, _EMPLOYEE_IDS_ATTR):
+        delattr(user, _EMPLOYEE_IDS_ATTR)
+
+
+def get_accessible_employee_ids(user):
+    """
+    Liefert die pk-Menge der Mitarbeitenden, auf die ein MITARBEITER Zugriff hat.
+
+    Die Zuordnung wird am User-Objekt (pro Request) gecached und zusätzlich in der
+    Session des Requests gehalten (gültig, solange die Version im Cache gleich bleibt).
+
+    Returns:
+        frozenset der pks, oder None für ADMIN/MANAGER (= alle)
+    """
+    if can_view_all_entries(user):
+        return None
+    if not user.is_authenticated:
+        return frozenset()
+
+    employee_ids = getattr(user, _EMPLOYEE_IDS_ATTR, None)
+    if employee_ids is not None:
+        return employee_ids
+
+    session = _scope_session.get()
+    if session is not None and not _owns_session(user, session):
+        session = None
+    version = get_employee_scope_version() if session is not None else None
+    if session is not None:
+        employee_ids = _employee_ids_from_session(user, session, version)
+
+    if employee_ids is not None:
+        record_hit("permissions")
+    else:
+        record_miss("permissions")
+        employee_id = _lookup_employee_id(user)
+        employee_ids = frozenset([employee_id]) if employee_id else frozenset()
+        if session is not None:
+            _store_employee_ids_in_session(user, session, version, employee_ids)
+    setattr(user, _EMPLOYEE_IDS_ATTR, employee_ids)
+    return employee_ids
 
 
 def get_accessible_employees(user):
@@ -104,32 +316,12 @@ def get_accessible_employees(user):
     """
     from .models import EmployeeInternal
     
-    if can_view_all_entries(user):
+    employee_ids = get_accessible_employee_ids(user)
+    if employee_ids is None:
         return EmployeeInternal.objects.all()
-    
-    # MITARBEITER: Versuche, EmployeeInternal über UserProfile zu finden
-    try:
-        from .models import UserProfile
-        profile = UserProfile.objects.filter(user=user).first()
-        if profile and profile.employee:
-            return EmployeeInternal.objects.filter(pk=profile.employee.pk)
-    except:
-        pass
-    
-    # Fallback: Versuche über Username zu finden (für Migration)
-    try:
-        employee = EmployeeInternal.objects.filter(
-            Q(code__iexact=user.username) | 
-            Q(name__icontains=user.get_full_name()) |
-            Q(name__icontains=user.username)
-        ).first()
-        
-        if employee:
-            return EmployeeInternal.objects.filter(pk=employee.pk)
-    except:
-        pass
-    
-    return EmployeeInternal.objects.none()
+    if not employee_ids:
+        return EmployeeInternal.objects.none()
+    return EmployeeInternal.objects.filter(pk__in=employee_ids)
 
 
 def get_accessible_time_entries(user):
@@ -145,8 +337,7 @@ def get_accessible_time_entries(user):
         return TimeEntry.objects.all()
     
     # MITARBEITER: Nur eigene Einträge
-    accessible_employees = get_accessible_employees(user)
-    return TimeEntry.objects.filter(mitarbeiter__in=accessible_employees)
+    return TimeEntry.objects.filter(mitarbeiter_id__in=get_accessible_employee_ids(user))
 
 
 def get_accessible_absences(user):
@@ -162,6 +353,5 @@ def get_accessible_absences(user):
         return Absence.objects.all()
     
     # MITARBEITER: Nur eigene Abwesenheiten
-    accessible_employees = get_accessible_employees(user)
-    return Absence.objects.filter(employee__in=accessible_employees)
+    return Absence.objects.filter(employee_id__in=get_accessible_employee_ids(user))
 
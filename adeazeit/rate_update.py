@@ -0,0 +1,149 @@
+"""
+Mengenbasierte Neuberechnung von Stundensatz und Betrag bestehender Zeiteinträge.
+
+Ziel: Eine Satzänderung auf einem häufig genutzten Service-Typ darf die Tabelle
+nicht minutenlang sperren. Statt jeden Eintrag einzeln zu laden und zu speichern,
+wird der korrekte Satz pro (Service-Typ, Mitarbeiter-Koeffizient)-Paar einmal
+berechnet (`adeazeit.timeentry_calc`, 1:1 wie bisher). Abweichende Einträge werden
+anschliessend in kurzen Chunks per UPDATE korrigiert – je Chunk eine eigene
+Transaktion, gruppiert nach Dauer, damit der Betrag exakt wie in Python
+(Decimal.quantize) gerundet wird und nicht von der Rundung der Datenbank abhängt.
+
+Wie bisher mit `save(update_fields=["rate", "betrag"])` bleibt `updated_at` unverändert.
+Anders als `save()` sendet das UPDATE aber keine Model-Signale (post_save); die
+Tabellen-Version für ETags (`adeacore.http_cache`) wird deshalb nach dem Lauf
+explizit erhöht.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from adeacore.http_cache import bump_table_version
+
+from .models import EmployeeInternal, ServiceType, TimeEntry
+from .timeentry_calc import calculate_timeentry_amount, calculate_timeentry_rate
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class RatePair:
+    """Ein (Service-Typ, Mitarbeiter)-Paar mit korrektem Satz und Anzahl abweichender Einträge."""
+
+    service_type: ServiceType
+    employee: EmployeeInternal
+    rate: Decimal
+    count: int = 0
+
+
+@dataclass
+class RateUpdateResult:
+    pairs_total: int = 0
+    pairs_changed: int = 0
+    updated: int = 0
+    changes: List[RatePair] = field(default_factory=list)
+
+
+def _rate_pairs(entries) -> List[Tuple[ServiceType, EmployeeInternal, Decimal]]:
+    """Vorkommende Paare inkl. korrektem Satz (3 Queries, unabhängig von der Anzahl Einträge)."""
+    keys = list(
+        entries.order_by()
+        .values_list("service_type_id", "mitarbeiter_id")
+        .distinct()
+    )
+    service_types = ServiceType.objects.in_bulk({s for s, _ in keys})
+    employees = EmployeeInternal.objects.only("id", "code", "name", "stundensatz").in_bulk({m for _, m in keys})
+
+    pairs = []
+    for service_type_id, employee_id in sorted(keys):
+        service_type = service_types[service_type_id]
+        employee = employees[employee_id]
+        pairs.append((service_type, employee, calculate_timeentry_rate(service_type=service_type, employee=employee)))
+    return pairs
+
+
+def _update_chunk(rows: List[Tuple[int, Decimal]], rate: Decimal) -> int:
+    """Setzt Satz und Betrag für einen Chunk (pk, dauer) – ein UPDATE pro vorkommender Dauer."""
+    by_dauer: Dict[Decimal, List[int]] = defaultdict(list)
+    for pk, dauer in rows:
+        by_dauer[dauer].append(pk)
+
+    updated = 0
+    with transaction.atomic():
+        for dauer, pks in by_dauer.items():
+            updated += TimeEntry.objects.filter(pk__in=pks).update(
+                rate=rate,
+                betrag=calculate_timeentry_amount(rate=rate, dauer=dauer),
+            )
+    return updated
+
+
+def recalculate_timeentry_rates(
+    entries=None,
+    *,
+    force: bool = False,
+    dry_run: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int, int], None]] = None,
+) -> RateUpdateResult:
+    """
+    Setzt Stundensatz und Betrag der Zeiteinträge auf den aktuell korrekten Wert.
+
+    Args:
+        entries: TimeEntry-QuerySet (Filter: Zeitraum, unverrechnet, Service-Typ, ...);
+            Standard: alle Einträge
+        force: Auch Einträge mit bereits korrektem Satz neu schreiben (Betrag neu berechnen)
+        dry_run: Nur zählen, nichts ändern
+        chunk_size: Einträge pro Transaktion
+        progress: Callback (paare_erledigt, paare_total, einträge_aktualisiert)
+
+    Returns:
+        RateUpdateResult mit den Paaren, deren Einträge (zu) aktualisieren sind
+    """
+    if entries is None:
+        entries = TimeEntry.objects.all()
+    entries = entries.order_by()
+
+    pairs = _rate_pairs(entries)
+    result = RateUpdateResult(pairs_total=len(pairs))
+
+    for index, (service_type, employee, rate) in enumerate(pairs, start=1):
+        pair_entries = entries.filter(service_type_id=service_type.pk, mitarbeiter_id=employee.pk)
+        if not force:
+            pair_entries = pair_entries.filter(Q(rate__isnull=True) | ~Q(rate=rate))
+
+        if dry_run:
+            count = pair_entries.count()
+        else:
+            # Keyset über pk: jeder Chunk ist eine kurze, eigene Transaktion
+            count = 0
+            last_pk = 0
+            while True:
+                rows = list(
+                    pair_entries.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", "dauer")[:chunk_size]
+                )
+                if not rows:
+                    break
+                count += _update_chunk(rows, rate)
+                last_pk = rows[-1][0]
+
+        if count:
+            result.pairs_changed += 1
+            result.updated += count
+            result.changes.append(RatePair(service_type=service_type, employee=employee, rate=rate, count=count))
+        if progress is not None:
+            progress(index, result.pairs_total, result.updated)
+
+    # UPDATE sendet keine Signale (ETags: adeacore.http_cache)
+    if result.updated and not dry_run:
+        bump_table_version(TimeEntry)
+    return result
@@ -6,7 +6,7 @@ from datetime import date, timedelta
 from functools import lru_cache
 from django.db.models import Sum, Q
 from calendar import monthrange
-from .models import EmployeeInternal, TimeEntry, Absence, Holiday
+from .models import EmployeeInternal, TimeEntry, Holiday
 
 
 class WorkingTimeCalculator:
@@ -97,52 +97,12 @@ class WorkingTimeCalculator:
           where daily_hours = weekly_soll_hours / weekly_working_days
         - For partial-day absences: use hours directly.
         - Feiertage are NOT captured here (we handle them via Holiday model).
+        See adeazeit.absence_engine.
         """
-        # Date range for the month
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-        
-        # Get all absences for this month (excluding FEIERTAG)
-        absences = Absence.objects.filter(
-            employee=employee,
-            date_from__lt=end_date,
-            date_to__gte=start_date
-        ).exclude(absence_type="FEIERTAG")
-        
-        total_hours = Decimal('0.00')
-        weekly_working_days = employee.weekly_working_days or Decimal('5.0')
-        daily_hours = employee.weekly_soll_hours / weekly_working_days if employee.weekly_soll_hours and weekly_working_days > 0 else Decimal('0.00')
-        
-        # Get holidays for this month (to exclude from workday count) – cached per (year, month, canton)
-        employee_canton = employee.work_canton or ""
-        holidays_set = WorkingTimeCalculator._holidays_set(year, month, employee_canton)
-        
-        for absence in absences:
-            # Calculate overlap with the month
-            overlap_start = max(absence.date_from, start_date)
-            overlap_end = min(absence.date_to, end_date - timedelta(days=1))
-            
-            if absence.full_day:
-                # Count workdays in the overlap period (excluding weekends and holidays)
-                days_count = 0
-                current_day = overlap_start
-                while current_day <= overlap_end:
-                    # Monday = 0, Friday = 4
-                    if current_day.weekday() < 5:  # Monday to Friday
-                        if current_day not in holidays_set:
-                            days_count += 1
-                    current_day += timedelta(days=1)
-                
-                total_hours += Decimal(str(days_count)) * daily_hours
-            else:
-                # Partial day: use hours directly
-                if absence.hours:
-                    total_hours += absence.hours
-        
-        return total_hours.quantize(Decimal('0.01'))
+        # Abwesenheiten werden pro (Mitarbeiter, Jahr) einmal expandiert und gecached
+        from .absence_engine import monthly_absence_hours
+
+        return monthly_absence_hours(employee, year, month)
     
     @staticmethod
     def monthly_ist_hours(employee: EmployeeInternal, year: int, month: int) -> Decimal:
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from django.db.models.signals import post_delete, post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from django.urls import reverse
 
-from .models import Holiday
+from adeacore.autocomplete import register_lookup
+from adeacore.http_cache import track_table_versions
+from adeacore.models import Client
+from adeacore.search import register_search_source
+
+from .models import (
+    Absence, EmployeeInternal, Holiday, RunningTimeEntry, ServiceType, Task, TimeEntry, UserProfile, ZeitProject,
+)
 
 
 @receiver(post_save, sender=Holiday)
@@ -21,3 +30,131 @@ def clear_worktime_holiday_caches(*args, **kwargs) -> None:
     WorkingTimeCalculator._holidays_set.cache_clear()
     WorkingTimeCalculator._count_workdays_for_canton.cache_clear()
 
+    from .absence_engine import invalidate_all_absences
+
+    invalidate_all_absences()
+
+
+@receiver(post_save, sender=Absence)
+@receiver(post_delete, sender=Absence)
+@receiver(post_save, sender=EmployeeInternal)
+def invalidate_employee_absences(sender, instance, **kwargs) -> None:
+    """Verwirft die expandierten Abwesenheiten des Mitarbeiters (adeazeit.absence_engine)."""
+    from .absence_engine import invalidate_employee_absences as invalidate
+
+    invalidate(instance.employee_id if sender is Absence else instance.pk)
+
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def clear_permission_snapshot_on_group_change(sender, instance, action, reverse, **kwargs) -> None:
+    """
+    Verwirft den am User gecachten Berechtigungs-Snapshot, wenn dessen Gruppen ändern.
+
+    Nur bei `user.groups.add(...)` o.ä. ist das User-Objekt bekannt; andere Instanzen
+    desselben Users laufen ohnehin nur bis zum Ende ihres Requests.
+    """
+    if reverse or not action.startswith("post_"):
+        return
+
+    from .permissions import clear_permission_snapshot
+
+    clear_permission_snapshot(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=EmployeeInternal)
+@receiver(post_delete, sender=EmployeeInternal)
+def invalidate_employee_scope(sender, instance, **kwargs) -> None:
+    """
+    Invalidiert die in Sessions gecachte User->Mitarbeiter-Zuordnung.
+
+    Auch bei jeder Änderung an EmployeeInternal: Name/Kürzel entscheiden über den
+    Namens-Fallback (neue, umbenannte und gelöschte Mitarbeitende).
+    """
+    from .permissions import bump_employee_scope_version, clear_employee_scope
+
+    bump_employee_scope_version()
+    if sender is UserProfile:
+        clear_employee_scope(instance.user)
+
+
+@receiver(post_save, sender=RunningTimeEntry)
+@receiver(post_delete, sender=RunningTimeEntry)
+def invalidate_running_timer_state(sender, instance, **kwargs) -> None:
+    """Timer gestartet/gestoppt: gecachten Timer-Zustand der betroffenen User verwerfen."""
+    from .timer_state import invalidate_employee_timer_state
+
+    invalidate_employee_timer_state(instance.mitarbeiter_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_running_timer_state_on_profile_change(sender, instance, **kwargs) -> None:
+    """Neue Mitarbeiter-Verknüpfung: Timer-Zustand des Users neu laden."""
+    from .timer_state import invalidate_user_timer_state
+
+    invalidate_user_timer_state(instance.user_id)
+
+
+# Tabellen-Versionen für ETags der AJAX-Lookups (adeacore.http_cache)
+track_table_versions(
+    Client,
+    ZeitProject,
+    ServiceType,
+    EmployeeInternal,
+    TimeEntry,
+    Absence,
+    Holiday,
+    UserProfile,
+    get_user_model().groups.through,
+)
+
+# Volltext-Suche (adeacore.search): Aufgaben und Zeiteinträge sind an die Mitarbeiterin
+# gebunden, MITARBEITER finden nur die eigenen
+register_search_source(
+    Task,
+    kind="task",
+    label="Aufgabe",
+    build=lambda task: {
+        "title": task.titel,
+        "body": "\n".join(filter(None, [task.beschreibung, task.notizen])),
+        "client_id": task.client_id,
+        "employee_id": task.mitarbeiter_id,
+        "date": task.fälligkeitsdatum,
+    },
+    url=lambda doc: reverse("adeazeit:task-update", args=[doc.object_id]),
+)
+register_search_source(
+    TimeEntry,
+    kind="timeentry",
+    label="Zeiteintrag",
+    build=lambda entry: {
+        "body": entry.kommentar,
+        "client_id": entry.client_id,
+        "employee_id": entry.mitarbeiter_id,
+        "date": entry.datum,
+    },
+    url=lambda doc: reverse("adeazeit:timeentry-update", args=[doc.object_id]),
+)
+
+# Mitarbeiter-Auswahl (adeacore.autocomplete): aktive Mitarbeitende, auf die der User Zugriff hat
+def _employee_lookup_queryset(request):
+    from .forms import active_employees
+    from .permissions import get_accessible_employee_ids
+
+    queryset = active_employees()
+    employee_ids = get_accessible_employee_ids(request.user)
+    if employee_ids is not None:
+        queryset = queryset.filter(pk__in=employee_ids)
+    return queryset
+
+
+register_lookup(
+    "employee",
+    queryset=_employee_lookup_queryset,
+    fields=["name", "code"],
+    label=lambda values: values["name"],
+    cache_models=[EmployeeInternal],
+)
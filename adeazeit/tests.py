@@ -1,13 +1,21 @@
+from unittest import mock
 from decimal import Decimal
 from datetime import date, timedelta, time
-from django.test import TestCase
+from django.test import TestCase, RequestFactory, override_settings
 from django.core.exceptions import ValidationError
+from django.contrib.auth.models import Group, User
 
 from adeacore.models import Client
-from .models import EmployeeInternal, ServiceType, ZeitProject, TimeEntry, Absence, Holiday
+from .models import EmployeeInternal, ServiceType, ZeitProject, TimeEntry, Absence, Holiday, UserProfile
 from .forms import EmployeeInternalForm, TimeEntryForm, AbsenceForm
 from .services import WorkingTimeCalculator
 
+# Query-Zählungen ohne DB-Cache (entspricht Produktion mit Redis)
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+from .permissions import (
+    ROLE_ADMIN, ROLE_MANAGER, get_user_role, is_admin, is_manager_or_admin,
+)
+
 
 class EmployeeInternalModelTest(TestCase):
     """Tests für das EmployeeInternal-Modell."""
@@ -716,3 +724,850 @@ class TimeDurationCalculationTest(TestCase):
         diff_minutes = TimeEntry._calculate_duration_minutes(start, ende)
         # 1 Stunde 45 Minuten = 105 Minuten
         self.assertEqual(diff_minutes, 105)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PermissionSnapshotTest(TestCase):
+    """Rolle/Rechte werden pro Request nur einmal aufgelöst."""
+
+    def setUp(self):
+        self.manager_group = Group.objects.create(name=ROLE_MANAGER)
+        self.admin_group = Group.objects.create(name=ROLE_ADMIN)
+        self.user = User.objects.create_user(username="manager", password="x")
+        self.user.groups.add(self.manager_group)
+
+    def _request(self, user):
+        from adeacore.middleware import PermissionSnapshotMiddleware
+
+        request = RequestFactory().get("/zeit/")
+        request.user = User.objects.get(pk=user.pk)
+        PermissionSnapshotMiddleware(lambda r: None).process_request(request)
+        return request
+
+    def test_context_processor_and_helpers_use_single_query(self):
+        """Test: Context-Processor + Helper + Mixin-Checks kosten zusammen eine Query."""
+        from adeacore.context_processors import adeazeit_permissions
+        from .permissions import get_request_permissions
+
+        request = self._request(self.user)
+        with self.assertNumQueries(1):
+            context = adeazeit_permissions(request)
+            self.assertTrue(is_manager_or_admin(request.user))
+            self.assertFalse(is_admin(request.user))
+            self.assertEqual(get_user_role(request.user), ROLE_MANAGER)
+            self.assertFalse(get_request_permissions(request).can_delete_entries)
+
+        self.assertTrue(context["adeazeit_is_manager"])
+        self.assertTrue(context["adeazeit_can_manage_absences"])
+        self.assertFalse(context["adeazeit_can_delete"])
+
+    def test_group_change_invalidates_snapshot(self):
+        """Test: Gruppenänderung am User-Objekt verwirft den gecachten Snapshot."""
+        self.assertFalse(is_admin(self.user))
+        self.user.groups.add(self.admin_group)
+        self.assertTrue(is_admin(self.user))
+
+    def test_superuser_without_group_is_admin(self):
+        """Test: Superuser ohne Gruppe gilt als Admin."""
+        superuser = User.objects.create_superuser(username="root", password="x")
+        request = self._request(superuser)
+        self.assertEqual(request.adeazeit_permissions.role, ROLE_ADMIN)
+        self.assertTrue(request.adeazeit_permissions.can_delete_entries)
+
+    def test_anonymous_has_no_permissions(self):
+        """Test: Anonyme Requests erhalten einen leeren Snapshot ohne Query."""
+        from django.contrib.auth.models import AnonymousUser
+
+        with self.assertNumQueries(0):
+            self.assertFalse(is_manager_or_admin(AnonymousUser()))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EmployeeScopeTest(TestCase):
+    """User->Mitarbeiter-Zuordnung wird pro Request und in der Session gecached."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        Group.objects.create(name=ROLE_MANAGER)
+        self.employee = EmployeeInternal.objects.create(
+            code="SCOPE1", name="Scope Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+        )
+        self.other = EmployeeInternal.objects.create(
+            code="SCOPE2", name="Scope Zwei", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+        )
+        self.user = User.objects.create_user(username="mitarbeiter", password="x")
+        UserProfile.objects.create(user=self.user, employee=self.employee)
+
+    def _run_middleware(self, session):
+        from adeacore.middleware import PermissionSnapshotMiddleware
+
+        request = RequestFactory().get("/zeit/")
+        request.user = User.objects.get(pk=self.user.pk)
+        request.session = session
+        middleware = PermissionSnapshotMiddleware(lambda r: None)
+        middleware.process_request(request)
+        return request, middleware
+
+    def test_scope_cached_per_request(self):
+        """Test: Mehrfache Aufrufe im selben Request lösen die Zuordnung nur einmal auf."""
+        from .permissions import get_accessible_employee_ids, get_accessible_time_entries
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(get_accessible_employee_ids(user), frozenset([self.employee.pk]))
+        with self.assertNumQueries(0):
+            get_accessible_employee_ids(user)
+            get_accessible_time_entries(user)
+
+    def test_scope_cached_in_session_and_invalidated(self):
+        """Test: Folge-Requests lesen aus der Session; UserProfile-Änderung invalidiert."""
+        from .permissions import get_accessible_employee_ids
+
+        from django.contrib.auth import SESSION_KEY
+
+        session = {SESSION_KEY: str(self.user.pk)}
+        request, middleware = self._run_middleware(session)
+        get_accessible_employee_ids(request.user)
+        middleware.process_response(request, None)
+
+        request, _ = self._run_middleware(session)
+        self.assertFalse(is_manager_or_admin(request.user))  # Rolle vorab auflösen
+        with self.assertNumQueries(0):
+            self.assertEqual(get_accessible_employee_ids(request.user), frozenset([self.employee.pk]))
+
+        profile = UserProfile.objects.get(user=self.user)
+        profile.employee = self.other
+        profile.save()
+
+        request, _ = self._run_middleware(session)
+        self.assertEqual(get_accessible_employee_ids(request.user), frozenset([self.other.pk]))
+
+    def test_employee_rename_invalidates_session_scope(self):
+        """Test: Jede Änderung an EmployeeInternal (z.B. Umbenennung) erhöht die Version."""
+        from .permissions import get_employee_scope_version
+
+        version = get_employee_scope_version()
+        self.other.name = "Scope Zwei Neu"
+        self.other.save()
+        self.assertEqual(get_employee_scope_version(), version + 1)
+
+    def test_middleware_does_not_load_user_or_scope(self):
+        """Test: Requests ohne Zugriff auf die Zuordnung laden weder User noch Version."""
+        from django.utils.functional import SimpleLazyObject
+
+        from adeacore.middleware import PermissionSnapshotMiddleware
+
+        request = RequestFactory().get("/static/app.css")
+        request.user = SimpleLazyObject(lambda: self.fail("request.user geladen"))
+        request.session = {}
+        middleware = PermissionSnapshotMiddleware(lambda r: None)
+        with self.assertNumQueries(0), \
+                mock.patch("adeazeit.permissions.get_employee_scope_version") as get_version:
+            middleware.process_request(request)
+            middleware.process_response(request, None)
+        get_version.assert_not_called()
+
+    def test_empty_full_name_does_not_match_everyone(self):
+        """Test: Namens-Fallback ohne Vor-/Nachname liefert keinen beliebigen Mitarbeitenden."""
+        from .permissions import get_accessible_employees
+
+        user = User.objects.create_user(username="unbekannt", password="x")
+        self.assertFalse(get_accessible_employees(user).exists())
+
+    def test_manager_sees_all(self):
+        """Test: Manager erhalten alle Mitarbeitenden (keine pk-Einschränkung)."""
+        from .permissions import get_accessible_employee_ids, get_accessible_employees
+
+        self.user.groups.add(Group.objects.get(name=ROLE_MANAGER))
+        self.assertIsNone(get_accessible_employee_ids(self.user))
+        self.assertEqual(get_accessible_employees(self.user).count(), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RunningTimerStateTest(TestCase):
+    """Timer-Zustand wird gecached, bei start/stop invalidiert und per SSE gepusht."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.employee = EmployeeInternal.objects.create(
+            code="TIMER1", name="Timer Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+        )
+        self.service_type = ServiceType.objects.create(
+            code="TIM", name="Timer-Leistung", standard_rate=Decimal("100.00"), billable=True,
+        )
+        self.user = User.objects.create_user(username="timer", password="x")
+        UserProfile.objects.create(user=self.user, employee=self.employee)
+
+    def _context(self):
+        from adeacore.context_processors import running_timer
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return running_timer(request)["running_timer"]
+
+    def test_context_processor_cached_and_invalidated(self):
+        """Test: Zweiter Seitenaufruf ohne Query; start_timer/stop_timer invalidieren."""
+        import json
+
+        self.assertIsNone(self._context())
+        with self.assertNumQueries(0):
+            self.assertIsNone(self._context())
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            "/zeit/timer/start/",
+            data=json.dumps({"mitarbeiter_id": self.employee.pk, "service_type_id": self.service_type.pk}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        state = self._context()
+        self.assertEqual(state["mitarbeiter_name"], "Timer Eins")
+        self.assertEqual(state["service_type_name"], "Timer-Leistung")
+
+        self.client.post("/zeit/timer/stop/")
+        self.assertIsNone(self._context())
+
+    def test_timer_events_stream(self):
+        """Test: Unter WSGI nur der aktuelle Zustand mit langem Reconnect-Intervall (kein Polling)."""
+        self.client.force_login(self.user)
+        response = self.client.get("/zeit/timer/events/")
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            list(response.streaming_content),
+            [b"retry: 600000\n\n", b'event: timer\ndata: {"running": false}\n\n'],
+        )
+
+    def test_day_view_opens_event_source_only_under_asgi(self):
+        """Test: Unter WSGI öffnet die Tagesansicht keine EventSource."""
+        from asgiref.sync import async_to_sync
+        from django.urls import reverse
+
+        url = reverse("adeazeit:timeentry-day")
+        self.client.force_login(self.user)
+        self.assertNotContains(self.client.get(url), "new EventSource(")
+
+        async def asgi_day_view():
+            await self.async_client.aforce_login(self.user)
+            return await self.async_client.get(url)
+
+        self.assertContains(async_to_sync(asgi_day_view)(), "new EventSource(")
+
+    async def test_timer_events_push_via_asgi(self):
+        """Test: Unter ASGI kommt das erste Event sofort, Änderungen folgen, solange der Stream läuft."""
+        import asyncio
+
+        from asgiref.sync import sync_to_async
+
+        from .models import RunningTimeEntry
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch("adeazeit.views.TIMER_EVENTS_CHECK_SECONDS", 0.01):
+            response = await self.async_client.get("/zeit/timer/events/")
+            stream = response.streaming_content
+            try:
+                first = [await asyncio.wait_for(anext(stream), timeout=2) for _ in range(2)]
+                self.assertEqual(first, [b"retry: 3000\n\n", b'event: timer\ndata: {"running": false}\n\n'])
+
+                await sync_to_async(RunningTimeEntry.objects.create)(
+                    mitarbeiter=self.employee, service_type=self.service_type,
+                )
+                event = await asyncio.wait_for(anext(stream), timeout=2)
+                self.assertIn(b'"running": true', event)
+                self.assertIn(b'"mitarbeiter": "Timer Eins"', event)
+            finally:
+                await stream.aclose()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncAjaxViewsTest(TestCase):
+    """AJAX-Endpunkte laufen als async Views (ASGI) mit unverändertem JSON."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        Group.objects.create(name=ROLE_MANAGER)
+        self.employee = EmployeeInternal.objects.create(
+            code="ASYNC1", name="Async Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            stundensatz=Decimal("0.50"),
+        )
+        self.service_type = ServiceType.objects.create(
+            code="ASY", name="Async-Leistung", standard_rate=Decimal("120.00"), billable=True,
+        )
+        self.client_obj = Client.objects.create(name="Async AG", client_type="FIRMA")
+        self.project = ZeitProject.objects.create(client=self.client_obj, name="Projekt A", aktiv=True)
+        TimeEntry.objects.create(
+            mitarbeiter=self.employee, client=self.client_obj, service_type=self.service_type,
+            datum=date(2025, 3, 3), dauer=Decimal("1.00"),
+        )
+        self.user = User.objects.create_user(username="async", password="x")
+        self.user.groups.add(Group.objects.get(name=ROLE_MANAGER))
+        UserProfile.objects.create(user=self.user, employee=self.employee)
+
+    def test_views_are_async(self):
+        """Test: Django erkennt die Views als Coroutines (kein sync Worker unter ASGI)."""
+        from asgiref.sync import iscoroutinefunction
+        from django.urls import resolve
+
+        from adeacore.views import session_heartbeat
+
+        self.assertTrue(iscoroutinefunction(session_heartbeat))
+        for path in ("/zeit/ajax/projekte/", "/zeit/ajax/mitarbeiter-info/", "/zeit/ajax/service-type-rate/",
+                     "/zeit/timer/start/", "/zeit/timer/stop/", "/zeit/timer/events/"):
+            self.assertTrue(iscoroutinefunction(resolve(path).func), path)
+
+    async def test_lookups_via_asgi(self):
+        """Test: Projekte, Service-Typ-Satz (mit Koeffizient) und Heartbeat über den ASGI-Handler."""
+        from adeacore.testing import assert_view_query_budgets
+
+        await self.async_client.aforce_login(self.user)
+        with assert_view_query_budgets({"LoadProjectsView": 9, "LoadServiceTypeRateView": 5}):
+            response = await self.async_client.get("/zeit/ajax/projekte/", {"client_id": self.client_obj.pk})
+            self.assertEqual(response.json(), {"projects": [{"id": self.project.pk, "name": "Projekt A"}]})
+
+            response = await self.async_client.get(
+                "/zeit/ajax/service-type-rate/",
+                {"service_type_id": self.service_type.pk, "employee_id": self.employee.pk},
+            )
+            self.assertEqual(response.json()["final_rate"], "60.00")
+
+        response = await self.async_client.get("/zeit/ajax/mitarbeiter-info/", {"employee_id": self.employee.pk})
+        self.assertEqual(response.json()["employee"]["name"], "Async Eins")
+
+        response = await self.async_client.get("/session/heartbeat/")
+        self.assertEqual(response.json(), {"status": "ok", "authenticated": True})
+
+    async def test_timer_start_stop_via_asgi(self):
+        """Test: Timer starten und stoppen erzeugt den Zeiteintrag; doppelter Start wird abgelehnt."""
+        import json
+
+        from .models import RunningTimeEntry
+
+        await self.async_client.aforce_login(self.user)
+        payload = json.dumps({"mitarbeiter_id": self.employee.pk, "service_type_id": self.service_type.pk})
+        response = await self.async_client.post("/zeit/timer/start/", payload, content_type="application/json")
+        self.assertTrue(response.json()["success"])
+        response = await self.async_client.post("/zeit/timer/start/", payload, content_type="application/json")
+        self.assertEqual(response.json()["error"], "Es läuft bereits ein Timer für diesen Mitarbeiter")
+
+        response = await self.async_client.post("/zeit/timer/stop/")
+        data = response.json()
+        self.assertTrue(data["success"])
+        entry = await TimeEntry.objects.aget(pk=data["time_entry_id"])
+        self.assertEqual(entry.rate, Decimal("60.00"))
+        self.assertFalse(await RunningTimeEntry.objects.aexists())
+
+    async def test_login_required(self):
+        """Test: Ohne Login Redirect (Views) bzw. 401 (Heartbeat)."""
+        response = await self.async_client.get("/zeit/ajax/projekte/", {"client_id": self.client_obj.pk})
+        self.assertEqual(response.status_code, 302)
+        response = await self.async_client.post("/zeit/timer/stop/")
+        self.assertEqual(response.status_code, 302)
+        response = await self.async_client.get("/session/heartbeat/")
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AjaxConditionalGetTest(TestCase):
+    """ETag/Last-Modified der AJAX-Lookups: 304 bis sich eine der Tabellen ändert."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        # Versionen nach dem Commit setzen, damit die Tests danach neu zählen
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.create(name=ROLE_MANAGER)
+            self.employee = EmployeeInternal.objects.create(
+                code="ETAG1", name="Etag Eins", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            self.service_type = ServiceType.objects.create(
+                code="ETG", name="Etag-Leistung", standard_rate=Decimal("100.00"), billable=True,
+            )
+            self.client_obj = Client.objects.create(name="Etag AG", client_type="FIRMA")
+            ZeitProject.objects.create(client=self.client_obj, name="Projekt A", aktiv=True)
+            TimeEntry.objects.create(
+                mitarbeiter=self.employee, client=self.client_obj, service_type=self.service_type,
+                datum=date(2025, 3, 3), dauer=Decimal("1.00"),
+            )
+            self.user = User.objects.create_user(username="etag", password="x")
+            self.user.groups.add(Group.objects.get(name=ROLE_MANAGER))
+        self.client.force_login(self.user)
+        self.projects_url = f"/zeit/ajax/projekte/?client_id={self.client_obj.pk}"
+
+    def test_projects_not_modified_until_project_changes(self):
+        """Test: Zweiter Aufruf mit If-None-Match liefert 304 ohne View-Queries; neues Projekt -> 200."""
+        from adeacore.testing import assert_view_query_budgets
+
+        response = self.client.get(self.projects_url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("max-age=30", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        # Nur noch Session und User (Middleware), keine Berechtigungs- oder Projekt-Queries
+        with assert_view_query_budgets({"LoadProjectsView": 2}):
+            response = self.client.get(self.projects_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):  # Version wird nach dem Commit gesetzt
+            ZeitProject.objects.create(client=self.client_obj, name="Projekt B", aktiv=True)
+        response = self.client.get(self.projects_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["name"] for p in response.json()["projects"]], ["Projekt A", "Projekt B"])
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_user_and_permissions(self):
+        """Test: Anderer User bzw. geänderte Gruppen ergeben einen neuen ETag."""
+        etag = self.client.get(self.projects_url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = User.objects.create_user(username="etag2", password="x")
+            other.groups.add(Group.objects.get(name=ROLE_MANAGER))
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.projects_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(self.projects_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            other.groups.clear()
+        response = self.client.get(self.projects_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"projects": []})
+
+    def test_employee_info_and_rate_revalidate(self):
+        """Test: Mitarbeiter-Info immer revalidiert (max-age=0), neue Abwesenheit/Zeiteintrag -> 200."""
+        url = f"/zeit/ajax/mitarbeiter-info/?employee_id={self.employee.pk}&year=2025&month=3"
+        response = self.client.get(url)
+        self.assertIn("max-age=0", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeEntry.objects.bulk_create_validated([TimeEntry(
+                mitarbeiter=self.employee, client=self.client_obj, service_type=self.service_type,
+                datum=date(2025, 3, 4), dauer=Decimal("2.00"),
+            )])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["employee"]["monthly_ist"], "3.00")
+
+        rate_url = f"/zeit/ajax/service-type-rate/?service_type_id={self.service_type.pk}"
+        etag = self.client.get(rate_url)["ETag"]
+        self.assertEqual(self.client.get(rate_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.service_type.standard_rate = Decimal("110.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service_type.save()
+        response = self.client.get(rate_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()["final_rate"], "110.00")
+
+    def test_bump_once_per_transaction(self):
+        """Test: Mehrere Änderungen einer Tabelle in einer Transaktion -> ein Versions-Update nach dem Commit."""
+        from adeacore.http_cache import bump_table_version
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                bump_table_version(ZeitProject)
+            bump_table_version(ServiceType)
+        self.assertEqual(len(callbacks), 2)
+
+    def test_errors_not_cached(self):
+        """Test: Fehlerantworten erhalten keinen ETag."""
+        response = self.client.get("/zeit/ajax/service-type-rate/?service_type_id=999999")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ViewQueryBudgetTest(TestCase):
+    """Query-Budgets für die meistgenutzten AdeaZeit-Views (unabhängig von der Datenmenge)."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        Group.objects.create(name=ROLE_MANAGER)
+        self.service_type = ServiceType.objects.create(
+            code="BUD", name="Budget", standard_rate=Decimal("100.00"), billable=True,
+        )
+        self.client_obj = Client.objects.create(name="Budget AG", client_type="FIRMA")
+        for i in range(5):
+            employee = EmployeeInternal.objects.create(
+                code=f"BUD{i}", name=f"Budget {i}", employment_percent=Decimal("100.00"),
+                weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            )
+            TimeEntry.objects.create(
+                mitarbeiter=employee, client=self.client_obj, service_type=self.service_type,
+                datum=date(2025, 3, 3), dauer=Decimal("1.00"),
+            )
+        self.user = User.objects.create_user(username="budget", password="x")
+        self.user.groups.add(Group.objects.get(name=ROLE_MANAGER))
+        self.client.force_login(self.user)
+
+    def test_day_view_and_employee_list(self):
+        """Test: Tagesansicht und Mitarbeiterliste bleiben im Query-Budget."""
+        from adeacore.testing import assert_view_query_budgets
+
+        with assert_view_query_budgets({"TimeEntryDayView": 10, "EmployeeInternalListView": 5}):
+            self.client.get("/zeit/zeit/tag/?date=2025-03-03")
+            self.client.get("/zeit/mitarbeitende/")
+
+
+class UpdateTimeEntryRatesTest(TestCase):
+    """Mengenbasierte Neuberechnung der Stundensätze (update_timeentry_rates)."""
+
+    def setUp(self):
+        self.service_type = ServiceType.objects.create(
+            code="RAT", name="Satz", standard_rate=Decimal("100.00"), billable=True,
+        )
+        self.other_type = ServiceType.objects.create(
+            code="OTH", name="Andere", standard_rate=Decimal("80.00"), billable=True,
+        )
+        self.employee = EmployeeInternal.objects.create(
+            code="RAT1", name="Satz Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            stundensatz=Decimal("1.30"),
+        )
+        self.entries = [
+            TimeEntry.objects.create(
+                mitarbeiter=self.employee, service_type=service_type, datum=datum,
+                dauer=Decimal(dauer), verrechnet=verrechnet,
+            )
+            for service_type, datum, dauer, verrechnet in [
+                (self.service_type, date(2025, 1, 10), "1.25", False),
+                (self.service_type, date(2025, 2, 10), "0.75", False),
+                (self.service_type, date(2025, 3, 10), "2.00", True),
+                (self.other_type, date(2025, 2, 11), "1.00", False),
+            ]
+        ]
+        ServiceType.objects.filter(pk=self.service_type.pk).update(standard_rate=Decimal("110.00"))
+        ServiceType.objects.filter(pk=self.other_type.pk).update(standard_rate=Decimal("90.00"))
+
+    def _rates(self):
+        return [
+            (entry.rate, entry.betrag)
+            for entry in TimeEntry.objects.filter(pk__in=[e.pk for e in self.entries]).order_by("pk")
+        ]
+
+    def test_recalculates_like_timeentry_calc(self):
+        """Test: Satz inkl. Koeffizient und Betrag identisch zur Einzelberechnung, ohne updated_at zu ändern."""
+        from io import StringIO
+        from django.core.management import call_command
+        from .timeentry_calc import calculate_timeentry_amount
+
+        updated_at = TimeEntry.objects.get(pk=self.entries[0].pk).updated_at
+        out = StringIO()
+        with mock.patch("adeazeit.rate_update.bump_table_version") as bump:
+            call_command("update_timeentry_rates", "--chunk-size", "1", stdout=out)
+
+        rates = self._rates()
+        self.assertEqual(rates[0], (Decimal("143.00"), calculate_timeentry_amount(rate=Decimal("143.00"), dauer=Decimal("1.25"))))
+        self.assertEqual(rates[1], (Decimal("143.00"), Decimal("107.25")))
+        self.assertEqual(rates[3], (Decimal("117.00"), Decimal("117.00")))
+        self.assertEqual(TimeEntry.objects.get(pk=self.entries[0].pk).updated_at, updated_at)
+        self.assertIn("4 Einträge aktualisiert", out.getvalue())
+        # UPDATE ohne Signale: ETags der Zeiteinträge trotzdem ungültig (einmal pro Lauf)
+        bump.assert_called_once_with(TimeEntry)
+
+    def test_filters_and_dry_run(self):
+        """Test: Zeitraum, unverrechnet und Service-Typ schränken ein; --dry-run ändert nichts."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        before = self._rates()
+        out = StringIO()
+        with mock.patch("adeazeit.rate_update.bump_table_version") as bump:
+            call_command("update_timeentry_rates", "--dry-run", stdout=out)
+        self.assertEqual(self._rates(), before)
+        bump.assert_not_called()
+        self.assertIn("[DRY-RUN] 4 Einträge", out.getvalue())
+
+        call_command(
+            "update_timeentry_rates", "--service-type", "RAT", "--unbilled-only",
+            "--from", "2025-02-01", stdout=StringIO(),
+        )
+        rates = self._rates()
+        self.assertEqual(rates[0], before[0])
+        self.assertEqual(rates[1][0], Decimal("143.00"))
+        self.assertEqual(rates[2], before[2])
+        self.assertEqual(rates[3], before[3])
+
+        with self.assertRaises(CommandError):
+            call_command("update_timeentry_rates", "--service-type", "XXX", stdout=StringIO())
+
+    def test_query_count_independent_of_entries(self):
+        """Test: Ohne Abweichungen pro Paar nur eine Abfrage, keine Einzel-Saves."""
+        from .rate_update import recalculate_timeentry_rates
+
+        recalculate_timeentry_rates()
+        # distinct-Paare + ServiceTypes + Mitarbeitende + 1 leere Chunk-Abfrage pro Paar
+        with self.assertNumQueries(5):
+            result = recalculate_timeentry_rates()
+        self.assertEqual(result.updated, 0)
+        self.assertEqual(result.pairs_total, 2)
+
+
+class TimeEntrySaveQueriesTest(TestCase):
+    """TimeEntry.save mit einer Überschneidungs-Query und bulk_create_validated."""
+
+    def setUp(self):
+        self.service_type = ServiceType.objects.create(
+            code="SQ", name="Save", standard_rate=Decimal("100.00"), billable=True,
+        )
+        self.employee = EmployeeInternal.objects.create(
+            code="SQ1", name="Save Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            stundensatz=Decimal("1.20"),
+        )
+        self.client_obj = Client.objects.create(name="Save AG", client_type="FIRMA")
+        TimeEntry.objects.create(
+            mitarbeiter=self.employee, client=self.client_obj, service_type=self.service_type,
+            datum=date(2025, 4, 1), start=time(8, 0), ende=time(10, 0), dauer=Decimal("2.00"),
+        )
+
+    def _entry(self, start, ende, datum=date(2025, 4, 1), dauer=Decimal("0.00")):
+        return TimeEntry(
+            mitarbeiter_id=self.employee.pk, client_id=self.client_obj.pk,
+            service_type_id=self.service_type.pk, datum=datum,
+            start=start, ende=ende, dauer=dauer,
+        )
+
+    def test_save_with_loaded_objects(self):
+        """Test: Geladene Objekte -> Überschneidungs-Query + INSERT (plus Savepoint), keine FK-Prüfungen."""
+        entry = TimeEntry(
+            mitarbeiter=self.employee, client=self.client_obj, service_type=self.service_type,
+            datum=date(2025, 4, 1), start=time(10, 0), ende=time(11, 30), dauer=Decimal("0.00"),
+        )
+        with self.assertNumQueries(4):
+            entry.save()
+        self.assertEqual(entry.dauer, Decimal("1.50"))
+        self.assertEqual(entry.rate, Decimal("120.00"))
+        self.assertEqual(entry.betrag, Decimal("180.00"))
+
+    def test_save_overlap_message_and_rate_cache(self):
+        """Test: Überschneidung meldet den bestehenden Eintrag; rate_input_cache lädt Objekte einmal."""
+        from .timeentry_calc import rate_input_cache
+
+        with self.assertRaises(ValidationError) as ctx:
+            self._entry(time(9, 0), time(9, 30)).save()
+        self.assertIn("von 08:00 bis 10:00", ctx.exception.message_dict["start"][0])
+
+        with rate_input_cache():
+            self._entry(time(11, 0), time(12, 0)).save()
+            # Zweiter Save: Service-Typ/Mitarbeiter/Mandant aus dem Cache
+            with self.assertNumQueries(4):
+                self._entry(time(13, 0), time(14, 0)).save()
+
+    def test_request_middleware_enters_rate_cache(self):
+        """Test: RateInputCacheMiddleware – gewöhnliche Saves im Request nutzen den Cache."""
+        from asgiref.sync import async_to_sync, sync_to_async
+
+        from adeacore.middleware import RateInputCacheMiddleware
+        from .timeentry_calc import current_rate_input_cache
+
+        def view(request):
+            self._entry(time(11, 0), time(12, 0)).save()
+            with self.assertNumQueries(4):
+                self._entry(time(13, 0), time(14, 0)).save()
+            return current_rate_input_cache()
+
+        request = RequestFactory().post("/zeit/")
+        self.assertIsNotNone(RateInputCacheMiddleware(view)(request))
+        self.assertIsNone(current_rate_input_cache())
+
+        async def async_view(request):
+            return await sync_to_async(current_rate_input_cache)()
+
+        self.assertIsNotNone(async_to_sync(RateInputCacheMiddleware(async_view))(request))
+        self.assertIsNone(current_rate_input_cache())
+
+    def test_bulk_create_validated(self):
+        """Test: Ganzer Batch mit einer Überschneidungs-Query, Fehler pro Eintrag, nichts gespeichert."""
+        from .models import TimeEntryBatchValidationError
+
+        with self.assertRaises(TimeEntryBatchValidationError) as ctx:
+            TimeEntry.objects.bulk_create_validated([
+                self._entry(time(10, 0), time(11, 0)),
+                self._entry(time(9, 30), time(10, 30)),   # überschneidet bestehenden Eintrag
+                self._entry(time(10, 30), time(12, 0)),   # überschneidet Eintrag 1 im Batch
+                self._entry(None, None),                  # ohne Zeiten und ohne Dauer
+            ])
+        self.assertEqual(sorted(ctx.exception.errors_by_index), [1, 2, 3])
+        self.assertEqual(TimeEntry.objects.count(), 1)
+
+        entries = [self._entry(time(10, 0), time(11, 0), datum=date(2025, 4, d)) for d in range(1, 6)]
+        # Mitarbeiter, Mandant, Service-Typ (je eine Query), Überschneidungen, INSERT
+        with self.assertNumQueries(5):
+            created = TimeEntry.objects.bulk_create_validated(entries)
+        self.assertEqual(len(created), 5)
+        self.assertEqual(TimeEntry.objects.filter(rate=Decimal("120.00"), betrag=Decimal("120.00")).count(), 5)
+        self.assertFalse(hasattr(entries[0], "_overlap_checked"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WeekGridSaveTest(TestCase):
+    """Wochenraster: eine Woche Zeiteinträge in einem Request."""
+
+    url = "/zeit/zeit/woche/speichern/"
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.service_type = ServiceType.objects.create(
+            code="WG", name="Woche", standard_rate=Decimal("100.00"), billable=True,
+        )
+        self.client_obj = Client.objects.create(name="Woche AG", client_type="FIRMA")
+        self.employee = EmployeeInternal.objects.create(
+            code="WG1", name="Woche Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+            employment_start=date(2025, 3, 4),
+        )
+        self.other = EmployeeInternal.objects.create(
+            code="WG2", name="Woche Zwei", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+        )
+        self.user = User.objects.create_user(username="woche", password="x")
+        UserProfile.objects.create(user=self.user, employee=self.employee)
+        self.client.force_login(self.user)
+
+    def _post(self, entries, mitarbeiter_id=None):
+        import json
+
+        return self.client.post(
+            self.url,
+            data=json.dumps({"mitarbeiter_id": mitarbeiter_id or self.employee.pk, "entries": entries}),
+            content_type="application/json",
+        )
+
+    def _row(self, datum, start="08:00", ende="10:00", **kwargs):
+        row = {"datum": datum, "start": start, "ende": ende,
+               "service_type_id": self.service_type.pk, "client_id": self.client_obj.pk}
+        row.update(kwargs)
+        return row
+
+    def test_saves_week_in_one_request(self):
+        """Test: Alle Einträge gespeichert, Beträge berechnet, Query-Budget unabhängig von der Anzahl."""
+        from adeacore.testing import assert_view_query_budgets
+
+        rows = [self._row(f"2025-03-0{d}", start, ende) for d in range(4, 8) for start, ende in
+                [("08:00", "10:00"), ("10:00", "12:00"), ("13:00", "17:00")]]
+        rows.append(self._row("2025-03-08", None, None, dauer="1.50"))
+
+        with assert_view_query_budgets({"save_week_entries": 15}):
+            response = self._post(rows)
+
+        data = response.json()
+        self.assertTrue(data["success"], data)
+        self.assertEqual(data["created"], 13)
+        self.assertEqual(data["total_dauer"], "33.50")
+        self.assertEqual(TimeEntry.objects.filter(mitarbeiter=self.employee).count(), 13)
+        self.assertEqual(TimeEntry.objects.get(datum=date(2025, 3, 8)).betrag, Decimal("150.00"))
+
+    def test_rejects_invalid_week_atomically(self):
+        """Test: Überschneidung, Beschäftigungsbeginn, Woche, Service-Typ – Fehler pro Eintrag, nichts gespeichert."""
+        response = self._post([
+            self._row("2025-03-04"),
+            self._row("2025-03-04", "09:00", "11:00"),
+            self._row("2025-03-03"),
+            self._row("2025-03-12"),
+            self._row("2025-03-05", service_type_id=999999),
+            self._row("2025-03-05", start="8 Uhr"),
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(sorted(errors), ["1", "2", "3", "4", "5"])
+        self.assertIn("Zeitüberschneidung", errors["1"][0])
+        self.assertIn("erst ab 04.03.2025", errors["2"][0])
+        self.assertIn("Service-Typ existiert nicht", errors["4"][0])
+        self.assertFalse(TimeEntry.objects.exists())
+
+    def test_other_employee_forbidden(self):
+        """Test: Mitarbeitende ohne Manager-Rolle können nur für sich selbst erfassen."""
+        response = self._post([self._row("2025-03-04")], mitarbeiter_id=self.other.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(TimeEntry.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AbsenceEngineTest(TestCase):
+    """Abwesenheiten einmal pro (Mitarbeiter, Jahr) expandiert, gecached und für Ferien-Saldi genutzt."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.employee = EmployeeInternal.objects.create(
+            code="ABS1", name="Absenz Eins", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("40.00"), weekly_working_days=Decimal("5.0"), work_canton="ZH",
+            eintrittsdatum=date(2020, 1, 1), aktiv=True, vacation_days_per_year=Decimal("25.00"),
+        )
+        self.newcomer = EmployeeInternal.objects.create(
+            code="ABS2", name="Absenz Zwei", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("40.00"), work_canton="BE", aktiv=True,
+            employment_start=date(2025, 7, 1), vacation_days_per_year=Decimal("20.00"),
+        )
+        Holiday.objects.create(name="Sechseläuten", date=date(2025, 4, 28), canton="ZH", is_official=True)
+        Holiday.objects.create(name="Karfreitag", date=date(2025, 4, 18), canton="", is_official=True)
+        # Mo 14.04. – Fr 02.05.: 15 Werktage, minus Karfreitag und (nur ZH) Sechseläuten
+        for employee in (self.employee, self.newcomer):
+            Absence.objects.create(
+                employee=employee, absence_type="FERIEN",
+                date_from=date(2025, 4, 14), date_to=date(2025, 5, 2), full_day=True,
+            )
+        Absence.objects.create(
+            employee=self.employee, absence_type="FERIEN", date_from=date(2025, 6, 6),
+            date_to=date(2025, 6, 6), full_day=False, hours=Decimal("4.00"),
+        )
+        Absence.objects.create(
+            employee=self.employee, absence_type="KRANK", date_from=date(2025, 4, 30),
+            date_to=date(2025, 4, 30), full_day=False, hours=Decimal("2.00"),
+        )
+
+    def test_monthly_hours_and_cache(self):
+        """Test: Monatsgrenzen, Kantonsfeiertage, Teilzeit; weitere Monate ohne DB-Query."""
+        from .absence_engine import get_absence_years
+
+        # ZH: 11 Ferientage à 8h + 2h krank; BE: Sechseläuten ist Arbeitstag -> 12 Tage
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 4), Decimal("90.00"))
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.newcomer, 2025, 4), Decimal("96.00"))
+        with self.assertNumQueries(0):
+            self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 5), Decimal("16.00"))
+            self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 6), Decimal("4.00"))
+            get_absence_years([self.employee, self.newcomer], 2025)
+
+    def test_invalidation(self):
+        """Test: Neue Abwesenheit bzw. neuer Feiertag wirken sofort."""
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 5), Decimal("16.00"))
+        Absence.objects.create(
+            employee=self.employee, absence_type="WEITERBILDUNG",
+            date_from=date(2025, 5, 5), date_to=date(2025, 5, 5), full_day=True,
+        )
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 5), Decimal("24.00"))
+        Holiday.objects.create(name="Tag der Arbeit", date=date(2025, 5, 1), canton="ZH", is_official=True)
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.employee, 2025, 5), Decimal("16.00"))
+        self.assertEqual(WorkingTimeCalculator.monthly_absence_hours(self.newcomer, 2025, 5), Decimal("16.00"))
+
+    def test_vacation_balances(self):
+        """Test: Anspruch pro rata, Bezug inkl. Teilzeit-Ferien, alle Mitarbeitenden in einem Durchgang."""
+        from .absence_engine import vacation_balances
+
+        balances = vacation_balances([self.employee, self.newcomer], 2025)
+
+        self.assertEqual(balances[self.employee.pk].entitlement_days, Decimal("25.00"))
+        self.assertEqual(balances[self.employee.pk].taken_days, Decimal("13.50"))
+        self.assertEqual(balances[self.employee.pk].remaining_days, Decimal("11.50"))
+        # Eintritt 1.7.: 184 von 365 Tagen
+        self.assertEqual(balances[self.newcomer.pk].entitlement_days, Decimal("10.08"))
+        self.assertEqual(balances[self.newcomer.pk].taken_days, Decimal("14.00"))
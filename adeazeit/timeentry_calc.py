@@ -6,6 +6,8 @@ Ziel: DRY ohne Business-Logik zu ändern.
 
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 from typing import Optional
 
@@ -41,3 +43,62 @@ def calculate_timeentry_amount(*, rate: Optional[Decimal], dauer: Optional[Decim
         return (rate * dauer).quantize(DECIMAL_2)
     return Decimal("0.00")
 
+
+
+class RateInputCache:
+    """
+    Hält die für die Satzberechnung nötigen Objekte (ServiceType, Mitarbeiter, ...) pro pk.
+
+    Ziel: Mehrere TimeEntry-Saves in einem Request bzw. Import laden dieselben
+    Service-Typen und Mitarbeitenden nur einmal. Lebt nur innerhalb von
+    `rate_input_cache()` (pro Request: `adeacore.middleware.RateInputCacheMiddleware`) –
+    geänderte Sätze/Koeffizienten wirken ab dem nächsten Block.
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    def prefetch(self, model, pks) -> None:
+        """Lädt fehlende Objekte mit einer Query pro Modell."""
+        missing = {pk for pk in pks if pk is not None and (model, pk) not in self._objects}
+        if not missing:
+            return
+        found = model._default_manager.in_bulk(missing)
+        for pk in missing:
+            self._objects[(model, pk)] = found.get(pk)
+
+    def get(self, model, pk):
+        """Objekt oder None (nicht vorhanden); lädt bei Bedarf nach."""
+        if pk is None:
+            return None
+        self.prefetch(model, [pk])
+        return self._objects[(model, pk)]
+
+
+_rate_inputs: ContextVar[Optional[RateInputCache]] = ContextVar("timeentry_rate_inputs", default=None)
+
+
+def current_rate_input_cache() -> Optional[RateInputCache]:
+    """Aktiver RateInputCache oder None (ausserhalb von `rate_input_cache()`)."""
+    return _rate_inputs.get()
+
+
+@contextmanager
+def rate_input_cache():
+    """
+    Aktiviert einen RateInputCache für den Block (verschachtelt: der äussere wird weiterverwendet).
+
+    Beispiel:
+        with rate_input_cache():
+            for entry in entries:
+                entry.save()
+    """
+    active = _rate_inputs.get()
+    if active is not None:
+        yield active
+        return
+    token = _rate_inputs.set(RateInputCache())
+    try:
+        yield _rate_inputs.get()
+    finally:
+        _rate_inputs.reset(token)
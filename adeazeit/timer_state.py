@@ -0,0 +1,108 @@
+"""
+Gecachter Zustand des laufenden Timers pro User.
+
+Ziel: Der Context-Processor `running_timer` läuft auf jeder Seite – ohne Cache kostet
+das pro Seitenaufruf eine UserProfile- und eine RunningTimeEntry-Query. Der Zustand
+wird deshalb pro User im Django-Cache gehalten und bei Änderungen an
+RunningTimeEntry/UserProfile (start_timer/stop_timer, Admin) per Signal invalidiert.
+Der SSE-Endpunkt `timer_events` (async) liest über `aget_running_timer_state` ebenfalls
+nur aus diesem Cache.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from adeacore.cache_stats import record_hit, record_miss
+
+CACHE_TIMEOUT = 60 * 60
+_MISSING = object()
+
+
+def _cache_key(user_id: int) -> str:
+    return f"adeazeit:running_timer:{user_id}"
+
+
+def _load_state(user) -> Optional[Dict[str, Any]]:
+    from .models import RunningTimeEntry
+
+    timer = (
+        RunningTimeEntry.objects.filter(mitarbeiter__user_profiles__user=user)
+        .select_related("mitarbeiter", "client", "service_type")
+        .first()
+    )
+    if timer is None:
+        return None
+    return {
+        "id": timer.pk,
+        "mitarbeiter_id": timer.mitarbeiter_id,
+        "mitarbeiter_name": timer.mitarbeiter.name,
+        "client_name": timer.client.name if timer.client else "",
+        "service_type_name": timer.service_type.name,
+        "start_time": timer.start_time,
+        "datum": timer.datum,
+    }
+
+
+def get_running_timer_state(user) -> Optional[Dict[str, Any]]:
+    """
+    Liefert den laufenden Timer des Users als Dict (oder None), aus dem Cache.
+
+    Auch "kein Timer" wird gecached, damit Seiten ohne Timer keine Query kosten.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+
+    key = _cache_key(user.pk)
+    state = cache.get(key, _MISSING)
+    if state is _MISSING:
+        record_miss("timer")
+        state = _load_state(user)
+        cache.set(key, state, CACHE_TIMEOUT)
+    else:
+        record_hit("timer")
+    return state
+
+
+async def aget_running_timer_state(user) -> Optional[Dict[str, Any]]:
+    """
+    Wie `get_running_timer_state`, für den Event-Loop (async Cache-Zugriff).
+
+    Ohne Hit/Miss-Statistik: der SSE-Endpunkt fragt jede Sekunde ab und würde die
+    Quote der Seitenaufrufe verfälschen.
+    """
+    key = _cache_key(user.pk)
+    state = await cache.aget(key, _MISSING)
+    if state is _MISSING:
+        state = await sync_to_async(_load_state)(user)
+        await cache.aset(key, state, CACHE_TIMEOUT)
+    return state
+
+
+def serialize_timer_state(state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """JSON-taugliche Darstellung für den SSE-Endpunkt."""
+    if state is None:
+        return {"running": False}
+    return {
+        "running": True,
+        "id": state["id"],
+        "mitarbeiter": state["mitarbeiter_name"],
+        "client": state["client_name"],
+        "service_type": state["service_type_name"],
+        "start_time": state["start_time"].isoformat(),
+    }
+
+
+def invalidate_user_timer_state(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_employee_timer_state(employee_id: int) -> None:
+    """Invalidiert den Timer-Zustand aller mit dem Mitarbeitenden verknüpften User."""
+    from .models import UserProfile
+
+    user_ids = UserProfile.objects.filter(employee_id=employee_id).values_list("user_id", flat=True)
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
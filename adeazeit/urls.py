@@ -1,6 +1,9 @@
 from django.urls import path
 from . import views
-from .views import start_timer, stop_timer, mark_as_invoiced, mark_task_completed, toggle_task_tagesplan
+from .views import (
+    start_timer, stop_timer, timer_events, mark_as_invoiced, mark_task_completed, toggle_task_tagesplan,
+    save_week_entries,
+)
 
 app_name = "adeazeit"
 
@@ -31,6 +34,7 @@ urlpatterns = [
     # TimeEntry
     path("zeit/tag/", views.TimeEntryDayView.as_view(), name="timeentry-day"),
     path("zeit/woche/", views.TimeEntryWeekView.as_view(), name="timeentry-week"),
+    path("zeit/woche/speichern/", save_week_entries, name="timeentry-week-save"),
     path("zeit/kunden/", views.ClientTimeSummaryView.as_view(), name="client-summary"),
     path("zeit/neu/", views.TimeEntryCreateView.as_view(), name="timeentry-create"),
     path("zeit/<int:pk>/bearbeiten/", views.TimeEntryUpdateView.as_view(), name="timeentry-update"),
@@ -44,6 +48,7 @@ urlpatterns = [
     # Timer (Live-Tracking)
     path("timer/start/", start_timer, name="start-timer"),
     path("timer/stop/", stop_timer, name="stop-timer"),
+    path("timer/events/", timer_events, name="timer-events"),
     
     # Verrechnung
     path("ajax/mark-invoiced/", mark_as_invoiced, name="mark-invoiced"),
@@ -3,7 +3,8 @@ from calendar import month_name
 from datetime import datetime, timedelta, date
 from django.db.models import Q, Sum, Case, When, IntegerField, Value, F
 from django.db import transaction
-from django.shortcuts import redirect, get_object_or_404, render
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, redirect, get_object_or_404, render
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -15,12 +16,17 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
     TemplateView,
+    View,
 )
 from django.http import JsonResponse, HttpResponseForbidden
 from .mixins import render_forbidden
 
+from django.contrib.auth.models import User
+from adeacore.http_cache import ConditionalGetMixin
 from adeacore.models import Client
-from .models import EmployeeInternal, ServiceType, ZeitProject, TimeEntry, Absence, RunningTimeEntry, Task
+from .models import (
+    EmployeeInternal, ServiceType, ZeitProject, TimeEntry, Absence, Holiday, RunningTimeEntry, Task, UserProfile,
+)
 from .forms import (
     EmployeeInternalForm,
     ServiceTypeForm,
@@ -31,6 +37,7 @@ from .forms import (
 )
 from .services import WorkingTimeCalculator
 from .mixins import (
+    AsyncLoginRequiredMixin,
     ManagerOrAdminRequiredMixin,
     AdminRequiredMixin,
     TimeEntryFilterMixin,
@@ -47,6 +54,7 @@ from .permissions import (
     can_manage_absences,
     can_delete_entries,
     get_accessible_employees,
+    get_accessible_employee_ids,
 )
 
 
@@ -132,6 +140,9 @@ class EmployeeMonthlyStatsView(ManagerOrAdminRequiredMixin, TemplateView):
         from .employee_info import calculate_employee_monthly_stats_bulk
 
         bulk_stats = calculate_employee_monthly_stats_bulk(employees=employees, year=year, month=month)
+        from .absence_engine import vacation_balances
+
+        balances = vacation_balances(employees, year)
         employee_stats = []
         for employee in employees:
             stats = bulk_stats.get(employee.id)
@@ -146,6 +157,7 @@ class EmployeeMonthlyStatsView(ManagerOrAdminRequiredMixin, TemplateView):
                     **stats,
                     "employment_percent": employee.employment_percent,
                     "weekly_soll_hours": employee.weekly_soll_hours,
+                    "vacation": balances.get(employee.id),
                 }
             )
         
@@ -374,6 +386,10 @@ class TimeEntryDayView(LoginRequiredMixin, TemplateView):
         # Für Template: Liste der zugänglichen Mitarbeiter-IDs für Bearbeitungsprüfung
         accessible_employee_ids = list(get_accessible_employees(self.request.user).values_list('id', flat=True))
         context["accessible_employee_ids"] = accessible_employee_ids
+
+        # Timer-Push nur unter ASGI; unter WSGI (Rollback) kein Dauer-Reconnect, siehe timer_events
+        from django.core.handlers.asgi import ASGIRequest
+        context["timer_events_enabled"] = isinstance(self.request, ASGIRequest)
         
         return context
 
@@ -530,8 +546,7 @@ class TimeEntryUpdateView(LoginRequiredMixin, UpdateView):
             return render_forbidden(request, "Zeiteintrag hat keinen zugeordneten Mitarbeiter.")
         
         try:
-            accessible_employees = get_accessible_employees(request.user)
-            accessible_employee_ids = list(accessible_employees.values_list('id', flat=True))
+            accessible_employee_ids = get_accessible_employee_ids(request.user)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -609,12 +624,18 @@ class TimeEntryDeleteView(AdminRequiredMixin, DeleteView):
         return reverse("adeazeit:timeentry-day") + f"?date={datum}"
 
 
+# AJAX-Views (async): hochfrequente Aufrufe aus den Formularen, unter ASGI ohne
+# blockierten Worker. Sync-Helper (Berechtigungen, Statistik) via sync_to_async.
+# ConditionalGetMixin: 304, solange sich die gelisteten Tabellen nicht ändern.
+
 # AJAX View für Projekte
-class LoadProjectsView(LoginRequiredMixin, TemplateView):
+class LoadProjectsView(AsyncLoginRequiredMixin, ConditionalGetMixin, View):
     """AJAX-View zum Laden von Projekten für einen Client."""
     login_url = '/admin/login/'
+    # Berechtigung hängt an Zeiteinträgen, Rolle (Gruppen) und Mitarbeiter-Zuordnung
+    cache_models = (Client, ZeitProject, TimeEntry, EmployeeInternal, UserProfile, User.groups.through)
 
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         import logging
         logger = logging.getLogger(__name__)
         
@@ -632,13 +653,12 @@ class LoadProjectsView(LoginRequiredMixin, TemplateView):
             
             # Prüfe ob Client existiert und User Zugriff hat
             try:
-                from adeacore.models import Client
-                client = Client.objects.get(pk=client_id)
+                client = await Client.objects.aget(pk=client_id)
                 
                 # Prüfe Berechtigung (User sollte Zugriff auf Client haben)
                 from .permissions import get_accessible_time_entries
-                accessible_entries = get_accessible_time_entries(request.user)
-                if not accessible_entries.filter(client=client).exists():
+                accessible_entries = await sync_to_async(get_accessible_time_entries)(request.user)
+                if not await accessible_entries.filter(client=client).aexists():
                     # User hat keine Zeiteinträge für diesen Client → kein Zugriff
                     return JsonResponse({"projects": []})
                 
@@ -649,8 +669,8 @@ class LoadProjectsView(LoginRequiredMixin, TemplateView):
             # Lade Projekte
             projects = ZeitProject.objects.filter(
                 client_id=client_id, aktiv=True
-            ).order_by("name")
-            projects_data = [{"id": p.id, "name": p.name} for p in projects]
+            ).order_by("name").values("id", "name")
+            projects_data = [project async for project in projects]
             return JsonResponse({"projects": projects_data})
             
         except Exception as e:
@@ -659,22 +679,29 @@ class LoadProjectsView(LoginRequiredMixin, TemplateView):
 
 
 # AJAX View für Mitarbeiter-Info
-class LoadEmployeeInfoView(LoginRequiredMixin, TemplateView):
+class LoadEmployeeInfoView(AsyncLoginRequiredMixin, ConditionalGetMixin, View):
     """AJAX-View zum Laden von Mitarbeiter-Informationen."""
     login_url = '/admin/login/'
+    cache_models = (EmployeeInternal, TimeEntry, Absence, Holiday)
+    # Ist-Stunden ändern sich mit jedem eigenen Zeiteintrag: immer revalidieren (304)
+    cache_max_age = 0
+
+    def get_etag_parts(self):
+        # Ohne Jahr/Monat gilt der aktuelle Monat
+        return super().get_etag_parts() + [date.today().isoformat()]
+
+    async def get(self, request, *args, **kwargs):
+        from adeacore.http import json_error, json_ok
 
-    def get(self, request, *args, **kwargs):
         employee_id = request.GET.get("employee_id")
         year = request.GET.get("year")
         month = request.GET.get("month")
         
         if not employee_id:
-            from adeacore.http import json_error
-
             return json_error("Keine Mitarbeiter-ID angegeben")
         
         try:
-            employee = EmployeeInternal.objects.get(pk=employee_id)
+            employee = await EmployeeInternal.objects.aget(pk=employee_id)
             if not year or not month:
                 today = date.today()
                 year = today.year
@@ -686,46 +713,37 @@ class LoadEmployeeInfoView(LoginRequiredMixin, TemplateView):
                     if not (1 <= month <= 12):
                         raise ValueError("Monat muss zwischen 1 und 12 sein")
                 except (ValueError, TypeError):
-                    from adeacore.http import json_error
-
                     return json_error("Ungültiges Jahr oder Monat")
             
             from .employee_info import build_employee_ajax_info
 
-            info = build_employee_ajax_info(employee=employee, year=year, month=month)
-            from adeacore.http import json_ok
-
+            info = await sync_to_async(build_employee_ajax_info)(employee=employee, year=year, month=month)
             return json_ok({"employee": info})
         except EmployeeInternal.DoesNotExist:
-            from adeacore.http import json_error
-
             return json_error("Mitarbeiter nicht gefunden")
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Fehler beim Laden der Mitarbeiter-Info: {e}", exc_info=True)
-            from adeacore.http import json_error
-
             return json_error("Ein Fehler ist aufgetreten")
 
 
 # AJAX View für Service-Typ Standard-Stundensatz
-class LoadServiceTypeRateView(LoginRequiredMixin, TemplateView):
+class LoadServiceTypeRateView(AsyncLoginRequiredMixin, ConditionalGetMixin, View):
     """AJAX-View zum Laden des Standard-Stundensatzes eines Service-Typs mit Koeffizient."""
     login_url = '/admin/login/'
+    cache_models = (ServiceType, EmployeeInternal)
 
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         import logging
         logger = logging.getLogger(__name__)
-        from .models import ServiceType, EmployeeInternal
+        from adeacore.http import json_error, json_ok
         
         try:
             service_type_id = request.GET.get("service_type_id")
             employee_id = request.GET.get("employee_id")  # Optional: Mitarbeiter-ID für Koeffizient
             
             if not service_type_id:
-                from adeacore.http import json_error
-
                 return json_error("Keine Service-Typ-ID angegeben", status=400)
             
             # Validierung: service_type_id muss eine Zahl sein
@@ -733,16 +751,12 @@ class LoadServiceTypeRateView(LoginRequiredMixin, TemplateView):
                 service_type_id = int(service_type_id)
             except (ValueError, TypeError):
                 logger.warning(f"Ungültige service_type_id: {request.GET.get('service_type_id')}")
-                from adeacore.http import json_error
-
                 return json_error("Ungültige Service-Typ-ID", status=400)
             
             try:
-                service_type = ServiceType.objects.get(pk=service_type_id)
+                service_type = await ServiceType.objects.aget(pk=service_type_id)
             except ServiceType.DoesNotExist:
                 logger.warning(f"Service-Typ {service_type_id} nicht gefunden")
-                from adeacore.http import json_error
-
                 return json_error("Service-Typ nicht gefunden", status=404)
             
             base_rate = service_type.standard_rate or Decimal('0.00')
@@ -752,7 +766,7 @@ class LoadServiceTypeRateView(LoginRequiredMixin, TemplateView):
             if employee_id:
                 try:
                     employee_id = int(employee_id)
-                    employee = EmployeeInternal.objects.get(pk=employee_id)
+                    employee = await EmployeeInternal.objects.aget(pk=employee_id)
                     from .timeentry_calc import calculate_timeentry_rate
 
                     final_rate = calculate_timeentry_rate(service_type=service_type, employee=employee)
@@ -760,8 +774,6 @@ class LoadServiceTypeRateView(LoginRequiredMixin, TemplateView):
                     # Wenn Mitarbeiter nicht gefunden, verwende Standard-Rate
                     pass
             
-            from adeacore.http import json_ok
-
             return json_ok(
                 {
                     "standard_rate": str(service_type.standard_rate),
@@ -772,8 +784,6 @@ class LoadServiceTypeRateView(LoginRequiredMixin, TemplateView):
             
         except Exception as e:
             logger.error(f"Fehler beim Laden des Service-Typ-Stundensatzes: {e}", exc_info=True)
-            from adeacore.http import json_error
-
             return json_error("Ein Fehler ist aufgetreten", status=500)
 
 
@@ -1143,6 +1153,7 @@ class TaskArchiveListView(LoginRequiredMixin, ListView):
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from adeacore.http import alogin_required
 import json
 
 
@@ -1233,10 +1244,10 @@ def toggle_task_tagesplan(request, task_id):
 
         return json_error(str(e))
 
-@login_required
+@alogin_required
 @require_http_methods(["POST"])
-def start_timer(request):
-    """Startet einen Live-Timer für Zeiterfassung."""
+async def start_timer(request):
+    """Startet einen Live-Timer für Zeiterfassung (async)."""
     try:
         data = json.loads(request.body)
         mitarbeiter_id = data.get('mitarbeiter_id')
@@ -1251,20 +1262,19 @@ def start_timer(request):
         
         # Prüfe ob User Zugriff auf diesen Mitarbeiter hat
         from .permissions import get_accessible_employees
-        accessible_employees = get_accessible_employees(request.user)
-        mitarbeiter = get_object_or_404(accessible_employees, pk=mitarbeiter_id)
+        accessible_employees = await sync_to_async(get_accessible_employees)(request.user)
+        mitarbeiter = await aget_object_or_404(accessible_employees, pk=mitarbeiter_id)
         
-        service_type = get_object_or_404(ServiceType, pk=service_type_id)
+        service_type = await aget_object_or_404(ServiceType, pk=service_type_id)
         
         # Prüfe ob bereits ein Timer läuft
-        existing_timer = RunningTimeEntry.objects.filter(mitarbeiter=mitarbeiter).first()
-        if existing_timer:
+        if await RunningTimeEntry.objects.filter(mitarbeiter=mitarbeiter).aexists():
             from adeacore.http import json_error
 
             return json_error("Es läuft bereits ein Timer für diesen Mitarbeiter")
         
         # Erstelle neuen Timer
-        timer = RunningTimeEntry.objects.create(
+        timer = await RunningTimeEntry.objects.acreate(
             mitarbeiter=mitarbeiter,
             client_id=client_id if client_id else None,
             service_type=service_type,
@@ -1285,16 +1295,21 @@ def start_timer(request):
         return json_error(str(e))
 
 
-@login_required
+@alogin_required
 @require_http_methods(["POST"])
-def stop_timer(request):
-    """Stoppt den laufenden Timer und erstellt einen Zeiteintrag."""
+async def stop_timer(request):
+    """Stoppt den laufenden Timer und erstellt einen Zeiteintrag (async)."""
     try:
         from .permissions import get_accessible_employees
-        accessible_employees = get_accessible_employees(request.user)
-        
-        # Finde Timer für einen der zugänglichen Mitarbeiter
-        timer = RunningTimeEntry.objects.filter(mitarbeiter__in=accessible_employees).first()
+        accessible_employees = await sync_to_async(get_accessible_employees)(request.user)
+        
+        # Finde Timer für einen der zugänglichen Mitarbeiter (Relationen gleich mitladen:
+        # im Event-Loop ist kein Lazy-Loading möglich)
+        timer = await (
+            RunningTimeEntry.objects.filter(mitarbeiter__in=accessible_employees)
+            .select_related("mitarbeiter", "client", "service_type", "projekt")
+            .afirst()
+        )
         
         if not timer:
             from adeacore.http import json_error
@@ -1366,10 +1381,10 @@ def stop_timer(request):
         # Validiere manuell (ohne ende <= start Check wenn über Mitternacht)
         if time_entry.dauer <= 0:
             raise ValueError("Dauer muss größer als 0 sein.")
-        time_entry.save()
+        await time_entry.asave()
         
         # Lösche Timer
-        timer.delete()
+        await timer.adelete()
         
         return JsonResponse({
             "success": True,
@@ -1386,6 +1401,106 @@ def stop_timer(request):
         return json_error(str(e))
 
 
+@login_required
+@require_http_methods(["POST"])
+def save_week_entries(request):
+    """
+    Speichert eine ganze Woche Zeiteinträge eines Mitarbeiters in einem Request (Wochenraster).
+
+    Alle Einträge werden gemeinsam geprüft und in einer Transaktion gespeichert,
+    siehe `adeazeit.week_grid` für das Request-Format.
+    """
+    from adeacore.http import json_error, json_ok
+    from .week_grid import WeekGridError, save_week_entries as save_entries
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return json_error("Ungültiges JSON", status=400)
+    if not isinstance(data, dict):
+        return json_error("Ungültiges JSON", status=400)
+
+    try:
+        mitarbeiter_id = int(data.get("mitarbeiter_id"))
+    except (TypeError, ValueError):
+        return json_error("Mitarbeiter ist erforderlich", status=400)
+    mitarbeiter = get_accessible_employees(request.user).filter(pk=mitarbeiter_id).first()
+    if mitarbeiter is None:
+        return json_error("Mitarbeiter nicht gefunden oder keine Berechtigung", status=403)
+
+    try:
+        entries = save_entries(mitarbeiter, data.get("entries"))
+    except WeekGridError as e:
+        return json_error(str(e), status=400, errors={str(index): messages for index, messages in e.errors.items()})
+
+    return json_ok({
+        "created": len(entries),
+        "entry_ids": [entry.pk for entry in entries],
+        "total_dauer": str(sum((entry.dauer for entry in entries), Decimal("0.00"))),
+        "total_betrag": str(sum((entry.betrag for entry in entries), Decimal("0.00"))),
+        "message": f"{len(entries)} Zeiteinträge gespeichert",
+    })
+
+
+# Server-Sent Events für den Timer-Zustand: liest nur aus dem Cache (adeazeit.timer_state).
+# Unter ASGI ein async Generator (asyncio.sleep, kein blockierter Thread); die Verbindung
+# endet nach TIMER_EVENTS_MAX_SECONDS, EventSource verbindet sich automatisch neu.
+# Unter WSGI würde der Stream einen Worker belegen: die Tagesansicht öffnet dort keine
+# EventSource (`timer_events_enabled`), Änderungen erscheinen beim nächsten Laden. Fragt
+# trotzdem ein Client an, kommt nur der aktuelle Zustand mit langem Reconnect-Intervall.
+TIMER_EVENTS_CHECK_SECONDS = 1
+TIMER_EVENTS_KEEPALIVE_SECONDS = 15
+TIMER_EVENTS_MAX_SECONDS = 55
+TIMER_EVENTS_RETRY_MS = 3000
+TIMER_EVENTS_WSGI_RETRY_MS = 10 * 60 * 1000
+
+
+@alogin_required
+@require_http_methods(["GET"])
+async def timer_events(request):
+    """Pusht Änderungen am laufenden Timer des Users an offene Tabs (text/event-stream, async)."""
+    import asyncio
+    import time as time_module
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse
+    from .timer_state import aget_running_timer_state, serialize_timer_state
+
+    user = request.user
+    retry = f"retry: {TIMER_EVENTS_RETRY_MS}\n\n"
+
+    async def current_payload():
+        return json.dumps(serialize_timer_state(await aget_running_timer_state(user)))
+
+    async def event_stream():
+        yield retry
+        started = last_sent = time_module.monotonic()
+        last_payload = None
+        while True:
+            now = time_module.monotonic()
+            payload = await current_payload()
+            if payload != last_payload:
+                yield f"event: timer\ndata: {payload}\n\n"
+                last_payload = payload
+                last_sent = now
+            elif now - last_sent >= TIMER_EVENTS_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = now
+
+            if now - started >= TIMER_EVENTS_MAX_SECONDS:
+                return
+            await asyncio.sleep(TIMER_EVENTS_CHECK_SECONDS)
+
+    if isinstance(request, ASGIRequest):
+        content = event_stream()
+    else:
+        content = [f"retry: {TIMER_EVENTS_WSGI_RETRY_MS}\n\n", f"event: timer\ndata: {await current_payload()}\n\n"]
+
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # ============================================================================
 # Kundenübersicht (Client Summary)
 # ============================================================================
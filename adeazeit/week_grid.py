@@ -0,0 +1,183 @@
+"""
+Wochenraster: eine ganze Woche Zeiteinträge eines Mitarbeiters in einem Request erfassen.
+
+Ziel: Statt 20+ einzelner POSTs über `TimeEntryCreateView` (je Formular, full_clean,
+save) werden alle Einträge gemeinsam geprüft – Format, Service-Typen/Mandanten/Projekte
+(je eine Query über den RateInputCache), Beschäftigungszeitraum und Überschneidungen
+(`TimeEntry.objects.validate_entries`, eine Bereichs-Query) – und in einer
+Transaktion gespeichert. Fehler werden pro Eintrag (Index im Request) zurückgegeben.
+
+Request-Format (JSON):
+    {
+        "mitarbeiter_id": 5,
+        "entries": [
+            {"datum": "2025-03-03", "start": "08:00", "ende": "10:00",
+             "service_type_id": 1, "client_id": 3, "project_id": null, "kommentar": ""},
+            {"datum": "2025-03-04", "dauer": "1.50", "service_type_id": 2}
+        ]
+    }
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from adeacore.models import Client
+
+from .models import EmployeeInternal, ServiceType, TimeEntry, TimeEntryBatchValidationError, ZeitProject
+from .timeentry_calc import rate_input_cache
+
+# Obergrenze pro Request (7 Tage × ~14 Einträge), schützt vor versehentlichen Massenimporten
+MAX_WEEK_ENTRIES = 100
+
+_RELATIONS = (
+    ("service_type_id", ServiceType, "Service-Typ"),
+    ("client_id", Client, "Mandant"),
+    ("project_id", ZeitProject, "Projekt"),
+)
+
+
+class WeekGridError(Exception):
+    """Fehler im Wochenraster; `errors` = {Index: [Meldungen]} für einzelne Einträge."""
+
+    def __init__(self, message: str, errors: Optional[Dict[int, List[str]]] = None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+def _parse_date(value) -> date:
+    return date.fromisoformat(str(value))
+
+
+def _parse_time(value):
+    if value in (None, ""):
+        return None
+    return datetime.strptime(str(value), "%H:%M").time()
+
+
+def _parse_decimal(value) -> Decimal:
+    if value in (None, ""):
+        return Decimal("0.00")
+    return Decimal(str(value))
+
+
+def employment_error(employee: EmployeeInternal, datum: date) -> Optional[str]:
+    """Meldung, falls der Mitarbeiter am Datum nicht beschäftigt ist (sonst None)."""
+    start = employee.employment_start or employee.eintrittsdatum
+    end = employee.employment_end or employee.austrittsdatum
+    if start and datum < start:
+        return f"{employee.name} ist erst ab {start.strftime('%d.%m.%Y')} beschäftigt."
+    if end and datum > end:
+        return f"{employee.name} ist nur bis {end.strftime('%d.%m.%Y')} beschäftigt."
+    return None
+
+
+def _build_entry(employee: EmployeeInternal, row) -> TimeEntry:
+    if not isinstance(row, dict):
+        raise ValidationError("Ungültiger Eintrag.")
+    try:
+        datum = _parse_date(row.get("datum"))
+    except ValueError:
+        raise ValidationError("Ungültiges Datum (erwartet YYYY-MM-DD).")
+    try:
+        start = _parse_time(row.get("start"))
+        ende = _parse_time(row.get("ende"))
+    except ValueError:
+        raise ValidationError("Ungültige Zeit (erwartet HH:MM).")
+    try:
+        dauer = _parse_decimal(row.get("dauer"))
+    except InvalidOperation:
+        raise ValidationError("Ungültige Dauer.")
+
+    ids = {}
+    for key, _model, label in _RELATIONS:
+        value = row.get(key)
+        if value in (None, ""):
+            ids[key] = None
+            continue
+        try:
+            ids[key] = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError(f"Ungültige ID für {label}.")
+    if ids["service_type_id"] is None:
+        raise ValidationError("Service-Typ ist erforderlich.")
+
+    return TimeEntry(
+        mitarbeiter=employee,
+        datum=datum,
+        start=start,
+        ende=ende,
+        dauer=dauer,
+        kommentar=str(row.get("kommentar") or ""),
+        **ids,
+    )
+
+
+def save_week_entries(employee: EmployeeInternal, rows) -> List[TimeEntry]:
+    """
+    Prüft und speichert die Einträge einer Woche für einen Mitarbeiter.
+
+    Alle Einträge müssen in derselben Kalenderwoche (Mo–So) liegen. Ist ein Eintrag
+    ungültig, wird nichts gespeichert.
+
+    Raises:
+        WeekGridError: mit Fehlern pro Eintrag
+    """
+    if not isinstance(rows, list) or not rows:
+        raise WeekGridError("Keine Zeiteinträge übermittelt.")
+    if len(rows) > MAX_WEEK_ENTRIES:
+        raise WeekGridError(f"Maximal {MAX_WEEK_ENTRIES} Einträge pro Woche.")
+
+    errors: Dict[int, List[str]] = {}
+    entries: List[Tuple[int, TimeEntry]] = []
+    for index, row in enumerate(rows):
+        try:
+            entries.append((index, _build_entry(employee, row)))
+        except ValidationError as e:
+            errors[index] = e.messages
+
+    if entries:
+        monday = min(entry.datum for _, entry in entries)
+        monday -= timedelta(days=monday.weekday())
+        sunday = monday + timedelta(days=6)
+
+    with rate_input_cache() as rate_inputs:
+        # Je eine Query pro Modell; fehlende IDs als Fehler des Eintrags statt DoesNotExist
+        for key, model, _label in _RELATIONS:
+            rate_inputs.prefetch(model, {getattr(entry, key) for _, entry in entries})
+
+        for index, entry in entries:
+            messages = []
+            if entry.datum > sunday:
+                messages.append(
+                    f"Alle Einträge müssen in der Woche {monday.strftime('%d.%m.')}–{sunday.strftime('%d.%m.%Y')} liegen."
+                )
+            message = employment_error(employee, entry.datum)
+            if message:
+                messages.append(message)
+            for key, model, label in _RELATIONS:
+                if getattr(entry, key) is not None and rate_inputs.get(model, getattr(entry, key)) is None:
+                    messages.append(f"{label} existiert nicht.")
+            if messages:
+                errors[index] = messages
+
+        if not errors:
+            try:
+                with transaction.atomic():
+                    created = TimeEntry.objects.bulk_create_validated([entry for _, entry in entries])
+            except TimeEntryBatchValidationError as e:
+                errors = {entries[i][0]: error.messages for i, error in e.errors_by_index.items()}
+        else:
+            # Überschneidungen etc. auch melden, wenn andere Einträge schon Fehler haben
+            checked = [(index, entry) for index, entry in entries if index not in errors]
+            for i, error in TimeEntry.objects.validate_entries([entry for _, entry in checked]).items():
+                errors[checked[i][0]] = error.messages
+
+    if errors:
+        raise WeekGridError("Die Woche enthält ungültige Einträge.", dict(sorted(errors.items())))
+    return created
@@ -0,0 +1,19 @@
+"""
+Benchmark-Suite für die Hot Paths in Lohn, Zeiterfassung und Fakturierung.
+
+Ziel: Laufzeiten und Query-Anzahl der kritischen Pfade reproduzierbar messen und
+zwischen Commits vergleichen.
+
+- `benchmarks.data`: deterministischer (geseedeter) Generator für synthetische Daten
+  (Mandanten, Mitarbeitende, Jahre an Zeiteinträgen, Rechnungen).
+- `benchmarks.scenarios`: die gemessenen Szenarien.
+- `benchmarks.runner`: führt die Szenarien in einer temporären Test-Datenbank aus
+  und schreibt die Ergebnisse als JSON.
+- `benchmarks.load`: Lasttest der AJAX-Endpunkte gegen laufende Server
+  (gleichzeitige Requests, z.B. gunicorn sync vs. ASGI).
+
+Aufruf:
+    python -m benchmarks --output bench.json
+    python -m benchmarks --employees 50 --years 3 --compare bench_main.json
+    python -m benchmarks.load --username admin --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001
+"""
@@ -0,0 +1,89 @@
+"""
+Synthetischer Datenbestand für die Benchmarks.
+
+Dünne Schicht über `adeacore.load_data` (derselbe Generator wie
+`manage.py generate_load_data`), in kleinerer Standardgrösse und ohne
+Lohnlauf-Historie, damit das Szenario `payroll_record_save` freie Monate hat.
+Gleicher Seed + gleiche Grössen = identische Daten.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List
+
+from adeacore.load_data import REFERENCE_YEAR, LoadDataConfig, LoadDataGenerator
+
+__all__ = ["REFERENCE_YEAR", "Dataset", "generate_dataset"]
+
+
+@dataclass
+class Dataset:
+    """Erzeugte Objekte und Eckdaten, auf die die Szenarien zugreifen."""
+
+    seed: int
+    date_from: date
+    date_to: date
+    clients: List = field(default_factory=list)
+    payroll_client: object = None
+    payroll_employees: List = field(default_factory=list)
+    internal_employees: List = field(default_factory=list)
+    service_types: List = field(default_factory=list)
+    user: object = None
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict:
+        return {
+            "seed": self.seed,
+            "date_from": self.date_from.isoformat(),
+            "date_to": self.date_to.isoformat(),
+            "counts": dict(self.counts),
+        }
+
+
+def generate_dataset(
+    *,
+    seed: int = 42,
+    clients: int = 10,
+    employees: int = 20,
+    payroll_employees: int = 10,
+    years: int = 1,
+    entries_per_day: int = 2,
+) -> Dataset:
+    """
+    Legt einen vollständigen synthetischen Datenbestand an.
+
+    Args:
+        seed: Zufalls-Seed (bestimmt alle Werte)
+        clients: Anzahl Mandanten (mindestens 2: eine Firma mit und eine ohne Lohnmodul)
+        employees: Anzahl interner Mitarbeitender (Zeiterfassung)
+        payroll_employees: Anzahl Lohn-Mitarbeitender
+        years: Anzahl Jahre Zeiteinträge bis Ende REFERENCE_YEAR
+        entries_per_day: Zeiteinträge pro Mitarbeitender und Arbeitstag
+    """
+    config = LoadDataConfig(
+        seed=seed,
+        clients=clients,
+        employees=payroll_employees,
+        internal_employees=employees,
+        years=years,
+        entries_per_day=entries_per_day,
+        payroll_history=False,
+        batch_size=2000,
+    )
+    generator = LoadDataGenerator(config, log=lambda message: None)
+    counts = generator.run()
+
+    return Dataset(
+        seed=seed,
+        date_from=config.date_from,
+        date_to=config.date_to,
+        clients=generator.clients,
+        payroll_client=next((c for c in generator.clients if c.lohn_aktiv), None),
+        payroll_employees=generator.employees,
+        internal_employees=generator.internal_employees,
+        service_types=generator.service_types,
+        user=generator.user,
+        counts=counts,
+    )
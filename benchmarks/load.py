@@ -0,0 +1,208 @@
+"""
+Lasttest der AJAX-Endpunkte: gleichzeitige Requests gegen laufende Server (WSGI vs. ASGI).
+
+Misst pro Server und Parallelität den Durchsatz (Requests/s), Latenzen (p50/p95/p99)
+und Fehler. Jeder Client-Thread schickt Requests im Kreis über die Endpunkte
+(Session-Heartbeat, Projekte, Mitarbeiter-Info, Service-Typ-Satz).
+
+Die Server müssen dieselbe Datenbank nutzen wie dieser Prozess: die Session für
+`--username` wird hier angelegt und als Cookie mitgeschickt.
+
+Beispiel (Production-naher Vergleich, gleiche Worker-Zahl):
+    gunicorn adeacore.wsgi:application --workers 2 --bind 127.0.0.1:8000
+    gunicorn adeacore.asgi:application -k uvicorn_worker.UvicornWorker --workers 2 --bind 127.0.0.1:8001
+    python -m benchmarks.load --username admin \\
+        --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \\
+        --concurrency 1,10,50,100 --duration 10 --output load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+
+def build_paths() -> List[Tuple[str, str]]:
+    """(Name, Pfad mit Query) der gemessenen Endpunkte, Parameter aus der Datenbank."""
+    from django.urls import reverse
+
+    from adeazeit.models import EmployeeInternal, ServiceType, TimeEntry
+
+    paths = [("heartbeat", reverse("session-heartbeat"))]
+    entry = TimeEntry.objects.order_by("-pk").values("client_id", "mitarbeiter_id").first()
+    if entry and entry["client_id"]:
+        paths.append(("projects", f"{reverse('adeazeit:load-projects')}?{urlencode({'client_id': entry['client_id']})}"))
+    employee_id = entry["mitarbeiter_id"] if entry else EmployeeInternal.objects.values_list("pk", flat=True).first()
+    if employee_id:
+        paths.append(("employee_info", f"{reverse('adeazeit:load-employee-info')}?{urlencode({'employee_id': employee_id})}"))
+    service_type_id = ServiceType.objects.values_list("pk", flat=True).first()
+    if service_type_id:
+        params = {"service_type_id": service_type_id}
+        if employee_id:
+            params["employee_id"] = employee_id
+        paths.append(("service_type_rate", f"{reverse('adeazeit:load-service-type-rate')}?{urlencode(params)}"))
+    return paths
+
+
+def login_cookie(user) -> str:
+    """Legt eine Session für den User an und liefert den Cookie-Header."""
+    from django.conf import settings
+    from django.test import Client as HttpClient
+
+    http = HttpClient()
+    http.force_login(user)
+    return f"{settings.SESSION_COOKIE_NAME}={http.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: Sequence[float], errors: int, elapsed: float) -> Dict:
+    """Kennzahlen eines Laufs (Latenzen in Sekunden, Ergebnis in ms bzw. Requests/s)."""
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def run_load(base_url: str, paths: Sequence[Tuple[str, str]], *, concurrency: int, duration: float,
+             cookie: str = "", timeout: float = 30.0) -> Dict:
+    """
+    `concurrency` Threads schicken `duration` Sekunden lang Requests (Keep-Alive, falls
+    der Server es anbietet). Antworten ausser 200 und Verbindungsfehler zählen als Fehler.
+    """
+    url = urlsplit(base_url)
+    headers = {"X-Requested-With": "XMLHttpRequest"}
+    if cookie:
+        headers["Cookie"] = cookie
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors = [0]
+    deadline = time.perf_counter() + duration
+
+    def client(offset: int):
+        local_latencies, local_errors = [], 0
+        connection = None
+        index = offset
+        while time.perf_counter() < deadline:
+            _, path = paths[index % len(paths)]
+            index += 1
+            if connection is None:
+                connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+            started = time.perf_counter()
+            try:
+                connection.request("GET", url.path.rstrip("/") + path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+                if response.getheader("Connection", "").lower() == "close":
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException):
+                ok = False
+                connection.close()
+                connection = None
+            if ok:
+                local_latencies.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+        if connection is not None:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def _parse_targets(values: Sequence[str]) -> List[Tuple[str, str]]:
+    targets = []
+    for value in values:
+        name, sep, url = value.partition("=")
+        targets.append((name, url) if sep else (value, value))
+    return targets
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", action="append", required=True, help="name=URL eines laufenden Servers (mehrfach)")
+    parser.add_argument("--username", required=True, help="User, für den die Session angelegt wird")
+    parser.add_argument("--concurrency", default="1,10,50", help="Parallele Clients, kommagetrennt")
+    parser.add_argument("--duration", type=float, default=10.0, help="Sekunden pro Stufe")
+    parser.add_argument("--output", help="Ergebnisse als JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "adeacore.settings")
+    import django
+
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+
+    args = build_parser().parse_args(argv)
+    try:
+        levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    except ValueError:
+        print("--concurrency: kommagetrennte Zahlen erwartet.", file=sys.stderr)
+        return 2
+    if not levels or min(levels) < 1 or args.duration <= 0:
+        print("--concurrency und --duration müssen positiv sein.", file=sys.stderr)
+        return 2
+
+    user = get_user_model().objects.filter(username=args.username).first()
+    if user is None:
+        print(f"User '{args.username}' nicht gefunden.", file=sys.stderr)
+        return 2
+    cookie = login_cookie(user)
+    paths = build_paths()
+    print("Endpunkte: " + ", ".join(name for name, _ in paths))
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for name, url in _parse_targets(args.target):
+        results[name] = {}
+        for concurrency in levels:
+            result = run_load(url, paths, concurrency=concurrency, duration=args.duration, cookie=cookie)
+            results[name][str(concurrency)] = result
+            print(
+                f"{name:8} {concurrency:>4} parallel  {result['rps']:>8.1f} req/s  "
+                f"p50 {result['p50_ms'] or 0:>8.1f} ms  p99 {result['p99_ms'] or 0:>8.1f} ms  "
+                f"Fehler {result['errors']}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"endpoints": [name for name, _ in paths], "duration": args.duration, "results": results},
+                       indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Ergebnisse geschrieben: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
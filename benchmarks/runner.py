@@ -0,0 +1,235 @@
+"""
+Führt die Benchmark-Szenarien aus und schreibt die Ergebnisse als JSON.
+
+Ablauf: temporäre Test-Datenbank anlegen (die konfigurierte Datenbank bleibt
+unberührt), Daten generieren, jedes Szenario `warmup + repeat` Mal in einer
+zurückgerollten Transaktion ausführen (Cache vor jedem Durchlauf geleert),
+Laufzeit und Query-Anzahl erfassen.
+
+Vergleich zweier Läufe: `--compare alt.json` (optional mit `--max-regression`
+als Prozentschwelle für den Exit-Code, z.B. in CI).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+RESULT_SCHEMA_VERSION = 1
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+ISOLATED_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmarks"}}
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    """Commit-Hash und ob das Arbeitsverzeichnis Änderungen enthält."""
+
+    def _git(*args):
+        try:
+            result = subprocess.run(
+                ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+    }
+
+
+def measure(run, *, repeat: int, warmup: int) -> Dict:
+    """Misst eine Szenario-Funktion (Sekunden pro Durchlauf, Queries des letzten Durchlaufs)."""
+    from django.core.cache import cache
+    from django.db import transaction
+
+    from adeacore.performance import QueryRecorder
+
+    timings: List[float] = []
+    query_counts: List[int] = []
+    for iteration in range(warmup + repeat):
+        cache.clear()
+        recorder = QueryRecorder()
+        with transaction.atomic():
+            with recorder.record():
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if iteration >= warmup:
+            timings.append(elapsed)
+            query_counts.append(recorder.count)
+
+    return {
+        "repeat": repeat,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "stdev_ms": round(statistics.stdev(timings) * 1000, 3) if len(timings) > 1 else 0.0,
+        "queries": max(query_counts),
+    }
+
+
+def run_benchmarks(dataset, *, names: Optional[Iterable[str]] = None, repeat: int = 5, warmup: int = 1, log=None) -> Dict[str, Dict]:
+    """
+    Führt die (ausgewählten) Szenarien gegen einen bereits generierten Dataset aus.
+
+    Erwartet eine initialisierte Datenbank (Test-DB oder TestCase).
+    """
+    from .scenarios import SCENARIOS
+
+    selected = list(names) if names else list(SCENARIOS)
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unbekannte Szenarien: {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        scenario = SCENARIOS[name]
+        run = scenario.prepare(dataset)
+        result = measure(run, repeat=repeat, warmup=warmup)
+        result["description"] = scenario.description
+        results[name] = result
+        if log:
+            log(f"{name:36} {result['median_ms']:>12.1f} ms  {result['queries']:>6} Queries")
+    return results
+
+
+def build_report(dataset, results: Dict[str, Dict], *, generate_seconds: float, repeat: int, warmup: int) -> Dict:
+    import django
+    from django.db import connection
+
+    return {
+        "schema": RESULT_SCHEMA_VERSION,
+        "meta": {
+            **git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "warmup": warmup,
+        },
+        "dataset": {**dataset.as_dict(), "generate_seconds": round(generate_seconds, 2)},
+        "scenarios": results,
+    }
+
+
+def compare_reports(baseline: Dict, current: Dict) -> List[Dict]:
+    """
+    Vergleicht zwei Ergebnis-Dateien pro Szenario (Median und Queries).
+
+    Returns:
+        Liste von {"name", "baseline_ms", "current_ms", "change_percent", "baseline_queries", "current_queries"}
+    """
+    rows = []
+    for name, result in current.get("scenarios", {}).items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        rows.append({
+            "name": name,
+            "baseline_ms": old["median_ms"],
+            "current_ms": result["median_ms"],
+            "change_percent": round(change, 1),
+            "baseline_queries": old["queries"],
+            "current_queries": result["queries"],
+        })
+    return rows
+
+
+def _print_comparison(baseline: Dict, current: Dict, rows: List[Dict]) -> None:
+    if baseline.get("dataset", {}).get("counts") != current.get("dataset", {}).get("counts"):
+        print("WARNUNG: Datenbestände unterscheiden sich – Werte nur bedingt vergleichbar.")
+    old_commit = (baseline.get("meta", {}).get("commit") or "?")[:10]
+    new_commit = (current.get("meta", {}).get("commit") or "?")[:10]
+    print(f"\nVergleich {old_commit} -> {new_commit}")
+    for row in rows:
+        print(
+            f"{row['name']:36} {row['baseline_ms']:>10.1f} -> {row['current_ms']:>10.1f} ms "
+            f"({row['change_percent']:+6.1f}%)  Queries {row['baseline_queries']} -> {row['current_queries']}"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from .scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clients", type=int, default=10, help="Anzahl Mandanten")
+    parser.add_argument("--employees", type=int, default=20, help="Anzahl interner Mitarbeitender")
+    parser.add_argument("--payroll-employees", type=int, default=10, help="Anzahl Lohn-Mitarbeitender")
+    parser.add_argument("--years", type=int, default=1, help="Jahre an Zeiteinträgen")
+    parser.add_argument("--entries-per-day", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5, help="Gemessene Durchläufe pro Szenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Ungemessene Durchläufe vorab")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Nur diese Szenarien (mehrfach möglich)")
+    parser.add_argument("--output", help="Ergebnis-JSON (Standard: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Ergebnis-JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--max-regression", type=float, help="Exit-Code 1, wenn ein Median um mehr als diesen Prozentsatz steigt")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "adeacore.settings")
+    import django
+
+    django.setup()
+
+    from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases
+
+    from .data import generate_dataset
+
+    args = build_parser().parse_args(argv)
+    if args.repeat < 1:
+        print("--repeat muss mindestens 1 sein.", file=sys.stderr)
+        return 2
+
+    setup_test_environment()
+    with override_settings(CACHES=ISOLATED_CACHES):
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+        try:
+            started = time.perf_counter()
+            dataset = generate_dataset(
+                seed=args.seed,
+                clients=args.clients,
+                employees=args.employees,
+                payroll_employees=args.payroll_employees,
+                years=args.years,
+                entries_per_day=args.entries_per_day,
+            )
+            generate_seconds = time.perf_counter() - started
+            print(f"Daten generiert in {generate_seconds:.1f}s: {dataset.counts}")
+
+            results = run_benchmarks(dataset, names=args.scenario, repeat=args.repeat, warmup=args.warmup, log=print)
+            report = build_report(dataset, results, generate_seconds=generate_seconds, repeat=args.repeat, warmup=args.warmup)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    output = Path(args.output) if args.output else REPO_ROOT / "benchmarks" / "results" / f"{(report['meta']['commit'] or 'unknown')[:12]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Ergebnisse geschrieben: {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        rows = compare_reports(baseline, report)
+        _print_comparison(baseline, report, rows)
+        if args.max_regression is not None and any(r["change_percent"] > args.max_regression for r in rows):
+            print(f"Regression über {args.max_regression}% gefunden.", file=sys.stderr)
+            return 1
+    return 0
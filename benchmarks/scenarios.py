@@ -0,0 +1,180 @@
+"""
+Gemessene Szenarien.
+
+Jedes Szenario erhält den generierten `Dataset`, bereitet einmalig seine Eingaben
+vor (nicht gemessen) und liefert die zu messende Funktion zurück. Der Runner führt
+diese Funktion in einer Transaktion aus, die danach zurückgerollt wird – Szenarien
+dürfen also schreiben (Lohnlauf speichern, Rechnung erstellen).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict
+
+from .data import REFERENCE_YEAR, Dataset
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    prepare: Callable[[Dataset], Callable[[], object]]
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, description: str):
+    """Registriert eine Prepare-Funktion als Szenario."""
+
+    def decorator(prepare):
+        SCENARIOS[name] = Scenario(name=name, description=description, prepare=prepare)
+        return prepare
+
+    return decorator
+
+
+def _logged_in_client(dataset: Dataset):
+    from django.test import Client as HttpClient
+
+    http = HttpClient()
+    http.force_login(dataset.user)
+    return http
+
+
+def _get_ok(http, url: str, params: Dict[str, str]):
+    response = http.get(url, params)
+    if response.status_code != 200:
+        raise AssertionError(f"{url} lieferte Status {response.status_code}")
+    return response
+
+
+@scenario("payroll_record_save", "PayrollRecord anlegen, Grundlohn-Position erfassen und neu berechnen (pro Lohn-Mitarbeitendem)")
+def payroll_record_save(dataset: Dataset):
+    from adeacore.models import PayrollRecord
+    from adealohn.models import PayrollItem, WageType
+
+    wage_type, _ = WageType.objects.get_or_create(
+        code="GRUNDLOHN_MONAT",
+        defaults={
+            "name": "Grundlohn Monatslohn",
+            "category": "GRUNDLOHN",
+            "is_lohnwirksam": True,
+            "ahv_relevant": True,
+            "alv_relevant": True,
+            "bvg_relevant": True,
+            "uv_relevant": True,
+        },
+    )
+    employees = list(dataset.payroll_employees)
+
+    def run():
+        for employee in employees:
+            payroll = PayrollRecord.objects.create(employee=employee, month=6, year=REFERENCE_YEAR)
+            PayrollItem.objects.create(
+                payroll=payroll,
+                wage_type=wage_type,
+                quantity=Decimal("1"),
+                amount=employee.monthly_salary,
+                description="Monatslohn",
+            )
+            payroll.save()
+
+    return run
+
+
+@scenario("berechne_lohnlauf", "adea_payroll.berechne_lohnlauf für 12 Monate pro Lohn-Mitarbeitendem")
+def berechne_lohnlauf_scenario(dataset: Dataset):
+    from adea_payroll import Firmendaten, Lohnstamm, Mitarbeitende, berechne_lohnlauf
+
+    firma = Firmendaten(bu_satz_ag=Decimal("0.5"), nbu_satz_an=Decimal("1.2"))
+    inputs = [
+        (
+            Mitarbeitende(vorname=employee.first_name, nachname=employee.last_name),
+            Lohnstamm(monatslohn=employee.monthly_salary),
+        )
+        for employee in dataset.payroll_employees
+    ]
+
+    def run():
+        for mitarbeiter, lohnstamm in inputs:
+            for monat in range(1, 13):
+                berechne_lohnlauf(mitarbeiter, lohnstamm, firma, monat, REFERENCE_YEAR)
+
+    return run
+
+
+@scenario("employee_monthly_stats_bulk", "calculate_employee_monthly_stats_bulk für alle internen Mitarbeitenden, 12 Monate")
+def employee_monthly_stats_bulk(dataset: Dataset):
+    from adeazeit.employee_info import calculate_employee_monthly_stats_bulk
+    from adeazeit.models import EmployeeInternal
+
+    def run():
+        employees = list(EmployeeInternal.objects.filter(pk__in=[e.pk for e in dataset.internal_employees]))
+        for month in range(1, 13):
+            calculate_employee_monthly_stats_bulk(employees=employees, year=REFERENCE_YEAR, month=month)
+
+    return run
+
+
+def _year_params() -> Dict[str, str]:
+    return {"date_from": f"{REFERENCE_YEAR}-01-01", "date_to": f"{REFERENCE_YEAR}-12-31"}
+
+
+@scenario("zeit_client_summary_view", "adeazeit ClientTimeSummaryView über das Referenzjahr")
+def zeit_client_summary_view(dataset: Dataset):
+    http = _logged_in_client(dataset)
+    params = _year_params()
+    return lambda: _get_ok(http, "/zeit/zeit/kunden/", params)
+
+
+@scenario("rechnung_client_summary_view", "adearechnung ClientTimeSummaryView (offene Einträge) über das Referenzjahr")
+def rechnung_client_summary_view(dataset: Dataset):
+    http = _logged_in_client(dataset)
+    params = dict(_year_params(), verrechnet="offen")
+    return lambda: _get_ok(http, "/rechnung/", params)
+
+
+def _invoice_client(dataset: Dataset):
+    """Erster Firmen-Mandant ohne Lohnmodul (typischer Fakturierungs-Mandant)."""
+    return next(c for c in dataset.clients if c.client_type == "FIRMA" and not c.lohn_aktiv)
+
+
+@scenario("create_invoice_from_time_entries", "InvoiceService.create_invoice_from_time_entries aus den offenen Einträgen eines Mandanten")
+def create_invoice_from_time_entries(dataset: Dataset):
+    from adearechnung.services import InvoiceService
+    from adeazeit.models import TimeEntry
+
+    client = _invoice_client(dataset)
+    entry_ids = list(
+        TimeEntry.objects.filter(client=client, verrechnet=False, billable=True).values_list("id", flat=True)
+    )
+
+    def run():
+        return InvoiceService.create_invoice_from_time_entries(
+            entry_ids,
+            client,
+            invoice_date=date(REFERENCE_YEAR, 12, 31),
+            created_by=dataset.user,
+        )
+
+    return run
+
+
+@scenario("invoice_pdf", "InvoicePDFGenerator.generate_pdf für eine Monatsrechnung inkl. QR-Einzahlungsschein")
+def invoice_pdf(dataset: Dataset):
+    from adeacore.models import Invoice
+    from adearechnung.pdf_generator import InvoicePDFGenerator
+
+    invoice_id = (
+        Invoice.objects.filter(client=_invoice_client(dataset)).order_by("-invoice_date").values_list("id", flat=True).first()
+    )
+
+    def run():
+        invoice = Invoice.objects.select_related("client").get(pk=invoice_id)
+        return InvoicePDFGenerator().generate_pdf(invoice)
+
+    return run
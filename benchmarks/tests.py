@@ -0,0 +1,83 @@
+from django.test import LiveServerTestCase, TestCase, override_settings
+
+from benchmarks.data import generate_dataset
+from benchmarks.runner import ISOLATED_CACHES, compare_reports, run_benchmarks
+from benchmarks.scenarios import SCENARIOS
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class BenchmarkSuiteTest(TestCase):
+    """Smoke-Test der Benchmark-Suite mit minimalem Datenbestand."""
+
+    def test_all_scenarios_run_on_small_dataset(self):
+        """Test: Generator legt Daten an und alle Szenarien laufen (Änderungen werden zurückgerollt)."""
+        from adeacore.models import Invoice
+
+        dataset = generate_dataset(seed=7, clients=3, employees=2, payroll_employees=2, years=1, entries_per_day=1)
+        self.assertGreater(dataset.counts["time_entries"], 400)
+        self.assertGreater(dataset.counts["invoices"], 0)
+        invoices_before = Invoice.objects.count()
+
+        results = run_benchmarks(dataset, repeat=1, warmup=0)
+
+        self.assertEqual(set(results), set(SCENARIOS))
+        self.assertGreater(results["payroll_record_save"]["queries"], 0)
+        self.assertEqual(results["berechne_lohnlauf"]["queries"], 0)
+        self.assertEqual(Invoice.objects.count(), invoices_before)
+
+    def test_compare_reports(self):
+        """Test: Vergleich liefert prozentuale Änderung pro Szenario."""
+        baseline = {"scenarios": {"a": {"median_ms": 100.0, "queries": 10}}}
+        current = {"scenarios": {"a": {"median_ms": 125.0, "queries": 8}, "neu": {"median_ms": 1.0, "queries": 0}}}
+
+        rows = compare_reports(baseline, current)
+
+        self.assertEqual(rows, [{
+            "name": "a",
+            "baseline_ms": 100.0,
+            "current_ms": 125.0,
+            "change_percent": 25.0,
+            "baseline_queries": 10,
+            "current_queries": 8,
+        }])
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class LoadTestTest(LiveServerTestCase):
+    """Smoke-Test des Lasttests gegen den Live-Server."""
+
+    def test_run_load_against_live_server(self):
+        """Test: Alle AJAX-Endpunkte antworten mit angemeldeter Session ohne Fehler."""
+        from datetime import date
+        from decimal import Decimal
+
+        from django.contrib.auth.models import Group, User
+
+        from adeacore.models import Client
+        from adeazeit.models import EmployeeInternal, ServiceType, TimeEntry
+        from adeazeit.permissions import ROLE_MANAGER
+        from benchmarks.load import build_paths, login_cookie, run_load
+
+        user = User.objects.create_user(username="last", password="x")
+        user.groups.add(Group.objects.get_or_create(name=ROLE_MANAGER)[0])
+        employee = EmployeeInternal.objects.create(
+            code="LAST", name="Last Test", employment_percent=Decimal("100.00"),
+            weekly_soll_hours=Decimal("42.00"), eintrittsdatum=date(2020, 1, 1), aktiv=True,
+        )
+        service_type = ServiceType.objects.create(code="LST", name="Last", standard_rate=Decimal("100.00"))
+        client = Client.objects.create(name="Last AG", client_type="FIRMA")
+        TimeEntry.objects.create(mitarbeiter=employee, client=client, service_type=service_type,
+                                 datum=date(2025, 3, 3), dauer=Decimal("1.00"))
+
+        paths = build_paths()
+        self.assertEqual([name for name, _ in paths], ["heartbeat", "projects", "employee_info", "service_type_rate"])
+
+        result = run_load(self.live_server_url, paths, concurrency=2, duration=0.5, cookie=login_cookie(user))
+
+        self.assertGreater(result["requests"], 0)
+        self.assertEqual(result["errors"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+        anonymous = run_load(self.live_server_url, paths[:1], concurrency=1, duration=0.2)
+        self.assertEqual(anonymous["requests"], 0)
+        self.assertGreater(anonymous["errors"], 0)